@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: feedback latency and throughput per model backend
+
+Sends the same --requests structured feedback prompts through each backend,
+--concurrency at a time, with common.measure_backend:
+
+- openai: the OpenAI backend against the fake LLM server, answering after
+  --latency seconds (a stand-in for the network round-trip);
+- local: the local backend, generating one request at a time on its
+  worker thread. With --model-path it runs that GGUF model through
+  llama.cpp; without one it uses a simulated CPU runtime costing
+  --generate-cost seconds per request.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from common import build_agent, measure_backend
+from fake_llm_server import FakeLLMServer
+
+from src.agent.feedback_schema import feedback_max_tokens
+from src.agent.model_backends import LlamaCppRuntime, LocalModelBackend, LocalRuntime, create_model_backend
+from src.agent.training_scenarios import SCENARIO_CATALOG, SCENARIO_CHECKLISTS
+
+
+class SimulatedCPURuntime(LocalRuntime):
+    """Blocks its worker thread like CPU inference, for a fixed time per request"""
+
+    def __init__(self, generate_cost: float):
+        self.generate_cost = generate_cost
+
+    def load(self) -> None:
+        pass
+
+    def generate(self, request):
+        time.sleep(self.generate_cost)
+        return '{"scores": [], "strengths": [], "improvements": [], "summary": "Good."}'
+
+    def describe(self):
+        return {"runtime": "simulated"}
+
+
+def feedback_prompts(count: int, seed: int) -> list:
+    agent = build_agent()
+    rng = random.Random(seed)
+    keys = list(SCENARIO_CATALOG)
+    prompts = []
+    for i in range(count):
+        category, difficulty = rng.choice(keys)
+        prompts.append(agent._structured_feedback_messages(category, f"Welcome, guest {i}!", difficulty))
+    return prompts
+
+
+def report(label: str, result: dict) -> None:
+    print(f"{label:<28} {result['throughput']:8.1f} req/s   p50 {result['p50_ms']:8.1f}ms   "
+          f"p95 {result['p95_ms']:8.1f}ms   p99 {result['p99_ms']:8.1f}ms")
+
+
+def local_runtime(args: argparse.Namespace) -> LocalRuntime:
+    if args.model_path:
+        return LlamaCppRuntime(args.model_path)
+    return SimulatedCPURuntime(args.generate_cost)
+
+
+async def main(args: argparse.Namespace) -> None:
+    prompts = feedback_prompts(args.requests, args.seed)
+    max_tokens = feedback_max_tokens(max(len(items) for items in SCENARIO_CHECKLISTS.values()))
+    print(f"{args.requests} feedback requests, {args.concurrency} at a time\n")
+
+    with FakeLLMServer(latency=args.latency) as server:
+        backend = create_model_backend({"base_url": server.base_url, "openai_api_key": "bench-key"})
+        report(f"openai ({args.latency:.2f}s RTT)",
+               await measure_backend(backend, prompts, args.concurrency, max_tokens=max_tokens))
+        await backend.aclose()
+
+    backend = LocalModelBackend(local_runtime(args), request_timeout=600)
+    result = await measure_backend(backend, prompts, args.concurrency, max_tokens=max_tokens)
+    stats = backend.backend_stats()
+    await backend.aclose()
+    report(f"local ({stats['runtime']})", result)
+    print(f"{'':<28} generate p50 {stats['generate_ms']['p50']:.1f}ms   queue wait p95 {stats['queue_wait_ms']['p95']:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.8, help="fake OpenAI latency in seconds")
+    parser.add_argument("--model-path", help="GGUF model for the local backend")
+    parser.add_argument("--generate-cost", type=float, default=0.06, help="simulated seconds per local request")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
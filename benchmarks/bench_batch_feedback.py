@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: grading a classroom cohort one request at a time vs one batch call
+
+A trainer submits --cohort answers. "one by one" posts each to
+/api/submit-response in turn, as the page does; "batch" posts them all to
+/api/submit-responses, which grades up to batch.max_concurrency at once.
+Each fake completion takes --latency seconds.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from common import build_agent
+from fake_llm_server import FakeLLMServer
+
+import web_app
+
+
+ANSWERS = [
+    "Good evening, welcome! A table for how many?",
+    "Hi there, welcome in. Can I start you off with some drinks?",
+    "Welcome! We have a short wait, can I offer you a menu at the bar?",
+    "Hello, thanks for coming in tonight. Right this way.",
+]
+
+
+async def start_cohort(client: httpx.AsyncClient, size: int, label: str) -> list:
+    items = []
+    for i in range(size):
+        started = await client.post("/api/start-session", json={"waiter_name": f"Trainee {i}"})
+        items.append({
+            "session_id": started.json()["session_id"],
+            "scenario_category": "customer_greeting",
+            # Distinct answers, so the feedback cache does not hide LLM calls
+            "response": f"{ANSWERS[i % len(ANSWERS)]} ({label} trainee {i})"
+        })
+    return items
+
+
+async def run(cohort: int, latency: float, concurrency: int) -> None:
+    with FakeLLMServer(latency=latency) as server:
+        web_app.agent = build_agent(ai={"base_url": server.base_url}, batch={"max_concurrency": concurrency})
+        await web_app.agent.start()
+        transport = httpx.ASGITransport(app=web_app.app)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            items = await start_cohort(client, cohort, "sequential")
+            t0 = time.perf_counter()
+            for item in items:
+                (await client.post("/api/submit-response", json=item)).raise_for_status()
+            one_by_one = time.perf_counter() - t0
+
+            items = await start_cohort(client, cohort, "batched")
+            t0 = time.perf_counter()
+            batch = await client.post("/api/submit-responses", json={"responses": items})
+            batched = time.perf_counter() - t0
+            body = batch.json()
+
+        await web_app.agent.aclose()
+
+    print(f"cohort:               {cohort} answers, fake LLM latency {latency:.3f}s")
+    print(f"one by one:           {one_by_one:.3f}s ({cohort / one_by_one:.1f} answers/s)")
+    print(f"batch (x{concurrency}):          {batched:.3f}s ({cohort / batched:.1f} answers/s), "
+          f"{body['succeeded']} ok / {body['failed']} failed")
+    print(f"speedup:              {one_by_one / batched:.1f}x")
+    print(f"max LLM in flight:    {server.app.state.max_in_flight}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cohort", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.cohort, args.latency, args.concurrency))
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: offline grading throughput and memory as the archive grows
+
+Grades synthetic JSONL archives of increasing size through the agent and a
+fake LLM with --latency seconds per completion. Sizes run smallest first in
+one process, so the peak resident set size should barely move as the
+archive grows, since records are streamed through a bounded window rather
+than loaded up front.
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from common import build_agent
+from fake_llm_server import FakeLLMServer
+
+from src.agent.batch_grading import BatchGrader, read_responses
+
+
+CATEGORIES = ["customer_greeting", "menu_knowledge", "order_taking", "upselling"]
+
+
+def write_archive(path: Path, count: int) -> None:
+    with open(path, "w") as archive:
+        for i in range(count):
+            archive.write(json.dumps({
+                "id": i,
+                "scenario_category": CATEGORIES[i % len(CATEGORIES)],
+                "response": f"Good evening and welcome, may I suggest tonight's special? ({i})"
+            }) + "\n")
+
+
+async def grade(size: int, workers: int, base_url: str, directory: Path) -> None:
+    archive, output = directory / f"archive-{size}.jsonl", directory / f"graded-{size}.jsonl"
+    write_archive(archive, size)
+
+    agent = build_agent(ai={"base_url": base_url}, feedback_cache={"enabled": False})
+    await agent.start()
+    grader = BatchGrader(agent, workers=workers)
+
+    t0 = time.perf_counter()
+    stats = await grader.run(read_responses(archive), output)
+    elapsed = time.perf_counter() - t0
+    await agent.aclose()
+
+    # ru_maxrss is in KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{size:9d}   {stats['graded']:8d}   {size / elapsed:10.1f}   {peak_rss:10.1f}")
+
+
+async def run(sizes: list, workers: int, latency: float) -> None:
+    with FakeLLMServer(latency=latency) as server, tempfile.TemporaryDirectory() as directory:
+        print(f"workers {workers}, fake LLM latency {latency:.3f}s")
+        print("  records     graded   records/s   peak RSS MiB")
+        for size in sizes:
+            await grade(size, workers, server.base_url, Path(directory))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    asyncio.run(run([int(size) for size in args.sizes.split(",")], args.workers, args.latency))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: a class submitting the same canned answer at the same moment
+
+--trainees sessions each submit one of --distinct answers (with case and
+punctuation variations) at once, with the feedback cache enabled. The cache
+cannot help, since nothing is stored until the first completion returns;
+coalescing lets every duplicate share the in-flight completion instead.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from common import build_agent
+from fake_llm_server import FakeLLMServer
+
+
+ANSWERS = [
+    "Good evening, welcome! Table for how many?",
+    "Hi there, welcome to our restaurant. Do you have a reservation tonight?",
+    "Welcome in! Let me grab you some menus and show you to your table.",
+    "Hello and welcome, can I start you off with something to drink?",
+]
+
+VARIATIONS = [
+    lambda text: text,
+    lambda text: text.lower(),
+    lambda text: text.upper(),
+    lambda text: text.replace(",", ""),
+]
+
+
+async def run_case(label: str, coalesce: bool, args: argparse.Namespace) -> None:
+    with FakeLLMServer(latency=args.latency) as server:
+        agent = build_agent(ai={"base_url": server.base_url, "coalesce_requests": coalesce})
+        await agent.start()
+        sessions = [await agent.start_training_session(f"Trainee {i}") for i in range(args.trainees)]
+
+        async def submit(i: int, session_id: str) -> float:
+            answer = VARIATIONS[i // args.distinct % len(VARIATIONS)](ANSWERS[i % args.distinct % len(ANSWERS)])
+            t0 = time.perf_counter()
+            await agent.process_waiter_response(session_id, "customer_greeting", answer)
+            return time.perf_counter() - t0
+
+        wall_start = time.perf_counter()
+        latencies = sorted(await asyncio.gather(*(submit(i, s) for i, s in enumerate(sessions))))
+        wall = time.perf_counter() - wall_start
+        coalescing = agent.get_llm_stats()["coalescing"]
+        await agent.aclose()
+
+    print(f"{label:<14} LLM calls {server.app.state.requests_served:4d}   coalesced {coalescing['coalesced']:4d}   "
+          f"p50 {statistics.median(latencies) * 1000:7.1f}ms   "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:7.1f}ms   wall {wall:5.2f}s")
+
+
+async def run(args: argparse.Namespace) -> None:
+    print(f"{args.trainees} trainees, {args.distinct} distinct answers, fake latency {args.latency:.2f}s")
+    await run_case("no coalescing", False, args)
+    await run_case("coalescing", True, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trainees", type=int, default=120)
+    parser.add_argument("--distinct", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake LLM latency in seconds")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
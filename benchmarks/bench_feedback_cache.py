@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: feedback cache on a simulated group onboarding day
+
+A cohort answers the same scenarios with a handful of canned answers, each
+submitted with small variations in case, punctuation and wording. Runs the
+workload with the cache disabled, with the exact tier only, and with the
+similarity tier, reporting LLM calls, hit rate and response latency.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Any, Dict
+
+from common import build_agent
+from fake_llm_server import FakeLLMServer
+
+
+CANNED_ANSWERS = {
+    "customer_greeting": [
+        "Good evening, welcome! Table for how many?",
+        "Hi there, welcome to our restaurant. Do you have a reservation tonight?",
+        "I would smile, make eye contact, greet them and tell them I will seat them in a moment.",
+    ],
+    "upselling": [
+        "Would you like to start with one of our appetizers or a glass of wine?",
+        "I would recommend the chocolate lava cake, it is our most popular dessert.",
+    ],
+    "problem_resolution": [
+        "I am so sorry about that, let me take it back to the kitchen and have it reheated right away.",
+        "I apologize, I will get you a fresh plate immediately and let my manager know.",
+    ],
+}
+
+VARIATIONS = [
+    lambda text: text,
+    lambda text: text.lower(),
+    lambda text: text.upper(),
+    lambda text: text.rstrip("?.!"),
+    lambda text: text.replace(",", ""),
+    lambda text: text.replace("I would", "I'd"),
+    lambda text: text + " Thank you!",
+]
+
+
+async def run_mode(name: str, cache_config: Dict[str, Any], base_url: str,
+                   trainees: int, concurrency: int, seed: int) -> None:
+    agent = build_agent(ai={"base_url": base_url}, feedback_cache=cache_config)
+    await agent.start()
+    rng = random.Random(seed)
+    session_ids = [await agent.start_training_session(f"Trainee {i}") for i in range(trainees)]
+
+    # Every trainee answers every category once
+    submissions = [
+        (session_id, category, rng.choice(VARIATIONS)(rng.choice(answers)))
+        for session_id in session_ids
+        for category, answers in CANNED_ANSWERS.items()
+    ]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def submit(session_id: str, category: str, response: str) -> None:
+        async with semaphore:
+            t0 = time.perf_counter()
+            await agent.process_waiter_response(session_id, category, response)
+            latencies.append(time.perf_counter() - t0)
+
+    requests_before = agent.llm.stats.requests
+    t0 = time.perf_counter()
+    await asyncio.gather(*(submit(*submission) for submission in submissions))
+    wall = time.perf_counter() - t0
+    llm_calls = agent.llm.stats.requests - requests_before
+    stats = agent.get_feedback_cache_stats()
+    await agent.aclose()
+
+    latencies.sort()
+    print(f"{name:<18} {len(submissions):>8} {llm_calls:>9} {stats['hit_rate'] * 100:>8.1f}% "
+          f"{statistics.median(latencies) * 1000:>9.1f} {latencies[int(len(latencies) * 0.95)] * 1000:>9.1f} "
+          f"{wall:>8.2f}")
+
+
+async def main(trainees: int, concurrency: int, latency: float, seed: int) -> None:
+    modes = {
+        "no cache": {"enabled": False},
+        "exact": {"enabled": True},
+        "exact + similar": {"enabled": True, "similarity": True, "similarity_threshold": 0.7},
+    }
+    print(f"{'mode':<18} {'answers':>8} {'LLM calls':>9} {'hit rate':>9} {'p50 ms':>9} {'p95 ms':>9} {'wall s':>8}")
+    with FakeLLMServer(latency=latency) as server:
+        for name, cache_config in modes.items():
+            await run_mode(name, cache_config, server.base_url, trainees, concurrency, seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trainees", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.3, help="fake LLM latency in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.trainees, args.concurrency, args.latency, args.seed))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Load benchmark: concurrent /api/submit-response calls against a fake LLM
+
+Each fake completion takes --latency seconds. If feedback generation blocks the
+event loop the submissions run back to back and the wall time approaches
+``concurrency * latency``; with a non-blocking feedback path they overlap and
+the wall time stays close to a single ``latency``.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from common import build_agent
+from fake_llm_server import FakeLLMServer
+
+import web_app
+
+
+async def run(concurrency: int, latency: float) -> None:
+    with FakeLLMServer(latency=latency) as server:
+        web_app.agent = build_agent(ai={"base_url": server.base_url})
+        await web_app.agent.start()
+        transport = httpx.ASGITransport(app=web_app.app)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            session_ids = []
+            for i in range(concurrency):
+                started = await client.post("/api/start-session", json={"waiter_name": f"Trainee {i}"})
+                session_ids.append(started.json()["session_id"])
+
+            async def submit(session_id: str) -> float:
+                t0 = time.perf_counter()
+                result = await client.post("/api/submit-response", json={
+                    "session_id": session_id,
+                    "scenario_category": "customer_greeting",
+                    "response": "Good evening, welcome! A table for how many?"
+                })
+                result.raise_for_status()
+                return time.perf_counter() - t0
+
+            async def poll_status(stop: asyncio.Event) -> list:
+                # A trainee polling their status while everyone else waits on feedback
+                delays = []
+                while not stop.is_set():
+                    t0 = time.perf_counter()
+                    await client.get(f"/api/session-status/{session_ids[0]}")
+                    delays.append(time.perf_counter() - t0)
+                    await asyncio.sleep(0.05)
+                return delays
+
+            stop = asyncio.Event()
+            poller = asyncio.create_task(poll_status(stop))
+            wall_start = time.perf_counter()
+            latencies = await asyncio.gather(*(submit(s) for s in session_ids))
+            wall = time.perf_counter() - wall_start
+            stop.set()
+            status_delays = await poller
+
+        llm_stats = web_app.agent.get_llm_stats()
+        await web_app.agent.aclose()
+
+    serial = concurrency * latency
+    print(f"submissions:          {concurrency}")
+    print(f"fake LLM latency:     {latency:.3f}s")
+    print(f"wall time:            {wall:.3f}s (serial would be {serial:.3f}s)")
+    print(f"overlap factor:       {serial / wall:.1f}x")
+    print(f"max LLM in flight:    {server.app.state.max_in_flight}")
+    print(f"submit p50 / max:     {statistics.median(latencies):.3f}s / {max(latencies):.3f}s")
+    print(f"status poll max:      {max(status_delays) * 1000:.1f}ms over {len(status_delays)} polls")
+    print(f"LLM connections:      {llm_stats['new_connections']} new for {llm_stats['requests']} requests")
+    print(f"LLM pool wait p95:    {llm_stats['pool_wait_ms']['p95']:.2f}ms")
+    print(f"LLM ttfb p50:         {llm_stats['ttfb_ms']['p50']:.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.concurrency, args.latency))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark: landing page bytes on the wire and requests/sec, inline vs static
+
+"inline" rebuilds the old single-response page (all CSS and JS inlined, no
+compression or validators) on every GET. "static" serves the built frontend:
+a first visit fetches the brotli-compressed entry point and hashed assets,
+and a repeat visit revalidates only the entry point (304) because the hashed
+assets are cached as immutable.
+"""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse
+
+from common import build_agent
+
+import web_app
+
+
+FRONTEND_DIR = Path(web_app.__file__).parent / "frontend"
+
+
+def inline_page() -> str:
+    html = (FRONTEND_DIR / "index.html").read_text()
+    css = (FRONTEND_DIR / "app.css").read_text()
+    js = (FRONTEND_DIR / "app.js").read_text()
+    html = html.replace('<link rel="stylesheet" href="app.css">', f"<style>\n{css}</style>")
+    return html.replace('<script src="app.js"></script>', f"<script>\n{js}</script>")
+
+
+def inline_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/", response_class=HTMLResponse)
+    async def get_homepage():
+        return inline_page()
+
+    return app
+
+
+def wire_bytes(response: httpx.Response) -> int:
+    # Compressed body as sent, plus the response headers
+    headers = sum(len(k) + len(v) + 4 for k, v in response.headers.raw)
+    return int(response.headers.get("content-length", len(response.content))) + headers
+
+
+async def visit(client: httpx.AsyncClient, static: bool, cache: dict) -> tuple:
+    """One page load; returns (requests, bytes). ``cache`` plays the browser cache."""
+    headers = {"Accept-Encoding": "br, gzip"}
+    if "etag" in cache:
+        headers["If-None-Match"] = cache["etag"]
+    page = await client.get("/", headers=headers)
+    requests, total = 1, wire_bytes(page)
+    if not static:
+        return requests, total
+
+    if page.status_code == 200:
+        cache["etag"] = page.headers["etag"]
+    for asset in web_app.asset_manifest["files"].values():
+        if asset in cache:
+            continue
+        response = await client.get(f"/static/{asset}", headers={"Accept-Encoding": "br, gzip"})
+        cache[asset] = response.headers["cache-control"]
+        requests += 1
+        total += wire_bytes(response)
+    return requests, total
+
+
+async def requests_per_second(client: httpx.AsyncClient, headers: dict, seconds: float, concurrency: int) -> float:
+    count = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal count
+        while time.perf_counter() < deadline:
+            await client.get("/", headers=headers)
+            count += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return count / seconds
+
+
+async def run(seconds: float, concurrency: int) -> None:
+    web_app.agent = build_agent()
+    inline = httpx.AsyncClient(transport=httpx.ASGITransport(app=inline_app()), base_url="http://bench")
+    static = httpx.AsyncClient(transport=httpx.ASGITransport(app=web_app.app), base_url="http://bench")
+
+    async with inline, static:
+        cache: dict = {}
+        inline_first = await visit(inline, False, {})
+        static_first = await visit(static, True, cache)
+        static_repeat = await visit(static, True, cache)
+
+        print("page load                 requests   bytes on wire")
+        print(f"inline, any visit         {inline_first[0]:8d}   {inline_first[1]:13d}")
+        print(f"static, first visit       {static_first[0]:8d}   {static_first[1]:13d}")
+        print(f"static, repeat visit      {static_repeat[0]:8d}   {static_repeat[1]:13d}")
+        print()
+
+        accept = {"Accept-Encoding": "br, gzip"}
+        print(f"GET / requests/sec with {concurrency} concurrent clients over {seconds:.0f}s:")
+        print(f"inline                    {await requests_per_second(inline, accept, seconds, concurrency):8.0f}")
+        print(f"static (200, brotli)      {await requests_per_second(static, accept, seconds, concurrency):8.0f}")
+        revalidate = {**accept, "If-None-Match": cache["etag"]}
+        print(f"static (304 revalidate)   {await requests_per_second(static, revalidate, seconds, concurrency):8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.seconds, args.concurrency))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of recording metrics on the hot path
+
+Times counter increments and histogram observations from one thread and
+from --threads threads at once, then an in-memory session store workload
+with and without InstrumentedSessionStore timing every call, and how long
+a scrape of /metrics takes to render.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add repository root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agent.metrics import AgentMetrics, MetricsRegistry
+from src.agent.session_store import InstrumentedSessionStore, MemorySessionStore
+from src.agent.training_session import TrainingSession
+
+
+def per_call_ns(work, calls: int, threads: int) -> float:
+    workers = [threading.Thread(target=work, args=(calls,)) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - started) / (calls * threads) * 1e9
+
+
+def store_workload(store, sessions: int) -> float:
+    started = time.perf_counter()
+    for i in range(sessions):
+        store.create(TrainingSession(session_id=f"bench_{i}", waiter_name="Trainee", difficulty_level="beginner",
+                                     start_time=datetime.now(), scenarios_completed=[], score=0.0, feedback=[]))
+        store.mutate(f"bench_{i}", lambda session: session.add_feedback("Good greeting."))
+        store.get(f"bench_{i}")
+        store.end(f"bench_{i}", {"session_id": f"bench_{i}"})
+    return (time.perf_counter() - started) / (sessions * 4) * 1e9
+
+
+def main(args: argparse.Namespace) -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("bench_events", "Events").labels()
+    histogram = registry.histogram("bench_seconds", "Latency").labels()
+
+    def increment(calls: int) -> None:
+        for _ in range(calls):
+            counter.inc()
+
+    def observe(calls: int) -> None:
+        for i in range(calls):
+            histogram.observe((i % 1000) / 1000)
+
+    def baseline(calls: int) -> None:
+        for _ in range(calls):
+            pass
+
+    for threads in (1, args.threads):
+        loop = per_call_ns(baseline, args.calls, threads)
+        print(f"{threads} thread(s): counter.inc {per_call_ns(increment, args.calls, threads) - loop:6.0f}ns   "
+              f"histogram.observe {per_call_ns(observe, args.calls, threads) - loop:6.0f}ns")
+
+    plain = store_workload(MemorySessionStore(), args.sessions)
+    metrics = AgentMetrics()
+    timed = store_workload(InstrumentedSessionStore(MemorySessionStore(), "memory", metrics.store_operation_seconds),
+                           args.sessions)
+    print(f"session store op: plain {plain:6.0f}ns   instrumented {timed:6.0f}ns   (+{timed - plain:.0f}ns)")
+
+    started = time.perf_counter()
+    text = metrics.render()
+    print(f"render /metrics: {(time.perf_counter() - started) * 1000:.2f}ms for {len(text.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=20_000)
+    args = parser.parse_args()
+
+    main(args)
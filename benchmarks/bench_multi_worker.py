@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark: N worker processes sharing one session store
+
+Sessions are created up front, then every worker process submits responses
+for sessions chosen round-robin across the whole pool, so each session is
+served by several workers. Afterwards the total feedback count is checked
+against the number of submissions to confirm no update was lost.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from common import build_agent
+from fake_llm_server import FakeLLMServer
+
+
+def _worker(worker_id: int, workers: int, database: Dict[str, Any], base_url: str,
+            session_ids: List[str], submissions: int, concurrency: int, results: Any) -> None:
+    agent = build_agent(ai={"base_url": base_url}, database=database)
+
+    async def run() -> float:
+        await agent.start()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def submit(i: int) -> None:
+            async with semaphore:
+                session_id = session_ids[(worker_id + i * workers) % len(session_ids)]
+                await agent.process_waiter_response(
+                    session_id, "customer_greeting", "Good evening, welcome! A table for how many?"
+                )
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(submit(i) for i in range(submissions)))
+        elapsed = time.perf_counter() - t0
+        await agent.aclose()
+        return elapsed
+
+    results.put(asyncio.run(run()))
+
+
+def run(workers: int, sessions: int, submissions: int, concurrency: int,
+        latency: float, database: Dict[str, Any]) -> None:
+    setup = build_agent(database=database)
+
+    async def start_sessions() -> List[str]:
+        return [await setup.start_training_session(f"Trainee {i}") for i in range(sessions)]
+
+    session_ids = asyncio.run(start_sessions())
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    with FakeLLMServer(latency=latency) as server:
+        processes = [
+            context.Process(target=_worker, args=(
+                worker_id, workers, database, server.base_url,
+                session_ids, submissions, concurrency, results
+            ))
+            for worker_id in range(workers)
+        ]
+        t0 = time.perf_counter()
+        for process in processes:
+            process.start()
+        elapsed = [results.get() for _ in processes]
+        wall = time.perf_counter() - t0
+        for process in processes:
+            process.join()
+
+    recorded = sum(setup.active_sessions[session_id].feedback_count for session_id in session_ids)
+    setup.active_sessions.close()
+
+    total = workers * submissions
+    print(f"{workers:>7} {total:>11} {max(elapsed):>9.2f} {total / max(elapsed):>10.1f} "
+          f"{wall:>9.2f} {recorded == total!s:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--submissions", type=int, default=200, help="submissions per worker")
+    parser.add_argument("--concurrency", type=int, default=20, help="in-flight submissions per worker")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake LLM latency in seconds")
+    parser.add_argument("--redis-url", help="use a Redis server instead of a shared SQLite file")
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'submissions':>11} {'seconds':>9} {'per sec':>10} {'wall':>9} {'no loss':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for worker_count in args.workers:
+            if args.redis_url:
+                database = {"type": "redis", "url": args.redis_url, "prefix": f"bench{worker_count}:"}
+            else:
+                database = {"type": "sqlite", "shared": True,
+                            "path": str(Path(tmp) / f"workers_{worker_count}.db")}
+            run(worker_count, args.sessions, args.submissions, args.concurrency, args.latency, database)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: overhead of the profiling hooks
+
+Awaits a small coroutine method --calls times, undecorated and under
+@profiled with CPU attribution off and on, then runs scoring (the CPU-bound
+part of handling a response) for --seconds with and without the stack
+sampler running at --interval-ms, and reports the throughput lost.
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add repository root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agent.profiling import Profiler, profiled
+from src.agent.scoring import ResponseScorer
+
+ANSWER = "Good evening, welcome! My name is Sam and I'll be your server tonight. Can I start you with a drink?"
+
+
+class Worker:
+    def __init__(self, profiler: Profiler):
+        self.profiler = profiler
+
+    async def plain(self) -> int:
+        await asyncio.sleep(0)
+        return 1
+
+    @profiled("bench.profiled")
+    async def profiled(self) -> int:
+        await asyncio.sleep(0)
+        return 1
+
+
+async def per_call_ns(method, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        await method()
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+def scoring_rate(seconds: float) -> float:
+    scorer = ResponseScorer()
+    done = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        scorer.assess("customer_greeting", f"{ANSWER} ({done})", "beginner")
+        done += 1
+    return done / seconds
+
+
+async def main(args: argparse.Namespace) -> None:
+    baseline = await per_call_ns(Worker(Profiler()).plain, args.calls)
+    print(f"{'undecorated':<18} {baseline:8.0f}ns per call")
+    for label, profiler in (("attribution off", Profiler()), ("attribution on", Profiler(enabled=True))):
+        cost = await per_call_ns(Worker(profiler).profiled, args.calls)
+        print(f"{label:<18} {cost:8.0f}ns per call   (+{cost - baseline:.0f}ns)")
+
+    quiet = scoring_rate(args.seconds)
+    sampler = threading.Thread(target=Profiler(enabled=True).sample, args=(args.seconds, args.interval_ms / 1000))
+    sampler.start()
+    sampled = scoring_rate(args.seconds)
+    sampler.join()
+    print(f"scoring {quiet:8.0f}/s, {sampled:8.0f}/s while sampling every {args.interval_ms:g}ms "
+          f"({sampled / quiet - 1:+.1%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--interval-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
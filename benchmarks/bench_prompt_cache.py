@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark: replaying a grading workload with and without a cacheable prompt prefix
+
+Replays --workload (a JSONL/CSV/SQLite file batch grading can read) or
+--responses synthetic answers through the agent's feedback path twice:
+
+- inline: the single user message used before, with the waiter's response
+  in the middle of the instructions;
+- prefix: a system message that is identical for every answer to a
+  scenario, followed by the response.
+
+The fake LLM server models a provider prompt cache and charges prefill time
+per uncached prompt token. Each layout is replayed under two cache rules:
+paged (16-token blocks from the first token, as vLLM and llama.cpp reuse
+prefixes) and openai (128-token blocks, only prompts of 1024+ tokens).
+Reports latency, cached-token share and cost at the given prices.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from common import build_agent, percentile
+from fake_llm_server import FakeLLMServer
+
+from src.agent.batch_grading import read_responses
+from src.agent.feedback_schema import schema_instructions
+from src.agent.prompt_templates import PromptTemplate
+from src.agent.training_scenarios import SCENARIO_CATALOG
+
+
+# The feedback prompt before the prefix layout
+INLINE_PROMPT = PromptTemplate("inline_feedback", """
+        You are an expert restaurant trainer evaluating a waiter's response to a training scenario.
+
+        Category: {category}
+        Difficulty Level: {difficulty}
+        Checklist:
+        {checklist}
+
+        Waiter's Response: {response}
+
+        Be specific, actionable and encouraging.
+        {schema}
+        """)
+
+CACHE_RULES = {
+    "paged": {"cache_min_tokens": 0, "cache_block_tokens": 16},
+    "openai": {"cache_min_tokens": 1024, "cache_block_tokens": 128},
+}
+
+ANSWERS = [
+    "I would walk over with a smile, welcome them and ask if they have a reservation.",
+    "I'm so sorry about that, let me take it back to the kitchen and bring a fresh plate.",
+    "I'd check with the chef about the ingredients and confirm the allergy on the ticket.",
+    "Would you like to try our chocolate cake? It pairs really well with the espresso.",
+    "I would repeat the order back, note the substitutions and check back after a few minutes.",
+]
+
+
+def load_workload(args: argparse.Namespace) -> list:
+    if args.workload:
+        return [
+            (record.get("scenario_category"), record.get("difficulty_level") or "beginner", record.get("response"))
+            for record in read_responses(args.workload) if isinstance(record, dict)
+        ]
+    rng = random.Random(args.seed)
+    keys = list(SCENARIO_CATALOG)
+    return [(*rng.choice(keys), f"{rng.choice(ANSWERS)} ({i})") for i in range(args.responses)]
+
+
+def inline_messages(agent, category: str, response: str, difficulty: str) -> list:
+    checklist = agent._checklist(category, difficulty)
+    prompt = agent.prompts.render(
+        INLINE_PROMPT, response,
+        category=category,
+        difficulty=difficulty,
+        checklist="\n".join(f"{number}. {item}" for number, item in enumerate(checklist, 1)),
+        schema=schema_instructions(len(checklist))
+    )
+    return [{"role": "user", "content": prompt}]
+
+
+async def replay(layout: str, rules: str, workload: list, args: argparse.Namespace) -> dict:
+    with FakeLLMServer(latency=args.latency, prefill_per_token=args.prefill_ms / 1000,
+                       prompt_cache=True, **CACHE_RULES[rules]) as server:
+        agent = build_agent(ai={"base_url": server.base_url, "coalesce_requests": False},
+                            feedback_cache={"enabled": False})
+        if layout == "inline":
+            agent._structured_feedback_messages = lambda c, r, d: inline_messages(agent, c, r, d)
+        await agent.start()
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies = []
+
+        async def grade(category: str, difficulty: str, response: str) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                await agent.fetch_feedback(category, response, difficulty)
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(grade(*item) for item in workload))
+        usage = agent.get_llm_stats()["usage"]
+        await agent.aclose()
+
+    uncached = usage["prompt_tokens"] - usage["cached_tokens"]
+    cost = (uncached * args.input_price + usage["cached_tokens"] * args.cached_price
+            + usage["completion_tokens"] * args.output_price) / 1e6
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "cached": usage["cached_token_rate"],
+        "hits": usage["cache_hit_rate"],
+        "cost": cost
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    workload = load_workload(args)
+    print(f"{len(workload)} responses, {args.concurrency} at a time, fake latency {args.latency:.2f}s "
+          f"+ {args.prefill_ms:.2f}ms per uncached prompt token")
+    for rules in CACHE_RULES:
+        results = {layout: await replay(layout, rules, workload, args) for layout in ("inline", "prefix")}
+        for layout, result in results.items():
+            print(f"{rules:<7} {layout:<7} p50 {result['p50_ms']:7.1f}ms   p95 {result['p95_ms']:7.1f}ms   "
+                  f"hit rate {result['hits']:6.1%}   cached tokens {result['cached']:6.1%}   cost ${result['cost']:.4f}")
+        before, after = results["inline"], results["prefix"]
+        print(f"{rules:<7} change  p50 {after['p50_ms'] / before['p50_ms'] - 1:+7.1%}   "
+              f"cost {after['cost'] / before['cost'] - 1:+7.1%}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workload", help="responses file to replay instead of synthetic answers")
+    parser.add_argument("--responses", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM base latency in seconds")
+    parser.add_argument("--prefill-ms", type=float, default=0.5, help="fake prefill time per uncached prompt token")
+    parser.add_argument("--input-price", type=float, default=2.50, help="$ per 1M uncached input tokens")
+    parser.add_argument("--cached-price", type=float, default=1.25, help="$ per 1M cached input tokens")
+    parser.add_argument("--output-price", type=float, default=10.00, help="$ per 1M output tokens")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: input tokens per feedback prompt, before and after compilation
+
+Renders --prompts feedback prompts for synthetic waiter responses (a
+--long-share of them pasted many times over, as happens with copy-paste)
+and compares the tokens sent by the indented source template with the
+response inlined verbatim, against the compiled template with the response
+compacted and cut to --budget tokens. Also reports render time per call.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add repository root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agent.prompt_templates import FEEDBACK_PROMPT, PromptRenderer
+from src.agent.training_scenarios import SCENARIO_CATALOG
+
+
+SENTENCES = [
+    "I would walk over with a smile and make eye contact.",
+    "Good evening,  welcome! Do you have a reservation?",
+    "I'm so sorry about that, let me fix it right away.",
+    "I would check with the chef to confirm the ingredients.\n",
+    "Would you like to try our chocolate cake?   It pairs well with coffee.",
+    "I'd repeat the order back to confirm every allergy.\n\n",
+]
+
+
+def synthetic_responses(count: int, long_share: float, seed: int) -> list:
+    rng = random.Random(seed)
+    keys = list(SCENARIO_CATALOG)
+    responses = []
+    for _ in range(count):
+        sentences = rng.randint(1, 5) * (rng.randint(10, 40) if rng.random() < long_share else 1)
+        responses.append((*rng.choice(keys), " ".join(rng.choice(SENTENCES) for _ in range(sentences))))
+    return responses
+
+
+def main(args: argparse.Namespace) -> None:
+    renderer = PromptRenderer(response_token_budget=args.budget)
+    counter = renderer.counter
+    responses = synthetic_responses(args.prompts, args.long_share, args.seed)
+
+    before, after, timings = [], [], []
+    for category, difficulty, response in responses:
+        before.append(counter.count(FEEDBACK_PROMPT.render_source(
+            category=category, difficulty=difficulty, response=response
+        )))
+        started = time.perf_counter()
+        messages = renderer.render_chat(FEEDBACK_PROMPT, response, category=category, difficulty=difficulty)
+        timings.append(time.perf_counter() - started)
+        after.append(sum(counter.count(message["content"]) for message in messages))
+
+    stats = renderer.stats()["templates"]["feedback"]
+    counting = "tiktoken" if counter.exact else "estimated"
+    print(f"{args.prompts} prompts, {args.long_share:.0%} long responses, budget {args.budget} tokens ({counting})")
+    print(f"source template   mean {statistics.mean(before):7.1f} tokens   p95 {sorted(before)[int(0.95 * (len(before) - 1))]:6d}")
+    print(f"compiled          mean {statistics.mean(after):7.1f} tokens   p95 {sorted(after)[int(0.95 * (len(after) - 1))]:6d}")
+    print(f"saved per call    mean {statistics.mean(b - a for b, a in zip(before, after)):7.1f} tokens "
+          f"({1 - sum(after) / sum(before):.1%})   truncated {stats['truncated']}   "
+          f"render p50 {statistics.median(timings) * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--prompts", type=int, default=5000)
+    parser.add_argument("--long-share", type=float, default=0.05)
+    parser.add_argument("--budget", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark: feedback under provider rate limits, with and without the governor
+
+The fake provider accepts --capacity concurrent completions and answers 429
+with Retry-After beyond that, plus a random --rate-limit-ratio of requests.
+--submissions responses arrive at once. Without the governor every 429
+becomes the canned fallback; with it, calls queue, back off and retry.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from common import build_agent
+from fake_llm_server import FakeLLMServer
+
+from src.agent.waiter_agent import FEEDBACK_UNAVAILABLE_MESSAGE
+
+
+async def run_case(label: str, governed: bool, args: argparse.Namespace) -> None:
+    with FakeLLMServer(latency=args.latency, capacity=args.capacity,
+                       rate_limit_ratio=args.rate_limit_ratio, retry_after=0.05) as server:
+        agent = build_agent(
+            ai={"base_url": server.base_url, "rate_limit": {"enabled": governed, "max_retries": 4}},
+            feedback_cache={"enabled": False},
+            # Every ungoverned 429 logs an error; keep the report readable
+            logging={"level": "CRITICAL"}
+        )
+        await agent.start()
+        sessions = [await agent.start_training_session(f"Trainee {i}") for i in range(args.submissions)]
+
+        async def submit(i: int, session_id: str) -> tuple:
+            t0 = time.perf_counter()
+            result = await agent.process_waiter_response(session_id, "customer_greeting", f"Welcome, guest {i}!")
+            return time.perf_counter() - t0, result["feedback"] == FEEDBACK_UNAVAILABLE_MESSAGE
+
+        wall_start = time.perf_counter()
+        outcomes = await asyncio.gather(*(submit(i, s) for i, s in enumerate(sessions)))
+        wall = time.perf_counter() - wall_start
+        governor = agent.get_llm_stats()["governor"]
+        await agent.aclose()
+
+    latencies = sorted(latency for latency, _ in outcomes)
+    fallbacks = sum(fallback for _, fallback in outcomes)
+    print(f"{label:<16} fallbacks {fallbacks:4d}/{len(outcomes)}   429s {server.app.state.rate_limited:5d}   "
+          f"p50 {statistics.median(latencies):6.2f}s   p95 {latencies[int(0.95 * (len(latencies) - 1))]:6.2f}s   "
+          f"wall {wall:6.2f}s   limit {governor['concurrency_limit']:5.1f}   "
+          f"queue p95 {governor['queue_wait_ms']['p95']:7.1f}ms")
+
+
+async def run(args: argparse.Namespace) -> None:
+    print(f"{args.submissions} submissions, provider capacity {args.capacity}, "
+          f"latency {args.latency:.2f}s, random 429s {args.rate_limit_ratio:.0%}")
+    await run_case("no governor", False, args)
+    await run_case("governor", True, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--submissions", type=int, default=200)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.02)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
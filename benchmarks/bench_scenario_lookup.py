@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: TrainingScenario.generate_prompt lookup cost
+
+Times prompt lookups for every (category, difficulty) pair and counts the
+memory blocks allocated while doing so. With the precompiled catalog each
+lookup is a single dict probe returning a shared string, so the per-call time
+is flat across entries and no allocations survive the calls.
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+from common import BENCH_CONFIG
+
+from src.agent.training_scenarios import SCENARIO_CATALOG, TrainingScenario
+
+
+def run(iterations: int) -> None:
+    levels = BENCH_CONFIG["training"]["difficulty_levels"]
+    scenarios = [
+        TrainingScenario(category=category, difficulty_levels=levels)
+        for category in BENCH_CONFIG["training"]["scenario_categories"]
+    ]
+
+    print(f"catalog entries: {len(SCENARIO_CATALOG)}")
+    print(f"{'category':<20} {'difficulty':<14} {'ns/call':>10}")
+    for scenario in scenarios:
+        for level in levels:
+            generate = scenario.generate_prompt
+            t0 = time.perf_counter_ns()
+            for _ in range(iterations):
+                generate(level)
+            per_call = (time.perf_counter_ns() - t0) / iterations
+            print(f"{scenario.category:<20} {level:<14} {per_call:>10.1f}")
+
+    # Allocations retained across many calls
+    first = scenarios[0].generate_prompt("beginner")
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    blocks_before = sys.getallocatedblocks()
+    for _ in range(iterations):
+        for scenario in scenarios:
+            for level in levels:
+                scenario.generate_prompt(level)
+    blocks_after = sys.getallocatedblocks()
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    diff = snapshot_after.compare_to(snapshot_before, "filename")
+    lookup_bytes = sum(stat.size_diff for stat in diff if "training_scenarios" in str(stat.traceback))
+    print(f"\nshared string returned: {scenarios[0].generate_prompt('beginner') is first}")
+    print(f"blocks retained after {iterations * len(scenarios) * len(levels)} calls: {blocks_after - blocks_before}")
+    print(f"bytes allocated in training_scenarios: {lookup_bytes}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args()
+
+    run(args.iterations)
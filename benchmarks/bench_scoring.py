@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rule-based scoring throughput, and response latency by feedback mode
+
+Scores --responses synthetic answers across every scenario with the local
+scorer and reports responses scored per second. Then submits --submissions
+answers through the agent with scoring.llm_feedback set to sync, async and
+off against a fake LLM with --latency seconds per completion.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from common import build_agent
+from fake_llm_server import FakeLLMServer
+
+from src.agent.scoring import ResponseScorer
+from src.agent.training_scenarios import SCENARIO_CATALOG
+
+
+FRAGMENTS = [
+    "I would walk over with a smile and make eye contact.",
+    "Good evening, welcome! Do you have a reservation?",
+    "I'm so sorry about that, let me fix it right away.",
+    "I would check with the chef to confirm the ingredients.",
+    "Would you like to try our chocolate cake? It pairs well with coffee.",
+    "I'd repeat the order back to confirm every allergy and note it on the ticket.",
+    "If they decline I respect that and don't push.",
+    "I would let the manager know and follow up at the end of the meal.",
+    "I stay calm and polite even when it's busy.",
+    "Then I show them to a table and bring menus.",
+    "We could offer a complimentary dessert to make amends.",
+    "I would call 911 and get the EpiPen from the first aid kit.",
+]
+
+
+def synthetic_responses(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    keys = list(SCENARIO_CATALOG)
+    return [
+        (*rng.choice(keys), " ".join(rng.sample(FRAGMENTS, rng.randint(1, 6))))
+        for _ in range(count)
+    ]
+
+
+def bench_scorer(count: int, seed: int) -> None:
+    scorer = ResponseScorer()
+    responses = synthetic_responses(count, seed)
+    timings = []
+    t0 = time.perf_counter()
+    for category, difficulty, response in responses:
+        started = time.perf_counter()
+        scorer.assess(category, response, difficulty)
+        timings.append(time.perf_counter() - started)
+    wall = time.perf_counter() - t0
+
+    timings.sort()
+    print(f"scorer: {count} responses in {wall:.2f}s = {count / wall:,.0f} responses/s   "
+          f"p50 {statistics.median(timings) * 1e6:.1f}us   p99 {timings[int(0.99 * (count - 1))] * 1e6:.1f}us")
+
+
+async def bench_mode(mode: str, base_url: str, submissions: int, seed: int) -> None:
+    agent = build_agent(ai={"base_url": base_url}, scoring={"llm_feedback": mode},
+                        feedback_cache={"enabled": False})
+    await agent.start()
+    responses = synthetic_responses(submissions, seed)
+    sessions = [await agent.start_training_session(f"Trainee {i}") for i in range(submissions)]
+    requests_before = agent.llm.stats.requests
+
+    latencies = []
+    for session_id, (category, _, response) in zip(sessions, responses):
+        started = time.perf_counter()
+        await agent.process_waiter_response(session_id, category, f"{response} ({session_id})")
+        latencies.append(time.perf_counter() - started)
+
+    # Background feedback still counts as LLM work; wait for it before counting
+    while agent._feedback_tasks:
+        await asyncio.sleep(0.01)
+    llm_calls = agent.llm.stats.requests - requests_before
+    await agent.aclose()
+
+    latencies.sort()
+    print(f"{mode:<6} submit p50 {statistics.median(latencies) * 1000:8.2f}ms   "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:8.2f}ms   LLM calls {llm_calls:4d}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    bench_scorer(args.responses, args.seed)
+    print(f"\n{args.submissions} sequential submissions, fake LLM latency {args.latency:.2f}s")
+    with FakeLLMServer(latency=args.latency) as server:
+        for mode in ("sync", "async", "off"):
+            await bench_mode(mode, server.base_url, args.submissions, args.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--responses", type=int, default=100000)
+    parser.add_argument("--submissions", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake LLM latency in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: 100k live training sessions, before and after compaction
+
+"Before" is the original ``@dataclass`` record holding every category name
+and every feedback text in lists; "after" is the slotted TrainingSession
+with a category bitset and a bounded feedback ring. Each session completes
+every category and receives --feedback distinct feedback texts.
+"""
+
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List
+
+from common import BENCH_CONFIG
+
+from src.agent.training_session import TrainingSession
+
+
+@dataclass
+class LegacyTrainingSession:
+    """The session record as it was before compaction"""
+    session_id: str
+    waiter_name: str
+    difficulty_level: str
+    start_time: datetime
+    scenarios_completed: List[str]
+    score: float
+    feedback: List[str]
+
+    def complete_scenario(self, category: str) -> None:
+        if category not in self.scenarios_completed:
+            self.scenarios_completed.append(category)
+
+    def add_feedback(self, feedback: str) -> None:
+        self.feedback.append(feedback)
+
+
+def measure(factory: Callable, sessions: int, feedback: int) -> int:
+    categories = BENCH_CONFIG["training"]["scenario_categories"]
+    gc.collect()
+    tracemalloc.start()
+    live = []
+    for i in range(sessions):
+        session = factory(
+            session_id=f"session_01HZX{i:021d}",
+            waiter_name=f"Trainee {i}",
+            difficulty_level="intermediate",
+            start_time=datetime.now(),
+            scenarios_completed=[],
+            score=0.0,
+            feedback=[]
+        )
+        for round_number in range(feedback):
+            # Category names arrive from request bodies as fresh strings
+            session.complete_scenario("".join(categories[round_number % len(categories)]))
+            session.add_feedback(f"Feedback {round_number} for trainee {i}: good greeting, "
+                                 f"remember to mention the specials and check for allergies.")
+        live.append(session)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del live
+    return current
+
+
+def main(sessions: int, feedback: int) -> None:
+    before = measure(LegacyTrainingSession, sessions, feedback)
+    after = measure(TrainingSession, sessions, feedback)
+
+    print(f"{sessions} sessions, {feedback} feedback texts each "
+          f"(feedback_history={TrainingSession.feedback_history})")
+    print(f"before: {before / 2**20:8.1f} MiB  {before / sessions:7.0f} B/session")
+    print(f"after:  {after / 2**20:8.1f} MiB  {after / sessions:7.0f} B/session")
+    print(f"saved:  {(1 - after / before) * 100:7.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--feedback", type=int, default=12)
+    args = parser.parse_args()
+
+    main(args.sessions, args.feedback)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: session store throughput for create, update and end
+
+Runs the same workload against the in-memory store, the SQLite store with
+the write-behind queue, and the SQLite store writing synchronously, and
+reports operations per second for each phase.
+"""
+
+import argparse
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from common import BENCH_CONFIG
+
+from src.agent.session_store import MemorySessionStore, SQLiteSessionStore
+from src.agent.training_session import TrainingSession
+
+
+def run_workload(store, sessions: int, updates: int) -> dict:
+    categories = BENCH_CONFIG["training"]["scenario_categories"]
+    rates = {}
+
+    t0 = time.perf_counter()
+    for i in range(sessions):
+        store.create(TrainingSession(
+            session_id=f"bench_{i}",
+            waiter_name=f"Trainee {i % 500}",
+            difficulty_level="beginner",
+            start_time=datetime.now(),
+            scenarios_completed=[],
+            score=0.0,
+            feedback=[]
+        ))
+    rates["create"] = sessions / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for round_number in range(updates):
+        for i in range(sessions):
+            session = store.get(f"bench_{i}")
+            session.complete_scenario(categories[round_number % len(categories)])
+            session.add_feedback("Good greeting; remember to offer the specials.")
+            session.score = min(100.0, session.score + 10.0)
+            store.update(session)
+    rates["update"] = sessions * updates / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for i in range(sessions):
+        store.end(f"bench_{i}", {"session_id": f"bench_{i}", "waiter_name": f"Trainee {i % 500}"})
+    rates["end"] = sessions / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    store.flush()
+    rates["drain_seconds"] = time.perf_counter() - t0
+    store.close()
+    return rates
+
+
+def main(sessions: int, updates: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "memory": MemorySessionStore(),
+            "sqlite write-behind": SQLiteSessionStore(str(Path(tmp) / "behind.db")),
+            "sqlite synchronous": SQLiteSessionStore(str(Path(tmp) / "sync.db"), write_behind=False)
+        }
+        print(f"{sessions} sessions, {updates} updates each (ops/sec)")
+        print(f"{'store':<22} {'create':>10} {'update':>10} {'end':>10} {'drain s':>9}")
+        for name, store in stores.items():
+            rates = run_workload(store, sessions, updates)
+            print(f"{name:<22} {rates['create']:>10.0f} {rates['update']:>10.0f} "
+                  f"{rates['end']:>10.0f} {rates['drain_seconds']:>9.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--updates", type=int, default=5)
+    args = parser.parse_args()
+
+    main(args.sessions, args.updates)
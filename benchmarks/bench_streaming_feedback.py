@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time to first feedback token with streaming vs the blocking path
+
+Each fake completion waits --latency seconds before its first token and then
+sends one word every --token-interval seconds. The blocking path shows nothing
+until the whole completion has arrived; the streaming path shows the first
+words after roughly ``latency``.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from common import build_agent
+from fake_llm_server import FakeLLMServer
+
+
+RESPONSE = "Good evening, welcome! A table for how many?"
+
+
+def report(label: str, values: list) -> None:
+    values = sorted(value * 1000 for value in values)
+    p95 = values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+    print(f"{label:<26}p50 {statistics.median(values):8.1f}ms   p95 {p95:8.1f}ms")
+
+
+async def run(concurrency: int, latency: float, token_interval: float) -> None:
+    with FakeLLMServer(latency=latency, token_interval=token_interval) as server:
+        agent = build_agent(ai={"base_url": server.base_url})
+        await agent.start()
+        session_ids = [await agent.start_training_session(f"Trainee {i}") for i in range(concurrency)]
+
+        async def blocking(session_id: str) -> float:
+            t0 = time.perf_counter()
+            await agent.process_waiter_response(session_id, "customer_greeting", RESPONSE, bypass_cache=True)
+            return time.perf_counter() - t0
+
+        async def streaming(session_id: str):
+            t0 = time.perf_counter()
+            ttft = None
+            async for event in agent.stream_waiter_response(session_id, "customer_greeting", RESPONSE,
+                                                            bypass_cache=True):
+                if ttft is None and event["type"] == "token":
+                    ttft = time.perf_counter() - t0
+            return ttft, time.perf_counter() - t0
+
+        blocking_totals = await asyncio.gather(*(blocking(s) for s in session_ids))
+        streamed = await asyncio.gather(*(streaming(s) for s in session_ids))
+        llm_stats = agent.get_llm_stats()
+        await agent.aclose()
+
+    print(f"submissions:              {concurrency}")
+    print(f"fake LLM first token:     {latency:.3f}s, then {token_interval * 1000:.0f}ms per word")
+    report("blocking first feedback", blocking_totals)
+    report("streaming first token", [ttft for ttft, _ in streamed])
+    report("streaming total", [total for _, total in streamed])
+    print(f"LLM stream ttft p50:      {llm_stats['stream_ttft_ms']['p50']:.1f}ms over {llm_stats['streams']} streams")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--token-interval", type=float, default=0.03)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.concurrency, args.latency, args.token_interval))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: structured feedback parsing, repair and completion budget
+
+Parses --completions synthetic completions in each shape the LLM returns
+them (valid JSON, fenced, wrapped in text, trailing commas, cut off at
+max_tokens, prose) and reports parse time and how many still yield a
+rubric. Then compares the schema-sized max_tokens for every scenario
+checklist with the 200 tokens free-text feedback was given.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add repository root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agent.feedback_schema import FeedbackFormatError, FeedbackParser, feedback_max_tokens
+from src.agent.training_scenarios import SCENARIO_CHECKLISTS
+
+
+FREE_TEXT_MAX_TOKENS = 200
+
+STRENGTHS = ["Warm, immediate greeting", "Good eye contact", "Confirmed the allergy twice", "Stayed calm"]
+IMPROVEMENTS = ["Mention the expected wait time", "Offer a menu while they wait",
+                "Suggest a pairing with the main", "Check back after two minutes"]
+
+
+def completion(rng: random.Random, criteria: int) -> str:
+    return json.dumps({
+        "scores": [rng.randint(0, 5) for _ in range(criteria)],
+        "strengths": rng.sample(STRENGTHS, 2),
+        "improvements": rng.sample(IMPROVEMENTS, 2),
+        "summary": "A friendly start; set expectations on the wait next time."
+    })
+
+
+SHAPES = {
+    "valid": lambda text, rng: text,
+    "fenced": lambda text, rng: f"```json\n{text}\n```",
+    "wrapped": lambda text, rng: f"Here is my evaluation:\n{text}\nKeep it up!",
+    "trailing_comma": lambda text, rng: text.replace("]", ",]"),
+    "truncated": lambda text, rng: text[:rng.randint(len(text) // 3, len(text) - 2)],
+    "prose": lambda text, rng: "Warm greeting. Next time, mention the wait and offer a menu.",
+}
+
+
+def bench_shape(name: str, count: int, seed: int) -> None:
+    rng = random.Random(seed)
+    checklists = list(SCENARIO_CHECKLISTS.values())
+    cases = []
+    for _ in range(count):
+        criteria = rng.choice(checklists)
+        cases.append((SHAPES[name](completion(rng, len(criteria)), rng), criteria))
+
+    parser = FeedbackParser()
+    timings = []
+    rubrics = failed = 0
+    for content, criteria in cases:
+        started = time.perf_counter()
+        try:
+            feedback = parser.parse(content, criteria)
+        except FeedbackFormatError:
+            failed += 1
+        else:
+            rubrics += bool(feedback.scores)
+        timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    print(f"{name:<15} p50 {statistics.median(timings) * 1e6:7.1f}us   p99 {timings[int(0.99 * (count - 1))] * 1e6:7.1f}us   "
+          f"with rubric {rubrics / count:6.1%}   unusable {failed / count:6.1%}")
+
+
+def main(args: argparse.Namespace) -> None:
+    print(f"{args.completions} completions per shape")
+    for name in SHAPES:
+        bench_shape(name, args.completions, args.seed)
+
+    budgets = [feedback_max_tokens(len(criteria)) for criteria in SCENARIO_CHECKLISTS.values()]
+    print(f"\nmax_tokens per feedback: free text {FREE_TEXT_MAX_TOKENS}   "
+          f"structured {min(budgets)}-{max(budgets)} (mean {statistics.mean(budgets):.0f}, "
+          f"{1 - statistics.mean(budgets) / FREE_TEXT_MAX_TOKENS:.0%} lower)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--completions", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    main(args)
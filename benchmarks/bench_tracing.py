@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark: overhead of tracing an agent method
+
+Awaits a trivial coroutine method --calls times, undecorated and under
+@traced with tracing disabled, with traces sampled at 0% and at 100%
+(with a nested child span, exported to a file in a temporary directory),
+and reports the added cost per call.
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add repository root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agent.tracing import FileSpanExporter, Tracer, traced
+
+
+class Worker:
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+
+    async def plain(self) -> int:
+        return 1
+
+    @traced("bench.traced")
+    async def traced(self) -> int:
+        with self.tracer.span("bench.child"):
+            return 1
+
+
+async def per_call_ns(method, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        await method()
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "traces.jsonl"
+        modes = {
+            "disabled": Tracer(),
+            "sampled 0%": Tracer(enabled=True, sample_rate=0.0),
+            "sampled 100%": Tracer(enabled=True, sample_rate=1.0, exporter=FileSpanExporter(str(path))),
+        }
+        baseline = await per_call_ns(Worker(Tracer()).plain, args.calls)
+        print(f"{'undecorated':<14} {baseline:8.0f}ns per call")
+        for label, tracer in modes.items():
+            cost = await per_call_ns(Worker(tracer).traced, args.calls)
+            print(f"{label:<14} {cost:8.0f}ns per call   (+{cost - baseline:.0f}ns)")
+            tracer.close()
+        print(f"{sum(1 for _ in path.open())} spans written")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
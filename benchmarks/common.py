@@ -0,0 +1,87 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+
+# Add repository root to path, and tests for the fake LLM server
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "tests"))
+
+from src.agent import WaiterTrainingAgent
+from src.agent.model_backends import ModelBackend
+
+
+BENCH_CONFIG: Dict[str, Any] = {
+    "agent": {"name": "Benchmark Agent"},
+    "training": {
+        "difficulty_levels": ["beginner", "intermediate", "advanced"],
+        "scenario_categories": [
+            "customer_greeting",
+            "menu_knowledge",
+            "order_taking",
+            "upselling",
+            "problem_resolution",
+            "service_recovery"
+        ]
+    },
+    "ai": {
+        "model": "fake-model",
+        "temperature": 0.7,
+        "openai_api_key": "bench-key"
+    },
+    "logging": {"level": "WARNING"}
+}
+
+
+def build_agent(**sections: Dict[str, Any]) -> WaiterTrainingAgent:
+    """Build an agent from the benchmark config, merging any overridden sections"""
+    config = {key: dict(value) for key, value in BENCH_CONFIG.items()}
+    for section, overrides in sections.items():
+        config.setdefault(section, {}).update(overrides)
+
+    with tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False) as config_file:
+        yaml.safe_dump(config, config_file)
+
+    return WaiterTrainingAgent(config_file.name)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * (len(ordered) - 1)))]
+
+
+async def measure_backend(backend: ModelBackend, requests: List[List[Dict[str, str]]],
+                          concurrency: int, **params: Any) -> Dict[str, float]:
+    """
+    Send every request in ``requests`` through a model backend, ``concurrency`` at a time
+
+    Returns completions per second and latency percentiles in
+    milliseconds, so every backend is measured the same way.
+    """
+    await backend.start()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def send(messages: List[Dict[str, str]]) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await backend.complete("bench-model", messages, **params)
+            latencies.append(time.perf_counter() - started)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(send(messages) for messages in requests))
+    wall = time.perf_counter() - wall_start
+    return {
+        "throughput": len(requests) / wall,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000
+    }
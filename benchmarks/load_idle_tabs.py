@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Load test: request volume from idle-but-open training tabs, polling vs push
+
+Polling tabs fetch /api/session-status every --interval seconds, as the old
+page did. Push tabs hold one /api/session-events stream open and receive
+only keepalive comments while nothing changes. Both run for --duration
+seconds against the web app served by uvicorn on a local port.
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from common import build_agent
+from fake_llm_server import _free_port
+
+import web_app
+
+
+class Tally:
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.errors = 0
+
+
+async def polling_tab(client: httpx.AsyncClient, session_id: str, interval: float, deadline: float,
+                      tally: Tally) -> None:
+    # Tabs were opened at different times, so their timers are out of phase
+    await asyncio.sleep(random.uniform(0, interval))
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.get(f"/api/session-status/{session_id}")
+            tally.bytes += len(response.content)
+        except httpx.HTTPError:
+            tally.errors += 1
+        tally.requests += 1
+        await asyncio.sleep(interval)
+
+
+async def push_tab(client: httpx.AsyncClient, session_id: str, tally: Tally) -> None:
+    tally.requests += 1
+    try:
+        async with client.stream("GET", f"/api/session-events/{session_id}") as response:
+            async for chunk in response.aiter_bytes():
+                tally.bytes += len(chunk)
+    except httpx.HTTPError:
+        tally.errors += 1
+
+
+async def run_mode(mode: str, base_url: str, session_ids: list, interval: float, duration: float) -> None:
+    tally = Tally()
+    limits = httpx.Limits(max_connections=len(session_ids) + 10, max_keepalive_connections=len(session_ids) + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        deadline = wall_start + duration
+        if mode == "polling":
+            tabs = [polling_tab(client, s, interval, deadline, tally) for s in session_ids]
+        else:
+            tabs = [push_tab(client, s, tally) for s in session_ids]
+        tasks = [asyncio.ensure_future(tab) for tab in tabs]
+        await asyncio.sleep(max(0.0, deadline - time.perf_counter()))
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        cpu = time.process_time() - cpu_start
+
+    # Every tab makes one request when it opens; what matters is what follows
+    repeat = max(0, tally.requests - len(session_ids))
+    print(f"{mode:<8} requests {tally.requests:7d}   repeat {repeat / duration * 60:8.0f}/min   "
+          f"bytes {tally.bytes:10d}   errors {tally.errors:4d}   process cpu {cpu:6.1f}s")
+
+
+async def run(tabs: int, interval: float, duration: float, modes: list) -> None:
+    agent = build_agent(sessions={"max_sessions": tabs * 2})
+    session_ids = [await agent.start_training_session(f"Trainee {i}") for i in range(tabs)]
+    web_app.agent = agent
+
+    # The benchmark agent is installed directly, so skip the app's startup hook
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        web_app.app, host="127.0.0.1", port=port, log_level="warning", lifespan="off", backlog=tabs
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    print(f"idle tabs: {tabs}, poll interval {interval:.0f}s, keepalive "
+          f"{web_app.EVENT_KEEPALIVE_SECONDS:.0f}s, {duration:.0f}s per mode")
+    try:
+        for mode in modes:
+            await run_mode(mode, f"http://127.0.0.1:{port}", session_ids, interval, duration)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        await agent.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tabs", type=int, default=5000)
+    parser.add_argument("--interval", type=float, default=30.0)
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--mode", choices=["polling", "push", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ["polling", "push"] if args.mode == "both" else [args.mode]
+    asyncio.run(run(args.tabs, args.interval, args.duration, modes))
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Load test: concurrent trainees running full training sessions over HTTP
+
+Each simulated trainee runs start-session, then get-scenario and
+submit-response --responses times, then end-session, with --concurrency
+trainees in flight until --sessions sessions have finished. The web app is
+served by uvicorn on a local port against the fake LLM server, whose
+latency follows --latency-distribution (lognormal by default, for a
+provider-like tail).
+
+Reports throughput, p50/p95/p99 latency per endpoint and per session, and
+the memory a live session retains (traced allocations while
+--memory-sessions sessions are held open). With --save-baseline the
+results are stored in benchmarks/baselines/; later runs with the same
+parameters are compared against them and, with --check, exit non-zero
+when throughput, tail latency or memory regress beyond --tolerance.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import random
+import resource
+import ssl
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import httpx
+import uvicorn
+
+from common import build_agent, percentile
+from fake_llm_server import LATENCY_DISTRIBUTIONS, FakeLLMServer, _free_port
+
+import web_app
+
+
+BASELINES = Path(__file__).parent / "baselines" / "load_training_flow.json"
+
+ANSWERS = [
+    "Good evening and welcome! Do you have a reservation with us tonight?",
+    "I'm sorry about the wait, let me check with the kitchen and update you right away.",
+    "Our special tonight is the grilled salmon; it pairs well with the house white.",
+    "Let me repeat that back: one risotto, no parmesan, and a side salad with dressing on the side.",
+    "Would you like to see the dessert menu? The chocolate torte is made in house.",
+]
+
+# Parameters that must match for two runs to be comparable
+PROFILE_KEYS = ("sessions", "concurrency", "responses", "latency", "latency_distribution", "latency_spread",
+                "llm_feedback", "memory_sessions", "seed")
+
+
+def distribution(seconds: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(seconds, 50) * 1000, 2),
+        "p95": round(percentile(seconds, 95) * 1000, 2),
+        "p99": round(percentile(seconds, 99) * 1000, 2)
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors = 0
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[label].append(time.perf_counter() - started)
+        if response.status_code != 200:
+            self.errors += 1
+            raise RuntimeError(f"{label} returned {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+
+async def trainee(client: httpx.AsyncClient, recorder: Recorder, number: int, responses: int,
+                  rng: random.Random, end: bool = True) -> str:
+    """One trainee's session, from start to end"""
+    started = time.perf_counter()
+    session = await recorder.call(client, "POST /api/start-session", "POST", "/api/start-session",
+                                  json={"waiter_name": f"Trainee {number}"})
+    session_id = session["session_id"]
+    for turn in range(responses):
+        scenario = await recorder.call(client, "GET /api/get-scenario/{session_id}", "GET",
+                                       f"/api/get-scenario/{session_id}")
+        await recorder.call(client, "POST /api/submit-response", "POST", "/api/submit-response", json={
+            "session_id": session_id,
+            "scenario_category": scenario["category"],
+            # Trainees word their answers differently, so most miss the feedback cache
+            "response": f"{rng.choice(ANSWERS)} (trainee {number}, turn {turn})"
+        })
+    if end:
+        await recorder.call(client, "POST /api/end-session/{session_id}", "POST", f"/api/end-session/{session_id}")
+        recorder.latencies["session"].append(time.perf_counter() - started)
+    return session_id
+
+
+async def run_load(connect: Callable[[], httpx.AsyncClient], sessions: int, concurrency: int, responses: int,
+                   seed: int) -> Dict[str, Any]:
+    """
+    Run ``sessions`` full sessions, ``concurrency`` at a time, and summarize them
+
+    Each trainee gets its own client from ``connect``, as each browser has
+    its own connections.
+    """
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def run_one(number: int) -> None:
+        nonlocal failed
+        async with semaphore:
+            try:
+                async with connect() as client:
+                    await trainee(client, recorder, number, responses, random.Random(seed * 100003 + number))
+            except (RuntimeError, httpx.HTTPError):
+                failed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_one(number) for number in range(sessions)))
+    elapsed = time.perf_counter() - started
+
+    requests = sum(len(values) for label, values in recorder.latencies.items() if label != "session")
+    return {
+        "duration_s": round(elapsed, 3),
+        "requests": requests,
+        "failed_sessions": failed,
+        "errors": recorder.errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "sessions_per_s": round((sessions - failed) / elapsed, 2),
+        "latency_ms": {label: distribution(values) for label, values in sorted(recorder.latencies.items())}
+    }
+
+
+async def measure_session_memory(connect: Callable[[], httpx.AsyncClient], count: int, responses: int,
+                                 seed: int) -> Dict[str, Any]:
+    """Allocations retained per live session, while ``count`` sessions with ``responses`` answers each are open"""
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(50)
+
+    async def open_one(number: int) -> str:
+        async with semaphore, connect() as client:
+            return await trainee(client, recorder, number, responses, random.Random(seed + number), end=False)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        session_ids = await asyncio.gather(*(open_one(number) for number in range(count)))
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    async with connect() as client:
+        for session_id in session_ids:
+            await recorder.call(client, "end", "POST", f"/api/end-session/{session_id}")
+    return {"sessions": count, "bytes_per_session": round(retained / count)}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of ``results`` against ``baseline`` beyond ``tolerance``, as messages"""
+    regressions = []
+    if results["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {results['throughput_rps']:.1f} req/s, "
+                           f"baseline {baseline['throughput_rps']:.1f}")
+    for label, latency in results["latency_ms"].items():
+        before = baseline["latency_ms"].get(label)
+        if before and latency["p95"] > before["p95"] * (1 + tolerance):
+            regressions.append(f"{label} p95 {latency['p95']:.1f}ms, baseline {before['p95']:.1f}ms")
+    memory, before = results.get("memory", {}), baseline.get("memory", {})
+    if before and memory and memory["bytes_per_session"] > before["bytes_per_session"] * (1 + tolerance):
+        regressions.append(f"memory {memory['bytes_per_session']} bytes/session, "
+                           f"baseline {before['bytes_per_session']}")
+    if results["errors"] > baseline["errors"]:
+        regressions.append(f"{results['errors']} errors, baseline {baseline['errors']}")
+    return regressions
+
+
+def report(results: Dict[str, Any]) -> None:
+    print(f"{results['requests']} requests in {results['duration_s']:.1f}s: {results['throughput_rps']:.1f} req/s, "
+          f"{results['sessions_per_s']:.1f} sessions/s, {results['errors']} errors, "
+          f"{results['failed_sessions']} failed sessions")
+    for label, latency in results["latency_ms"].items():
+        print(f"  {label:<36} p50 {latency['p50']:8.1f}ms   p95 {latency['p95']:8.1f}ms   p99 {latency['p99']:8.1f}ms")
+    memory = results.get("memory")
+    if memory:
+        print(f"memory: {memory['bytes_per_session']} bytes per live session ({memory['sessions']} held open), "
+              f"peak RSS {results['peak_rss_mb']:.0f}MB")
+
+
+async def drive(base_url: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """The trainees' side: a warm-up, the timed run and the memory measurement"""
+    # Building a client builds an SSL context unless it is given one, which costs more than a request
+    context = ssl.create_default_context()
+
+    def connect() -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url=base_url, timeout=120, verify=context)
+
+    await run_load(connect, min(args.sessions, args.concurrency), args.concurrency, 1, args.seed + 1)
+    results = await run_load(connect, args.sessions, args.concurrency, args.responses, args.seed)
+    if args.memory_sessions:
+        results["memory"] = await measure_session_memory(connect, args.memory_sessions, args.responses, args.seed)
+    return results
+
+
+async def main(args: argparse.Namespace) -> int:
+    profile = {key: getattr(args, key) for key in PROFILE_KEYS}
+    with FakeLLMServer(latency=args.latency, latency_distribution=args.latency_distribution,
+                       latency_spread=args.latency_spread, seed=args.seed) as llm:
+        agent = build_agent(
+            ai={"base_url": llm.base_url},
+            scoring={"llm_feedback": args.llm_feedback},
+            sessions={"max_sessions": max(10000, args.memory_sessions * 2)}
+        )
+        await agent.start()
+        web_app.agent = agent
+
+        # The app and agent share this event loop, as in a real worker; the
+        # trainees get their own loop in a thread so that driving the load
+        # does not queue behind the requests it makes. The benchmark agent
+        # is installed directly, so skip the app's startup hook.
+        port = _free_port()
+        server = uvicorn.Server(uvicorn.Config(
+            web_app.app, host="127.0.0.1", port=port, log_level="warning", lifespan="off",
+            backlog=max(2048, args.concurrency * 2)
+        ))
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+
+        print(f"{args.sessions} sessions of {args.responses} responses, {args.concurrency} trainees at a time; "
+              f"fake LLM {args.latency_distribution} latency {args.latency:.2f}s (spread {args.latency_spread:g})")
+        try:
+            results = await asyncio.to_thread(asyncio.run, drive(f"http://127.0.0.1:{port}", args))
+        finally:
+            server.should_exit = True
+            await serving
+            await agent.aclose()
+    # ru_maxrss is in kilobytes on Linux
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    report(results)
+
+    baselines = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+    if args.save_baseline:
+        baselines[args.baseline_name] = {"profile": profile, "results": results}
+        BASELINES.parent.mkdir(parents=True, exist_ok=True)
+        BASELINES.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"baseline {args.baseline_name!r} saved to {BASELINES}")
+        return 0
+
+    baseline = baselines.get(args.baseline_name)
+    if baseline is None:
+        print(f"no baseline {args.baseline_name!r} to compare with; run with --save-baseline")
+        return 0
+    if baseline["profile"] != profile:
+        print(f"baseline {args.baseline_name!r} was recorded with {baseline['profile']}; not comparable")
+        return 0
+    regressions = compare(results, baseline["results"], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    if not regressions:
+        print(f"within {args.tolerance:.0%} of baseline {args.baseline_name!r}")
+    return 1 if regressions and args.check else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--responses", type=int, default=3, help="scenarios answered per session")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM latency in seconds (median for lognormal)")
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-spread", type=float, default=0.5,
+                        help="lognormal shape, or +/- seconds for uniform")
+    parser.add_argument("--llm-feedback", choices=["sync", "async", "off"], default="sync")
+    parser.add_argument("--memory-sessions", type=int, default=200, help="sessions held open to measure memory; 0 to skip")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline-name", default="default")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression as a fraction of the baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 when a regression is found")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Stress test: create 1M training sessions concurrently without ID collisions
+
+Threads, each running its own event loop, start sessions on one shared agent
+at the same time; a collision would overwrite an existing session, so the
+live session count must equal the number created. Separate processes then
+generate IDs in parallel to check uniqueness across workers too.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import threading
+import time
+from typing import List
+
+from common import build_agent
+
+from src.utils.ids import generate_session_id
+
+
+def _generate_ids(count: int) -> List[str]:
+    return [generate_session_id() for _ in range(count)]
+
+
+def main(sessions: int, threads: int, processes: int, chunk: int) -> None:
+    agent = build_agent()
+    per_thread = sessions // threads
+    created: List[List[str]] = [[] for _ in range(threads)]
+
+    def create_sessions(bucket: List[str]) -> None:
+        async def run() -> None:
+            for start in range(0, per_thread, chunk):
+                ids = await asyncio.gather(*(
+                    agent.start_training_session(f"Jamie Doe {i}")
+                    for i in range(start, min(start + chunk, per_thread))
+                ))
+                bucket.extend(ids)
+
+        asyncio.run(run())
+
+    t0 = time.perf_counter()
+    workers = [threading.Thread(target=create_sessions, args=(bucket,)) for bucket in created]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - t0
+
+    all_ids = [session_id for bucket in created for session_id in bucket]
+    unique = len(set(all_ids))
+    in_order = all(bucket == sorted(bucket) for bucket in created)
+    print(f"sessions created:     {len(all_ids)} across {threads} threads in {elapsed:.1f}s")
+    print(f"unique IDs:           {unique}")
+    print(f"live sessions:        {len(agent.active_sessions)}")
+    print(f"time-ordered:         {in_order}")
+    del created, all_ids
+
+    t0 = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        batches = pool.map(_generate_ids, [sessions // processes] * processes)
+    elapsed = time.perf_counter() - t0
+    process_ids = [session_id for batch in batches for session_id in batch]
+    print(f"cross-process IDs:    {len(process_ids)} from {processes} processes in {elapsed:.1f}s")
+    print(f"cross-process unique: {len(set(process_ids))}")
+
+    ok = unique == sessions and len(agent.active_sessions) == sessions and len(set(process_ids)) == len(process_ids)
+    print("PASS" if ok else "FAIL")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--chunk", type=int, default=1000, help="sessions started together per gather")
+    args = parser.parse_args()
+
+    main(args.sessions, args.threads, args.processes, args.chunk)
@@ -0,0 +1,252 @@
+let currentSessionId = null;
+let sessionStartTime = null;
+let feedbackSocket = null;
+let statsSource = null;
+let durationTimer = null;
+
+function openStatsSource() {
+    // The server pushes a stats event whenever the session changes
+    statsSource = new EventSource(`/api/session-events/${currentSessionId}`);
+    statsSource.addEventListener('stats', (message) => {
+        const data = JSON.parse(message.data);
+        document.getElementById('currentScore').textContent = Math.round(data.current_score);
+        document.getElementById('scenariosCompleted').textContent = data.scenarios_completed.length;
+    });
+    // LLM feedback generated after the response was scored
+    statsSource.addEventListener('feedback', (message) => {
+        const data = JSON.parse(message.data);
+        document.getElementById('feedbackText').textContent = data.feedback;
+        renderRubric(data.rubric);
+    });
+    statsSource.addEventListener('ended', () => statsSource.close());
+}
+
+function renderRubric(rubric) {
+    // One line per checklist point the LLM scored
+    const list = document.getElementById('rubricList');
+    list.replaceChildren();
+    if (!rubric) {
+        return;
+    }
+    for (const item of rubric.criteria) {
+        const row = document.createElement('li');
+        const criterion = document.createElement('span');
+        const score = document.createElement('strong');
+        criterion.textContent = item.criterion;
+        score.textContent = `${item.score}/${rubric.max_score}`;
+        row.append(criterion, score);
+        list.appendChild(row);
+    }
+}
+
+function openFeedbackSocket() {
+    const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    feedbackSocket = new WebSocket(`${protocol}://${window.location.host}/ws/${currentSessionId}`);
+    feedbackSocket.onmessage = (message) => handleFeedbackEvent(JSON.parse(message.data));
+    feedbackSocket.onclose = () => { feedbackSocket = null; };
+}
+
+function handleFeedbackEvent(event) {
+    const feedbackText = document.getElementById('feedbackText');
+    if (event.type === 'token') {
+        feedbackText.textContent += event.text;
+    } else if (event.type === 'error') {
+        feedbackText.textContent = event.message;
+    } else if (event.type === 'score') {
+        document.getElementById('newScore').textContent = `Score: ${event.score}`;
+    } else if (event.type === 'next_scenario') {
+        document.getElementById('nextScenario').textContent = `Next: ${event.next_scenario}`;
+        document.getElementById('scoreDisplay').classList.remove('hidden');
+    } else if (event.type === 'done') {
+        feedbackText.textContent = event.feedback;
+        document.getElementById('responseForm').classList.add('hidden');
+        setTimeout(() => {
+            getNextScenario();
+        }, 3000);
+    }
+}
+
+async function startTraining() {
+    const waiterName = document.getElementById('waiterName').value.trim();
+    const difficultyLevel = document.getElementById('difficultyLevel').value;
+
+    if (!waiterName) {
+        alert('Please enter a waiter name');
+        return;
+    }
+
+    try {
+        const response = await fetch('/api/start-session', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                waiter_name: waiterName,
+                difficulty_level: difficultyLevel
+            })
+        });
+
+        if (response.ok) {
+            const data = await response.json();
+            currentSessionId = data.session_id;
+            sessionStartTime = Date.now();
+
+            document.getElementById('trainingArea').style.display = 'block';
+            document.getElementById('sessionForm').style.display = 'none';
+            openFeedbackSocket();
+            openStatsSource();
+
+            // Get first scenario
+            await getNextScenario();
+
+            // Start timer
+            updateDuration();
+            durationTimer = setInterval(updateDuration, 30000); // Update every 30 seconds
+        } else {
+            alert('Failed to start training session');
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        alert('Error starting training session');
+    }
+}
+
+async function getNextScenario() {
+    if (!currentSessionId) return;
+
+    try {
+        const response = await fetch(`/api/get-scenario/${currentSessionId}`);
+        if (response.ok) {
+            const data = await response.json();
+
+            document.getElementById('scenarioCategory').textContent = 
+                data.category.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
+            document.getElementById('scenarioPrompt').textContent = data.prompt;
+            document.getElementById('scenarioDisplay').classList.remove('hidden');
+            document.getElementById('responseForm').classList.remove('hidden');
+            document.getElementById('feedbackDisplay').style.display = 'none';
+            document.getElementById('scoreDisplay').classList.add('hidden');
+        }
+    } catch (error) {
+        console.error('Error getting scenario:', error);
+    }
+}
+
+async function submitResponse() {
+    if (!currentSessionId) return;
+
+    const response = document.getElementById('waiterResponse').value.trim();
+    if (!response) {
+        alert('Please enter a response');
+        return;
+    }
+
+    const scenarioCategory = document.getElementById('scenarioCategory').textContent.toLowerCase().replace(/\s+/g, '_');
+
+    // Stream feedback over the socket when it is open
+    if (feedbackSocket && feedbackSocket.readyState === WebSocket.OPEN) {
+        document.getElementById('feedbackText').textContent = '';
+        renderRubric(null);
+        document.getElementById('feedbackDisplay').style.display = 'block';
+        document.getElementById('waiterResponse').value = '';
+        feedbackSocket.send(JSON.stringify({
+            scenario_category: scenarioCategory,
+            response: response
+        }));
+        return;
+    }
+
+    try {
+        const apiResponse = await fetch('/api/submit-response', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                session_id: currentSessionId,
+                scenario_category: scenarioCategory,
+                response: response
+            })
+        });
+
+        if (apiResponse.ok) {
+            const data = await apiResponse.json();
+
+            // Show feedback
+            document.getElementById('feedbackText').textContent = data.feedback;
+            renderRubric(data.rubric);
+            document.getElementById('feedbackDisplay').style.display = 'block';
+
+            // Show score update
+            document.getElementById('newScore').textContent = `Score: ${data.score}`;
+            document.getElementById('nextScenario').textContent = `Next: ${data.next_scenario}`;
+            document.getElementById('scoreDisplay').classList.remove('hidden');
+
+            // Clear response
+            document.getElementById('waiterResponse').value = '';
+
+            // Hide response form temporarily
+            document.getElementById('responseForm').classList.add('hidden');
+
+            // Show next scenario after a delay
+            setTimeout(() => {
+                getNextScenario();
+            }, 3000);
+        }
+    } catch (error) {
+        console.error('Error submitting response:', error);
+        alert('Error submitting response');
+    }
+}
+
+async function endSession() {
+    if (!currentSessionId) return;
+
+    try {
+        const response = await fetch(`/api/end-session/${currentSessionId}`, {
+            method: 'POST'
+        });
+        if (response.ok) {
+            const data = await response.json();
+            alert(`Training session ended!\nFinal Score: ${data.final_score}\nScenarios Completed: ${data.scenarios_completed.length}\nDuration: ${data.duration_minutes} minutes`);
+
+            // Reset interface
+            resetInterface();
+        }
+    } catch (error) {
+        console.error('Error ending session:', error);
+    }
+}
+
+function updateDuration() {
+    if (!currentSessionId || !sessionStartTime) return;
+
+    const duration = Math.round((Date.now() - sessionStartTime) / 60000);
+    document.getElementById('sessionDuration').textContent = duration;
+}
+
+function resetInterface() {
+    if (feedbackSocket) {
+        feedbackSocket.close();
+    }
+    if (statsSource) {
+        statsSource.close();
+        statsSource = null;
+    }
+    clearInterval(durationTimer);
+    durationTimer = null;
+    currentSessionId = null;
+    sessionStartTime = null;
+
+    document.getElementById('trainingArea').style.display = 'none';
+    document.getElementById('sessionForm').style.display = 'grid';
+    document.getElementById('waiterName').value = '';
+    document.getElementById('difficultyLevel').value = 'beginner';
+
+    // Hide all training elements
+    document.getElementById('scenarioDisplay').classList.add('hidden');
+    document.getElementById('responseForm').classList.add('hidden');
+    document.getElementById('feedbackDisplay').style.display = 'none';
+    document.getElementById('scoreDisplay').classList.add('hidden');
+}
@@ -3,6 +3,7 @@
 Main entry point for the Waiter Training Agent
 """
 
+import argparse
 import asyncio
 import sys
 from pathlib import Path
@@ -11,6 +12,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from src.agent import WaiterTrainingAgent
+from src.agent.batch_grading import BatchGrader, read_responses
 from src.utils.helpers import ensure_directories, validate_config
 
 
@@ -37,7 +39,11 @@ async def main():
         print(f"Difficulty levels: {', '.join(agent.get_difficulty_levels())}")
         
         # Interactive demo mode
-        await interactive_demo(agent)
+        await agent.start()
+        try:
+            await interactive_demo(agent)
+        finally:
+            await agent.aclose()
         
     except Exception as e:
         print(f"❌ Error initializing agent: {e}")
@@ -71,7 +77,7 @@ async def interactive_demo(agent: WaiterTrainingAgent):
         print("\n" + "=" * 50)
         
         # Get current session status
-        status = agent.get_session_status(session_id)
+        status = await agent.get_session_status(session_id)
         if not status:
             print("❌ Session not found!")
             break
@@ -125,9 +131,61 @@ async def interactive_demo(agent: WaiterTrainingAgent):
     print("\n🎉 Training session completed! Thank you for using the Waiter Training Agent.")
 
 
+async def grade_archive(args: argparse.Namespace):
+    """Grade an archive of responses without a trainee at the keyboard"""
+    ensure_directories({})
+    agent = WaiterTrainingAgent(args.config)
+    await agent.start()
+    
+    checkpoint = None if args.no_checkpoint else Path(args.checkpoint or f"{args.output}.checkpoint")
+    if checkpoint and args.restart and checkpoint.exists():
+        checkpoint.unlink()
+    
+    grader = BatchGrader(
+        agent,
+        workers=args.workers,
+        max_retries=args.max_retries,
+        default_difficulty=args.difficulty,
+        bypass_cache=args.no_cache
+    )
+    try:
+        records = read_responses(Path(args.input), args.format, args.table)
+        stats = await grader.run(records, Path(args.output), checkpoint)
+    finally:
+        await agent.aclose()
+    
+    if stats["resumed_from"]:
+        print(f"↩️  Resumed after {stats['resumed_from']} records")
+    print(f"✅ Graded {stats['graded']} responses ({stats['failed']} failed) in {stats['elapsed_seconds']:.1f}s")
+    print(f"Retries: {stats['retries']} (rate limited {stats['rate_limited']} times)")
+    print(f"Results written to {args.output}")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Waiter Training Agent")
+    subcommands = parser.add_subparsers(dest="command")
+    
+    grade = subcommands.add_parser("grade", help="Grade archived responses from JSONL, CSV or SQLite")
+    grade.add_argument("input", help="file of responses with scenario_category and response fields")
+    grade.add_argument("-o", "--output", required=True, help="JSONL file for the graded results")
+    grade.add_argument("--format", choices=["jsonl", "csv", "sqlite"], help="input format (default: from suffix)")
+    grade.add_argument("--table", default="responses", help="table to read from a SQLite input")
+    grade.add_argument("--workers", type=int, default=8, help="responses graded at the same time")
+    grade.add_argument("--max-retries", type=int, default=5, help="retries for rate limits and timeouts")
+    grade.add_argument("--difficulty", default="beginner", help="difficulty for records without one")
+    grade.add_argument("--checkpoint", help="checkpoint file (default: OUTPUT.checkpoint)")
+    grade.add_argument("--no-checkpoint", action="store_true", help="do not checkpoint or resume")
+    grade.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    grade.add_argument("--no-cache", action="store_true", help="ask the LLM even for repeated responses")
+    grade.add_argument("--config", default="config/config.yaml")
+    
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(grade_archive(args) if args.command == "grade" else main())
     except KeyboardInterrupt:
         print("\n\n👋 Goodbye! Training session interrupted.")
     except Exception as e:
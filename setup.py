@@ -27,14 +27,13 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.11",
         "Topic :: Education",
         "Topic :: Scientific/Engineering :: Artificial Intelligence",
     ],
-    python_requires=">=3.8",
+    python_requires=">=3.9",
     install_requires=[
         "fastapi>=0.104.1",
         "uvicorn>=0.24.0",
@@ -50,6 +49,12 @@ setup(
         "pyyaml>=6.0",
     ],
     extras_require={
+        "local": [
+            "llama-cpp-python>=0.2.20",
+        ],
+        "redis": [
+            "redis>=5.0",
+        ],
         "dev": [
             "pytest>=7.4.3",
             "pytest-asyncio>=0.21.1",
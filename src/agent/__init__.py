@@ -1,5 +1,5 @@
 # Agent Package
-from .waiter_agent import WaiterTrainingAgent
+from .waiter_agent import WaiterTrainingAgent, TrainingSession
 from .training_scenarios import TrainingScenario
 
-__all__ = ["WaiterTrainingAgent", "TrainingScenario"] 
\ No newline at end of file
+__all__ = ["WaiterTrainingAgent", "TrainingSession", "TrainingScenario"] 
\ No newline at end of file
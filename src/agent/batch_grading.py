@@ -0,0 +1,264 @@
+"""
+Offline batch grading of archived waiter responses
+"""
+
+import asyncio
+import csv
+import json
+import os
+import random
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+
+import openai
+
+from .rate_limiter import retry_after_seconds
+
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Errors worth retrying; anything else fails the record straight away
+_TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class InvalidRecord:
+    """Placeholder for an input record that could not be parsed"""
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+Record = Union[Dict[str, Any], InvalidRecord]
+
+
+def read_jsonl(path: Path) -> Iterator[Record]:
+    with open(path, encoding="utf-8") as source:
+        for line_number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield InvalidRecord(f"line {line_number}: invalid JSON ({e.msg})")
+
+
+def read_csv(path: Path) -> Iterator[Record]:
+    with open(path, encoding="utf-8", newline="") as source:
+        yield from csv.DictReader(source)
+
+
+def read_sqlite(path: Path, table: str = "responses") -> Iterator[Record]:
+    if not _IDENTIFIER.match(table):
+        raise ValueError(f"Invalid table name: {table}")
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    connection.row_factory = sqlite3.Row
+    try:
+        for row in connection.execute(f'SELECT * FROM "{table}" ORDER BY rowid'):
+            yield dict(row)
+    finally:
+        connection.close()
+
+
+def read_responses(path: Path, format: Optional[str] = None, table: str = "responses") -> Iterator[Record]:
+    """Stream records from a JSONL, CSV or SQLite file, chosen by ``format`` or the file suffix"""
+    path = Path(path)
+    format = format or {
+        ".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv",
+        ".db": "sqlite", ".sqlite": "sqlite", ".sqlite3": "sqlite"
+    }.get(path.suffix.lower())
+
+    if format == "jsonl":
+        return read_jsonl(path)
+    if format == "csv":
+        return read_csv(path)
+    if format == "sqlite":
+        return read_sqlite(path, table)
+    raise ValueError(f"Cannot tell the format of {path}; pass jsonl, csv or sqlite")
+
+
+class BatchGrader:
+    """
+    Grades a stream of archived responses with the agent's feedback and scoring
+
+    Records are read lazily and at most ``window`` are in flight or waiting
+    to be written, so memory stays flat however large the input is. Results
+    are written as JSON lines in input order. The checkpoint records how
+    many records and output bytes are complete, so a rerun truncates any
+    partial output and resumes without duplicates.
+
+    The LLM client's governor already retries briefly within its queue
+    deadline; failures that outlast it are retried here with longer waits.
+    A rate-limit response pauses every worker until its Retry-After has
+    passed (or a jittered exponential backoff when none is given); timeouts
+    and server errors are retried the same way, up to ``max_retries``.
+    """
+
+    def __init__(self, agent: Any, workers: int = 8, window: Optional[int] = None, max_retries: int = 5,
+                 backoff: float = 1.0, max_backoff: float = 60.0, checkpoint_every: int = 100,
+                 default_difficulty: str = "beginner", bypass_cache: bool = False):
+        self.agent = agent
+        self.workers = workers
+        self.window = window or workers * 4
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.checkpoint_every = checkpoint_every
+        self.default_difficulty = default_difficulty
+        self.bypass_cache = bypass_cache
+
+        self._resume_at = 0.0
+        self.graded = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limited = 0
+
+    async def _wait_for_rate_limit(self) -> None:
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+        retry_after = retry_after_seconds(error)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    async def grade(self, position: int, record: Record) -> Dict[str, Any]:
+        """Grade one record, returning a result line with ``status`` ok or error"""
+        if isinstance(record, InvalidRecord):
+            return {"position": position, "status": "error", "error": record.message}
+
+        category = record.get("scenario_category") or record.get("category")
+        response = record.get("response")
+        difficulty = record.get("difficulty_level") or record.get("difficulty") or self.default_difficulty
+        result = {"position": position, "id": record.get("id"), "category": category, "difficulty": difficulty}
+        if not category or not response:
+            return {**result, "status": "error", "error": "record needs scenario_category and response"}
+        # Scoring is local, so a record it rejects costs no LLM call
+        try:
+            self.agent.check_category(category)
+            score = self.agent.score_response(category, response, difficulty)
+        except Exception as e:
+            return {**result, "status": "error", "error": str(e) or type(e).__name__}
+
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_rate_limit()
+            try:
+                feedback = await self.agent.fetch_feedback(
+                    category, response, difficulty, bypass_cache=self.bypass_cache
+                )
+            except openai.RateLimitError as e:
+                error: Exception = e
+                self.rate_limited += 1
+                # Everyone waits: the limit applies to the whole account
+                self._resume_at = max(self._resume_at, time.monotonic() + self._backoff(attempt, e))
+            except _TRANSIENT_ERRORS as e:
+                error = e
+                await asyncio.sleep(self._backoff(attempt, e))
+            except Exception as e:
+                return {**result, "status": "error", "error": str(e) or type(e).__name__}
+            else:
+                return {
+                    **result,
+                    "status": "ok",
+                    "feedback": feedback.to_text(),
+                    "rubric": feedback.to_rubric(),
+                    "score": score
+                }
+            if attempt < self.max_retries:
+                self.retries += 1
+
+        return {**result, "status": "error", "error": str(error) or type(error).__name__}
+
+    async def run(self, records: Iterable[Record], output_path: Path,
+                  checkpoint_path: Optional[Path] = None) -> Dict[str, Any]:
+        """Grade every record into ``output_path``, resuming from ``checkpoint_path`` if present"""
+        output_path = Path(output_path)
+        start, offset = 0, 0
+        if checkpoint_path is not None and Path(checkpoint_path).exists():
+            checkpoint = json.loads(Path(checkpoint_path).read_text(encoding="utf-8"))
+            start, offset = checkpoint["position"], checkpoint["output_offset"]
+
+        output = open(output_path, "r+b" if offset and output_path.exists() else "wb")
+        output.truncate(offset)
+        output.seek(offset)
+
+        window = asyncio.Semaphore(self.window)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.workers)
+        finished: Dict[int, Dict[str, Any]] = {}
+        next_position = start
+        started = time.perf_counter()
+
+        def save_checkpoint() -> None:
+            if checkpoint_path is None:
+                return
+            output.flush()
+            os.fsync(output.fileno())
+            temporary = Path(f"{checkpoint_path}.tmp")
+            temporary.write_text(json.dumps({
+                "position": next_position,
+                "output_offset": output.tell()
+            }), encoding="utf-8")
+            os.replace(temporary, checkpoint_path)
+
+        def write_ready() -> None:
+            # Results finish out of order; write them in input order
+            nonlocal next_position
+            while next_position in finished:
+                result = finished.pop(next_position)
+                output.write(json.dumps(result).encode("utf-8") + b"\n")
+                if result["status"] == "ok":
+                    self.graded += 1
+                else:
+                    self.failed += 1
+                next_position += 1
+                window.release()
+                if (next_position - start) % self.checkpoint_every == 0:
+                    save_checkpoint()
+
+        async def worker() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                position, record = item
+                try:
+                    finished[position] = await self.grade(position, record)
+                except Exception as e:
+                    # Every position must finish, or write_ready stalls and the window never reopens
+                    finished[position] = {"position": position, "status": "error",
+                                          "error": str(e) or type(e).__name__}
+                write_ready()
+
+        tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        try:
+            for position, record in enumerate(records):
+                if position < start:
+                    continue
+                await window.acquire()
+                await queue.put((position, record))
+            for _ in tasks:
+                await queue.put(None)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            save_checkpoint()
+            output.close()
+
+        return {
+            "resumed_from": start,
+            "processed": next_position,
+            "graded": self.graded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "elapsed_seconds": round(time.perf_counter() - started, 3)
+        }
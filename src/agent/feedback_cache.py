@@ -0,0 +1,188 @@
+"""
+Feedback cache for the Waiter Training Agent
+"""
+
+import random
+import re
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+# Universal hashing modulus for MinHash permutations
+_PRIME = (1 << 61) - 1
+_HASH_MASK = (1 << 32) - 1
+
+CacheKey = Tuple[str, str, str, str]
+
+
+def normalize_response(response: str) -> str:
+    """Normalize a waiter response so trivially different answers compare equal"""
+    text = unicodedata.normalize("NFKC", response).casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class MinHasher:
+    """MinHash signatures over character shingles, for estimating Jaccard similarity"""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        size = self.shingle_size
+        shingles = {zlib.crc32(text[i:i + size].encode()) for i in range(max(1, len(text) - size + 1))}
+        return tuple(
+            min(((a * shingle + b) % _PRIME) & _HASH_MASK for shingle in shingles)
+            for a, b in self._perms
+        )
+
+    @staticmethod
+    def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+@dataclass
+class _CacheEntry:
+    feedback: str
+    expires_at: float
+    signature: Optional[Tuple[int, ...]]
+
+
+class FeedbackCache:
+    """
+    Cache of generated feedback, scoped by scenario category, difficulty and prompt
+
+    ``prompt`` identifies the prompt, and so the format, the feedback was
+    generated with, such as a template version; feedback from one prompt
+    is never returned for another.
+
+    The exact tier matches normalized response text. The optional
+    similarity tier finds near-duplicate responses with MinHash signatures
+    indexed by LSH bands, accepting a match when the estimated Jaccard
+    similarity reaches ``similarity_threshold``. Entries expire after
+    ``ttl`` seconds and the least recently used are dropped beyond
+    ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600.0, similarity: bool = False,
+                 similarity_threshold: float = 0.8, num_perm: int = 64, band_rows: int = 4,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.band_rows = band_rows
+        self._clock = clock
+        self._hasher = MinHasher(num_perm) if similarity else None
+
+        self._entries: "OrderedDict[CacheKey, _CacheEntry]" = OrderedDict()
+        self._bands: Dict[Tuple[str, str, str, int, Tuple[int, ...]], Set[CacheKey]] = {}
+
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def _band_keys(self, category: str, difficulty: str, prompt: str, signature: Tuple[int, ...]):
+        rows = self.band_rows
+        for band in range(len(signature) // rows):
+            yield (category, difficulty, prompt, band, signature[band * rows:(band + 1) * rows])
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        if entry.signature is not None:
+            for band_key in self._band_keys(key[0], key[1], key[2], entry.signature):
+                members = self._bands.get(band_key)
+                if members is not None:
+                    members.discard(key)
+                    if not members:
+                        del self._bands[band_key]
+
+    def _live(self, key: CacheKey, now: float) -> Optional[_CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, category: str, difficulty: str, response: str, prompt: str = "") -> Optional[str]:
+        """Look up feedback for a response, or None on a miss"""
+        now = self._clock()
+        key = (category, difficulty, prompt, normalize_response(response))
+
+        entry = self._live(key, now)
+        if entry is not None:
+            self.exact_hits += 1
+            return entry.feedback
+
+        if self._hasher is not None:
+            signature = self._hasher.signature(key[3])
+            candidates: Set[CacheKey] = set()
+            for band_key in self._band_keys(category, difficulty, prompt, signature):
+                candidates.update(self._bands.get(band_key, ()))
+
+            best_key, best_score = None, self.similarity_threshold
+            for candidate in candidates:
+                candidate_entry = self._entries.get(candidate)
+                if candidate_entry is None or candidate_entry.expires_at <= now:
+                    continue
+                score = MinHasher.similarity(signature, candidate_entry.signature)
+                if score >= best_score:
+                    best_key, best_score = candidate, score
+
+            if best_key is not None:
+                self.similar_hits += 1
+                return self._live(best_key, now).feedback
+
+        self.misses += 1
+        return None
+
+    def put(self, category: str, difficulty: str, response: str, feedback: str, prompt: str = "") -> None:
+        """Store feedback generated for a response"""
+        key = (category, difficulty, prompt, normalize_response(response))
+        if key in self._entries:
+            self._remove(key)
+
+        signature = self._hasher.signature(key[3]) if self._hasher is not None else None
+        self._entries[key] = _CacheEntry(feedback, self._clock() + self.ttl, signature)
+        if signature is not None:
+            for band_key in self._band_keys(category, difficulty, prompt, signature):
+                self._bands.setdefault(band_key, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def record_bypass(self) -> None:
+        self.bypassed += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "similarity": self._hasher is not None,
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "hit_rate": round((self.exact_hits + self.similar_hits) / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,241 @@
+"""
+Structured feedback schema and parsing for the Waiter Training Agent
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, ConfigDict, ValidationError, field_validator
+
+
+MAX_SCORE = 5
+MAX_ITEMS = 2
+ITEM_WORDS = 12
+SUMMARY_WORDS = 25
+
+# Completion budget: JSON syntax and keys, then roughly 1.4 tokens per word
+# of text, and two tokens per criterion score
+_SYNTAX_TOKENS = 24
+_TOKENS_PER_WORD = 1.4
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class FeedbackFormatError(ValueError):
+    """Raised when a completion holds neither usable JSON nor usable text"""
+
+
+class StructuredFeedback(BaseModel):
+    """
+    Feedback as the LLM is asked to return it
+
+    ``scores`` rate each point of the scenario checklist from 0 to
+    ``MAX_SCORE``, in checklist order; ``criteria`` names those points and
+    is filled in from the checklist, not by the LLM. Feedback that could
+    only be read as prose has just a ``summary``.
+    """
+
+    model_config = ConfigDict(extra="ignore")
+
+    scores: List[int] = []
+    strengths: List[str] = []
+    improvements: List[str] = []
+    summary: str = ""
+    criteria: List[str] = []
+
+    @field_validator("scores", mode="before")
+    @classmethod
+    def _clamp_scores(cls, value: Any) -> List[int]:
+        if not isinstance(value, list):
+            return []
+        scores = []
+        for item in value:
+            try:
+                scores.append(min(MAX_SCORE, max(0, round(float(item)))))
+            except (TypeError, ValueError):
+                scores.append(0)
+        return scores
+
+    @field_validator("strengths", "improvements", mode="before")
+    @classmethod
+    def _clean_items(cls, value: Any) -> List[str]:
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            return []
+        return [str(item).strip() for item in value if str(item).strip()][:MAX_ITEMS]
+
+    @field_validator("summary", mode="before")
+    @classmethod
+    def _clean_summary(cls, value: Any) -> str:
+        return "" if value is None else str(value).strip()
+
+    @classmethod
+    def from_text(cls, text: str) -> "StructuredFeedback":
+        return cls(summary=text)
+
+    def to_text(self) -> str:
+        """Render as the prose stored in the session and shown to the trainee"""
+        parts = [self.summary] if self.summary else []
+        if self.strengths:
+            parts.append("Strengths: " + "; ".join(item.rstrip(".") for item in self.strengths) + ".")
+        if self.improvements:
+            parts.append("To improve: " + "; ".join(item.rstrip(".") for item in self.improvements) + ".")
+        return " ".join(parts)
+
+    def to_rubric(self) -> Dict[str, Any]:
+        return {
+            "criteria": [
+                {"criterion": criterion, "score": score} for criterion, score in zip(self.criteria, self.scores)
+            ],
+            "max_score": MAX_SCORE,
+            "strengths": self.strengths,
+            "improvements": self.improvements,
+            "summary": self.summary
+        }
+
+
+def feedback_max_tokens(criteria_count: int) -> int:
+    """``max_tokens`` for a structured completion covering ``criteria_count`` checklist points"""
+    words = 2 * MAX_ITEMS * ITEM_WORDS + SUMMARY_WORDS
+    return _SYNTAX_TOKENS + 2 * criteria_count + int(words * _TOKENS_PER_WORD)
+
+
+def schema_instructions(criteria_count: int) -> str:
+    """The reply format spelled out for the prompt"""
+    scores = (f"<{criteria_count} integers from 0 to {MAX_SCORE}, one per checklist point, in order>"
+              if criteria_count else "[]")
+    return (
+        "Reply with only a JSON object, no other text:\n"
+        f'{{"scores": {scores}, '
+        f'"strengths": [<up to {MAX_ITEMS}, at most {ITEM_WORDS} words each>], '
+        f'"improvements": [<up to {MAX_ITEMS} specific, actionable suggestions, at most {ITEM_WORDS} words each>], '
+        f'"summary": "<one encouraging sentence, at most {SUMMARY_WORDS} words>"}}'
+    )
+
+
+def _close_truncated(text: str) -> str:
+    """Close the strings, arrays and objects left open by a completion cut off at max_tokens"""
+    stack: List[str] = []
+    in_string = escaped = False
+    expect_key = False
+    key_start: Optional[int] = None
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+                key_start = None
+            continue
+        if char == '"':
+            in_string = True
+            key_start = index if expect_key else None
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            expect_key = char == "{"
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            expect_key = False
+        elif char == ",":
+            expect_key = bool(stack) and stack[-1] == "}"
+        elif char == ":":
+            expect_key = False
+
+    if in_string:
+        if key_start is not None:
+            # Cut off inside a key: drop the key
+            text = text[:key_start]
+        else:
+            text = text.rstrip("\\") + '"'
+    text = text.rstrip()
+    # Drop a key left without its value, and any dangling comma
+    text = re.sub(r'"[^"]*"\s*:\s*$', "", text).rstrip().rstrip(",")
+    return text + "".join(reversed(stack))
+
+
+def repair_json(content: str) -> Optional[Dict[str, Any]]:
+    """
+    Recover a JSON object from a malformed completion, or None
+
+    Handles Markdown code fences and text around the object, trailing
+    commas, and output truncated by ``max_tokens``.
+    """
+    start = content.find("{")
+    if start < 0:
+        return None
+    text = content[start:]
+    try:
+        data, _ = json.JSONDecoder().raw_decode(text)
+    except ValueError:
+        end = text.rfind("```")
+        if end > 0:
+            text = text[:end]
+        text = _close_truncated(_TRAILING_COMMA.sub(r"\1", text.strip()))
+        try:
+            data = json.loads(_TRAILING_COMMA.sub(r"\1", text))
+        except ValueError:
+            return None
+    return data if isinstance(data, dict) else None
+
+
+class FeedbackParser:
+    """Parses completions into StructuredFeedback, counting how each was read"""
+
+    def __init__(self):
+        self.valid = 0
+        self.repaired = 0
+        self.text_only = 0
+
+    def parse(self, content: str, criteria: Sequence[str]) -> StructuredFeedback:
+        """
+        Parse a completion for a scenario with the given checklist
+
+        Valid JSON is validated directly; malformed JSON goes through
+        ``repair_json``; anything else is kept as prose in ``summary``.
+        Scores beyond the checklist are dropped.
+        """
+        content = content.strip()
+        feedback, repaired = self._parse_json(content)
+        if feedback is None or not feedback.to_text():
+            if not content or "{" in content:
+                raise FeedbackFormatError("Completion holds no usable feedback")
+            self.text_only += 1
+            return StructuredFeedback.from_text(content)
+
+        if len(feedback.scores) != len(criteria):
+            feedback.scores = feedback.scores[:len(criteria)]
+            repaired = True
+        feedback.criteria = list(criteria)
+        if repaired:
+            self.repaired += 1
+        else:
+            self.valid += 1
+        return feedback
+
+    @staticmethod
+    def _parse_json(content: str) -> Tuple[Optional[StructuredFeedback], bool]:
+        try:
+            return StructuredFeedback.model_validate_json(content), False
+        except ValidationError:
+            pass
+        data = repair_json(content)
+        if data is None:
+            return None, False
+        try:
+            return StructuredFeedback.model_validate(data), True
+        except ValidationError:
+            return None, False
+
+    def stats(self) -> Dict[str, Any]:
+        parsed = self.valid + self.repaired + self.text_only
+        return {
+            "valid": self.valid,
+            "repaired": self.repaired,
+            "text_only": self.text_only,
+            "valid_rate": round(self.valid / parsed, 4) if parsed else 0.0
+        }
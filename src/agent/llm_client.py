@@ -0,0 +1,281 @@
+"""
+Shared LLM client for the Waiter Training Agent
+"""
+
+import asyncio
+import importlib.util
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import httpx
+import openai
+
+from .rate_limiter import LLMGovernor
+from .tracing import current_span
+
+
+@dataclass
+class RequestTiming:
+    """Connection-level timings for a single LLM request, in seconds"""
+    pool_wait: float
+    connect: float
+    ttfb: float
+    new_connection: bool
+
+
+class _RequestTrace:
+    """Collects httpcore trace events for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.events: Dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        # Event names look like "connection.connect_tcp.started" or
+        # "http11.receive_response_headers.complete"; keep the step and phase
+        step, _, phase = event_name.partition(".")[2].rpartition(".")
+        self.events.setdefault(f"{step}.{phase}", time.perf_counter())
+
+    def _span(self, step: str) -> float:
+        started = self.events.get(f"{step}.started")
+        complete = self.events.get(f"{step}.complete")
+        if started is None or complete is None:
+            return 0.0
+        return complete - started
+
+    def timing(self) -> RequestTiming:
+        first_io = self.events.get("connect_tcp.started",
+                                   self.events.get("send_request_headers.started", self.started))
+        headers_sent = self.events.get("send_request_headers.started", first_io)
+        headers_received = self.events.get("receive_response_headers.complete", time.perf_counter())
+
+        return RequestTiming(
+            pool_wait=first_io - self.started,
+            connect=self._span("connect_tcp") + self._span("start_tls"),
+            ttfb=headers_received - headers_sent,
+            new_connection="connect_tcp.started" in self.events
+        )
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _distribution(seconds: List[float]) -> Dict[str, float]:
+    values = [value * 1000 for value in seconds]
+    return {
+        "p50": round(_percentile(values, 50), 3),
+        "p95": round(_percentile(values, 95), 3),
+        "max": round(max(values, default=0.0), 3)
+    }
+
+
+def _token_count(value: Any) -> int:
+    # Providers omit fields or send null for them
+    return value if isinstance(value, int) else 0
+
+
+class LLMClientStats:
+    """Rolling per-request connection statistics for sizing the HTTP pool"""
+
+    def __init__(self, window: int = 1000):
+        self.requests = 0
+        self.new_connections = 0
+        self.recent: Deque[RequestTiming] = deque(maxlen=window)
+        self.streams = 0
+        # (time to first token, total) for streamed completions
+        self.recent_streams: Deque[Tuple[float, float]] = deque(maxlen=window)
+        # Token usage reported by the provider
+        self.completions = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hits = 0
+
+    def record(self, timing: RequestTiming) -> None:
+        self.requests += 1
+        self.new_connections += timing.new_connection
+        self.recent.append(timing)
+
+    def record_stream(self, ttft: float, total: float) -> None:
+        self.streams += 1
+        self.recent_streams.append((ttft, total))
+
+    def record_usage(self, usage: Any) -> None:
+        """Add a completion's usage, including prompt tokens served from the provider's prompt cache"""
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = _token_count(getattr(details, "cached_tokens", 0))
+        prompt_tokens = _token_count(getattr(usage, "prompt_tokens", 0))
+        completion_tokens = _token_count(getattr(usage, "completion_tokens", 0))
+        self.completions += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cached_tokens += cached
+        self.cache_hits += cached > 0
+        current_span().set_attributes({
+            "prompt_tokens": prompt_tokens, "cached_tokens": cached, "completion_tokens": completion_tokens
+        })
+
+    def summary(self) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "window": len(self.recent)
+        }
+        for field in ("pool_wait", "connect", "ttfb"):
+            summary[f"{field}_ms"] = _distribution([getattr(timing, field) for timing in self.recent])
+
+        summary["streams"] = self.streams
+        summary["stream_ttft_ms"] = _distribution([ttft for ttft, _ in self.recent_streams])
+        summary["stream_total_ms"] = _distribution([total for _, total in self.recent_streams])
+        summary["usage"] = {
+            "completions": self.completions,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cache_hit_rate": round(self.cache_hits / self.completions, 4) if self.completions else 0.0,
+            "cached_token_rate": round(self.cached_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0
+        }
+        return summary
+
+
+class LLMClient:
+    """
+    Long-lived OpenAI client with a shared HTTP connection pool
+
+    Created once by the agent and reused by every feedback request so that
+    connections (and their TLS sessions) are kept alive between calls.
+    """
+
+    def __init__(self, ai_config: Dict[str, Any]):
+        self.api_key = ai_config.get("openai_api_key")
+        self.base_url = ai_config.get("base_url")
+        self.request_timeout = ai_config.get("request_timeout", 30.0)
+
+        pool_config = ai_config.get("http_pool", {})
+        self.limits = httpx.Limits(
+            max_connections=pool_config.get("max_connections", 100),
+            max_keepalive_connections=pool_config.get("max_keepalive_connections", 20),
+            keepalive_expiry=pool_config.get("keepalive_expiry", 30.0)
+        )
+        # HTTP/2 needs the optional h2 package
+        self.http2 = bool(pool_config.get("http2", True)) and importlib.util.find_spec("h2") is not None
+
+        self.stats = LLMClientStats(pool_config.get("stats_window", 1000))
+        
+        # Admission control shared by every call through this client
+        self.governor = LLMGovernor.from_config(ai_config.get("rate_limit", {}))
+        self._client: Optional[openai.AsyncOpenAI] = None
+
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        """The underlying AsyncOpenAI client, created on first use"""
+        if self._client is None:
+            http_client = httpx.AsyncClient(
+                limits=self.limits,
+                http2=self.http2,
+                timeout=self.request_timeout,
+                event_hooks={"request": [self._start_trace], "response": [self._finish_trace]}
+            )
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.request_timeout,
+                max_retries=0,
+                http_client=http_client
+            )
+        return self._client
+
+    async def _start_trace(self, request: httpx.Request) -> None:
+        request.extensions["trace"] = _RequestTrace()
+
+    async def _finish_trace(self, response: httpx.Response) -> None:
+        trace = response.request.extensions.get("trace")
+        if isinstance(trace, _RequestTrace):
+            timing = trace.timing()
+            self.stats.record(timing)
+            current_span().set_attributes({
+                "pool_wait_ms": round(timing.pool_wait * 1000, 3),
+                "ttfb_ms": round(timing.ttfb * 1000, 3),
+                "new_connection": timing.new_connection
+            })
+
+    async def chat(self, model: str, messages: List[Dict[str, str]], **params: Any) -> Any:
+        """Create a chat completion under the governor, each attempt bounded by the request timeout"""
+        completion = await self.governor.call(lambda: asyncio.wait_for(
+            self.client.chat.completions.create(model=model, messages=messages, **params),
+            timeout=self.request_timeout
+        ))
+        self.stats.record_usage(getattr(completion, "usage", None))
+        return completion
+
+    async def stream_chat(self, model: str, messages: List[Dict[str, str]], **params: Any) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as they arrive
+
+        Opening the stream goes through the governor (with its retries), and
+        reading it is bounded by the request timeout. Time to first token
+        and total time are recorded separately in ``stats``, along with the
+        token usage the provider sends after the last delta.
+        """
+        started = time.perf_counter()
+        ttft: Optional[float] = None
+
+        async def open_stream() -> Any:
+            return await asyncio.wait_for(
+                self.client.chat.completions.create(model=model, messages=messages, stream=True,
+                                                    stream_options={"include_usage": True}, **params),
+                timeout=self.request_timeout
+            )
+
+        # The governor slot is held until the stream has been read
+        async with self.governor.hold(open_stream) as stream:
+            deadline = time.perf_counter() + self.request_timeout
+            chunks = stream.__aiter__()
+            try:
+                while True:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        break
+                    if not chunk.choices:
+                        self.stats.record_usage(getattr(chunk, "usage", None))
+                        continue
+                    text = chunk.choices[0].delta.content
+                    if text:
+                        if ttft is None:
+                            ttft = time.perf_counter() - started
+                        yield text
+            finally:
+                await stream.close()
+                if ttft is not None:
+                    self.stats.record_stream(ttft, time.perf_counter() - started)
+
+    def governor_stats(self) -> Dict[str, Any]:
+        """Governor limits and counters with queue wait percentiles"""
+        return {**self.governor.stats(), "queue_wait_ms": _distribution(list(self.governor.recent_waits))}
+
+    def pool_config(self) -> Dict[str, Any]:
+        return {
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "http2": self.http2
+        }
+
+    async def aclose(self) -> None:
+        """Close the client and its connection pool"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
@@ -0,0 +1,295 @@
+"""
+Prometheus metrics for the Waiter Training Agent
+"""
+
+import asyncio
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import openai
+
+
+# Seconds; spans a cache hit to a slow completion
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STORE_BUCKETS = (0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.25)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# asyncio.TimeoutError is only an alias of TimeoutError from Python 3.11
+_TIMEOUT_ERRORS = (asyncio.TimeoutError, TimeoutError, openai.APITimeoutError)
+
+
+class _Shards:
+    """
+    Per-thread value arrays that are summed when read
+
+    Each thread adds to its own list, so updates take no lock; a lock is
+    only taken the first time a thread writes, and when collecting.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[List[float]] = []
+
+    def mine(self) -> List[float]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = [0.0] * self._size
+            with self._lock:
+                self._shards.append(values)
+            self._local.values = values
+            return values
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            shards = list(self._shards)
+        return [sum(column) for column in zip(*shards)] if shards else [0.0] * self._size
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """The child for one combination of label values, created on first use"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> Iterable[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_number(value)}" for name, labels, value in self._samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._shards.mine()[0] += amount
+
+    def value(self) -> float:
+        return self._shards.totals()[0]
+
+
+class Counter(_Metric):
+    """A monotonically increasing total"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        # Totals kept elsewhere, read at scrape time
+        self._function = function
+
+    def set_function(self, function: Callable[[], Dict[Tuple[str, ...], float]]) -> None:
+        self._function = function
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self):
+        if self._function is not None:
+            values = self._function().items()
+        else:
+            values = [(key, child.value()) for key, child in list(self._children.items())]
+        for key, value in values:
+            yield f"{self.name}_total", _labels(self.labelnames, key), value
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._shards.mine()[0] -= amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, or is read from ``function`` at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._function = function
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def _samples(self):
+        if self._function is not None:
+            yield self.name, "", float(self._function())
+            return
+        for key, child in list(self._children.items()):
+            yield self.name, _labels(self.labelnames, key), child.value()
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "_shards")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # One count per bucket, then the +Inf bucket, then the sum
+        self._shards = _Shards(len(buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        values = self._shards.mine()
+        values[bisect_left(self._buckets, value)] += 1
+        values[-1] += value
+
+    def snapshot(self) -> Tuple[List[float], float]:
+        totals = self._shards.totals()
+        return totals[:-1], totals[-1]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative ``le`` buckets, with their count and sum"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            counts, total = child.snapshot()
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                yield f"{self.name}_bucket", _labels(self.labelnames, key, le), cumulative
+            yield f"{self.name}_count", _labels(self.labelnames, key), cumulative
+            yield f"{self.name}_sum", _labels(self.labelnames, key), total
+
+
+class MetricsRegistry:
+    """Metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), **options) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, **options))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), **options) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, **options))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), **options) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, **options))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+class AgentMetrics:
+    """The metrics the agent and the web app record"""
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        registry = self.registry
+
+        self.http_request_seconds = registry.histogram(
+            "waiter_http_request_duration_seconds", "HTTP request latency by route template",
+            ("method", "route", "status")
+        )
+        self.websocket_connections = registry.gauge(
+            "waiter_websocket_connections", "Open feedback WebSocket connections"
+        )
+        self.active_sessions = registry.gauge(
+            "waiter_active_sessions", "Live training sessions in the session store"
+        )
+        self.llm_request_seconds = registry.histogram(
+            "waiter_llm_request_duration_seconds", "Feedback completion latency, including governor queueing",
+            ("backend", "outcome")
+        )
+        self.llm_errors = registry.counter(
+            "waiter_llm_errors", "Failed feedback completions by error type", ("backend", "error")
+        )
+        self.llm_tokens = registry.counter(
+            "waiter_llm_tokens", "Tokens reported by the model backend", ("kind",)
+        )
+        self.store_operation_seconds = registry.histogram(
+            "waiter_session_store_operation_duration_seconds", "Session store call latency",
+            ("store", "operation"), buckets=STORE_BUCKETS
+        )
+
+    def record_llm_request(self, backend: str, seconds: float, error: Optional[BaseException] = None) -> None:
+        if error is None:
+            outcome = "ok"
+        else:
+            outcome = "timeout" if isinstance(error, _TIMEOUT_ERRORS) else "error"
+            self.llm_errors.labels(backend, type(error).__name__).inc()
+        self.llm_request_seconds.labels(backend, outcome).observe(seconds)
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -0,0 +1,250 @@
+"""
+Model backends for the Waiter Training Agent
+"""
+
+import asyncio
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from .llm_client import LLMClient, _distribution
+
+
+class ModelBackend(ABC):
+    """
+    Interface the agent uses to get completions
+
+    Backends take OpenAI-style chat messages and return the completion
+    text. ``start`` does any expensive setup (opening a connection pool,
+    loading a model) once, before the first request.
+    """
+
+    #: Short name reported in the LLM stats
+    name = "base"
+
+    #: Seconds a single completion may take before it raises asyncio.TimeoutError
+    request_timeout: float = 30.0
+
+    async def start(self) -> None:
+        """Create long-lived resources"""
+
+    @abstractmethod
+    async def complete(self, model: str, messages: List[Dict[str, str]], **params: Any) -> str:
+        """Create a chat completion and return its text"""
+
+    async def stream_chat(self, model: str, messages: List[Dict[str, str]], **params: Any) -> AsyncIterator[str]:
+        """Stream a chat completion; backends that cannot stream yield it in one piece"""
+        yield await self.complete(model, messages, **params)
+
+    @abstractmethod
+    def backend_stats(self) -> Dict[str, Any]:
+        """Backend-specific configuration and timings"""
+
+    async def aclose(self) -> None:
+        """Release long-lived resources"""
+
+
+class OpenAIBackend(LLMClient, ModelBackend):
+    """Completions from the OpenAI API, or any OpenAI-compatible endpoint at ``base_url``"""
+
+    name = "openai"
+
+    async def start(self) -> None:
+        self.client
+
+    async def complete(self, model: str, messages: List[Dict[str, str]], **params: Any) -> str:
+        completion = await self.chat(model, messages, **params)
+        return (completion.choices[0].message.content or "").strip()
+
+    def backend_stats(self) -> Dict[str, Any]:
+        return {"pool": self.pool_config(), "governor": self.governor_stats(), **self.stats.summary()}
+
+
+@dataclass
+class GenerationRequest:
+    """One completion for a local runtime to generate"""
+    messages: List[Dict[str, str]]
+    max_tokens: int = 256
+    temperature: float = 0.7
+    response_format: Optional[Dict[str, Any]] = None
+
+
+class LocalRuntime(ABC):
+    """A model that runs in-process; called from a single worker thread"""
+
+    @abstractmethod
+    def load(self) -> None:
+        """Load the model into memory"""
+
+    @abstractmethod
+    def generate(self, request: GenerationRequest) -> str:
+        """Generate the completion for one request"""
+
+    def describe(self) -> Dict[str, Any]:
+        return {}
+
+
+class LlamaCppRuntime(LocalRuntime):
+    """
+    A GGUF model run on the CPU with llama.cpp (the optional llama-cpp-python package)
+
+    llama.cpp keeps the KV cache of the previous prompt, so consecutive
+    prompts for the same scenario only evaluate what follows their shared
+    prefix.
+    """
+
+    def __init__(self, model_path: str, n_ctx: int = 4096, n_threads: Optional[int] = None, n_batch: int = 512):
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads or os.cpu_count()
+        self.n_batch = n_batch
+        self.model: Any = None
+
+    def load(self) -> None:
+        if self.model is not None:
+            return
+        try:
+            from llama_cpp import Llama
+        except ImportError as e:
+            raise ImportError("ai.backend 'local' needs the llama-cpp-python package") from e
+        self.model = Llama(
+            model_path=self.model_path,
+            n_ctx=self.n_ctx,
+            n_threads=self.n_threads,
+            n_batch=self.n_batch,
+            verbose=False
+        )
+
+    def generate(self, request: GenerationRequest) -> str:
+        self.load()
+        params: Dict[str, Any] = {"max_tokens": request.max_tokens, "temperature": request.temperature}
+        if request.response_format:
+            params["response_format"] = request.response_format
+        completion = self.model.create_chat_completion(messages=request.messages, **params)
+        return (completion["choices"][0]["message"]["content"] or "").strip()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "runtime": "llama_cpp",
+            "model_path": self.model_path,
+            "n_ctx": self.n_ctx,
+            "n_threads": self.n_threads,
+            "loaded": self.model is not None
+        }
+
+
+class LocalModelBackend(ModelBackend):
+    """
+    Completions from a model loaded once in this process and kept warm
+
+    The runtime runs on a single worker thread, one request at a time, so
+    the event loop never blocks on inference and the model is never used
+    from two threads at once; llama.cpp already spreads each generation
+    over every core. Requests waiting for the thread are taken in arrival
+    order, and ones whose caller gave up first are skipped. If the model
+    fails to load, every later request fails with the same error at once
+    rather than loading it again.
+    """
+
+    name = "local"
+
+    def __init__(self, runtime: LocalRuntime, request_timeout: float = 30.0, stats_window: int = 1000):
+        self.runtime = runtime
+        self.request_timeout = request_timeout
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loaded = False
+        self._load_error: Optional[Exception] = None
+
+        self.requests = 0
+        self.errors = 0
+        self.queued = 0
+        self.recent_queue_waits: Deque[float] = deque(maxlen=stats_window)
+        self.recent_generate_times: Deque[float] = deque(maxlen=stats_window)
+
+    async def start(self) -> None:
+        """Load the model, or raise the error its first load failed with"""
+        if self._load_error is not None:
+            raise self._load_error
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-model")
+        if not self._loaded:
+            try:
+                await asyncio.get_running_loop().run_in_executor(self._executor, self.runtime.load)
+            except Exception as e:
+                self._load_error = e
+                raise
+            self._loaded = True
+
+    async def complete(self, model: str, messages: List[Dict[str, str]], **params: Any) -> str:
+        if not self._loaded:
+            await self.start()
+        request = GenerationRequest(
+            messages=messages,
+            max_tokens=params.get("max_tokens", 256),
+            temperature=params.get("temperature", 0.7),
+            response_format=params.get("response_format")
+        )
+        self.requests += 1
+        self.queued += 1
+        try:
+            generation = asyncio.get_running_loop().run_in_executor(
+                self._executor, self._generate, request, time.perf_counter()
+            )
+            return await asyncio.wait_for(generation, timeout=self.request_timeout)
+        finally:
+            self.queued -= 1
+
+    def _generate(self, request: GenerationRequest, queued: float) -> str:
+        started = time.perf_counter()
+        self.recent_queue_waits.append(started - queued)
+        try:
+            return self.runtime.generate(request)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.recent_generate_times.append(time.perf_counter() - started)
+
+    def backend_stats(self) -> Dict[str, Any]:
+        return {
+            **self.runtime.describe(),
+            "requests": self.requests,
+            "errors": self.errors,
+            "queued": self.queued,
+            "load_error": str(self._load_error) if self._load_error is not None else None,
+            "queue_wait_ms": _distribution(list(self.recent_queue_waits)),
+            "generate_ms": _distribution(list(self.recent_generate_times))
+        }
+
+    async def aclose(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._loaded = False
+
+
+def create_model_backend(ai_config: Dict[str, Any]) -> ModelBackend:
+    """Create the model backend described by the ``ai`` config section"""
+    backend_type = ai_config.get("backend", "openai")
+
+    if backend_type == "openai":
+        return OpenAIBackend(ai_config)
+    if backend_type == "local":
+        local_config = ai_config.get("local", {})
+        model_path = local_config.get("model_path")
+        if not model_path:
+            raise ValueError("ai.local.model_path is required for the local backend")
+        runtime = LlamaCppRuntime(
+            model_path=model_path,
+            n_ctx=local_config.get("n_ctx", 4096),
+            n_threads=local_config.get("n_threads") or None,
+            n_batch=local_config.get("n_batch", 512)
+        )
+        return LocalModelBackend(runtime, request_timeout=ai_config.get("request_timeout", 30.0))
+
+    raise ValueError(f"Unsupported model backend: {backend_type}")
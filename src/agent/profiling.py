@@ -0,0 +1,240 @@
+"""
+Opt-in profiling for the Waiter Training Agent
+
+Two tools for finding hot paths in a running process:
+
+- a stack sampler that records what every thread is running, every few
+  milliseconds for a fixed time, as collapsed stacks (one
+  ``frame;frame;frame count`` line per distinct stack) that flamegraph.pl,
+  speedscope and similar tools read directly;
+- CPU time attribution, which adds up the thread CPU time spent inside
+  each agent method and each HTTP route, separately from the wall time
+  they took.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Generator, Optional, Tuple, Union
+
+from ..utils.decorators import instrument_method
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a stack sample is requested while another is running"""
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    return f"{code.co_name} ({path.parent.name}/{path.name}:{frame.f_lineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> Counter:
+    """
+    Sample the stacks of every other thread for ``seconds``
+
+    Returns how many samples each collapsed stack was seen in, outermost
+    frame first and prefixed with the thread name. Blocks the calling
+    thread, which is left out of the samples.
+    """
+    me = threading.get_ident()
+    stacks: Counter = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(ident, f"thread-{ident}"))
+            stacks[";".join(reversed(labels))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def collapsed(stacks: Counter) -> str:
+    """Collapsed stack lines, most sampled first"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+@dataclass
+class _CPUStats:
+    calls: int = 0
+    cpu_ns: int = 0
+    wall_ns: int = 0
+
+
+class _CPUTimed:
+    """
+    Awaits a coroutine, adding up the thread CPU time of each step it runs
+
+    A coroutine only uses CPU between the points where it is resumed and
+    where it suspends again, so timing each ``send`` leaves out the time
+    other requests ran on the event loop in between. Coroutines awaited
+    inside are included; tasks it starts are not.
+    """
+
+    __slots__ = ("coroutine", "record")
+
+    def __init__(self, coroutine: Any, record: Callable[[int, int], None]):
+        self.coroutine = coroutine
+        self.record = record
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        coroutine = self.coroutine
+        started = time.perf_counter_ns()
+        cpu = 0
+        value: Any = None
+        error: Optional[BaseException] = None
+        try:
+            while True:
+                step = time.thread_time_ns()
+                try:
+                    if error is None:
+                        yielded = coroutine.send(value)
+                    else:
+                        yielded = coroutine.throw(error)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    cpu += time.thread_time_ns() - step
+                try:
+                    value, error = (yield yielded), None
+                except BaseException as e:
+                    value, error = None, e
+        finally:
+            coroutine.close()
+            self.record(cpu, time.perf_counter_ns() - started)
+
+
+class Profiler:
+    """
+    Stack sampling and CPU attribution, both off unless configured
+
+    ``cpu_attribution`` turns on the per-method and per-route CPU times
+    recorded through ``profiled`` and ``cpu_timed``; with it off they
+    call straight through. Only one stack sample runs at a time.
+    """
+
+    def __init__(self, enabled: bool = False, cpu_attribution: bool = True,
+                 sample_interval: float = 0.005, output_dir: str = "logs/profiles"):
+        self.enabled = enabled
+        self.cpu_attribution = enabled and cpu_attribution
+        self.sample_interval = sample_interval
+        self.output_dir = Path(output_dir)
+        self._cpu: Dict[str, _CPUStats] = {}
+        self._sampling = threading.Lock()
+
+    @classmethod
+    def from_config(cls, profiling_config: Dict[str, Any]) -> "Profiler":
+        """Create the profiler described by the ``profiling`` config section"""
+        return cls(
+            enabled=profiling_config.get("enabled", False),
+            cpu_attribution=profiling_config.get("cpu_attribution", True),
+            sample_interval=profiling_config.get("sample_interval_ms", 5) / 1000,
+            output_dir=profiling_config.get("output_dir", "logs/profiles")
+        )
+
+    # CPU attribution
+
+    def record(self, name: str, cpu_ns: int, wall_ns: int) -> None:
+        stats = self._cpu.get(name)
+        if stats is None:
+            stats = self._cpu.setdefault(name, _CPUStats())
+        stats.calls += 1
+        stats.cpu_ns += cpu_ns
+        stats.wall_ns += wall_ns
+
+    def cpu_timed(self, name: Union[str, Callable[[], str]], coroutine: Awaitable[Any]) -> Awaitable[Any]:
+        """
+        Await ``coroutine`` with its CPU time recorded under ``name``
+
+        ``name`` may be a function, called once the coroutine finishes, for
+        names only known then such as a request's route.
+        """
+        return _CPUTimed(coroutine, lambda cpu, wall: self.record(name() if callable(name) else name, cpu, wall))
+
+    def cpu_stats(self) -> Dict[str, Any]:
+        """CPU and wall time per method and route, most CPU first"""
+        ordered = sorted(self._cpu.items(), key=lambda item: item[1].cpu_ns, reverse=True)
+        return {
+            name: {
+                "calls": stats.calls,
+                "cpu_ms": round(stats.cpu_ns / 1e6, 3),
+                "mean_cpu_ms": round(stats.cpu_ns / stats.calls / 1e6, 3),
+                "mean_wall_ms": round(stats.wall_ns / stats.calls / 1e6, 3),
+                "cpu_share": round(stats.cpu_ns / stats.wall_ns, 4) if stats.wall_ns else 0.0
+            }
+            for name, stats in ordered
+        }
+
+    def reset_cpu_stats(self) -> None:
+        self._cpu = {}
+
+    # Stack sampling
+
+    def sample(self, seconds: float, interval: Optional[float] = None) -> Counter:
+        """Sample every thread's stack for ``seconds``; blocks the calling thread"""
+        if not self._sampling.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already being taken")
+        try:
+            return sample_stacks(seconds, interval or self.sample_interval)
+        finally:
+            self._sampling.release()
+
+    def write(self, stacks: Counter) -> Path:
+        """Write collapsed stacks to a timestamped file in ``output_dir``"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"profile-{datetime.now():%Y%m%d-%H%M%S-%f}.folded"
+        path.write_text(collapsed(stacks), encoding="utf-8")
+        return path
+
+
+async def _time_items(profiler: "Profiler", name: str, generator: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    started = time.perf_counter_ns()
+    cpu = [0]
+
+    def add(step_cpu: int, _: int) -> None:
+        cpu[0] += step_cpu
+
+    try:
+        while True:
+            try:
+                item = await _CPUTimed(generator.__anext__(), add)
+            except StopAsyncIteration:
+                break
+            yield item
+    finally:
+        await generator.aclose()
+        profiler.record(name, cpu[0], time.perf_counter_ns() - started)
+
+
+def profiled(name: str) -> Callable[[Callable], Callable]:
+    """
+    Record the CPU time a method uses in its instance's ``profiler``
+
+    Works for plain methods, coroutines and async generators. Without CPU
+    attribution the original method is called directly.
+    """
+    def call(self: Any, method: Callable, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        started, cpu = time.perf_counter_ns(), time.thread_time_ns()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.profiler.record(name, time.thread_time_ns() - cpu, time.perf_counter_ns() - started)
+
+    async def coroutine(self: Any, method: Callable, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        return await self.profiler.cpu_timed(name, method(self, *args, **kwargs))
+
+    def generator(self: Any, method: Callable, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        return _time_items(self.profiler, name, method(self, *args, **kwargs))
+
+    return instrument_method(lambda self: self.profiler.cpu_attribution, call, coroutine, generator)
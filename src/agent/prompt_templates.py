@@ -0,0 +1,318 @@
+"""
+Prompt templates and token budgeting for the Waiter Training Agent
+"""
+
+import hashlib
+import re
+import textwrap
+from dataclasses import dataclass
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    import tiktoken
+except ImportError:  # token counts fall back to an estimate without tiktoken
+    tiktoken = None
+
+
+# Pre-tokenizer in the style of the GPT BPE vocabularies: contractions,
+# words with their leading space, short digit runs, punctuation runs
+_PRETOKEN = re.compile(r"'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+")
+_WHITESPACE = re.compile(r"\s+")
+_INLINE_SPACE = re.compile(r"[ \t]+")
+
+# Words up to this long are usually a single token; longer ones take one
+# more token per _CHARS_PER_TOKEN characters
+_SHORT_WORD = 8
+_CHARS_PER_TOKEN = 4
+_LONG_WORD = re.compile(r"[^\W\d_]{%d,}" % (_SHORT_WORD + 1))
+
+TRUNCATION_MARKER = " [...] "
+
+_MAX_FIXED_ENTRIES = 1024
+
+
+class TokenCounter:
+    """
+    Counts prompt tokens locally
+
+    Uses tiktoken's ``encoding`` when the optional package is installed,
+    otherwise estimates from a GPT-style pre-tokenization: one token per
+    word, number or punctuation run, plus one per four characters beyond
+    the eighth in long words.
+    """
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.get_encoding(encoding)
+            except Exception:
+                # Encodings are downloaded on first use; estimate when offline
+                self.encoding = None
+
+    @property
+    def exact(self) -> bool:
+        return self.encoding is not None
+
+    @staticmethod
+    def _estimate(piece: str) -> int:
+        return 1 + max(0, len(piece.strip()) - _SHORT_WORD) // _CHARS_PER_TOKEN
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        extra = sum((len(word) - _SHORT_WORD) // _CHARS_PER_TOKEN for word in _LONG_WORD.findall(text))
+        return len(_PRETOKEN.findall(text)) + extra
+
+    def head_and_tail(self, text: str, head: int, tail: int) -> Tuple[str, str, int]:
+        """The first ``head`` and last ``tail`` tokens of text, and its total token count"""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            tail_tokens = tokens[max(head, len(tokens) - tail):] if tail else []
+            return self.encoding.decode(tokens[:head]), self.encoding.decode(tail_tokens), len(tokens)
+
+        pieces = [(piece, self._estimate(piece)) for piece in _PRETOKEN.findall(text)]
+        total = sum(tokens for _, tokens in pieces)
+        used = cut = 0
+        while cut < len(pieces) and used + pieces[cut][1] <= head:
+            used += pieces[cut][1]
+            cut += 1
+        start = len(pieces)
+        tail_used = 0
+        while start > cut and tail_used + pieces[start - 1][1] <= tail:
+            start -= 1
+            tail_used += pieces[start][1]
+        return "".join(piece for piece, _ in pieces[:cut]), "".join(piece for piece, _ in pieces[start:]), total
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse every whitespace run to one space"""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def compile_source(source: str) -> str:
+    """Dedent a template, collapse spaces within lines and drop repeated blank lines"""
+    lines: List[str] = []
+    for line in textwrap.dedent(source).split("\n"):
+        line = _INLINE_SPACE.sub(" ", line).strip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines).strip()
+
+
+class PromptTemplate:
+    """
+    A prompt compiled once from an indented source string
+
+    ``text`` is the source with whitespace normalized and is split into
+    literal parts and ``{field}`` placeholders at compile time, so
+    rendering is a single join. ``version`` is a hash of ``text``: it
+    changes whenever the wording does and tags caches, coalescing keys and
+    stats with the exact prompt used.
+    """
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        self.text = compile_source(source)
+        self.version = hashlib.sha256(self.text.encode()).hexdigest()[:8]
+        self._parts: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in Formatter().parse(self.text)
+        ]
+        self.fields = tuple(field for _, field in self._parts if field)
+
+    def render(self, **values: Any) -> str:
+        return "".join(
+            literal + (str(values[field]) if field else "") for literal, field in self._parts
+        )
+
+    def render_source(self, **values: Any) -> str:
+        """Render the uncompiled source, as an inline f-string would have sent it"""
+        return self.source.format(**values)
+
+
+class ChatPrompt:
+    """
+    A system message and a user message, each compiled as a PromptTemplate
+
+    Everything that is the same for every trainee goes in ``system``, with
+    the instructions shared by all scenarios first, so that it forms a
+    stable prefix a provider's prompt cache can reuse. ``user`` holds the
+    trainee's response and is sent last.
+    """
+
+    def __init__(self, name: str, system_source: str, user_source: str):
+        self.name = name
+        self.system = PromptTemplate(f"{name}.system", system_source)
+        self.user = PromptTemplate(f"{name}.user", user_source)
+        self.version = hashlib.sha256(f"{self.system.text}\0{self.user.text}".encode()).hexdigest()[:8]
+        self.fields = tuple(dict.fromkeys(self.system.fields + self.user.fields))
+
+    def render(self, **values: Any) -> str:
+        """Both messages as one string, for counting tokens"""
+        return f"{self.system.render(**values)}\n\n{self.user.render(**values)}"
+
+    def render_source(self, **values: Any) -> str:
+        return f"{self.system.render_source(**values)}\n\n{self.user.render_source(**values)}"
+
+    def messages(self, **values: Any) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system.render(**values)},
+            {"role": "user", "content": self.user.render(**values)}
+        ]
+
+
+def truncate_to_budget(text: str, budget: int, counter: TokenCounter) -> Tuple[str, int]:
+    """
+    Shorten text to at most ``budget`` tokens, returning it with the number of tokens removed
+
+    Keeps the opening two thirds of the budget and the closing third,
+    joined by a marker, since an answer's approach is usually stated first
+    and its follow-up last.
+    """
+    # A token is never shorter than a character
+    if len(text) <= budget:
+        return text, 0
+    total = counter.count(text)
+    if total <= budget:
+        return text, 0
+
+    keep = max(0, budget - counter.count(TRUNCATION_MARKER))
+    head, tail, _ = counter.head_and_tail(text, keep * 2 // 3, keep - keep * 2 // 3)
+    shortened = (head.rstrip() + TRUNCATION_MARKER + tail.lstrip()).strip()
+    return shortened, total - counter.count(shortened)
+
+
+@dataclass
+class _TemplateStats:
+    calls: int = 0
+    input_tokens: int = 0
+    saved_tokens: int = 0
+    truncated: int = 0
+
+
+class PromptRenderer:
+    """
+    Renders feedback prompts within a token budget and counts the tokens saved
+
+    The waiter's response has its whitespace collapsed and is cut to
+    ``response_token_budget`` tokens before it is placed in the template.
+    Savings are measured per call against the uncompiled template and the
+    response as submitted.
+    """
+
+    def __init__(self, response_token_budget: int = 400, counter: Optional[TokenCounter] = None):
+        self.response_token_budget = response_token_budget
+        self.counter = counter or TokenCounter()
+        self._stats: Dict[Tuple[str, str], _TemplateStats] = {}
+        # The text of a template around the response: its tokens, the tokens
+        # compiling it saved and, for chat prompts, the rendered system
+        # message; by template version and the other values
+        self._fixed: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], Tuple[int, int, Optional[str]]] = {}
+
+    def prepare_response(self, response: str) -> Tuple[str, int, int, bool]:
+        """
+        The response as it goes into a prompt, its tokens, the tokens saved
+        on it, and whether it was cut
+        """
+        compact = normalize_whitespace(response)
+        saved = self.counter.count(response) - self.counter.count(compact) if compact != response else 0
+        if self.response_token_budget and self.response_token_budget > 0 and len(compact) > self.response_token_budget:
+            total = self.counter.count(compact)
+            compact, removed = truncate_to_budget(compact, self.response_token_budget, self.counter)
+            return compact, total - removed, saved + removed, removed > 0
+        return compact, self.counter.count(compact), saved, False
+
+    def _fixed_part(self, template: Union[PromptTemplate, ChatPrompt],
+                    values: Dict[str, Any]) -> Tuple[int, int, Optional[str]]:
+        key = (template.version, tuple(sorted(values.items())))
+        fixed = self._fixed.get(key)
+        if fixed is None:
+            compiled = self.counter.count(template.render(response="", **values))
+            saved = self.counter.count(template.render_source(response="", **values)) - compiled
+            system = template.system.render(**values) if isinstance(template, ChatPrompt) else None
+            fixed = (compiled, saved, system)
+            # One entry per scenario; never grows past the catalog
+            if len(self._fixed) < _MAX_FIXED_ENTRIES:
+                self._fixed[key] = fixed
+        return fixed
+
+    def _record(self, template: Union[PromptTemplate, ChatPrompt], input_tokens: int, saved: int,
+                truncated: bool) -> None:
+        stats = self._stats.setdefault((template.name, template.version), _TemplateStats())
+        stats.calls += 1
+        stats.input_tokens += input_tokens
+        stats.saved_tokens += saved
+        stats.truncated += truncated
+
+    def render(self, template: PromptTemplate, response: str, **values: Any) -> str:
+        """Render ``template`` with the budgeted response in its ``response`` field"""
+        response, response_tokens, saved, truncated = self.prepare_response(response)
+        fixed_tokens, compiled_saved, _ = self._fixed_part(template, values)
+        self._record(template, fixed_tokens + response_tokens, saved + compiled_saved, truncated)
+        return template.render(response=response, **values)
+
+    def render_chat(self, prompt: ChatPrompt, response: str, **values: Any) -> List[Dict[str, str]]:
+        """
+        Build the messages for ``prompt`` with the budgeted response
+
+        The system message is rendered once per set of values and reused
+        verbatim, so repeated requests for a scenario share an identical
+        prefix.
+        """
+        response, response_tokens, saved, truncated = self.prepare_response(response)
+        fixed_tokens, compiled_saved, system = self._fixed_part(prompt, values)
+        self._record(prompt, fixed_tokens + response_tokens, saved + compiled_saved, truncated)
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt.user.render(response=response, **values)}
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        templates = {}
+        for (name, version), stats in self._stats.items():
+            templates[name] = {
+                "version": version,
+                "calls": stats.calls,
+                "truncated": stats.truncated,
+                "mean_input_tokens": round(stats.input_tokens / stats.calls, 1),
+                "mean_saved_tokens": round(stats.saved_tokens / stats.calls, 1),
+                "saved_tokens": stats.saved_tokens
+            }
+        return {
+            "response_token_budget": self.response_token_budget,
+            "exact_token_counts": self.counter.exact,
+            "templates": templates
+        }
+
+
+FEEDBACK_PROMPT = ChatPrompt("feedback", """
+        You are an expert restaurant trainer evaluating a waiter's response to a training scenario.
+
+        Please provide constructive feedback that:
+        1. Acknowledges what was done well
+        2. Suggests specific improvements
+        3. Provides actionable advice
+        4. Maintains a positive, encouraging tone
+
+        Keep the feedback concise but helpful (2-3 sentences).
+
+        Category: {category}
+        Difficulty Level: {difficulty}
+        """, """
+        Waiter's Response: {response}
+        """)
+
+STRUCTURED_FEEDBACK_PROMPT = ChatPrompt("structured_feedback", """
+        You are an expert restaurant trainer evaluating a waiter's response to a training scenario.
+        Be specific, actionable and encouraging.
+        {schema}
+
+        Category: {category}
+        Difficulty Level: {difficulty}
+        Checklist:
+        {checklist}
+        """, """
+        Waiter's Response: {response}
+        """)
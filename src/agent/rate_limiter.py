@@ -0,0 +1,252 @@
+"""
+Rate limiting and adaptive concurrency for LLM calls
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+import openai
+
+
+T = TypeVar("T")
+
+# Errors that mean the provider is overloaded; the concurrency limit backs off
+_OVERLOAD_ERRORS = (openai.RateLimitError, openai.InternalServerError, openai.APITimeoutError, asyncio.TimeoutError)
+
+# Errors worth another attempt
+_RETRYABLE_ERRORS = _OVERLOAD_ERRORS + (openai.APIConnectionError,)
+
+
+class LLMQueueTimeout(asyncio.TimeoutError):
+    """Raised when a call waits in the governor's queue past its deadline"""
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """The delay a provider asked for in Retry-After(-ms) headers, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+class TokenBucket:
+    """Allows ``rate`` calls per second on average, with bursts of up to ``burst``"""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+
+    def reserve(self) -> float:
+        """Take a token, returning how long to wait before it is really available"""
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return max(0.0, -self._tokens / self.rate)
+
+    def refund(self) -> None:
+        self._tokens = min(self.burst, self._tokens + 1)
+
+
+class LLMGovernor:
+    """
+    Admission control for LLM calls: a token bucket plus an AIMD concurrency limit
+
+    Calls wait in FIFO order for a concurrency slot and a token, for no
+    longer than ``queue_timeout`` in total. The concurrency limit grows by
+    about one per limit's worth of successful calls and is multiplied by
+    ``decrease`` when the provider signals overload (429, 5xx, timeouts);
+    calls started before the last decrease do not decrease it again.
+    A 429 pauses new calls until its Retry-After has passed, and retryable
+    failures are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, rate: float = 0.0, burst: float = 10.0, initial_concurrency: float = 16,
+                 min_concurrency: float = 1, max_concurrency: float = 64, decrease: float = 0.5,
+                 max_retries: int = 2, backoff: float = 0.25, max_backoff: float = 10.0,
+                 queue_timeout: float = 10.0, window: int = 1000, enabled: bool = True):
+        self.enabled = enabled
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self.limit = float(initial_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.queue_timeout = queue_timeout
+
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+
+        self.queued = 0
+        self.admitted = 0
+        self.throttled = 0
+        self.retries = 0
+        self.queue_timeouts = 0
+        self.recent_waits: Deque[float] = deque(maxlen=window)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "LLMGovernor":
+        return cls(
+            enabled=config.get("enabled", True),
+            rate=config.get("requests_per_second", 0.0),
+            burst=config.get("burst", 10),
+            initial_concurrency=config.get("initial_concurrency", 16),
+            min_concurrency=config.get("min_concurrency", 1),
+            max_concurrency=config.get("max_concurrency", 64),
+            max_retries=config.get("max_retries", 2),
+            queue_timeout=config.get("queue_timeout_seconds", 10.0)
+        )
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def _acquire_slot(self, deadline: float) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=max(0.0, deadline - time.monotonic()))
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we gave up
+                self._release_slot()
+            else:
+                waiter.cancel()
+            raise
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    async def _acquire(self, deadline: float) -> float:
+        """Wait for any Retry-After pause, a slot and a token; returns the admission time"""
+        self.queued += 1
+        started = time.monotonic()
+        try:
+            # Another 429 may extend the pause while we sleep
+            while self._paused_until > time.monotonic():
+                if self._paused_until > deadline:
+                    raise LLMQueueTimeout()
+                await asyncio.sleep(self._paused_until - time.monotonic())
+            await self._acquire_slot(deadline)
+
+            if self.bucket is not None:
+                wait = self.bucket.reserve()
+                if time.monotonic() + wait > deadline:
+                    self.bucket.refund()
+                    self._release_slot()
+                    raise LLMQueueTimeout()
+                if wait:
+                    try:
+                        await asyncio.sleep(wait)
+                    except BaseException:
+                        # Cancelled before admission: give back what was reserved
+                        self.bucket.refund()
+                        self._release_slot()
+                        raise
+        except asyncio.TimeoutError:
+            self.queue_timeouts += 1
+            raise LLMQueueTimeout() from None
+        finally:
+            self.queued -= 1
+
+        admitted = time.monotonic()
+        self.admitted += 1
+        self.recent_waits.append(admitted - started)
+        return admitted
+
+    def _release(self, admitted: float, error: Optional[BaseException] = None) -> None:
+        if error is None:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        elif isinstance(error, _OVERLOAD_ERRORS) and admitted >= self._last_decrease:
+            self.limit = max(self.min_concurrency, self.limit * self.decrease)
+            self._last_decrease = time.monotonic()
+        self._release_slot()
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+        retry_after = retry_after_seconds(error)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    async def _admit(self, fn: Callable[[], Awaitable[T]]) -> Tuple[T, float]:
+        """Run ``fn`` once admitted, retrying; the slot stays held on success"""
+        deadline = time.monotonic() + self.queue_timeout
+        attempt = 0
+        while True:
+            admitted = await self._acquire(deadline)
+            try:
+                return await fn(), admitted
+            except _RETRYABLE_ERRORS as e:
+                self._release(admitted, e)
+                delay = self._backoff_delay(attempt, e)
+                if isinstance(e, openai.RateLimitError):
+                    self.throttled += 1
+                    self._paused_until = max(self._paused_until, time.monotonic() + (retry_after_seconds(e) or 0.0))
+                if attempt >= self.max_retries or time.monotonic() + delay > deadline:
+                    raise
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
+            except BaseException as e:
+                self._release(admitted, e)
+                raise
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run an LLM call under the governor"""
+        if not self.enabled:
+            return await fn()
+        result, admitted = await self._admit(fn)
+        self._release(admitted)
+        return result
+
+    @asynccontextmanager
+    async def hold(self, fn: Callable[[], Awaitable[T]]) -> AsyncIterator[T]:
+        """Like ``call`` but keeps the slot until the block exits, e.g. while a stream is read"""
+        if not self.enabled:
+            yield await fn()
+            return
+        result, admitted = await self._admit(fn)
+        try:
+            yield result
+        except BaseException as e:
+            self._release(admitted, e)
+            raise
+        self._release(admitted)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "queue_timeouts": self.queue_timeouts,
+            "rate_per_second": self.bucket.rate if self.bucket else None
+        }
@@ -0,0 +1,388 @@
+"""
+Rule-based scoring of waiter responses for the Waiter Training Agent
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Sequence, Set, Tuple
+
+from .feedback_cache import normalize_response
+from .training_scenarios import SCENARIO_CHECKLISTS
+
+
+# Words in checklist items that say nothing about what a good answer covers
+_STOPWORDS = frozenset("""
+    a about after all an and any are as at be being can create creating customer customers
+    despite do for from get getting handle handling how if in is it its keep make making
+    manage managing menu need needed not of on or order orders other re situation take that the their them
+    they this to up what when why with would you your
+""".split())
+
+_SUFFIXES = ("ations", "ation", "ments", "ment", "ings", "ing", "ies", "ed", "ly", "es", "s", "e")
+
+# Related words and phrases for checklist keywords, matched as word prefixes
+_RELATED: Dict[str, Tuple[str, ...]] = {
+    "approach": ("walk over", "go over", "come over", "head over", "eye contact", "smile", "acknowledg", "greet"),
+    "say": ("welcome", "hello", "hi", "good evening", "good afternoon", "good morning", "i would say", "i d say",
+            "sorry", "apolog", "let me", "thank"),
+    "professionally": ("calm", "polite", "courteous", "respect", "friendly", "patien", "composed"),
+    "professionalism": ("calm", "polite", "courteous", "respect", "honest", "friendly"),
+    "next": ("then", "after", "seat", "menu", "show", "lead", "escort", "follow me", "this way"),
+    "greeting": ("greet", "welcome", "hello", "good evening", "good afternoon", "good morning"),
+    "elderly": ("older", "senior", "mobility", "cane", "walker", "wheelchair", "slowly", "accessib", "arm"),
+    "group": ("party", "everyone", "all of you", "together", "six"),
+    "efficiently": ("quick", "prompt", "right away", "organi", "at once"),
+    "seating": ("seat", "table", "booth", "chair", "close to the", "near the"),
+    "assistance": ("assist", "help", "high chair", "booster", "coat", "wheelchair", "anything else"),
+    "acknowledging": ("recogni", "remember", "welcome back", "last time", "previous", "sorry", "apolog"),
+    "previous": ("last time", "last visit", "before", "welcome back"),
+    "trust": ("confiden", "reassur", "personally", "assure", "promise"),
+    "expectations": ("expect", "wait time", "honest", "let them know", "inform", "update"),
+    "kitchen": ("chef", "cook"),
+    "staff": ("team", "colleague", "manager", "chef", "kitchen"),
+    "coordinating": ("coordinat", "communicat", "let the kitchen", "tell the chef", "inform", "manager"),
+    "positive": ("complimentary", "special", "extra", "attentive", "personal", "enjoy"),
+    "issues": ("problem", "complain", "slow"),
+    "accurate": ("accura", "correct", "check", "confirm", "verify"),
+    "information": ("inform", "detail", "ingredient"),
+    "unsure": ("not sure", "don t know", "do not know", "find out", "check with", "let me check", "honest"),
+    "concerns": ("concern", "worr", "understand", "reassur", "listen", "serious"),
+    "gather": ("ask", "find out", "which", "allerg", "ingredient", "note"),
+    "communicate": ("communicat", "tell", "inform", "let the", "ticket", "note", "flag", "mark"),
+    "communication": ("communicat", "tell", "inform", "let the", "ticket", "note", "flag", "mark"),
+    "safety": ("safe", "allerg", "cross contam", "clean", "separate"),
+    "protocols": ("protocol", "procedure", "allergen", "separate", "clean", "flag", "policy"),
+    "alternative": ("alternativ", "instead", "option", "substitut", "recommend"),
+    "suggestions": ("suggest", "recommend", "option", "would you like", "how about", "might enjoy"),
+    "composure": ("calm", "compos", "confiden", "steady", "breath"),
+    "scrutiny": ("critic", "question", "scrutin", "note"),
+    "detailed": ("detail", "specific", "technique", "origin", "sourc", "pairing", "local"),
+    "sommelier": ("wine", "pairing"),
+    "follow": ("follow up", "check back", "come back", "return"),
+    "questions": ("question", "ask", "answer"),
+    "dining": ("meal", "pace", "pacing", "course", "experience"),
+    "indecisive": ("indecis", "decid", "undecided", "more time", "few minutes", "come back", "recommend"),
+    "ready": ("start with", "take their order", "first", "ready"),
+    "happy": ("satisf", "drink", "bread", "appetizer", "attentive", "thank"),
+    "efficiency": ("efficien", "one at a time", "write", "systematic", "organi", "clockwise"),
+    "tensions": ("tension", "calm", "patien", "defuse", "diffuse", "de escalat", "polite", "smile"),
+    "track": ("note", "write", "record", "list", "seat number", "position"),
+    "dietary": ("dietar", "allerg", "vegetarian", "vegan", "gluten", "dairy", "shellfish"),
+    "requirements": ("requir", "restrict", "need"),
+    "double": ("double check", "repeat", "read back", "confirm", "verify"),
+    "accuracy": ("accura", "correct", "confirm", "verify"),
+    "special": ("modif", "substitut", "on the side", "request"),
+    "requests": ("request", "ask", "modif"),
+    "satisfaction": ("satisf", "check back", "happy", "enjoy"),
+    "vip": ("discreet", "discret", "priorit", "personal", "attention"),
+    "management": ("manager",),
+    "off": ("off menu", "chef", "possible", "check with"),
+    "quality": ("other tables", "attentive", "balance", "section", "colleague"),
+    "tables": ("other tables", "section", "colleague", "team"),
+    "crisis": ("emergenc", "calm", "plan", "backup", "contingen", "manager"),
+    "wrong": ("mistake", "problem", "issue", "apolog"),
+    "suggest": ("recommend", "would you like", "how about", "may i", "offer", "try"),
+    "why": ("because", "pair", "goes well", "popular", "favorite", "favourite", "complement"),
+    "present": ("describe", "mention", "natural", "casual", "offer"),
+    "options": ("option", "choice", "menu"),
+    "naturally": ("natural", "casual", "conversation", "friendly", "genuine"),
+    "read": ("notice", "watch", "body language", "cue", "interest", "react"),
+    "interest": ("interest", "hesitat", "react", "body language", "cue"),
+    "stop": ("decline", "no thank", "not interested", "respect", "pushy", "no pressure", "leave it"),
+    "wine": ("bottle", "vintage", "champagne", "sparkling"),
+    "upgrade": ("upgrade", "premium", "better", "finer", "reserve"),
+    "dessert": ("cake", "sweet", "tiramisu", "chocolate"),
+    "drink": ("coffee", "espresso", "cognac", "port", "liqueur", "digestif", "cocktail", "champagne"),
+    "anniversary": ("anniversar", "celebrat", "congratulat", "special occasion", "toast"),
+    "recommendations": ("recommend", "suggest"),
+    "salesy": ("genuine", "personal", "not pushy", "sincere", "complimentary"),
+    "timing": ("time", "moment", "after", "before", "during", "pause", "end of"),
+    "atmosphere": ("business", "discreet", "quiet", "mood", "focus"),
+    "premium": ("top shelf", "reserve", "finest", "upgrade"),
+    "interrupting": ("interrupt", "discreet", "quiet", "pause", "unobtrusive", "wait for"),
+    "decision": ("host", "whoever", "organizer", "leader"),
+    "celebration": ("celebrat", "champagne", "toast", "congratulat"),
+    "deal": ("success", "close"),
+    "apologize": ("apolog", "sorry"),
+    "actions": ("replace", "reheat", "fresh", "right away", "immediately", "take it back", "remake", "fix"),
+    "prevent": ("future", "let the kitchen", "manager", "make sure", "won t happen", "feedback"),
+    "escalate": ("calm", "listen", "empath", "understand", "apolog", "sorry", "private", "acknowledg"),
+    "anger": ("upset", "frustrat", "calm", "listen", "empath", "understand"),
+    "immediate": ("right away", "immediately", "now", "quickly", "first"),
+    "solutions": ("solution", "table", "seat", "offer", "option", "accommodat"),
+    "amends": ("amend", "complimentary", "on the house", "discount", "free", "dessert", "comp", "voucher"),
+    "inconvenience": ("inconvenien", "wait", "sorry"),
+    "online": ("review", "online"),
+    "reputation": ("review", "online", "reputation", "contact", "follow up"),
+    "emergency": ("emergenc", "911", "ambulance", "epipen", "epinephrine", "first aid"),
+    "medical": ("paramedic", "doctor", "ambulance", "911", "epipen", "nurse"),
+    "legal": ("liabilit", "incident report", "document", "insurance", "record"),
+    "liability": ("legal", "incident report", "document", "insurance"),
+    "incident": ("report", "follow up", "review", "investigat", "contact"),
+    "delay": ("wait", "sorry", "late", "longer"),
+    "speed": ("rush", "priorit", "quick", "fast", "bill", "check", "to go", "box"),
+    "ensure": ("make sure", "check", "satisf", "happy"),
+    "satisfied": ("satisf", "happy", "thank"),
+    "failures": ("failure", "mistake", "wrong", "sorry", "apolog", "acknowledg"),
+    "compensation": ("compensat", "refund", "discount", "complimentary", "voucher", "gift", "on the house", "comp"),
+    "restore": ("restor", "invite", "return", "personally", "manager", "come back"),
+    "learning": ("learn", "lesson", "training", "team", "feedback", "improve", "review"),
+    "venue": ("venue", "location", "room", "partner"),
+    "arrangements": ("arrang", "book", "transport", "organi"),
+    "financial": ("financ", "refund", "compensat", "cover", "cost"),
+    "relationship": ("relationship", "personal", "invite", "loyal"),
+    "term": ("long term", "future", "relationship"),
+    "preventing": ("prevent", "future", "safety", "inspect", "training", "review"),
+}
+
+# Steps every good answer in a category takes, whatever the checklist asks
+_REQUIRED_STEPS: Dict[str, Tuple[Tuple[str, Tuple[str, ...]], ...]] = {
+    "customer_greeting": (
+        ("greet the guests", ("hello", "hi", "welcome", "good evening", "good afternoon", "good morning", "greet")),
+        ("offer a next step such as seating", ("seat", "table", "menu", "wait", "reservation", "show",
+                                               "this way", "follow me", "drink")),
+    ),
+    "menu_knowledge": (
+        ("check details with the kitchen rather than guess", ("check", "ask the", "kitchen", "chef", "find out",
+                                                              "confirm", "let me")),
+        ("give the guest concrete information", ("ingredient", "allerg", "dish", "recommend", "prepar", "made")),
+    ),
+    "order_taking": (
+        ("confirm the order back to the guests", ("repeat", "confirm", "double check", "read back", "verify")),
+        ("pass the details to the kitchen", ("kitchen", "chef", "note", "write", "ticket", "system")),
+    ),
+    "upselling": (
+        ("make a specific suggestion", ("recommend", "suggest", "offer", "would you like", "how about", "special")),
+        ("respect the guest's interest", ("notice", "interest", "if they", "decline", "pushy", "pressure",
+                                          "respect", "read")),
+    ),
+    "problem_resolution": (
+        ("apologize", ("apolog", "sorry")),
+        ("take corrective action", ("replace", "remake", "fresh", "reheat", "take it back", "fix", "right away",
+                                    "immediately", "manager", "call")),
+        ("follow up with the guest", ("follow up", "check back", "come back", "make sure", "ensure", "return")),
+    ),
+    "service_recovery": (
+        ("acknowledge what went wrong", ("sorry", "apolog", "acknowledg", "understand")),
+        ("offer to make amends", ("compensat", "discount", "complimentary", "on the house", "free", "refund",
+                                  "comp", "voucher", "offer")),
+        ("follow up with the guest", ("follow up", "check back", "come back", "make sure", "ensure", "manager",
+                                      "contact")),
+    ),
+}
+
+# Expected answer length in words by difficulty: (too short below, rambling above)
+_LENGTH_BANDS: Dict[str, Tuple[int, int]] = {
+    "beginner": (25, 150),
+    "intermediate": (45, 250),
+    "advanced": (70, 350),
+}
+
+_SENTENCE_END = re.compile(r"[.!?](?:\s|$)")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+", re.MULTILINE)
+
+
+def _root(word: str) -> str:
+    """Strip common suffixes so a checklist word matches its inflections as a prefix"""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def _normalized(terms: Iterable[str]) -> Set[str]:
+    return {normalize_response(term) for term in terms}
+
+
+def _checklist_terms(item: str) -> Set[str]:
+    terms: List[str] = []
+    for word in normalize_response(item).split():
+        if word in _STOPWORDS or len(word) < 3:
+            continue
+        terms.append(_root(word))
+        terms.extend(_RELATED.get(word, ()))
+    return _normalized(terms)
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """A regex matching any of ``terms``, factored into a trie so matching does not try each in turn"""
+    trie: Dict[str, Any] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class _Rubric:
+    """
+    Checklist items and required steps for one scenario, compiled into one regex
+
+    A criterion is met when any of its terms starts a word in the response.
+    Terms shorter than three characters must match a whole word. The regex
+    finds the longest term at each word start; shorter terms that are a
+    prefix of it are credited too.
+    """
+
+    def __init__(self, items: Sequence[str], steps: Sequence[Tuple[str, Iterable[str]]]):
+        self.items = tuple(items)
+        self.steps = tuple(label for label, _ in steps)
+        criteria = [_checklist_terms(item) for item in items] + [_normalized(terms) for _, terms in steps]
+
+        owners: Dict[str, Set[int]] = {}
+        for index, terms in enumerate(criteria):
+            for term in terms:
+                owners.setdefault(term, set()).add(index)
+        self._credit: Dict[str, FrozenSet[int]] = {
+            term: frozenset().union(*(
+                indexes for other, indexes in owners.items()
+                if other == term or (len(other) >= 3 and term.startswith(other))
+            ))
+            for term in owners
+        }
+
+        prefixes = [term for term in owners if len(term) >= 3]
+        words = [re.escape(term) + r"\b" for term in owners if len(term) < 3]
+        self._pattern = re.compile(r"\b(?=(" + "|".join(filter(None, [_trie_pattern(prefixes), *words])) + "))")
+
+    def met(self, text: str) -> Set[int]:
+        """Indexes of the criteria met by normalized ``text``; items first, then steps"""
+        met: Set[int] = set()
+        for match in self._pattern.finditer(text):
+            met.update(self._credit.get(match.group(1), ()))
+        return met
+
+
+@dataclass
+class ResponseAssessment:
+    """How a response scored, with the checklist items and steps it missed"""
+    points: float
+    coverage: float
+    steps: float
+    form: float
+    word_count: int
+    covered: List[str] = field(default_factory=list)
+    missed: List[str] = field(default_factory=list)
+    missing_steps: List[str] = field(default_factory=list)
+    too_short: bool = False
+
+    def summary(self) -> str:
+        """Short feedback built from the assessment, used when no LLM feedback is requested"""
+        if not self.missed and not self.missing_steps and not self.too_short:
+            return "Well done: your answer covers every point the scenario asks about."
+        parts = []
+        if self.covered:
+            parts.append(f"You covered {len(self.covered)} of {len(self.covered) + len(self.missed)} key points.")
+        if self.missed:
+            parts.append("To improve, also address: " + "; ".join(item[0].lower() + item[1:]
+                                                                 for item in self.missed) + ".")
+        if self.missing_steps:
+            parts.append("Remember to " + " and ".join(self.missing_steps) + ".")
+        if self.too_short:
+            parts.append("Describe your approach step by step in a little more detail.")
+        return " ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "points": self.points,
+            "coverage": round(self.coverage, 3),
+            "steps": round(self.steps, 3),
+            "form": round(self.form, 3),
+            "word_count": self.word_count,
+            "covered": self.covered,
+            "missed": self.missed,
+            "missing_steps": self.missing_steps
+        }
+
+
+class ResponseScorer:
+    """
+    Scores responses locally from each scenario's "Consider:" checklist
+
+    Each checklist item becomes a criterion met when the response mentions
+    one of its keywords (or a related word or phrase); each category also
+    has a few steps any good answer takes, such as apologizing when
+    resolving a problem. Points blend checklist coverage, required steps
+    and a length and structure check against the difficulty's expected
+    answer length, scaled to ``max_points``. Rubrics are compiled once, so
+    scoring a response takes tens of microseconds.
+    """
+
+    coverage_weight = 0.5
+    steps_weight = 0.3
+    form_weight = 0.2
+
+    def __init__(self, checklists: Mapping[Tuple[str, str], Tuple[str, ...]] = SCENARIO_CHECKLISTS,
+                 max_points: float = 10.0):
+        self.max_points = max_points
+        self._rubrics = {
+            (category, difficulty): _Rubric(items, _REQUIRED_STEPS.get(category, ()))
+            for (category, difficulty), items in checklists.items()
+        }
+        self._fallbacks = {category: _Rubric((), steps) for category, steps in _REQUIRED_STEPS.items()}
+        self._empty = _Rubric((), ())
+
+    @staticmethod
+    def _form(words: int, sentences: int, difficulty: str) -> float:
+        low, high = _LENGTH_BANDS.get(difficulty, _LENGTH_BANDS["beginner"])
+        if words < low:
+            length = words / low
+        elif words > high:
+            length = max(0.5, high / words)
+        else:
+            length = 1.0
+        structure = min(1.0, sentences / 3)
+        return 0.7 * length + 0.3 * structure
+
+    def assess(self, category: str, response: str, difficulty: str) -> ResponseAssessment:
+        """
+        Score a response against its scenario's checklist and the category's required steps
+
+        A category with neither, such as one configured outside the catalog,
+        is scored on length and structure alone rather than given the
+        coverage and step points for free.
+        """
+        rubric = (self._rubrics.get((category, difficulty)) or self._rubrics.get((category, "beginner"))
+                  or self._fallbacks.get(category) or self._empty)
+        tokens = normalize_response(response).split()
+        met = rubric.met(" ".join(tokens))
+
+        covered = [item for index, item in enumerate(rubric.items) if index in met]
+        missed = [item for index, item in enumerate(rubric.items) if index not in met]
+        coverage = len(covered) / len(rubric.items) if rubric.items else 1.0
+
+        offset = len(rubric.items)
+        missing_steps = [step for index, step in enumerate(rubric.steps, offset) if index not in met]
+        step_score = 1 - len(missing_steps) / len(rubric.steps) if rubric.steps else 1.0
+
+        sentences = max(len(_SENTENCE_END.findall(response)), len(_LIST_ITEM.findall(response)), 1 if tokens else 0)
+        form = self._form(len(tokens), sentences, difficulty)
+
+        if rubric.items or rubric.steps:
+            total = self.coverage_weight * coverage + self.steps_weight * step_score + self.form_weight * form
+        else:
+            total = form
+        low, _ = _LENGTH_BANDS.get(difficulty, _LENGTH_BANDS["beginner"])
+        return ResponseAssessment(
+            points=round(self.max_points * total, 1),
+            coverage=coverage,
+            steps=step_score,
+            form=form,
+            word_count=len(tokens),
+            covered=covered,
+            missed=missed,
+            missing_steps=missing_steps,
+            too_short=len(tokens) < low
+        )
+
+    def score(self, category: str, response: str, difficulty: str) -> float:
+        return self.assess(category, response, difficulty).points
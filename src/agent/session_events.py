@@ -0,0 +1,46 @@
+"""
+Session change notifications for the Waiter Training Agent
+"""
+
+import asyncio
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Set
+
+
+class SessionEventBus:
+    """
+    Fans session mutation events out to in-process subscribers
+
+    Each subscriber gets its own bounded queue. Events are status snapshots,
+    so when a slow subscriber's queue is full the oldest event is dropped
+    and the latest always gets through. Only mutations made in this process
+    are published; with several workers a subscriber sees the changes made
+    by the worker it is connected to.
+    """
+
+    def __init__(self, max_queued: int = 16):
+        self.max_queued = max_queued
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    @contextmanager
+    def subscribe(self, session_id: str) -> Iterator[asyncio.Queue]:
+        """Receive events for a session until the block exits"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queued)
+        self._subscribers.setdefault(session_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(session_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[session_id]
+
+    def publish(self, session_id: str, event: Dict[str, Any]) -> None:
+        for queue in self._subscribers.get(session_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
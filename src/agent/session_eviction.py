@@ -0,0 +1,178 @@
+"""
+Idle expiry and capacity eviction for training sessions
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+
+from .session_store import SessionStore
+
+logger = logging.getLogger("waiter_training_agent.session_eviction")
+
+
+class SessionEvictor:
+    """
+    Decides which live sessions to end because they are idle or in excess
+
+    Idle expiry uses a hashed timer wheel with one slot per ``tick``; each
+    session sits in the slot of the tick when it will have been idle for
+    ``idle_ttl``, so touching a session and expiring due sessions are both
+    O(1) per session. Capacity is enforced in least-recently-used order.
+
+    The evictor only knows about sessions touched in this process, so it
+    is for stores private to one worker; shared stores use
+    SharedSessionEvictor.
+    """
+
+    def __init__(self, idle_ttl: float = 1800.0, max_sessions: int = 10000, tick: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.tick = tick
+        self._clock = clock
+
+        self._ttl_ticks = max(1, math.ceil(idle_ttl / tick))
+        self._wheel: List[Set[str]] = [set() for _ in range(self._ttl_ticks + 1)]
+        self._deadlines: Dict[str, int] = {}
+        self._current_tick = self._now_tick()
+
+        # Least recently used first, with the approximate bytes each session retains
+        self._lru: "OrderedDict[str, int]" = OrderedDict()
+        self.bytes_retained = 0
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+
+    def _now_tick(self) -> int:
+        return int(self._clock() // self.tick)
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def touch(self, session_id: str, size: int = 0) -> None:
+        """Record activity on a session and its current approximate size in bytes"""
+        deadline = self._now_tick() + self._ttl_ticks
+        previous = self._deadlines.get(session_id)
+        if previous is not None:
+            self._wheel[previous % len(self._wheel)].discard(session_id)
+        self._deadlines[session_id] = deadline
+        self._wheel[deadline % len(self._wheel)].add(session_id)
+
+        self.bytes_retained += size - self._lru.get(session_id, 0)
+        self._lru[session_id] = size
+        self._lru.move_to_end(session_id)
+
+    def forget(self, session_id: str) -> None:
+        """Stop tracking a session that has ended"""
+        deadline = self._deadlines.pop(session_id, None)
+        if deadline is not None:
+            self._wheel[deadline % len(self._wheel)].discard(session_id)
+        self.bytes_retained -= self._lru.pop(session_id, 0)
+
+    def collect(self) -> List[Tuple[str, str]]:
+        """Advance the wheel to now and return (session_id, reason) pairs to evict"""
+        now_tick = self._now_tick()
+        evictions: List[Tuple[str, str]] = []
+
+        # A long pause may span more than one rotation; each slot is visited once
+        steps = min(now_tick - self._current_tick, len(self._wheel))
+        for step in range(1, steps + 1):
+            slot = (self._current_tick + step) % len(self._wheel)
+            due, self._wheel[slot] = self._wheel[slot], set()
+            for session_id in due:
+                deadline = self._deadlines[session_id]
+                if deadline > now_tick:
+                    # Touched after the last sweep; not idle yet
+                    self._wheel[slot].add(session_id)
+                    continue
+                self.forget(session_id)
+                self.evicted_idle += 1
+                evictions.append((session_id, "expired"))
+        self._current_tick = max(self._current_tick, now_tick)
+
+        while len(self._lru) > self.max_sessions:
+            session_id = next(iter(self._lru))
+            self.forget(session_id)
+            self.evicted_capacity += 1
+            evictions.append((session_id, "evicted"))
+
+        return evictions
+
+    async def run(self, on_evict: Callable[[List[Tuple[str, str]]], Awaitable[None]]) -> None:
+        """Sweep once per tick until cancelled, handing evictions to ``on_evict``"""
+        while True:
+            await asyncio.sleep(self.tick)
+            evictions = self.collect()
+            if evictions:
+                await on_evict(evictions)
+
+
+class SharedSessionEvictor:
+    """
+    Session eviction driven by the last-activity times in a shared store
+
+    Every worker serves every session, so no worker's own view of activity
+    can say a session is idle. Instead each sweep asks the store for the
+    least recently active sessions: beyond ``max_sessions`` across all
+    workers the idlest are evicted, and any left idle for ``idle_ttl`` are
+    expired, at most ``batch_size`` per sweep. Workers sweeping at the same
+    time may pick the same session; the ones that lose find it already
+    ended.
+    """
+
+    bytes_retained = 0
+
+    def __init__(self, store: SessionStore, idle_ttl: float = 1800.0, max_sessions: int = 10000,
+                 tick: float = 1.0, batch_size: int = 100, clock: Callable[[], float] = time.time):
+        self.store = store
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.tick = tick
+        self.batch_size = batch_size
+        self._clock = clock
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+
+    def __len__(self) -> int:
+        # Activity is tracked by the store, not here
+        return 0
+
+    def touch(self, session_id: str, size: int = 0) -> None:
+        """Writes record activity in the store; reads call the store's ``atouch``"""
+
+    def forget(self, session_id: str) -> None:
+        """Ending a session removes its activity from the store"""
+
+    async def collect(self) -> List[Tuple[str, str]]:
+        """Return (session_id, reason) pairs to evict, from the store's idlest sessions"""
+        excess = max(0, await self.store.acount() - self.max_sessions)
+        idlest = await self.store.aleast_recently_active(excess + self.batch_size)
+        cutoff = self._clock() - self.idle_ttl
+
+        evictions: List[Tuple[str, str]] = []
+        for index, (session_id, last_active) in enumerate(idlest):
+            if index < excess:
+                self.evicted_capacity += 1
+                evictions.append((session_id, "evicted"))
+            elif last_active <= cutoff:
+                self.evicted_idle += 1
+                evictions.append((session_id, "expired"))
+            else:
+                break
+        return evictions
+
+    async def run(self, on_evict: Callable[[List[Tuple[str, str]]], Awaitable[None]]) -> None:
+        """Sweep once per tick until cancelled, handing evictions to ``on_evict``"""
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                evictions = await self.collect()
+            except Exception as e:
+                # The store may be briefly unreachable; try again next tick
+                logger.error(f"Session eviction sweep failed: {e}")
+                continue
+            if evictions:
+                await on_evict(evictions)
@@ -0,0 +1,904 @@
+"""
+Session storage backends for the Waiter Training Agent
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .training_session import TrainingSession
+from ..utils.batch_writer import BatchWriter
+
+try:
+    from redis.exceptions import WatchError
+except ImportError:  # redis is only needed for RedisSessionStore
+    class WatchError(Exception):
+        """Raised when a watched key changes before EXEC"""
+
+
+logger = logging.getLogger("waiter_training_agent.session_store")
+
+
+class SessionConflictError(Exception):
+    """Raised when a session keeps changing underneath an update"""
+
+
+class SessionStore(ABC):
+    """
+    Storage interface for training sessions
+
+    Live sessions are looked up by ID; ended sessions are kept as history
+    where the backend supports it. Stores also behave like a read-only
+    mapping of the live sessions (``in``, ``[]`` and ``len``).
+
+    Request handlers use the ``a``-prefixed coroutine versions of each
+    operation. They call the plain methods directly, which suits stores
+    that stay in process; stores that wait on disk or the network
+    override them so the event loop never blocks.
+    """
+
+    #: Whether several worker processes can safely share this store
+    shared = False
+
+    @abstractmethod
+    def create(self, session: TrainingSession) -> None:
+        """Store a newly started session"""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[TrainingSession]:
+        """Get a live session, or None if it does not exist"""
+
+    @abstractmethod
+    def update(self, session: TrainingSession) -> None:
+        """Persist changes to a live session"""
+
+    @abstractmethod
+    def end(self, session_id: str, summary: Dict[str, Any]) -> None:
+        """Remove a session from the live set, keeping its summary as history"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of live sessions"""
+
+    def history(self, waiter_name: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Summaries of ended sessions, newest first"""
+        return []
+
+    def replace(self, session: TrainingSession, expected_version: int) -> bool:
+        """Write a session only if the stored copy is still at ``expected_version``"""
+        self.update(session)
+        return True
+
+    def touch(self, session_id: str) -> None:
+        """Record activity on a session without changing it, in stores that track activity"""
+
+    def least_recently_active(self, limit: int) -> List[Tuple[str, float]]:
+        """
+        IDs and last-activity times of the ``limit`` live sessions idle longest
+
+        Times are Unix seconds, oldest first. Shared stores keep these so
+        any worker can expire sessions that every worker has left idle.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not track session activity")
+
+    def mutate(self, session_id: str, apply: Callable[[TrainingSession], None],
+               retries: int = 8) -> Optional[TrainingSession]:
+        """
+        Apply a change to a session with optimistic concurrency
+
+        The session is re-read and the change re-applied whenever another
+        worker updated it in between. Returns None if the session no longer
+        exists.
+        """
+        for _ in range(retries):
+            session = self.get(session_id)
+            if session is None:
+                return None
+            expected_version = session.version
+            apply(session)
+            session.version = expected_version + 1
+            if self.replace(session, expected_version):
+                return session
+        raise SessionConflictError(f"Session {session_id} was modified concurrently")
+
+    def flush(self) -> None:
+        """Wait until all pending writes are durable"""
+
+    def close(self) -> None:
+        """Flush pending writes and release resources"""
+
+    # Async access
+
+    async def acreate(self, session: TrainingSession) -> None:
+        self.create(session)
+
+    async def aget(self, session_id: str) -> Optional[TrainingSession]:
+        return self.get(session_id)
+
+    async def aupdate(self, session: TrainingSession) -> None:
+        self.update(session)
+
+    async def aend(self, session_id: str, summary: Dict[str, Any]) -> None:
+        self.end(session_id, summary)
+
+    async def acount(self) -> int:
+        return self.count()
+
+    async def ahistory(self, waiter_name: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        return self.history(waiter_name, limit)
+
+    async def areplace(self, session: TrainingSession, expected_version: int) -> bool:
+        return self.replace(session, expected_version)
+
+    async def atouch(self, session_id: str) -> None:
+        self.touch(session_id)
+
+    async def aleast_recently_active(self, limit: int) -> List[Tuple[str, float]]:
+        return self.least_recently_active(limit)
+
+    async def amutate(self, session_id: str, apply: Callable[[TrainingSession], None],
+                      retries: int = 8) -> Optional[TrainingSession]:
+        """``mutate`` through ``aget`` and ``areplace``"""
+        for _ in range(retries):
+            session = await self.aget(session_id)
+            if session is None:
+                return None
+            expected_version = session.version
+            apply(session)
+            session.version = expected_version + 1
+            if await self.areplace(session, expected_version):
+                return session
+        raise SessionConflictError(f"Session {session_id} was modified concurrently")
+
+    async def aclose(self) -> None:
+        self.close()
+
+    def __contains__(self, session_id: object) -> bool:
+        return isinstance(session_id, str) and self.get(session_id) is not None
+
+    def __getitem__(self, session_id: str) -> TrainingSession:
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+    def __len__(self) -> int:
+        return self.count()
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local session store; sessions are lost on restart"""
+
+    def __init__(self, max_history: int = 10000):
+        self._sessions: Dict[str, TrainingSession] = {}
+        # Capped like the Redis store's history list
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=max_history)
+
+    def create(self, session: TrainingSession) -> None:
+        self._sessions[session.session_id] = session
+
+    def get(self, session_id: str) -> Optional[TrainingSession]:
+        return self._sessions.get(session_id)
+
+    def update(self, session: TrainingSession) -> None:
+        self._sessions[session.session_id] = session
+
+    def end(self, session_id: str, summary: Dict[str, Any]) -> None:
+        self._sessions.pop(session_id, None)
+        self._history.append(summary)
+
+    def count(self) -> int:
+        return len(self._sessions)
+
+    def history(self, waiter_name: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        matching = [s for s in reversed(self._history)
+                    if waiter_name is None or s.get("waiter_name") == waiter_name]
+        return matching[:limit]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    waiter_name TEXT NOT NULL,
+    difficulty_level TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT,
+    status TEXT NOT NULL DEFAULT 'active',
+    score REAL NOT NULL,
+    scenarios_completed TEXT NOT NULL,
+    feedback TEXT NOT NULL,
+    feedback_count INTEGER NOT NULL DEFAULT 0,
+    summary TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_waiter_name ON sessions (waiter_name);
+CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON sessions (start_time);
+"""
+
+_UPSERT_SQL = """
+INSERT INTO sessions (session_id, waiter_name, difficulty_level, start_time,
+                      score, scenarios_completed, feedback, feedback_count, version, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (session_id) DO UPDATE SET
+    score = excluded.score,
+    scenarios_completed = excluded.scenarios_completed,
+    feedback = excluded.feedback,
+    feedback_count = excluded.feedback_count,
+    version = excluded.version,
+    updated_at = excluded.updated_at
+"""
+
+_COMPARE_AND_SET_SQL = """
+UPDATE sessions SET score = ?, scenarios_completed = ?, feedback = ?, feedback_count = ?, version = ?,
+                    updated_at = ?
+WHERE session_id = ? AND version = ? AND status = 'active'
+"""
+
+_TOUCH_SQL = "UPDATE sessions SET updated_at = ? WHERE session_id = ? AND status = 'active'"
+
+_IDLEST_SQL = """
+SELECT session_id, updated_at FROM sessions
+WHERE status = 'active' ORDER BY updated_at LIMIT ?
+"""
+
+_END_SQL = """
+UPDATE sessions SET status = 'ended', end_time = ?, summary = ?
+WHERE session_id = ?
+"""
+
+_SELECT_SQL = """
+SELECT session_id, waiter_name, difficulty_level, start_time,
+       score, scenarios_completed, feedback, feedback_count, version
+FROM sessions WHERE session_id = ? AND status = 'active'
+"""
+
+_COUNT_SQL = "SELECT COUNT(*) FROM sessions WHERE status = 'active'"
+
+_HISTORY_SQL = """
+SELECT summary FROM sessions
+WHERE status = 'ended' AND (? IS NULL OR waiter_name = ?)
+ORDER BY start_time DESC LIMIT ?
+"""
+
+
+def _session_row(session: TrainingSession) -> Tuple[Any, ...]:
+    return (
+        session.session_id,
+        session.waiter_name,
+        session.difficulty_level,
+        session.start_time.isoformat(),
+        session.score,
+        json.dumps(session.scenarios_completed),
+        json.dumps(session.feedback),
+        session.feedback_count,
+        session.version,
+        time.time()
+    )
+
+
+def _row_session(row: Tuple[Any, ...]) -> TrainingSession:
+    return TrainingSession.from_dict({
+        "session_id": row[0],
+        "waiter_name": row[1],
+        "difficulty_level": row[2],
+        "start_time": row[3],
+        "score": row[4],
+        "scenarios_completed": json.loads(row[5]),
+        "feedback": json.loads(row[6]),
+        "feedback_count": row[7],
+        "version": row[8]
+    })
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite-backed session store
+
+    The database runs in WAL mode with ``synchronous=NORMAL``. Writes go
+    through a write-behind queue drained by a background thread, which
+    coalesces repeated updates to the same session and commits each batch
+    in a single transaction, so request handlers never wait on disk I/O.
+    A batch that fails is retried one write at a time, so one bad row only
+    loses itself. Live sessions are kept in an in-process cache for reads,
+    along with the live count and the summaries of ended sessions whose
+    writes are still queued, so reads never wait for the queue either.
+
+    In ``shared`` mode the file is used by several worker processes at
+    once: the cache and write-behind queue are disabled, every read goes to
+    the database and updates are compare-and-set on the session version.
+
+    The async operations answer from the cache and queue where they can and
+    run anything that reads or writes the file on a single I/O thread.
+    """
+
+    def __init__(self, path: str = "data/training_sessions.db", batch_size: int = 256,
+                 flush_interval: float = 0.05, write_behind: bool = True, shared: bool = False):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.shared = shared
+        # An in-memory database is private to its connection, so it cannot
+        # be shared with a writer thread
+        self.write_behind = write_behind and not shared and path != ":memory:"
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = self._connect()
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._lock = threading.Lock()
+        self._cache: Dict[str, TrainingSession] = {}
+        # Sessions ended since their end was queued, until it is committed
+        self._ending: Dict[str, Dict[str, Any]] = {}
+        # Changed from the event loop and the I/O thread alike
+        self._live_lock = threading.Lock()
+        self._live = self._conn.execute(_COUNT_SQL).fetchone()[0]
+
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-store-io")
+        self._writer: Optional[BatchWriter] = None
+        if self.write_behind:
+            writer_conn = self._connect()
+            self._writer_conn = writer_conn
+            self._writer = BatchWriter(
+                lambda batch: self._write(writer_conn, batch), "session-store-writer", batch_size, flush_interval
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None,
+                               cached_statements=64)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _migrate(self) -> None:
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        for column in ("version", "feedback_count"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE sessions ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+        if "updated_at" not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN updated_at REAL NOT NULL DEFAULT 0")
+            # Sessions from before the upgrade count as active now, not since 1970
+            self._conn.execute("UPDATE sessions SET updated_at = ?", (time.time(),))
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_activity ON sessions (status, updated_at)")
+
+    # Writes
+
+    def _submit(self, op: str, args: Tuple[Any, ...]) -> None:
+        if self._writer is not None:
+            self._writer.put((op, args))
+        else:
+            with self._lock:
+                self._apply_batch(self._conn, [(op, args)])
+
+    @staticmethod
+    def _apply_batch(conn: sqlite3.Connection, batch: List[Tuple[str, Tuple[Any, ...]]]) -> None:
+        # Only the latest upsert per session matters; ends must follow their upserts
+        upserts: Dict[str, Tuple[Any, ...]] = {}
+        ends: List[Tuple[Any, ...]] = []
+        for op, args in batch:
+            if op == "upsert":
+                upserts[args[0]] = args
+            else:
+                ends.append(args)
+
+        conn.execute("BEGIN")
+        try:
+            if upserts:
+                conn.executemany(_UPSERT_SQL, upserts.values())
+            if ends:
+                conn.executemany(_END_SQL, ends)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Tuple[str, Tuple[Any, ...]]]) -> None:
+        """Commit a batch, falling back to one write at a time if it fails; never raises"""
+        try:
+            self._apply_batch(conn, batch)
+            written = batch
+        except Exception as e:
+            logger.error(f"Session store batch of {len(batch)} writes failed, retrying one by one: {e}")
+            written = []
+            for op, args in batch:
+                try:
+                    self._apply_batch(conn, [(op, args)])
+                    written.append((op, args))
+                except Exception as e:
+                    session_id = args[2] if op == "end" else args[0]
+                    logger.error(f"Dropped session store {op} of {session_id}: {e}")
+        for op, args in written:
+            if op == "end":
+                self._ending.pop(args[2], None)
+
+    def create(self, session: TrainingSession) -> None:
+        if not self.shared:
+            self._cache[session.session_id] = session
+            with self._live_lock:
+                self._live += 1
+        self._submit("upsert", _session_row(session))
+
+    def update(self, session: TrainingSession) -> None:
+        if not self.shared:
+            self._cache[session.session_id] = session
+        self._submit("upsert", _session_row(session))
+
+    def replace(self, session: TrainingSession, expected_version: int) -> bool:
+        if not self.shared:
+            self.update(session)
+            return True
+
+        row = _session_row(session)
+        with self._lock:
+            cursor = self._conn.execute(
+                _COMPARE_AND_SET_SQL,
+                (row[4], row[5], row[6], row[7], session.version, row[9], session.session_id, expected_version)
+            )
+        return cursor.rowcount == 1
+
+    def end(self, session_id: str, summary: Dict[str, Any]) -> None:
+        if not self.shared:
+            if self._cache.pop(session_id, None) is not None or self._select(session_id) is not None:
+                with self._live_lock:
+                    self._live -= 1
+            if self.write_behind:
+                self._ending[session_id] = summary
+        self._submit("end", (datetime.now().isoformat(), json.dumps(summary), session_id))
+
+    # Reads
+
+    def _select(self, session_id: str) -> Optional[TrainingSession]:
+        # Every session with queued writes is cached or ending, so what is
+        # on disk is current for the rest and the queue need not be waited on
+        if session_id in self._ending:
+            return None
+        with self._lock:
+            row = self._conn.execute(_SELECT_SQL, (session_id,)).fetchone()
+        return _row_session(row) if row is not None else None
+
+    def get(self, session_id: str) -> Optional[TrainingSession]:
+        session = self._cache.get(session_id)
+        if session is not None:
+            return session
+
+        # Sessions started before a restart (or by another worker) are
+        # loaded from the database
+        session = self._select(session_id)
+        if session is not None and not self.shared:
+            self._cache[session_id] = session
+        return session
+
+    def count(self) -> int:
+        if not self.shared:
+            return self._live
+        with self._lock:
+            return self._conn.execute(_COUNT_SQL).fetchone()[0]
+
+    def touch(self, session_id: str) -> None:
+        # Only shared stores expire by the stored time; otherwise the
+        # worker's own evictor tracks activity
+        if self.shared:
+            with self._lock:
+                self._conn.execute(_TOUCH_SQL, (time.time(), session_id))
+
+    def least_recently_active(self, limit: int) -> List[Tuple[str, float]]:
+        with self._lock:
+            return [(row[0], row[1]) for row in self._conn.execute(_IDLEST_SQL, (limit,))]
+
+    def history(self, waiter_name: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        # Ends still queued are the newest; the database has the rest
+        pending = [summary for summary in reversed(list(self._ending.values()))
+                   if waiter_name is None or summary.get("waiter_name") == waiter_name]
+        with self._lock:
+            rows = self._conn.execute(_HISTORY_SQL, (waiter_name, waiter_name, limit + len(pending))).fetchall()
+        seen = {summary.get("session_id") for summary in pending}
+        stored = (json.loads(row[0]) for row in rows if row[0])
+        return (pending + [summary for summary in stored if summary.get("session_id") not in seen])[:limit]
+
+    # Lifecycle
+
+    def flush(self) -> None:
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self) -> None:
+        self._io.shutdown()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer_conn.close()
+        with self._lock:
+            self._conn.close()
+
+    # Async access
+
+    async def _off_loop(self, call: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._io, call, *args)
+
+    @property
+    def _writes_block(self) -> bool:
+        return not self.write_behind or self.shared
+
+    async def acreate(self, session: TrainingSession) -> None:
+        if self._writes_block:
+            await self._off_loop(self.create, session)
+        else:
+            self.create(session)
+
+    async def aget(self, session_id: str) -> Optional[TrainingSession]:
+        session = self._cache.get(session_id)
+        if session is not None:
+            return session
+        return await self._off_loop(self.get, session_id)
+
+    async def aupdate(self, session: TrainingSession) -> None:
+        if self._writes_block:
+            await self._off_loop(self.update, session)
+        else:
+            self.update(session)
+
+    async def areplace(self, session: TrainingSession, expected_version: int) -> bool:
+        if self._writes_block:
+            return await self._off_loop(self.replace, session, expected_version)
+        return self.replace(session, expected_version)
+
+    async def aend(self, session_id: str, summary: Dict[str, Any]) -> None:
+        if self._writes_block or session_id not in self._cache:
+            await self._off_loop(self.end, session_id, summary)
+        else:
+            self.end(session_id, summary)
+
+    async def acount(self) -> int:
+        if self.shared:
+            return await self._off_loop(self.count)
+        return self.count()
+
+    async def ahistory(self, waiter_name: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        return await self._off_loop(self.history, waiter_name, limit)
+
+    async def atouch(self, session_id: str) -> None:
+        if self.shared:
+            await self._off_loop(self.touch, session_id)
+
+    async def aleast_recently_active(self, limit: int) -> List[Tuple[str, float]]:
+        return await self._off_loop(self.least_recently_active, limit)
+
+    async def aclose(self) -> None:
+        # Waits for the writer to drain the queue
+        await asyncio.to_thread(self.close)
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Session store for any Redis-protocol server
+
+    Each live session is a JSON value under ``{prefix}session:{id}``, with
+    the set of live IDs in ``{prefix}live``, their last-activity times in
+    the sorted set ``{prefix}activity`` and ended-session summaries in
+    the capped list ``{prefix}history``. Updates are compare-and-set on the
+    session version using WATCH/MULTI/EXEC, so any worker can serve any
+    session. ``client`` is a redis-py client or a compatible fake.
+
+    The async operations use ``async_client``, a ``redis.asyncio`` client
+    for the same server, so requests never wait on Redis with the event
+    loop blocked. Without one they run the blocking client on a thread.
+    """
+
+    shared = True
+
+    def __init__(self, client: Any, prefix: str = "waiter_training:", max_history: int = 10000,
+                 async_client: Any = None):
+        self.client = client
+        self.async_client = async_client
+        self.prefix = prefix
+        self.max_history = max_history
+        self._live_key = f"{prefix}live"
+        self._activity_key = f"{prefix}activity"
+        self._history_key = f"{prefix}history"
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> "RedisSessionStore":
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError as e:
+            raise ImportError("The redis session store requires the 'redis' package") from e
+        return cls(redis.Redis.from_url(url), async_client=redis.asyncio.Redis.from_url(url), **kwargs)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}session:{session_id}"
+
+    def create(self, session: TrainingSession) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self._key(session.session_id), json.dumps(session.to_dict()))
+        pipe.sadd(self._live_key, session.session_id)
+        pipe.zadd(self._activity_key, {session.session_id: time.time()})
+        pipe.execute()
+
+    def get(self, session_id: str) -> Optional[TrainingSession]:
+        raw = self.client.get(self._key(session_id))
+        if raw is None:
+            return None
+        return TrainingSession.from_dict(json.loads(raw))
+
+    def update(self, session: TrainingSession) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self._key(session.session_id), json.dumps(session.to_dict()))
+        pipe.zadd(self._activity_key, {session.session_id: time.time()}, xx=True)
+        pipe.execute()
+
+    def replace(self, session: TrainingSession, expected_version: int) -> bool:
+        key = self._key(session.session_id)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                raw = pipe.get(key)
+                if raw is None or json.loads(raw).get("version", 0) != expected_version:
+                    return False
+                pipe.multi()
+                pipe.set(key, json.dumps(session.to_dict()))
+                pipe.zadd(self._activity_key, {session.session_id: time.time()}, xx=True)
+                pipe.execute()
+                return True
+            except WatchError:
+                return False
+
+    def end(self, session_id: str, summary: Dict[str, Any]) -> None:
+        pipe = self.client.pipeline()
+        pipe.delete(self._key(session_id))
+        pipe.srem(self._live_key, session_id)
+        pipe.zrem(self._activity_key, session_id)
+        pipe.lpush(self._history_key, json.dumps(summary))
+        pipe.ltrim(self._history_key, 0, self.max_history - 1)
+        pipe.execute()
+
+    def count(self) -> int:
+        return int(self.client.scard(self._live_key))
+
+    def touch(self, session_id: str) -> None:
+        # XX so a touch racing an end cannot bring the session back
+        self.client.zadd(self._activity_key, {session_id: time.time()}, xx=True)
+
+    def least_recently_active(self, limit: int) -> List[Tuple[str, float]]:
+        return _decode_activity(self.client.zrange(self._activity_key, 0, limit - 1, withscores=True))
+
+    def history(self, waiter_name: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        summaries = (json.loads(raw) for raw in self.client.lrange(self._history_key, 0, -1))
+        matching = [s for s in summaries if waiter_name is None or s.get("waiter_name") == waiter_name]
+        return matching[:limit]
+
+    def close(self) -> None:
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+    # Async access
+
+    async def acreate(self, session: TrainingSession) -> None:
+        if self.async_client is None:
+            return await asyncio.to_thread(self.create, session)
+        pipe = self.async_client.pipeline()
+        pipe.set(self._key(session.session_id), json.dumps(session.to_dict()))
+        pipe.sadd(self._live_key, session.session_id)
+        pipe.zadd(self._activity_key, {session.session_id: time.time()})
+        await pipe.execute()
+
+    async def aget(self, session_id: str) -> Optional[TrainingSession]:
+        if self.async_client is None:
+            return await asyncio.to_thread(self.get, session_id)
+        raw = await self.async_client.get(self._key(session_id))
+        if raw is None:
+            return None
+        return TrainingSession.from_dict(json.loads(raw))
+
+    async def aupdate(self, session: TrainingSession) -> None:
+        if self.async_client is None:
+            return await asyncio.to_thread(self.update, session)
+        pipe = self.async_client.pipeline()
+        pipe.set(self._key(session.session_id), json.dumps(session.to_dict()))
+        pipe.zadd(self._activity_key, {session.session_id: time.time()}, xx=True)
+        await pipe.execute()
+
+    async def areplace(self, session: TrainingSession, expected_version: int) -> bool:
+        if self.async_client is None:
+            return await asyncio.to_thread(self.replace, session, expected_version)
+        key = self._key(session.session_id)
+        async with self.async_client.pipeline() as pipe:
+            try:
+                await pipe.watch(key)
+                raw = await pipe.get(key)
+                if raw is None or json.loads(raw).get("version", 0) != expected_version:
+                    return False
+                pipe.multi()
+                pipe.set(key, json.dumps(session.to_dict()))
+                pipe.zadd(self._activity_key, {session.session_id: time.time()}, xx=True)
+                await pipe.execute()
+                return True
+            except WatchError:
+                return False
+
+    async def aend(self, session_id: str, summary: Dict[str, Any]) -> None:
+        if self.async_client is None:
+            return await asyncio.to_thread(self.end, session_id, summary)
+        pipe = self.async_client.pipeline()
+        pipe.delete(self._key(session_id))
+        pipe.srem(self._live_key, session_id)
+        pipe.zrem(self._activity_key, session_id)
+        pipe.lpush(self._history_key, json.dumps(summary))
+        pipe.ltrim(self._history_key, 0, self.max_history - 1)
+        await pipe.execute()
+
+    async def acount(self) -> int:
+        if self.async_client is None:
+            return await asyncio.to_thread(self.count)
+        return int(await self.async_client.scard(self._live_key))
+
+    async def atouch(self, session_id: str) -> None:
+        if self.async_client is None:
+            return await asyncio.to_thread(self.touch, session_id)
+        await self.async_client.zadd(self._activity_key, {session_id: time.time()}, xx=True)
+
+    async def aleast_recently_active(self, limit: int) -> List[Tuple[str, float]]:
+        if self.async_client is None:
+            return await asyncio.to_thread(self.least_recently_active, limit)
+        return _decode_activity(await self.async_client.zrange(self._activity_key, 0, limit - 1, withscores=True))
+
+    async def ahistory(self, waiter_name: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        if self.async_client is None:
+            return await asyncio.to_thread(self.history, waiter_name, limit)
+        raws = await self.async_client.lrange(self._history_key, 0, -1)
+        summaries = (json.loads(raw) for raw in raws)
+        matching = [s for s in summaries if waiter_name is None or s.get("waiter_name") == waiter_name]
+        return matching[:limit]
+
+    async def aclose(self) -> None:
+        self.close()
+        if self.async_client is not None:
+            await self.async_client.aclose()
+
+
+def _decode_activity(entries: List[Tuple[Any, float]]) -> List[Tuple[str, float]]:
+    return [(member.decode() if isinstance(member, bytes) else member, float(score)) for member, score in entries]
+
+
+class InstrumentedSessionStore(SessionStore):
+    """
+    Times every call to another store
+
+    ``histogram`` is a metrics histogram labelled by store and operation;
+    each operation's child is looked up once here, so a call costs two
+    clock reads and an observation.
+    """
+
+    OPERATIONS = ("create", "get", "update", "end", "count", "history", "replace", "mutate", "flush",
+                  "touch", "least_recently_active")
+
+    def __init__(self, store: SessionStore, name: str, histogram: Any):
+        self.store = store
+        self.name = name
+        self._observe = {op: histogram.labels(name, op).observe for op in self.OPERATIONS}
+
+    @property
+    def shared(self) -> bool:
+        return self.store.shared
+
+    def _timed(self, op: str, call: Callable[..., Any], *args: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            self._observe[op](time.perf_counter() - started)
+
+    def create(self, session: TrainingSession) -> None:
+        self._timed("create", self.store.create, session)
+
+    def get(self, session_id: str) -> Optional[TrainingSession]:
+        return self._timed("get", self.store.get, session_id)
+
+    def update(self, session: TrainingSession) -> None:
+        self._timed("update", self.store.update, session)
+
+    def end(self, session_id: str, summary: Dict[str, Any]) -> None:
+        self._timed("end", self.store.end, session_id, summary)
+
+    def count(self) -> int:
+        return self._timed("count", self.store.count)
+
+    def history(self, waiter_name: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        return self._timed("history", self.store.history, waiter_name, limit)
+
+    def replace(self, session: TrainingSession, expected_version: int) -> bool:
+        return self._timed("replace", self.store.replace, session, expected_version)
+
+    def mutate(self, session_id: str, apply: Callable[[TrainingSession], None],
+               retries: int = 8) -> Optional[TrainingSession]:
+        # Timed as a whole, retries included
+        return self._timed("mutate", self.store.mutate, session_id, apply, retries)
+
+    def touch(self, session_id: str) -> None:
+        self._timed("touch", self.store.touch, session_id)
+
+    def least_recently_active(self, limit: int) -> List[Tuple[str, float]]:
+        return self._timed("least_recently_active", self.store.least_recently_active, limit)
+
+    def flush(self) -> None:
+        self._timed("flush", self.store.flush)
+
+    def close(self) -> None:
+        self.store.close()
+
+    async def _atimed(self, op: str, call: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await call(*args)
+        finally:
+            self._observe[op](time.perf_counter() - started)
+
+    async def acreate(self, session: TrainingSession) -> None:
+        await self._atimed("create", self.store.acreate, session)
+
+    async def aget(self, session_id: str) -> Optional[TrainingSession]:
+        return await self._atimed("get", self.store.aget, session_id)
+
+    async def aupdate(self, session: TrainingSession) -> None:
+        await self._atimed("update", self.store.aupdate, session)
+
+    async def aend(self, session_id: str, summary: Dict[str, Any]) -> None:
+        await self._atimed("end", self.store.aend, session_id, summary)
+
+    async def acount(self) -> int:
+        return await self._atimed("count", self.store.acount)
+
+    async def ahistory(self, waiter_name: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        return await self._atimed("history", self.store.ahistory, waiter_name, limit)
+
+    async def areplace(self, session: TrainingSession, expected_version: int) -> bool:
+        return await self._atimed("replace", self.store.areplace, session, expected_version)
+
+    async def amutate(self, session_id: str, apply: Callable[[TrainingSession], None],
+                      retries: int = 8) -> Optional[TrainingSession]:
+        return await self._atimed("mutate", self.store.amutate, session_id, apply, retries)
+
+    async def atouch(self, session_id: str) -> None:
+        await self._atimed("touch", self.store.atouch, session_id)
+
+    async def aleast_recently_active(self, limit: int) -> List[Tuple[str, float]]:
+        return await self._atimed("least_recently_active", self.store.aleast_recently_active, limit)
+
+    async def aclose(self) -> None:
+        await self.store.aclose()
+
+
+def create_session_store(database_config: Dict[str, Any]) -> SessionStore:
+    """Create the session store described by the ``database`` config section"""
+    store_type = database_config.get("type", "memory")
+
+    if store_type == "sqlite":
+        return SQLiteSessionStore(
+            path=database_config.get("path", "data/training_sessions.db"),
+            batch_size=database_config.get("batch_size", 256),
+            flush_interval=database_config.get("flush_interval", 0.05),
+            write_behind=database_config.get("write_behind", True),
+            shared=database_config.get("shared", False)
+        )
+    if store_type == "redis":
+        return RedisSessionStore.from_url(
+            database_config.get("url", "redis://localhost:6379/0"),
+            prefix=database_config.get("prefix", "waiter_training:"),
+            max_history=database_config.get("max_history", 10000)
+        )
+    if store_type == "memory":
+        return MemorySessionStore(max_history=database_config.get("max_history", 10000))
+
+    raise ValueError(f"Unsupported session store type: {store_type}")
@@ -0,0 +1,81 @@
+"""
+Request coalescing for identical in-flight LLM calls
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Shares one in-flight call between concurrent callers with the same key
+
+    The first caller for a key starts the call; callers arriving while it is
+    still running wait for the same result (or exception) instead of
+    starting their own. The call runs as its own task, so a caller that is
+    cancelled, e.g. by a client disconnecting, does not cancel it for the
+    others; once every caller has gone, the call is cancelled too. The key
+    is forgotten as soon as the call finishes, so this only
+    removes duplicate work happening at the same time; reuse after that is
+    the feedback cache's job.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+        # Callers still waiting on each key's call
+        self._waiters: Dict[Hashable, int] = {}
+
+    @staticmethod
+    def _finished(task: asyncio.Future) -> None:
+        # Retrieve the exception so it is not reported as never retrieved
+        # when every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            self._waiters.pop(key, None)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` for ``key``, or join the call already running for it"""
+        self.calls += 1
+        task = self._calls.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            task.add_done_callback(self._finished)
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self._calls[key] = task
+            self._waiters[key] = 1
+        else:
+            self.coalesced += 1
+            self._waiters[key] += 1
+        self.max_waiters = max(self.max_waiters, self._waiters[key])
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+                if not self._waiters[key] and not task.done():
+                    # Nobody is left to use the result
+                    task.cancel()
+                    self._forget(key, task)
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "max_waiters": self.max_waiters,
+            "coalesced_rate": round(self.coalesced / self.calls, 4) if self.calls else 0.0
+        }
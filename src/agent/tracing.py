@@ -0,0 +1,312 @@
+"""
+Request tracing for the Waiter Training Agent
+
+Spans in the OpenTelemetry style: each has a trace ID shared by everything
+done for one request, its own span ID, its parent's span ID, start and end
+times, attributes and a status. The active span is kept in a context
+variable, so it follows a request through ``await`` and into tasks it
+creates, and is written out as one JSON line per span.
+"""
+
+import contextvars
+import json
+import random
+import re
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from ..utils.batch_writer import BatchWriter
+from ..utils.decorators import instrument_method
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off or the trace was not sampled"""
+
+    __slots__ = ()
+
+    recording = False
+    name = trace_id = span_id = parent_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def record_exception(self, error: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("waiter_current_span", default=None)
+
+
+def current_span() -> Any:
+    """The active span, or the no-op span outside of a trace"""
+    return _current_span.get() or NOOP_SPAN
+
+
+class Span:
+    """
+    One timed operation in a trace
+
+    Used as a context manager the span becomes the active one until it
+    exits; ``Tracer.start_span`` creates one without activating it, to be
+    ended explicitly.
+    """
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "status", "error", "_token")
+
+    recording = True
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self._token: Optional[contextvars.Token] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def record_exception(self, error: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer.exporter.export(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], tb: Any) -> None:
+        if exc is not None:
+            self.record_exception(exc)
+        _current_span.reset(self._token)
+        self.end()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+
+class SpanExporter:
+    """Receives finished spans"""
+
+    def export(self, span: Span) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps finished spans in a list"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Appends finished spans to a JSON lines file
+
+    Spans are queued and written in batches by a background thread, so
+    ending a span never waits on disk. Each line carries the resource's
+    ``service_name`` alongside the span.
+    """
+
+    def __init__(self, path: str = "logs/traces.jsonl", service_name: str = "waiter-training-agent",
+                 batch_size: int = 512, flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._writer = BatchWriter(self._write, "span-writer", batch_size, flush_interval)
+
+    def export(self, span: Span) -> None:
+        self._writer.put(span)
+
+    def _write(self, batch: List[Span]) -> None:
+        with self.path.open("a", encoding="utf-8") as f:
+            f.writelines(
+                json.dumps({"service_name": self.service_name, **span.to_dict()}, default=str) + "\n"
+                for span in batch
+            )
+
+    def flush(self) -> None:
+        self._writer.flush()
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class Tracer:
+    """
+    Creates spans and decides which traces are recorded
+
+    A trace is sampled with probability ``sample_rate`` when its first span
+    starts, or as an incoming ``traceparent`` header says, and every span
+    in it follows that decision. When tracing is disabled, or a trace is
+    not sampled, spans are the shared no-op span and cost one check.
+    """
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 1.0,
+                 exporter: Optional[SpanExporter] = None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.exporter = exporter or SpanExporter()
+
+    @classmethod
+    def from_config(cls, tracing_config: Dict[str, Any]) -> "Tracer":
+        """Create the tracer described by the ``tracing`` config section"""
+        if not tracing_config.get("enabled", False):
+            return cls()
+        exporter_type = tracing_config.get("exporter", "file")
+        if exporter_type == "file":
+            exporter: SpanExporter = FileSpanExporter(
+                path=tracing_config.get("path", "logs/traces.jsonl"),
+                service_name=tracing_config.get("service_name", "waiter-training-agent"),
+                batch_size=tracing_config.get("batch_size", 512),
+                flush_interval=tracing_config.get("flush_interval", 1.0)
+            )
+        elif exporter_type == "memory":
+            exporter = InMemorySpanExporter()
+        else:
+            raise ValueError(f"Unsupported span exporter: {exporter_type}")
+        return cls(enabled=True, sample_rate=tracing_config.get("sample_rate", 1.0), exporter=exporter)
+
+    def start_span(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Any:
+        """A span under the active one, or starting a new trace; not activated"""
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if parent is NOOP_SPAN:
+            # Inside a trace that was not sampled
+            return NOOP_SPAN
+        if parent is not None:
+            return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+        match = _TRACEPARENT.match(traceparent) if traceparent else None
+        if match:
+            trace_id, parent_id, flags = match.groups()
+            if not int(flags, 16) & 1:
+                return _UnsampledRoot()
+            return Span(self, name, trace_id, parent_id, attributes)
+        if random.random() >= self.sample_rate:
+            return _UnsampledRoot()
+        return Span(self, name, "%032x" % random.getrandbits(128), None, attributes)
+
+    def span(self, name: str, **attributes: Any) -> Any:
+        """A span to use with ``with``; it is active inside the block"""
+        if not self.enabled:
+            return NOOP_SPAN
+        return self.start_span(name, **attributes)
+
+    def flush(self) -> None:
+        self.exporter.flush()
+
+    def close(self) -> None:
+        self.exporter.close()
+
+
+class _UnsampledRoot(_NoopSpan):
+    """Marks a trace as unsampled so the spans under it are no-ops too"""
+
+    __slots__ = ("_token",)
+
+    def __enter__(self) -> "_UnsampledRoot":
+        self._token = _current_span.set(NOOP_SPAN)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _current_span.reset(self._token)
+
+
+async def _trace_items(generator: AsyncIterator[Any], span: Any) -> AsyncIterator[Any]:
+    try:
+        while True:
+            # Active only while the generator runs, not between items
+            token = _current_span.set(span)
+            try:
+                item = await generator.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                _current_span.reset(token)
+            yield item
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            span.record_exception(e)
+        raise
+    finally:
+        await generator.aclose()
+        span.end()
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """
+    Run a method inside a span from its instance's ``tracer``
+
+    Works for plain methods, coroutines and async generators. With tracing
+    disabled the original method is called directly.
+    """
+    def call(self: Any, method: Callable, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        with self.tracer.span(name):
+            return method(self, *args, **kwargs)
+
+    async def coroutine(self: Any, method: Callable, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        with self.tracer.span(name):
+            return await method(self, *args, **kwargs)
+
+    def generator(self: Any, method: Callable, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        span = self.tracer.start_span(name)
+        # An unsampled trace still marks what runs under it
+        return _trace_items(method(self, *args, **kwargs), span if span.recording else NOOP_SPAN)
+
+    return instrument_method(lambda self: self.tracer.enabled, call, coroutine, generator)
@@ -0,0 +1,142 @@
+"""
+Training session records for the Waiter Training Agent
+"""
+
+import sys
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+from datetime import datetime
+
+from .training_scenarios import SCENARIO_CATEGORIES
+
+
+# Category names interned as bit positions, shared by every session in the
+# process. The agent only records categories from its scenario catalog, so
+# this stays as small as the catalog.
+_CATEGORY_NAMES: List[str] = list(SCENARIO_CATEGORIES)
+_CATEGORY_BITS: Dict[str, int] = {name: bit for bit, name in enumerate(_CATEGORY_NAMES)}
+
+
+def _category_bit(category: str) -> int:
+    bit = _CATEGORY_BITS.get(category)
+    if bit is None:
+        bit = len(_CATEGORY_NAMES)
+        _CATEGORY_NAMES.append(sys.intern(category))
+        _CATEGORY_BITS[_CATEGORY_NAMES[bit]] = bit
+    return bit
+
+
+class TrainingSession:
+    """
+    Represents a training session for a waiter
+    
+    Stored compactly: attributes live in ``__slots__``, completed scenario
+    categories are a bitset over interned category names, and only the most
+    recent feedback texts are kept, alongside a running ``feedback_count``.
+    """
+    
+    #: Number of recent feedback texts kept when add_feedback is not told otherwise
+    feedback_history = 5
+    
+    __slots__ = (
+        "session_id", "waiter_name", "difficulty_level", "start_time", "score", "version",
+        "feedback_count", "_completed", "_feedback"
+    )
+    
+    def __init__(self, session_id: str, waiter_name: str, difficulty_level: str,
+                 start_time: datetime, scenarios_completed: Iterable[str], score: float,
+                 feedback: Iterable[str], version: int = 0, feedback_count: Optional[int] = None):
+        self.session_id = session_id
+        self.waiter_name = waiter_name
+        self.difficulty_level = sys.intern(difficulty_level)
+        self.start_time = start_time
+        self.score = score
+        self.version = version
+        self.scenarios_completed = scenarios_completed
+        self._feedback: Deque[str] = deque(feedback)
+        self.feedback_count = len(self._feedback) if feedback_count is None else feedback_count
+    
+    @property
+    def scenarios_completed(self) -> List[str]:
+        """Completed scenario categories, in catalog order"""
+        mask = self._completed
+        return [name for bit, name in enumerate(_CATEGORY_NAMES) if mask >> bit & 1]
+    
+    @scenarios_completed.setter
+    def scenarios_completed(self, categories: Iterable[str]) -> None:
+        self._completed = 0
+        for category in categories:
+            self.complete_scenario(category)
+    
+    @property
+    def completed_count(self) -> int:
+        return bin(self._completed).count("1")
+    
+    def has_completed(self, category: str) -> bool:
+        bit = _CATEGORY_BITS.get(category)
+        return bit is not None and bool(self._completed >> bit & 1)
+    
+    def complete_scenario(self, category: str) -> None:
+        self._completed |= 1 << _category_bit(category)
+    
+    @property
+    def feedback(self) -> List[str]:
+        """The most recent feedback texts, oldest first"""
+        return list(self._feedback)
+    
+    def add_feedback(self, feedback: str, keep: Optional[int] = None) -> None:
+        """Append a feedback text, keeping the ``keep`` most recent"""
+        self._feedback.append(feedback)
+        self.feedback_count += 1
+        keep = self.feedback_history if keep is None else keep
+        while len(self._feedback) > keep:
+            self._feedback.popleft()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the session to plain JSON-compatible values"""
+        return {
+            "session_id": self.session_id,
+            "waiter_name": self.waiter_name,
+            "difficulty_level": self.difficulty_level,
+            "start_time": self.start_time.isoformat(),
+            "scenarios_completed": self.scenarios_completed,
+            "score": self.score,
+            "feedback": self.feedback,
+            "feedback_count": self.feedback_count,
+            "version": self.version
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrainingSession":
+        """Rebuild a session from the output of to_dict"""
+        return cls(
+            session_id=data["session_id"],
+            waiter_name=data["waiter_name"],
+            difficulty_level=data["difficulty_level"],
+            start_time=datetime.fromisoformat(data["start_time"]),
+            scenarios_completed=data["scenarios_completed"],
+            score=float(data["score"]),
+            feedback=data["feedback"],
+            version=int(data.get("version", 0)),
+            feedback_count=data.get("feedback_count")
+        )
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TrainingSession):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return (f"TrainingSession(session_id={self.session_id!r}, waiter_name={self.waiter_name!r}, "
+                f"score={self.score!r}, scenarios_completed={self.scenarios_completed!r}, "
+                f"feedback_count={self.feedback_count!r})")
+    
+    def estimate_size(self) -> int:
+        """Approximate bytes retained by this session, including its strings"""
+        size = sys.getsizeof(self) + sys.getsizeof(self._feedback) + sys.getsizeof(self._completed)
+        size += sum(sys.getsizeof(value) for value in (
+            self.session_id, self.waiter_name, self.start_time, self.score
+        ))
+        return size + sum(sys.getsizeof(item) for item in self._feedback)
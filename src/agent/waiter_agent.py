@@ -3,29 +3,38 @@ Waiter Training Agent - Main AI agent for training restaurant waiters
 """
 
 import asyncio
-import logging
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+import time
+from typing import AsyncIterator, Dict, List, Optional, Any, Set, Tuple
 from datetime import datetime
 
 import openai
-from pydantic import BaseModel
 
-from .training_scenarios import TrainingScenario
+from .feedback_cache import FeedbackCache, normalize_response
+from .feedback_schema import FeedbackParser, StructuredFeedback, feedback_max_tokens, schema_instructions
+from .metrics import AgentMetrics
+from .model_backends import ModelBackend, create_model_backend
+from .profiling import Profiler, profiled
+from .prompt_templates import FEEDBACK_PROMPT, STRUCTURED_FEEDBACK_PROMPT, ChatPrompt, PromptRenderer
+from .scoring import ResponseAssessment, ResponseScorer
+from .session_eviction import SessionEvictor, SharedSessionEvictor
+from .session_events import SessionEventBus
+from .session_store import InstrumentedSessionStore, SessionStore, create_session_store
+from .single_flight import SingleFlight
+from .training_scenarios import SCENARIO_CHECKLISTS, TrainingScenario
+from .tracing import Tracer, current_span, traced
+from .training_session import TrainingSession
 from ..utils.helpers import load_config, setup_logging
+from ..utils.ids import generate_session_id
 
 
-@dataclass
-class TrainingSession:
-    """Represents a training session for a waiter"""
-    session_id: str
-    waiter_name: str
-    difficulty_level: str
-    start_time: datetime
-    scenarios_completed: List[str]
-    score: float
-    feedback: List[str]
+FEEDBACK_UNAVAILABLE_MESSAGE = (
+    "Thank you for your response. I'm having trouble processing feedback right now, "
+    "but please continue with the training."
+)
 
+# When LLM feedback is requested: before responding, in the background
+# after responding with rule-based feedback, or never
+LLM_FEEDBACK_MODES = ("sync", "async", "off")
 
 class WaiterTrainingAgent:
     """
@@ -36,17 +45,122 @@ class WaiterTrainingAgent:
         self.config = load_config(config_path)
         self.logger = setup_logging(self.config.get("logging", {}))
         
-        # Initialize OpenAI client
+        # Initialize the model backend (OpenAI unless ai.backend says otherwise)
         openai.api_key = self.config.get("ai", {}).get("openai_api_key")
         self.model = self.config.get("ai", {}).get("model", "gpt-4")
         self.temperature = self.config.get("ai", {}).get("temperature", 0.7)
+        self.llm: ModelBackend = create_model_backend(self.config.get("ai", {}))
+        
+        # Prometheus metrics, served by the web app at /metrics
+        self.metrics = AgentMetrics()
+        self.metrics.llm_tokens.set_function(self._token_totals)
+        
+        # Spans around requests, agent methods and model calls; off unless configured
+        self.tracer = Tracer.from_config(self.config.get("tracing", {}))
+        
+        # Stack sampling and CPU time per method; off unless configured
+        self.profiler = Profiler.from_config(self.config.get("profiling", {}))
+        
+        # Ask for feedback as a JSON rubric rather than free text
+        self.structured_feedback = self.config.get("ai", {}).get("structured_feedback", True)
+        self.json_mode = self.config.get("ai", {}).get("json_mode", False)
+        self.feedback_parser = FeedbackParser()
+        
+        # Compiled prompt templates, with long responses cut to a token budget
+        prompts_config = self.config.get("prompts", {})
+        self.prompts = PromptRenderer(response_token_budget=prompts_config.get("response_token_budget", 400))
+        
+        # Concurrent identical feedback requests share one LLM call
+        self.coalesce_requests = self.config.get("ai", {}).get("coalesce_requests", True)
+        self.feedback_flights = SingleFlight()
+        
+        # Reuse feedback for repeated or near-identical responses
+        cache_config = self.config.get("feedback_cache", {})
+        self.feedback_cache_enabled = cache_config.get("enabled", True)
+        self.feedback_cache = FeedbackCache(
+            max_entries=cache_config.get("max_entries", 10000),
+            ttl=cache_config.get("ttl_seconds", 3600),
+            similarity=cache_config.get("similarity", False),
+            similarity_threshold=cache_config.get("similarity_threshold", 0.8)
+        )
+        
+        # Score locally from the scenario checklists; LLM feedback is optional
+        scoring_config = self.config.get("scoring", {})
+        self.scorer = ResponseScorer(max_points=scoring_config.get("max_points", 10.0))
+        self.llm_feedback = scoring_config.get("llm_feedback", "sync")
+        if self.llm_feedback not in LLM_FEEDBACK_MODES:
+            self.logger.warning(f"Unknown scoring.llm_feedback {self.llm_feedback!r}, using 'sync'")
+            self.llm_feedback = "sync"
+        self._feedback_tasks: Set[asyncio.Task] = set()
+        
+        # Batch grading limits
+        batch_config = self.config.get("batch", {})
+        self.batch_concurrency = batch_config.get("max_concurrency", 8)
+        self.batch_max_items = batch_config.get("max_items", 200)
         
         # Initialize training scenarios
         self.scenarios = self._load_training_scenarios()
-        self.active_sessions: Dict[str, TrainingSession] = {}
+        database_config = self.config.get("database", {})
+        store = create_session_store(database_config)
+        self.active_sessions: SessionStore = InstrumentedSessionStore(
+            store, database_config.get("type", "memory"), self.metrics.store_operation_seconds
+        )
+        # An in-process count is cheap enough to read at scrape time; a
+        # shared store's is fetched by render_metrics before rendering
+        self._shared_session_count = 0
+        self.metrics.active_sessions.set_function(
+            (lambda: self._shared_session_count) if store.shared else store.count
+        )
+        
+        # Expire idle sessions and cap how many are kept live
+        session_config = self.config.get("sessions", {})
+        self.feedback_history = session_config.get("feedback_history", TrainingSession.feedback_history)
+        eviction_limits = dict(
+            idle_ttl=session_config.get("idle_ttl_seconds", 1800),
+            max_sessions=session_config.get("max_sessions", 10000),
+            tick=session_config.get("sweep_interval_seconds", 1.0)
+        )
+        # Other workers serve the same sessions, so only the store knows
+        # which are idle and how many are live
+        if store.shared:
+            self.evictor = SharedSessionEvictor(self.active_sessions, **eviction_limits)
+        else:
+            self.evictor = SessionEvictor(**eviction_limits)
+        self._eviction_task: Optional[asyncio.Task] = None
+        
+        # Pushes status changes to subscribed clients instead of having them poll
+        self.session_events = SessionEventBus()
         
         self.logger.info("Waiter Training Agent initialized successfully")
     
+    async def start(self) -> None:
+        """Create long-lived resources such as the LLM connection pool or a local model"""
+        try:
+            await self.llm.start()
+        except Exception as e:
+            self.logger.error(f"LLM backend {self.llm.name!r} unavailable: {e}")
+        
+        if self._eviction_task is None:
+            self._eviction_task = asyncio.create_task(self.evictor.run(self._evict_sessions))
+    
+    async def aclose(self) -> None:
+        """Release long-lived resources on shutdown"""
+        for task in list(self._feedback_tasks):
+            task.cancel()
+        await asyncio.gather(*self._feedback_tasks, return_exceptions=True)
+        
+        if self._eviction_task is not None:
+            self._eviction_task.cancel()
+            try:
+                await self._eviction_task
+            except asyncio.CancelledError:
+                pass
+            self._eviction_task = None
+        
+        await self.llm.aclose()
+        await self.active_sessions.aclose()
+        self.tracer.close()
+    
     def _load_training_scenarios(self) -> Dict[str, TrainingScenario]:
         """Load training scenarios from configuration"""
         scenarios = {}
@@ -60,9 +174,11 @@ class WaiterTrainingAgent:
         
         return scenarios
     
+    @traced("agent.start_training_session")
+    @profiled("agent.start_training_session")
     async def start_training_session(self, waiter_name: str, difficulty_level: str = "beginner") -> str:
         """Start a new training session for a waiter"""
-        session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{waiter_name}"
+        session_id = generate_session_id()
         
         session = TrainingSession(
             session_id=session_id,
@@ -74,27 +190,30 @@ class WaiterTrainingAgent:
             feedback=[]
         )
         
-        self.active_sessions[session_id] = session
+        await self.active_sessions.acreate(session)
+        self.evictor.touch(session_id, session.estimate_size())
         self.logger.info(f"Started training session {session_id} for {waiter_name}")
         
         return session_id
     
+    @traced("agent.get_training_scenario")
+    @profiled("agent.get_training_scenario")
     async def get_training_scenario(self, session_id: str, category: str = None) -> Dict[str, Any]:
         """Get a training scenario for the current session"""
-        if session_id not in self.active_sessions:
+        session = await self.active_sessions.aget(session_id)
+        if session is None:
             raise ValueError(f"Session {session_id} not found")
         
-        session = self.active_sessions[session_id]
-        
         if category is None:
             # Select a random category
             import random
             available_categories = list(self.scenarios.keys())
             category = random.choice(available_categories)
         
-        if category not in self.scenarios:
-            raise ValueError(f"Category {category} not found")
+        self.check_category(category)
         
+        self.evictor.touch(session_id, session.estimate_size())
+        await self.active_sessions.atouch(session_id)
         scenario = self.scenarios[category]
         training_prompt = scenario.generate_prompt(session.difficulty_level)
         
@@ -105,65 +224,344 @@ class WaiterTrainingAgent:
             "session_id": session_id
         }
     
+    @traced("agent.process_waiter_response")
+    @profiled("agent.process_waiter_response")
     async def process_waiter_response(self, session_id: str, scenario_category: str, 
-                                    waiter_response: str) -> Dict[str, Any]:
-        """Process a waiter's response to a training scenario"""
-        if session_id not in self.active_sessions:
+                                    waiter_response: str, bypass_cache: bool = False) -> Dict[str, Any]:
+        """
+        Process a waiter's response to a training scenario
+        
+        The response is scored locally. With ``scoring.llm_feedback`` "sync"
+        the result waits for LLM feedback; with "async" it carries feedback
+        built from the checklist and ``feedback_pending``, and the LLM
+        feedback is pushed to session event subscribers when it arrives;
+        with "off" no LLM call is made.
+        """
+        self.check_category(scenario_category)
+        session = await self.active_sessions.aget(session_id)
+        if session is None:
             raise ValueError(f"Session {session_id} not found")
         
-        session = self.active_sessions[session_id]
+        difficulty = session.difficulty_level
+        assessment = self._assess_response(scenario_category, waiter_response, difficulty)
         
-        # Generate AI feedback
-        feedback = await self._generate_feedback(scenario_category, waiter_response, session.difficulty_level)
+        if self.llm_feedback == "sync":
+            feedback = await self._generate_feedback(
+                scenario_category, waiter_response, difficulty, bypass_cache=bypass_cache
+            )
+            return await self._record_response(
+                session_id, scenario_category, waiter_response, feedback.to_text(), assessment,
+                rubric=feedback.to_rubric()
+            )
         
-        # Update session
-        if scenario_category not in session.scenarios_completed:
-            session.scenarios_completed.append(scenario_category)
+        if self.llm_feedback == "off":
+            return await self._record_response(
+                session_id, scenario_category, waiter_response, assessment.summary(), assessment
+            )
         
-        session.feedback.append(feedback)
+        result = await self._record_response(
+            session_id, scenario_category, waiter_response, assessment.summary(), assessment, record_feedback=False
+        )
+        task = asyncio.create_task(self._deliver_feedback(
+            session_id, scenario_category, waiter_response, difficulty, assessment.summary(), bypass_cache
+        ))
+        self._feedback_tasks.add(task)
+        task.add_done_callback(self._feedback_tasks.discard)
+        return {**result, "feedback_pending": True}
+    
+    @traced("agent.deliver_feedback")
+    @profiled("agent.deliver_feedback")
+    async def _deliver_feedback(self, session_id: str, category: str, response: str, difficulty: str,
+                                fallback: str, bypass_cache: bool = False) -> None:
+        """Generate LLM feedback in the background, store it and push it to subscribers"""
+        try:
+            feedback = await self.fetch_feedback(category, response, difficulty, bypass_cache=bypass_cache)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Error generating background feedback: {e}")
+            feedback = StructuredFeedback.from_text(fallback)
+        
+        text = feedback.to_text()
+        session = await self.active_sessions.amutate(session_id, lambda session: session.add_feedback(text, self.feedback_history))
+        if session is None:
+            # Ended while the feedback was being generated
+            return
+        self.session_events.publish(session_id, {
+            "type": "feedback",
+            "scenario_category": category,
+            "feedback": text,
+            "rubric": feedback.to_rubric()
+        })
+    
+    @traced("agent.process_waiter_responses")
+    @profiled("agent.process_waiter_responses")
+    async def process_waiter_responses(self, responses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Process a batch of waiter responses, at most ``batch_concurrency`` at a time
         
-        # Calculate score (simplified scoring system)
-        session.score = min(100.0, session.score + 10.0)
+        Each item needs ``session_id``, ``scenario_category`` and ``response``
+        (``bypass_cache`` is optional). Results come back in input order with
+        ``status`` "ok" and the usual result fields, or "error" and a message,
+        so one bad item does not fail the rest.
+        """
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        
+        async def process(index: int, item: Dict[str, Any]) -> Dict[str, Any]:
+            outcome = {"index": index, "session_id": item["session_id"]}
+            async with semaphore:
+                try:
+                    result = await self.process_waiter_response(
+                        item["session_id"],
+                        item["scenario_category"],
+                        item["response"],
+                        bypass_cache=item.get("bypass_cache", False)
+                    )
+                except ValueError as e:
+                    return {**outcome, "status": "error", "error": str(e)}
+                except Exception as e:
+                    self.logger.error(f"Error processing batch item {index}: {e}")
+                    return {**outcome, "status": "error", "error": str(e)}
+            return {**outcome, "status": "ok", **result}
+        
+        return list(await asyncio.gather(*(process(i, item) for i, item in enumerate(responses))))
+    
+    @traced("agent.stream_waiter_response")
+    @profiled("agent.stream_waiter_response")
+    async def stream_waiter_response(self, session_id: str, scenario_category: str,
+                                     waiter_response: str, bypass_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a waiter's response, yielding feedback tokens as they are generated
+        
+        Yields ``token`` events while feedback streams in (a cached answer,
+        or rule-based feedback when ``scoring.llm_feedback`` is "off",
+        arrives as a single token), then ``score``, ``next_scenario`` and a
+        final ``done`` event with the full feedback, time to first token and
+        total latency. If generation fails an ``error`` event replaces any
+        partial feedback with the fallback message.
+        """
+        self.check_category(scenario_category)
+        session = await self.active_sessions.aget(session_id)
+        if session is None:
+            raise ValueError(f"Session {session_id} not found")
         
-        return {
+        started = time.perf_counter()
+        ttft: Optional[float] = None
+        difficulty = session.difficulty_level
+        assessment = self._assess_response(scenario_category, waiter_response, difficulty)
+        use_cache = self.feedback_cache_enabled and not bypass_cache
+        
+        if self.llm_feedback == "off":
+            feedback = assessment.summary()
+        elif use_cache:
+            # Streamed feedback is free text, so it is cached apart from structured feedback
+            cached = self.feedback_cache.get(scenario_category, difficulty, waiter_response,
+                                             prompt=FEEDBACK_PROMPT.version)
+            feedback = StructuredFeedback.model_validate_json(cached).to_text() if cached is not None else None
+        else:
+            feedback = None
+            self.feedback_cache.record_bypass()
+        
+        if feedback is not None:
+            ttft = time.perf_counter() - started
+            yield {"type": "token", "text": feedback}
+        else:
+            parts: List[str] = []
+            llm_span = self.tracer.start_span("llm.stream", backend=self.llm.name, model=self.model, max_tokens=200)
+            llm_started = time.perf_counter()
+            try:
+                async for text in self.llm.stream_chat(
+                    model=self.model,
+                    messages=self._feedback_messages(scenario_category, waiter_response, difficulty),
+                    temperature=self.temperature,
+                    max_tokens=200
+                ):
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                        llm_span.set_attribute("ttft_ms", round(ttft * 1000, 3))
+                    parts.append(text)
+                    yield {"type": "token", "text": text}
+                feedback = "".join(parts).strip()
+                self.metrics.record_llm_request(self.llm.name, time.perf_counter() - llm_started)
+            
+            except asyncio.TimeoutError as e:
+                llm_span.record_exception(e)
+                self.metrics.record_llm_request(self.llm.name, time.perf_counter() - llm_started, e)
+                self.logger.warning(f"Feedback streaming timed out after {self.llm.request_timeout}s")
+            
+            except Exception as e:
+                llm_span.record_exception(e)
+                self.metrics.record_llm_request(self.llm.name, time.perf_counter() - llm_started, e)
+                self.logger.error(f"Error streaming feedback: {e}")
+            
+            finally:
+                llm_span.end()
+            
+            if feedback:
+                if use_cache:
+                    self.feedback_cache.put(
+                        scenario_category, difficulty, waiter_response,
+                        StructuredFeedback.from_text(feedback).model_dump_json(), prompt=FEEDBACK_PROMPT.version
+                    )
+            else:
+                feedback = FEEDBACK_UNAVAILABLE_MESSAGE
+                yield {"type": "error", "message": feedback}
+        
+        result = await self._record_response(session_id, scenario_category, waiter_response, feedback, assessment)
+        yield {
+            "type": "score",
+            "score": result["score"],
+            "points": result["points"],
+            "scenarios_completed": result["scenarios_completed"]
+        }
+        yield {"type": "next_scenario", "next_scenario": result["next_scenario"]}
+        yield {
+            "type": "done",
+            "feedback": feedback,
+            "ttft_ms": round(ttft * 1000, 3) if ttft is not None else None,
+            "total_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+    
+    @traced("agent.record_response")
+    @profiled("agent.record_response")
+    async def _record_response(self, session_id: str, scenario_category: str, waiter_response: str,
+                               feedback: str, assessment: ResponseAssessment, record_feedback: bool = True,
+                               rubric: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Record a completed scenario and its points, returning the updated progress"""
+        # Update session; re-applied if another worker changed it meanwhile
+        def record_response(session: TrainingSession) -> None:
+            session.complete_scenario(scenario_category)
+            if record_feedback:
+                session.add_feedback(feedback, self.feedback_history)
+            session.score = min(100.0, session.score + assessment.points)
+        
+        session = await self.active_sessions.amutate(session_id, record_response)
+        if session is None:
+            raise ValueError(f"Session {session_id} not found")
+        self.evictor.touch(session_id, session.estimate_size())
+        self.session_events.publish(session_id, {"type": "stats", **self._session_status(session)})
+        
+        result = {
             "feedback": feedback,
+            "points": assessment.points,
+            "assessment": assessment.to_dict(),
             "score": session.score,
-            "scenarios_completed": len(session.scenarios_completed),
+            "scenarios_completed": session.completed_count,
             "next_scenario": await self._suggest_next_scenario(session)
         }
+        if rubric is not None:
+            result["rubric"] = rubric
+        return result
     
-    async def _generate_feedback(self, category: str, response: str, difficulty: str) -> str:
-        """Generate AI feedback for a waiter's response"""
-        prompt = f"""
-        You are an expert restaurant trainer evaluating a waiter's response to a training scenario.
-        
-        Category: {category}
-        Difficulty Level: {difficulty}
-        Waiter's Response: {response}
-        
-        Please provide constructive feedback that:
-        1. Acknowledges what was done well
-        2. Suggests specific improvements
-        3. Provides actionable advice
-        4. Maintains a positive, encouraging tone
+    @traced("agent.generate_feedback")
+    @profiled("agent.generate_feedback")
+    async def _generate_feedback(self, category: str, response: str, difficulty: str,
+                                 bypass_cache: bool = False) -> StructuredFeedback:
+        """Generate AI feedback for a waiter's response, falling back to a holding message on errors"""
+        try:
+            return await self.fetch_feedback(category, response, difficulty, bypass_cache=bypass_cache)
         
-        Keep the feedback concise but helpful (2-3 sentences).
-        """
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Feedback generation timed out after {self.llm.request_timeout}s")
+            return StructuredFeedback.from_text(FEEDBACK_UNAVAILABLE_MESSAGE)
         
-        try:
-            client = openai.OpenAI(api_key=openai.api_key)
-            response = client.chat.completions.create(
+        except Exception as e:
+            self.logger.error(f"Error generating feedback: {e}")
+            return StructuredFeedback.from_text(FEEDBACK_UNAVAILABLE_MESSAGE)
+    
+    @traced("agent.fetch_feedback")
+    @profiled("agent.fetch_feedback")
+    async def fetch_feedback(self, category: str, response: str, difficulty: str,
+                             bypass_cache: bool = False) -> StructuredFeedback:
+        """Get feedback from the cache or the LLM; LLM and format errors propagate to the caller"""
+        use_cache = self.feedback_cache_enabled and not bypass_cache
+        if use_cache:
+            cached = self.feedback_cache.get(category, difficulty, response, prompt=self.feedback_prompt.version)
+            current_span().set_attribute("feedback.cache_hit", cached is not None)
+            if cached is not None:
+                return StructuredFeedback.model_validate_json(cached)
+        else:
+            self.feedback_cache.record_bypass()
+        
+        async def request() -> StructuredFeedback:
+            started = time.perf_counter()
+            try:
+                content = await self._request_feedback(category, response, difficulty)
+            except Exception as e:
+                self.metrics.record_llm_request(self.llm.name, time.perf_counter() - started, e)
+                raise
+            self.metrics.record_llm_request(self.llm.name, time.perf_counter() - started)
+            return self.feedback_parser.parse(content, self._checklist(category, difficulty))
+        
+        if self.coalesce_requests:
+            # The prompt version keeps requests for different prompts apart
+            key = (self.model, category, difficulty, normalize_response(response), self.feedback_prompt.version)
+            feedback = await self.feedback_flights.do(key, request)
+        else:
+            feedback = await request()
+        if use_cache:
+            self.feedback_cache.put(category, difficulty, response, feedback.model_dump_json(),
+                                    prompt=self.feedback_prompt.version)
+        return feedback
+    
+    def check_category(self, category: str) -> None:
+        """Reject categories outside the scenario catalog before they reach a session"""
+        if category not in self.scenarios:
+            raise ValueError(f"Category {category} not found")
+    
+    @traced("agent.assess_response")
+    @profiled("agent.assess_response")
+    def _assess_response(self, category: str, response: str, difficulty: str) -> ResponseAssessment:
+        """Score a response against its scenario's checklist"""
+        return self.scorer.assess(category, response, difficulty)
+    
+    def score_response(self, category: str, response: str, difficulty: str) -> float:
+        """Points a response adds to the session score"""
+        return self._assess_response(category, response, difficulty).points
+    
+    def _checklist(self, category: str, difficulty: str) -> Tuple[str, ...]:
+        """The scenario checklist the feedback rubric scores, in order"""
+        return SCENARIO_CHECKLISTS.get((category, difficulty)) or SCENARIO_CHECKLISTS.get((category, "beginner"), ())
+    
+    def _structured_feedback_messages(self, category: str, response: str, difficulty: str) -> List[Dict[str, str]]:
+        """Build the chat messages asking for feedback as a JSON rubric over the scenario checklist"""
+        checklist = self._checklist(category, difficulty)
+        return self.prompts.render_chat(
+            STRUCTURED_FEEDBACK_PROMPT, response,
+            category=category,
+            difficulty=difficulty,
+            checklist="\n".join(f"{number}. {item}" for number, item in enumerate(checklist, 1)),
+            schema=schema_instructions(len(checklist))
+        )
+    
+    def _feedback_messages(self, category: str, response: str, difficulty: str) -> List[Dict[str, str]]:
+        """Build the chat messages asking for free-text feedback, as streamed to the page"""
+        return self.prompts.render_chat(FEEDBACK_PROMPT, response, category=category, difficulty=difficulty)
+    
+    @property
+    def feedback_prompt(self) -> ChatPrompt:
+        """The prompt non-streamed feedback requests are built from"""
+        return STRUCTURED_FEEDBACK_PROMPT if self.structured_feedback else FEEDBACK_PROMPT
+    
+    async def _request_feedback(self, category: str, response: str, difficulty: str) -> str:
+        """Ask the LLM for feedback on a waiter's response, returning the raw completion text"""
+        if not self.structured_feedback:
+            messages = self._feedback_messages(category, response, difficulty)
+            params: Dict[str, Any] = {"max_tokens": 200}
+        else:
+            messages = self._structured_feedback_messages(category, response, difficulty)
+            params = {"max_tokens": feedback_max_tokens(len(self._checklist(category, difficulty)))}
+            if self.json_mode:
+                params["response_format"] = {"type": "json_object"}
+        
+        with self.tracer.span("llm.complete", backend=self.llm.name, model=self.model,
+                              max_tokens=params["max_tokens"]):
+            return await self.llm.complete(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=messages,
                 temperature=self.temperature,
-                max_tokens=200
+                **params
             )
-            
-            return response.choices[0].message.content.strip()
-        
-        except Exception as e:
-            self.logger.error(f"Error generating feedback: {e}")
-            return "Thank you for your response. I'm having trouble processing feedback right now, but please continue with the training."
     
     async def _suggest_next_scenario(self, session: TrainingSession) -> str:
         """Suggest the next training scenario based on progress"""
@@ -180,12 +578,13 @@ class WaiterTrainingAgent:
         import random
         return random.choice(list(remaining))
     
-    async def end_training_session(self, session_id: str) -> Dict[str, Any]:
+    @traced("agent.end_training_session")
+    @profiled("agent.end_training_session")
+    async def end_training_session(self, session_id: str, reason: str = "completed") -> Dict[str, Any]:
         """End a training session and provide summary"""
-        if session_id not in self.active_sessions:
+        session = await self.active_sessions.aget(session_id)
+        if session is None:
             raise ValueError(f"Session {session_id} not found")
-        
-        session = self.active_sessions[session_id]
         end_time = datetime.now()
         duration = (end_time - session.start_time).total_seconds() / 60  # minutes
         
@@ -195,33 +594,98 @@ class WaiterTrainingAgent:
             "duration_minutes": round(duration, 2),
             "final_score": session.score,
             "scenarios_completed": session.scenarios_completed,
-            "total_feedback": len(session.feedback),
-            "completion_rate": len(session.scenarios_completed) / len(self.scenarios) * 100
+            "total_feedback": session.feedback_count,
+            "completion_rate": session.completed_count / len(self.scenarios) * 100,
+            "end_reason": reason
         }
         
-        # Remove from active sessions
-        del self.active_sessions[session_id]
+        # Remove from active sessions, keeping the summary as history
+        await self.active_sessions.aend(session_id, summary)
+        self.evictor.forget(session_id)
+        self.session_events.publish(session_id, {"type": "ended", **summary})
         
-        self.logger.info(f"Ended training session {session_id} for {session.waiter_name}")
+        self.logger.info(f"Ended training session {session_id} for {session.waiter_name} ({reason})")
         
         return summary
     
-    def get_session_status(self, session_id: str) -> Optional[Dict[str, Any]]:
+    async def _evict_sessions(self, evictions: List[Tuple[str, str]]) -> None:
+        """End idle or excess sessions, archiving their summaries"""
+        for session_id, reason in evictions:
+            try:
+                await self.end_training_session(session_id, reason=reason)
+            except ValueError:
+                # Already ended, possibly by another worker
+                pass
+            except Exception as e:
+                self.logger.error(f"Error evicting session {session_id}: {e}")
+    
+    async def get_session_metrics(self) -> Dict[str, Any]:
+        """Get live session counts, retained memory and eviction totals"""
+        return {
+            "live_sessions": await self.active_sessions.acount(),
+            "tracked_sessions": len(self.evictor),
+            "bytes_retained": self.evictor.bytes_retained,
+            "evicted_idle": self.evictor.evicted_idle,
+            "evicted_capacity": self.evictor.evicted_capacity,
+            "event_subscribers": self.session_events.subscriber_count(),
+            "pending_feedback": len(self._feedback_tasks),
+            "idle_ttl_seconds": self.evictor.idle_ttl,
+            "max_sessions": self.evictor.max_sessions
+        }
+    
+    async def get_session_status(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get current status of a training session"""
-        if session_id not in self.active_sessions:
+        session = await self.active_sessions.aget(session_id)
+        if session is None:
             return None
-        
-        session = self.active_sessions[session_id]
+        return self._session_status(session)
+    
+    def _session_status(self, session: TrainingSession) -> Dict[str, Any]:
         return {
-            "session_id": session_id,
+            "session_id": session.session_id,
             "waiter_name": session.waiter_name,
             "difficulty_level": session.difficulty_level,
             "start_time": session.start_time.isoformat(),
             "scenarios_completed": session.scenarios_completed,
             "current_score": session.score,
-            "feedback_count": len(session.feedback)
+            "feedback_count": session.feedback_count
+        }
+    
+    def get_feedback_cache_stats(self) -> Dict[str, Any]:
+        """Get feedback cache size and hit rates"""
+        return {"enabled": self.feedback_cache_enabled, **self.feedback_cache.stats()}
+    
+    def get_llm_stats(self) -> Dict[str, Any]:
+        """Get the model backend's configuration and timings, with coalescing and feedback format state"""
+        return {
+            "backend": self.llm.name,
+            "coalescing": {"enabled": self.coalesce_requests, **self.feedback_flights.stats()},
+            "feedback_format": {"structured": self.structured_feedback, **self.feedback_parser.stats()},
+            "prompts": self.prompts.stats(),
+            **self.llm.backend_stats()
         }
     
+    async def render_metrics(self) -> str:
+        """The metrics in the Prometheus text format, counting a shared store's sessions first"""
+        if self.active_sessions.shared:
+            self._shared_session_count = await self.active_sessions.acount()
+        return self.metrics.render()
+    
+    def _token_totals(self) -> Dict[Tuple[str, ...], float]:
+        """Token usage the backend has counted so far, by kind"""
+        stats = getattr(self.llm, "stats", None)
+        if stats is None:
+            return {}
+        return {
+            ("prompt",): stats.prompt_tokens,
+            ("cached",): stats.cached_tokens,
+            ("completion",): stats.completion_tokens
+        }
+    
+    async def get_session_history(self, waiter_name: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get summaries of ended training sessions, newest first"""
+        return await self.active_sessions.ahistory(waiter_name, limit)
+    
     def get_available_categories(self) -> List[str]:
         """Get list of available training categories"""
         return list(self.scenarios.keys())
@@ -1,4 +1,5 @@
 # Utils Package
 from .helpers import load_config, setup_logging
+from .ids import generate_session_id
 
-__all__ = ["load_config", "setup_logging"] 
\ No newline at end of file
+__all__ = ["load_config", "setup_logging", "generate_session_id"] 
\ No newline at end of file
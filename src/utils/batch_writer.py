@@ -0,0 +1,83 @@
+"""
+Background batch writer shared by the session store and the span exporter
+"""
+
+import logging
+import queue
+import threading
+from typing import Any, Callable, List
+
+logger = logging.getLogger("waiter_training_agent.batch_writer")
+
+# Sentinel queued by close() to stop the writer thread
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    Writes queued items in batches on a background thread
+
+    Items are collected until ``batch_size`` are waiting or none has
+    arrived for ``flush_interval`` seconds, then handed to ``write`` in one
+    call, so callers never wait on the write itself. A batch that raises is
+    logged and dropped and the thread keeps running, so ``flush`` and
+    ``close`` can always count on it draining the queue.
+    """
+
+    def __init__(self, write: Callable[[List[Any]], None], name: str, batch_size: int = 256,
+                 flush_interval: float = 0.05):
+        self.write = write
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, item: Any) -> None:
+        self._queue.put(item)
+
+    @property
+    def pending(self) -> int:
+        """Items queued or being written"""
+        return self._queue.unfinished_tasks
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch = []
+            taken = 1
+            if item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+            # Collect whatever else arrives within the flush interval
+            while len(batch) < self.batch_size and not stopping:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            try:
+                if batch:
+                    self.write(batch)
+            except Exception as e:
+                logger.error(f"{self.name} dropped a batch of {len(batch)}: {e}")
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    def flush(self) -> None:
+        """Wait until everything queued so far has been written or dropped"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write what is queued, then stop the thread"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
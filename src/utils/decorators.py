@@ -0,0 +1,42 @@
+"""
+Method decorators that switch on a setting of the instance they are called on
+"""
+
+import functools
+import inspect
+from typing import Any, Callable, Dict, Tuple
+
+# Called as hook(self, method, args, kwargs) and returning what the method would
+Hook = Callable[[Any, Callable, Tuple[Any, ...], Dict[str, Any]], Any]
+
+
+def instrument_method(enabled: Callable[[Any], bool], call: Hook, coroutine: Hook,
+                      generator: Hook) -> Callable[[Callable], Callable]:
+    """
+    Build a decorator that runs a method through a hook for its kind
+
+    ``call`` wraps plain methods, ``coroutine`` coroutine methods and
+    ``generator`` async generator methods; ``coroutine`` should be a
+    coroutine function and ``generator`` return an async iterator, so the
+    decorated method can be awaited, iterated or passed to create_task()
+    as before. While ``enabled(self)`` is false the method is called
+    directly, so a switched-off decorator costs one check.
+    """
+    def decorate(method: Callable) -> Callable:
+        # Look through other decorators of this kind to the function's real type
+        original = inspect.unwrap(method)
+        if inspect.isasyncgenfunction(original):
+            hook = generator
+        elif inspect.iscoroutinefunction(original):
+            hook = coroutine
+        else:
+            hook = call
+
+        @functools.wraps(method)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            if not enabled(self):
+                return method(self, *args, **kwargs)
+            return hook(self, method, args, kwargs)
+        return wrapper
+
+    return decorate
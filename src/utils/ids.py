@@ -0,0 +1,57 @@
+"""
+Identifier generation for the Waiter Training Agent
+"""
+
+import os
+import threading
+import time
+
+
+# Crockford base32: URL-safe and free of easily confused characters
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+_RANDOM_LIMIT = 1 << _RANDOM_BITS
+
+
+class ULIDGenerator:
+    """
+    Monotonic ULID generator
+
+    Each ID is a 48-bit millisecond timestamp followed by 80 random bits,
+    encoded as 26 Crockford base32 characters, so IDs sort by creation
+    time. Within one millisecond the random part is incremented rather
+    than redrawn, which keeps IDs from one process strictly increasing.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def new(self) -> str:
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._last_random = int.from_bytes(os.urandom(10), "big")
+            else:
+                # Same millisecond, or the clock stepped back
+                self._last_random += 1
+                if self._last_random == _RANDOM_LIMIT:
+                    self._last_ms += 1
+                    self._last_random = 0
+            value = (self._last_ms << _RANDOM_BITS) | self._last_random
+
+        chars = []
+        for _ in range(26):
+            chars.append(_ALPHABET[value & 31])
+            value >>= 5
+        return "".join(reversed(chars))
+
+
+_session_ids = ULIDGenerator()
+
+
+def generate_session_id() -> str:
+    """Generate a unique, URL-safe, time-ordered training session ID"""
+    return f"session_{_session_ids.new()}"
@@ -0,0 +1,197 @@
+"""
+Build and serve the web frontend as precompressed, content-hashed static assets
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Set, Tuple
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; only gzip variants are built without it
+    brotli = None
+
+logger = logging.getLogger("waiter_training_agent.static_assets")
+
+ENTRY_POINT = "index.html"
+MANIFEST = "manifest.json"
+
+# Assets referenced from the entry point get a content hash in their name
+_HASHED_SUFFIXES = (".css", ".js")
+
+# Preferred first; each maps to the suffix of its precompressed variant
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def source_digest(source_dir: Path) -> str:
+    """Digest of every source file, used to tell whether a build is stale"""
+    digest = hashlib.sha256()
+    for path in sorted(Path(source_dir).iterdir()):
+        if path.is_file():
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _write(path: Path, data: bytes) -> None:
+    # Write then rename, so a worker never serves a half-written file
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+
+
+def _write_with_variants(path: Path, data: bytes) -> None:
+    """Write a file plus .gz and .br variants wherever they are smaller"""
+    _write(path, data)
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+
+    for suffix, compressed in variants.items():
+        target = path.with_name(path.name + suffix)
+        if len(compressed) < len(data):
+            _write(target, compressed)
+        elif target.exists():
+            target.unlink()
+
+
+def build_assets(source_dir: Path, output_dir: Path, url_prefix: str = "/static") -> Dict[str, Any]:
+    """
+    Build the frontend into ``output_dir`` and return the manifest
+
+    Stylesheets and scripts are written under content-hashed names, the
+    entry point's ``{url_prefix}/name`` references are rewritten to them,
+    and every text asset gets precompressed variants. Files from earlier
+    builds are removed.
+    """
+    source_dir, output_dir = Path(source_dir), Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    files: Dict[str, str] = {}
+    for path in sorted(source_dir.iterdir()):
+        if path.is_file() and path.suffix in _HASHED_SUFFIXES:
+            data = path.read_bytes()
+            files[path.name] = f"{path.stem}.{_content_hash(data)}{path.suffix}"
+            _write_with_variants(output_dir / files[path.name], data)
+
+    html = (source_dir / ENTRY_POINT).read_text(encoding="utf-8")
+    for name, hashed in files.items():
+        html = html.replace(f'"{url_prefix}/{name}"', f'"{url_prefix}/{hashed}"')
+    _write_with_variants(output_dir / ENTRY_POINT, html.encode("utf-8"))
+
+    manifest = {"source_digest": source_digest(source_dir), "files": files}
+    _write(output_dir / MANIFEST, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    keep = {MANIFEST, ENTRY_POINT, *files.values()}
+    for path in output_dir.iterdir():
+        base = path.name[:-3] if path.name.endswith((".gz", ".br")) else path.name
+        if path.is_file() and base not in keep and not path.name.startswith("."):
+            path.unlink()
+
+    return manifest
+
+
+def load_assets(source_dir: Path, output_dir: Path) -> Tuple[Path, Dict[str, Any]]:
+    """
+    Choose the directory to serve the frontend from, and its manifest
+
+    Nothing is built here: building is a deploy step, so read-only deploys
+    and several workers starting at once are fine. The build in
+    ``output_dir`` is used when it has a manifest, with a warning if the
+    sources have changed since. Without one the sources are served as
+    they are, uncompressed and revalidated on every load.
+    """
+    source_dir, output_dir = Path(source_dir), Path(output_dir)
+    try:
+        manifest = json.loads((output_dir / MANIFEST).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        logger.warning(f"No frontend build in {output_dir}/, serving {source_dir}/ uncompressed; "
+                       f"build it with: python -m src.utils.static_assets")
+        return source_dir, {"files": {}}
+    if source_dir.is_dir() and manifest.get("source_digest") != source_digest(source_dir):
+        logger.warning(f"The frontend build in {output_dir}/ is older than {source_dir}/; "
+                       f"rebuild it with: python -m src.utils.static_assets")
+    return output_dir, manifest
+
+
+def _accepted_encodings(header: str) -> Set[str]:
+    accepted = set()
+    for part in header.split(","):
+        encoding, _, params = part.strip().partition(";")
+        if encoding and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves build-time .br/.gz variants and caches hashed assets forever
+
+    ETag and If-None-Match handling come from StaticFiles; each encoding
+    is its own file and so carries its own ETag. Names listed in
+    ``immutable`` are cached for a year, everything else is revalidated.
+    """
+
+    def __init__(self, *, immutable: Iterable[str] = (), **kwargs: Any):
+        super().__init__(**kwargs)
+        self.immutable = set(immutable)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+
+        response = None
+        for encoding, suffix in _ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                response = await super().get_response(path + suffix, scope)
+            except HTTPException:
+                continue
+            if response.status_code == 200:
+                media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                if media_type.startswith("text/"):
+                    media_type += "; charset=utf-8"
+                response.headers["content-type"] = media_type
+                response.headers["content-encoding"] = encoding
+            break
+
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        response.headers["vary"] = "Accept-Encoding"
+        response.headers["cache-control"] = (
+            IMMUTABLE_CACHE if os.path.basename(path) in self.immutable else REVALIDATE_CACHE
+        )
+        return response
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the web frontend into precompressed static assets")
+    parser.add_argument("--source", default="frontend")
+    parser.add_argument("--output", default="static")
+    args = parser.parse_args()
+
+    built = build_assets(Path(args.source), Path(args.output))
+    for path in sorted(Path(args.output).iterdir()):
+        print(f"{path.stat().st_size:8d}  {path.name}")
+    print(f"Built {len(built['files']) + 1} assets into {args.output}/")
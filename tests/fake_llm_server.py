@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible fake LLM server for tests and benchmarks
+"""
+
+import asyncio
+import json
+import math
+import random
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+
+DEFAULT_FEEDBACK = (
+    "You greeted the guest warmly and offered help right away. "
+    "Next time, mention the wait time and offer a menu while they wait."
+)
+
+DEFAULT_STRUCTURED_FEEDBACK = json.dumps({
+    "scores": [4, 3, 4, 2],
+    "strengths": ["Warm, immediate greeting", "Offered help right away"],
+    "improvements": ["Mention the expected wait time", "Offer a menu while they wait"],
+    "summary": "A friendly start; set expectations on the wait next time."
+})
+
+
+# Rough characters per token, for usage figures
+_CHARS_PER_TOKEN = 4
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+def _prompt_text(messages: List[Dict[str, Any]]) -> str:
+    return "".join(f"<{message.get('role')}>{message.get('content', '')}" for message in messages)
+
+
+def create_app(latency: float = 0.5, content: str = DEFAULT_FEEDBACK,
+               structured_content: str = DEFAULT_STRUCTURED_FEEDBACK,
+               token_interval: float = 0.0, capacity: Optional[int] = None,
+               rate_limit_ratio: float = 0.0, retry_after: float = 0.1,
+               prefill_per_token: float = 0.0, prompt_cache: bool = False,
+               cache_min_tokens: int = 1024, cache_block_tokens: int = 128, seed: int = 1,
+               latency_distribution: str = "fixed", latency_spread: float = 0.0) -> FastAPI:
+    """
+    Create a fake chat-completions app that answers after a delay
+
+    Streamed completions send their first token after ``latency`` and one
+    word every ``token_interval`` seconds after that; non-streamed ones
+    answer once all words would have been generated. Non-streamed prompts
+    that ask for a JSON reply get ``structured_content`` instead.
+
+    Like a real provider it answers 429 with a Retry-After header when more
+    than ``capacity`` completions are in flight, and at random for a
+    ``rate_limit_ratio`` share of requests.
+
+    Non-streamed completions also spend ``prefill_per_token`` seconds per
+    prompt token. With ``prompt_cache`` the longest previously seen prompt
+    prefix, in whole ``cache_block_tokens`` blocks and at least
+    ``cache_min_tokens`` long, is served from cache: it costs no prefill
+    time and is reported as ``cached_tokens`` in the usage.
+
+    The delay before the first token is ``latency`` unless
+    ``latency_distribution`` says otherwise: "uniform" draws it from
+    ``latency`` plus or minus ``latency_spread``, "exponential" has mean
+    ``latency``, and "lognormal" has median ``latency`` and shape
+    ``latency_spread``, giving the long tail real providers show. Draws
+    come from a generator seeded with ``seed``.
+    """
+    if latency_distribution not in LATENCY_DISTRIBUTIONS:
+        raise ValueError(f"Unknown latency distribution {latency_distribution!r}")
+    app = FastAPI(title="Fake LLM")
+    app.state.latency = latency
+    app.state.content = content
+    app.state.structured_content = structured_content
+    app.state.token_interval = token_interval
+    app.state.capacity = capacity
+    app.state.rate_limit_ratio = rate_limit_ratio
+    app.state.retry_after = retry_after
+    app.state.requests_served = 0
+    app.state.rate_limited = 0
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+    app.state.prefill_per_token = prefill_per_token
+    app.state.prompt_cache = prompt_cache
+    app.state.cache_min_tokens = cache_min_tokens
+    app.state.cache_block_tokens = cache_block_tokens
+    app.state.cached_blocks: Set[int] = set()
+    app.state.latency_distribution = latency_distribution
+    app.state.latency_spread = latency_spread
+    rng = random.Random(seed)
+    latency_rng = random.Random(seed)
+
+    def sample_latency() -> float:
+        base, spread = app.state.latency, app.state.latency_spread
+        distribution = app.state.latency_distribution
+        if distribution == "uniform":
+            return max(0.0, latency_rng.uniform(base - spread, base + spread))
+        if distribution == "exponential":
+            return latency_rng.expovariate(1 / base) if base > 0 else 0.0
+        if distribution == "lognormal":
+            return base * math.exp(latency_rng.gauss(0, spread))
+        return base
+
+    def cached_prefix_tokens(prompt: str) -> int:
+        """Look up the prompt's cached prefix, then cache all of its blocks"""
+        block = app.state.cache_block_tokens * _CHARS_PER_TOKEN
+        blocks = [hash(prompt[:end]) for end in range(block, len(prompt) + 1, block)]
+        hits = 0
+        for key in blocks:
+            if key not in app.state.cached_blocks:
+                break
+            hits += 1
+        app.state.cached_blocks.update(blocks)
+        cached = hits * app.state.cache_block_tokens
+        return cached if cached >= max(app.state.cache_min_tokens, 1) else 0
+
+    def chunk(completion_id: str, model: str, delta: Dict[str, str], finish_reason: Optional[str]) -> str:
+        return "data: " + json.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }) + "\n\n"
+
+    async def stream_completion(completion_id: str, model: str, prompt_tokens: Optional[int]):
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        try:
+            await asyncio.sleep(sample_latency())
+            yield chunk(completion_id, model, {"role": "assistant", "content": ""}, None)
+            words = app.state.content.split(" ")
+            for i, word in enumerate(words):
+                if i:
+                    await asyncio.sleep(app.state.token_interval)
+                yield chunk(completion_id, model, {"content": word if i == 0 else " " + word}, None)
+            yield chunk(completion_id, model, {}, "stop")
+            if prompt_tokens is not None:
+                # Asked for with stream_options.include_usage: a last chunk with no choices
+                completion_tokens = max(1, len(app.state.content) // _CHARS_PER_TOKEN)
+                yield "data: " + json.dumps({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens
+                    }
+                }) + "\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            app.state.in_flight -= 1
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> Any:
+        body = await request.json()
+        over_capacity = app.state.capacity is not None and app.state.in_flight >= app.state.capacity
+        if over_capacity or rng.random() < app.state.rate_limit_ratio:
+            app.state.rate_limited += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after-ms": str(int(app.state.retry_after * 1000))},
+                content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+            )
+
+        app.state.requests_served += 1
+        completion_id = f"chatcmpl-fake-{app.state.requests_served}"
+        model = body.get("model", "fake-model")
+
+        prompt = _prompt_text(body.get("messages", []))
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+            prompt_tokens = max(1, len(prompt) // _CHARS_PER_TOKEN) if include_usage else None
+            return StreamingResponse(stream_completion(completion_id, model, prompt_tokens),
+                                     media_type="text/event-stream")
+
+        content = app.state.structured_content if '"scores"' in prompt else app.state.content
+        prompt_tokens = max(1, len(prompt) // _CHARS_PER_TOKEN)
+        cached_tokens = cached_prefix_tokens(prompt) if app.state.prompt_cache else 0
+        words = len(content.split(" "))
+        completion_tokens = max(1, len(content) // _CHARS_PER_TOKEN)
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        try:
+            await asyncio.sleep(
+                sample_latency()
+                + app.state.prefill_per_token * (prompt_tokens - cached_tokens)
+                + app.state.token_interval * (words - 1)
+            )
+        finally:
+            app.state.in_flight -= 1
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens}
+            }
+        }
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeLLMServer:
+    """Runs the fake LLM app on a background thread for the duration of a `with` block"""
+
+    def __init__(self, latency: float = 0.5, port: Optional[int] = None, **app_options: Any):
+        self.app = create_app(latency=latency, **app_options)
+        self.port = port or _free_port()
+        self._server = uvicorn.Server(uvicorn.Config(
+            self.app, host="127.0.0.1", port=self.port, log_level="warning"
+        ))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def __enter__(self) -> "FakeLLMServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI-compatible LLM server")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--latency-spread", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = create_app(latency=args.latency, latency_distribution=args.latency_distribution,
+                     latency_spread=args.latency_spread)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -0,0 +1,203 @@
+"""
+In-process fake of the Redis commands used by RedisSessionStore
+"""
+
+import threading
+from pathlib import Path
+import sys
+from typing import Any, Dict, List, Optional, Set
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.agent.session_store import WatchError
+
+
+class FakeRedis:
+    """Thread-safe dict-backed stand-in for a redis-py client"""
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._data: Dict[str, Any] = {}
+        self._versions: Dict[str, int] = {}
+    
+    def _touch(self, key: str) -> None:
+        self._versions[key] = self._versions.get(key, 0) + 1
+    
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._data.get(key)
+            return value.encode() if isinstance(value, str) else value
+    
+    def set(self, key: str, value: str) -> bool:
+        with self._lock:
+            self._data[key] = value
+            self._touch(key)
+            return True
+    
+    def delete(self, key: str) -> int:
+        with self._lock:
+            existed = self._data.pop(key, None) is not None
+            self._touch(key)
+            return int(existed)
+    
+    def sadd(self, key: str, member: str) -> int:
+        with self._lock:
+            members: Set[str] = self._data.setdefault(key, set())
+            added = member not in members
+            members.add(member)
+            self._touch(key)
+            return int(added)
+    
+    def srem(self, key: str, member: str) -> int:
+        with self._lock:
+            members: Set[str] = self._data.get(key, set())
+            removed = member in members
+            members.discard(member)
+            self._touch(key)
+            return int(removed)
+    
+    def scard(self, key: str) -> int:
+        with self._lock:
+            return len(self._data.get(key, set()))
+    
+    def lpush(self, key: str, value: str) -> int:
+        with self._lock:
+            items: List[str] = self._data.setdefault(key, [])
+            items.insert(0, value)
+            self._touch(key)
+            return len(items)
+    
+    def ltrim(self, key: str, start: int, stop: int) -> bool:
+        with self._lock:
+            items: List[str] = self._data.get(key, [])
+            self._data[key] = items[start:stop + 1]
+            return True
+    
+    def lrange(self, key: str, start: int, stop: int) -> List[str]:
+        with self._lock:
+            items: List[str] = self._data.get(key, [])
+            return items[start:] if stop == -1 else items[start:stop + 1]
+    
+    def zadd(self, key: str, mapping: Dict[str, float], xx: bool = False) -> int:
+        with self._lock:
+            scores: Dict[str, float] = self._data.setdefault(key, {})
+            added = 0
+            for member, score in mapping.items():
+                if xx and member not in scores:
+                    continue
+                added += member not in scores
+                scores[member] = score
+            self._touch(key)
+            return added
+    
+    def zrem(self, key: str, member: str) -> int:
+        with self._lock:
+            scores: Dict[str, float] = self._data.get(key, {})
+            removed = scores.pop(member, None) is not None
+            self._touch(key)
+            return int(removed)
+    
+    def zrange(self, key: str, start: int, stop: int, withscores: bool = False) -> List[Any]:
+        with self._lock:
+            ranked = sorted(self._data.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+            ranked = ranked[start:] if stop == -1 else ranked[start:stop + 1]
+            if withscores:
+                return [(member.encode(), score) for member, score in ranked]
+            return [member.encode() for member, _ in ranked]
+    
+    def pipeline(self) -> "FakePipeline":
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Buffers commands until execute(), honouring WATCH like redis-py"""
+    
+    def __init__(self, redis: FakeRedis):
+        self._redis = redis
+        self._watched: Dict[str, int] = {}
+        self._commands: List[Any] = []
+    
+    def __enter__(self) -> "FakePipeline":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.reset()
+    
+    def watch(self, *keys: str) -> None:
+        with self._redis._lock:
+            for key in keys:
+                self._watched[key] = self._redis._versions.get(key, 0)
+    
+    def multi(self) -> None:
+        self._commands = []
+    
+    def get(self, key: str) -> Optional[bytes]:
+        return self._redis.get(key)
+    
+    def __getattr__(self, name: str) -> Any:
+        command = getattr(self._redis, name)
+        return lambda *args, **kwargs: self._commands.append((command, args, kwargs))
+    
+    def execute(self) -> List[Any]:
+        with self._redis._lock:
+            for key, version in self._watched.items():
+                if self._redis._versions.get(key, 0) != version:
+                    self.reset()
+                    raise WatchError("Watched variable changed")
+            results = [command(*args, **kwargs) for command, args, kwargs in self._commands]
+        self.reset()
+        return results
+    
+    def reset(self) -> None:
+        self._watched = {}
+        self._commands = []
+
+
+class FakeAsyncRedis:
+    """``redis.asyncio``-style client over a FakeRedis, so both clients see the same data"""
+    
+    def __init__(self, redis: FakeRedis):
+        self._redis = redis
+        self.closed = False
+    
+    def __getattr__(self, name: str) -> Any:
+        command = getattr(self._redis, name)
+        
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return command(*args, **kwargs)
+        return call
+    
+    def pipeline(self) -> "FakeAsyncPipeline":
+        return FakeAsyncPipeline(self._redis)
+    
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+class FakeAsyncPipeline:
+    """Async pipeline: WATCH and reads are awaited, queued commands are not"""
+    
+    def __init__(self, redis: FakeRedis):
+        self._pipeline = FakePipeline(redis)
+    
+    async def __aenter__(self) -> "FakeAsyncPipeline":
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._pipeline.reset()
+    
+    async def watch(self, *keys: str) -> None:
+        self._pipeline.watch(*keys)
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._pipeline.get(key)
+    
+    def multi(self) -> None:
+        self._pipeline.multi()
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pipeline, name)
+    
+    async def execute(self) -> List[Any]:
+        return self._pipeline.execute()
@@ -12,7 +12,18 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from src.agent import WaiterTrainingAgent, TrainingSession
-from src.agent.training_scenarios import TrainingScenario
+from src.agent import training_session
+from src.agent.training_scenarios import SCENARIO_CATALOG, TrainingScenario
+
+
+@pytest.fixture
+def category_registry():
+    """Restore the process-wide category table after a test adds categories outside the catalog"""
+    names, bits = list(training_session._CATEGORY_NAMES), dict(training_session._CATEGORY_BITS)
+    yield
+    training_session._CATEGORY_NAMES[:] = names
+    training_session._CATEGORY_BITS.clear()
+    training_session._CATEGORY_BITS.update(bits)
 
 
 class TestTrainingScenario:
@@ -49,6 +60,17 @@ class TestTrainingScenario:
         prompt = scenario.generate_prompt("expert")
         assert "beginner" in prompt.lower()  # Should default to beginner
     
+    def test_prompts_are_precompiled(self):
+        """Test prompts come from the shared catalog without source indentation"""
+        first = TrainingScenario(category="upselling", difficulty_levels=["beginner"])
+        second = TrainingScenario(category="upselling", difficulty_levels=["beginner"])
+        
+        prompt = first.generate_prompt("beginner")
+        assert prompt is second.generate_prompt("beginner")
+        assert prompt is SCENARIO_CATALOG[("upselling", "beginner")]
+        assert all(line == line.lstrip() for line in prompt.splitlines())
+        assert len(SCENARIO_CATALOG) == 18
+    
     def test_get_scenario_summary(self):
         """Test getting scenario summary"""
         scenario = TrainingScenario(
@@ -61,6 +83,62 @@ class TestTrainingScenario:
         assert "first impressions" in summary["description"].lower()
 
 
+class TestTrainingSession:
+    """Test the compact session record"""
+    
+    @pytest.fixture
+    def session(self):
+        from datetime import datetime
+        return TrainingSession(
+            session_id="session_1",
+            waiter_name="Ann Lee",
+            difficulty_level="beginner",
+            start_time=datetime(2024, 1, 1, 12, 0),
+            scenarios_completed=[],
+            score=0.0,
+            feedback=[]
+        )
+    
+    def test_is_slotted(self, session):
+        """Test sessions carry no per-instance __dict__"""
+        assert not hasattr(session, "__dict__")
+    
+    def test_completed_categories(self, session):
+        """Test completed categories are deduplicated and listed in catalog order"""
+        for category in ("upselling", "customer_greeting", "upselling", "problem_resolution"):
+            session.complete_scenario(category)
+        
+        assert session.scenarios_completed == ["customer_greeting", "upselling", "problem_resolution"]
+        assert session.completed_count == 3
+        assert session.has_completed("problem_resolution")
+        assert not session.has_completed("order_taking")
+    
+    def test_categories_outside_the_catalog(self, session, category_registry):
+        """Test a configured category missing from the catalog is recorded after the catalog ones"""
+        session.complete_scenario("wine_service")
+        session.complete_scenario("upselling")
+        
+        assert session.scenarios_completed == ["upselling", "wine_service"]
+        assert session.has_completed("wine_service")
+        assert TrainingSession.from_dict(session.to_dict()) == session
+    
+    def test_feedback_history_is_bounded(self, session):
+        """Test only recent feedback is kept while the total is counted"""
+        for i in range(TrainingSession.feedback_history + 3):
+            session.add_feedback(f"Feedback {i}")
+        
+        assert len(session.feedback) == TrainingSession.feedback_history
+        assert session.feedback[-1] == f"Feedback {TrainingSession.feedback_history + 2}"
+        assert session.feedback_count == TrainingSession.feedback_history + 3
+    
+    def test_dict_round_trip(self, session):
+        """Test serialization keeps categories, feedback and counts"""
+        session.complete_scenario("menu_knowledge")
+        session.add_feedback("Good allergy check.")
+        
+        assert TrainingSession.from_dict(session.to_dict()) == session
+
+
 class TestWaiterTrainingAgent:
     """Test the WaiterTrainingAgent class"""
     
@@ -78,20 +156,16 @@ class TestWaiterTrainingAgent:
                 "temperature": 0.7,
                 "openai_api_key": "test_key"
             },
-            "logging": {"level": "INFO"}
+            "logging": {"level": "WARNING"}
         }
     
-    @patch('src.agent.openai')
-    @patch('src.utils.helpers.load_config')
-    @patch('src.utils.helpers.setup_logging')
-    def test_agent_initialization(self, mock_setup_logging, mock_load_config, mock_openai):
+    @pytest.fixture
+    def agent(self, mock_config):
+        with patch('src.agent.waiter_agent.load_config', return_value=mock_config):
+            yield WaiterTrainingAgent()
+    
+    def test_agent_initialization(self, agent):
         """Test agent initialization"""
-        mock_load_config.return_value = self.mock_config()
-        mock_logger = Mock()
-        mock_setup_logging.return_value = mock_logger
-        
-        agent = WaiterTrainingAgent()
-        
         assert agent.model == "gpt-4"
         assert agent.temperature == 0.7
         assert len(agent.scenarios) == 2
@@ -99,20 +173,13 @@ class TestWaiterTrainingAgent:
         assert "menu_knowledge" in agent.scenarios
     
     @pytest.mark.asyncio
-    @patch('src.agent.openai')
-    @patch('src.utils.helpers.load_config')
-    @patch('src.utils.helpers.setup_logging')
-    async def test_start_training_session(self, mock_setup_logging, mock_load_config, mock_openai):
+    async def test_start_training_session(self, agent):
         """Test starting a training session"""
-        mock_load_config.return_value = self.mock_config()
-        mock_logger = Mock()
-        mock_setup_logging.return_value = mock_logger
-        
-        agent = WaiterTrainingAgent()
         session_id = await agent.start_training_session("John Doe", "intermediate")
         
         assert session_id.startswith("session_")
-        assert "John Doe" in session_id
+        assert "John Doe" not in session_id
+        assert session_id.replace("_", "").isalnum()
         assert session_id in agent.active_sessions
         
         session = agent.active_sessions[session_id]
@@ -122,16 +189,8 @@ class TestWaiterTrainingAgent:
         assert len(session.scenarios_completed) == 0
     
     @pytest.mark.asyncio
-    @patch('src.agent.openai')
-    @patch('src.utils.helpers.load_config')
-    @patch('src.utils.helpers.setup_logging')
-    async def test_get_training_scenario(self, mock_setup_logging, mock_load_config, mock_openai):
+    async def test_get_training_scenario(self, agent):
         """Test getting a training scenario"""
-        mock_load_config.return_value = self.mock_config()
-        mock_logger = Mock()
-        mock_setup_logging.return_value = mock_logger
-        
-        agent = WaiterTrainingAgent()
         session_id = await agent.start_training_session("Jane Doe", "beginner")
         
         scenario = await agent.get_training_scenario(session_id)
@@ -142,51 +201,217 @@ class TestWaiterTrainingAgent:
         assert scenario["difficulty"] == "beginner"
     
     @pytest.mark.asyncio
-    @patch('src.agent.openai')
-    @patch('src.utils.helpers.load_config')
-    @patch('src.utils.helpers.setup_logging')
-    async def test_get_session_status(self, mock_setup_logging, mock_load_config, mock_openai):
+    async def test_get_session_status(self, agent):
         """Test getting session status"""
-        mock_load_config.return_value = self.mock_config()
-        mock_logger = Mock()
-        mock_setup_logging.return_value = mock_logger
-        
-        agent = WaiterTrainingAgent()
         session_id = await agent.start_training_session("Bob Smith", "advanced")
         
-        status = agent.get_session_status(session_id)
+        status = await agent.get_session_status(session_id)
         
         assert status is not None
         assert status["waiter_name"] == "Bob Smith"
         assert status["difficulty_level"] == "advanced"
         assert status["current_score"] == 0.0
     
-    def test_get_available_categories(self):
-        """Test getting available categories"""
-        with patch('src.agent.WaiterTrainingAgent._load_training_scenarios') as mock_load:
-            mock_load.return_value = {
-                "customer_greeting": Mock(),
-                "menu_knowledge": Mock()
-            }
-            
+    @pytest.mark.asyncio
+    async def test_unknown_category_is_rejected(self, agent):
+        """Test responses for categories outside the catalog never reach the session"""
+        session_id = await agent.start_training_session("Ann Lee")
+        
+        with pytest.raises(ValueError):
+            await agent.process_waiter_response(session_id, "made_up_category", "Hello")
+        with pytest.raises(ValueError):
+            async for _ in agent.stream_waiter_response(session_id, "made_up_category", "Hello"):
+                pass
+        assert agent.active_sessions[session_id].scenarios_completed == []
+    
+    @pytest.mark.asyncio
+    async def test_configured_category_outside_the_catalog(self, mock_config, category_registry):
+        """Test a session can be given and answer a configured category that has no catalog entry"""
+        mock_config["training"]["scenario_categories"] = ["wine_service"]
+        mock_config["scoring"] = {"llm_feedback": "off"}
+        with patch('src.agent.waiter_agent.load_config', return_value=mock_config):
             agent = WaiterTrainingAgent()
-            categories = agent.get_available_categories()
-            
-            assert "customer_greeting" in categories
-            assert "menu_knowledge" in categories
-            assert len(categories) == 2
+        session_id = await agent.start_training_session("Ann Lee")
+        
+        scenario = await agent.get_training_scenario(session_id, "wine_service")
+        result = await agent.process_waiter_response(session_id, "wine_service", "I would suggest a dry white.")
+        
+        assert scenario["prompt"]
+        assert result["points"] > 0
+        assert agent.active_sessions[session_id].scenarios_completed == ["wine_service"]
     
-    def test_get_difficulty_levels(self):
-        """Test getting difficulty levels"""
-        with patch('src.agent.WaiterTrainingAgent._load_training_scenarios'):
+    @pytest.mark.asyncio
+    async def test_feedback_history_is_per_agent(self, mock_config):
+        """Test the configured feedback history applies to this agent only"""
+        mock_config["sessions"] = {"feedback_history": 2}
+        mock_config["scoring"] = {"llm_feedback": "off"}
+        with patch('src.agent.waiter_agent.load_config', return_value=mock_config):
             agent = WaiterTrainingAgent()
-            agent.config = self.mock_config()
-            
-            levels = agent.get_difficulty_levels()
-            
-            assert "beginner" in levels
-            assert "intermediate" in levels
-            assert "advanced" in levels
+        session_id = await agent.start_training_session("Ann Lee")
+        
+        for _ in range(4):
+            await agent.process_waiter_response(session_id, "customer_greeting", "Welcome!")
+        
+        assert len(agent.active_sessions[session_id].feedback) == 2
+        assert TrainingSession.feedback_history == 5
+    
+    def test_get_available_categories(self, agent):
+        """Test getting available categories"""
+        categories = agent.get_available_categories()
+        
+        assert "customer_greeting" in categories
+        assert "menu_knowledge" in categories
+        assert len(categories) == 2
+    
+    def test_get_difficulty_levels(self, agent):
+        """Test getting difficulty levels"""
+        levels = agent.get_difficulty_levels()
+        
+        assert "beginner" in levels
+        assert "intermediate" in levels
+        assert "advanced" in levels
+
+
+class FakeAsyncOpenAI:
+    """Stand-in for openai.AsyncOpenAI whose completions take `delay` seconds"""
+    delay = 0.0
+    calls = 0
+    in_flight = 0
+    max_in_flight = 0
+    
+    def __init__(self, **kwargs):
+        self.chat = Mock()
+        self.chat.completions.create = self._create
+    
+    async def close(self):
+        return None
+    
+    async def _create(self, **kwargs):
+        FakeAsyncOpenAI.calls += 1
+        FakeAsyncOpenAI.in_flight += 1
+        FakeAsyncOpenAI.max_in_flight = max(FakeAsyncOpenAI.max_in_flight, FakeAsyncOpenAI.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            FakeAsyncOpenAI.in_flight -= 1
+        return Mock(choices=[Mock(message=Mock(content="  Warm greeting, now offer a menu.  "))])
+
+
+class TestFeedbackGeneration:
+    """Test the asynchronous feedback path"""
+    
+    @pytest.fixture
+    def agent(self):
+        config = {
+            "training": {
+                "difficulty_levels": ["beginner", "intermediate", "advanced"],
+                "scenario_categories": ["customer_greeting", "menu_knowledge"]
+            },
+            "ai": {"model": "gpt-4", "openai_api_key": "test_key", "request_timeout": 0.2},
+            "logging": {"level": "WARNING"}
+        }
+        with patch('src.agent.waiter_agent.load_config', return_value=config), \
+                patch('src.agent.llm_client.openai.AsyncOpenAI', FakeAsyncOpenAI):
+            FakeAsyncOpenAI.delay = 0.0
+            FakeAsyncOpenAI.calls = 0
+            FakeAsyncOpenAI.max_in_flight = 0
+            yield WaiterTrainingAgent()
+    
+    @pytest.mark.asyncio
+    async def test_generate_feedback(self, agent):
+        """Test prose feedback text is returned stripped"""
+        feedback = await agent._generate_feedback("customer_greeting", "Welcome!", "beginner")
+        assert feedback.to_text() == "Warm greeting, now offer a menu."
+    
+    @pytest.mark.asyncio
+    async def test_generate_feedback_timeout(self, agent):
+        """Test a slow completion falls back instead of hanging"""
+        FakeAsyncOpenAI.delay = 5.0
+        feedback = await agent._generate_feedback("customer_greeting", "Welcome!", "beginner")
+        assert "having trouble" in feedback.to_text()
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_feedback_overlaps(self, agent):
+        """Test concurrent feedback requests do not run one after another"""
+        FakeAsyncOpenAI.delay = 0.1
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(*(
+            agent._generate_feedback("customer_greeting", f"Welcome {i}!", "beginner")
+            for i in range(10)
+        ))
+        assert asyncio.get_running_loop().time() - start < 0.5
+    
+    @pytest.mark.asyncio
+    async def test_repeated_response_uses_cache(self, agent):
+        """Test an identical answer is served from the feedback cache"""
+        first = await agent._generate_feedback("customer_greeting", "Welcome!", "beginner")
+        second = await agent._generate_feedback("customer_greeting", "welcome", "beginner")
+        
+        assert first == second
+        assert FakeAsyncOpenAI.calls == 1
+        
+        await agent._generate_feedback("customer_greeting", "Welcome!", "beginner", bypass_cache=True)
+        assert FakeAsyncOpenAI.calls == 2
+        assert agent.get_feedback_cache_stats()["bypassed"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_fallback_is_not_cached(self, agent):
+        """Test a timed-out completion is retried on the next request"""
+        FakeAsyncOpenAI.delay = 5.0
+        await agent._generate_feedback("customer_greeting", "Welcome!", "beginner")
+        FakeAsyncOpenAI.delay = 0.0
+        feedback = await agent._generate_feedback("customer_greeting", "Welcome!", "beginner")
+        
+        assert feedback.to_text() == "Warm greeting, now offer a menu."
+    
+    @pytest.mark.asyncio
+    async def test_llm_client_is_shared(self, agent):
+        """Test every feedback call reuses the agent's single client"""
+        await agent._generate_feedback("customer_greeting", "Welcome!", "beginner")
+        client = agent.llm.client
+        await agent._generate_feedback("customer_greeting", "Hello there!", "beginner")
+        
+        assert agent.llm.client is client
+        await agent.aclose()
+        assert agent.llm._client is None
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_response_leaves_session_untouched(self, agent):
+        """Test cancelling an in-flight response does not record feedback"""
+        FakeAsyncOpenAI.delay = 0.15
+        session_id = await agent.start_training_session("Ann Lee")
+        task = asyncio.create_task(
+            agent.process_waiter_response(session_id, "customer_greeting", "Welcome!")
+        )
+        await asyncio.sleep(0.01)
+        task.cancel()
+        
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert agent.active_sessions[session_id].feedback == []
+    
+    @pytest.mark.asyncio
+    async def test_batch_is_bounded_and_reports_failures(self, agent):
+        """Test a batch runs a few items at a time and keeps going past bad items"""
+        FakeAsyncOpenAI.delay = 0.02
+        agent.batch_concurrency = 3
+        session_ids = [await agent.start_training_session(f"Trainee {i}") for i in range(8)]
+        items = [
+            {"session_id": session_id, "scenario_category": "customer_greeting", "response": f"Welcome {i}!"}
+            for i, session_id in enumerate(session_ids)
+        ]
+        items.insert(2, {"session_id": "session_missing", "scenario_category": "customer_greeting",
+                         "response": "Hello!"})
+        
+        results = await agent.process_waiter_responses(items)
+        
+        assert [result["index"] for result in results] == list(range(9))
+        assert results[2]["status"] == "error"
+        assert "not found" in results[2]["error"]
+        ok = [result for result in results if result["status"] == "ok"]
+        assert len(ok) == 8
+        assert all(result["feedback"] == "Warm greeting, now offer a menu." for result in ok)
+        assert FakeAsyncOpenAI.max_in_flight == 3
 
 
 if __name__ == "__main__":
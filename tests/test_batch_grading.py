@@ -0,0 +1,180 @@
+"""
+Tests for offline batch grading
+"""
+
+import asyncio
+import csv
+import json
+import sqlite3
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import httpx
+import openai
+
+from src.agent.batch_grading import BatchGrader, InvalidRecord, read_responses
+from src.agent.feedback_schema import StructuredFeedback
+
+
+class StubAgent:
+    """Implements the agent methods the grader uses"""
+    
+    def __init__(self, delay: float = 0.0, failures: int = 0, block_on: str = None):
+        self.delay = delay
+        self.failures = failures
+        self.block_on = block_on
+        self.calls = 0
+    
+    def check_category(self, category):
+        if category == "wine_service":
+            raise ValueError(f"Category {category} not found")
+    
+    async def fetch_feedback(self, category, response, difficulty, bypass_cache=False):
+        self.calls += 1
+        if response == self.block_on:
+            await asyncio.Event().wait()
+        if self.failures:
+            self.failures -= 1
+            request = httpx.Request("POST", "http://llm/v1/chat/completions")
+            raise openai.RateLimitError(
+                "Rate limit reached",
+                response=httpx.Response(429, headers={"retry-after-ms": "20"}, request=request),
+                body=None
+            )
+        await asyncio.sleep(self.delay)
+        return StructuredFeedback.from_text(f"Feedback on {response}")
+    
+    def score_response(self, category, response, difficulty):
+        if response == "unscorable":
+            raise RuntimeError("scorer crashed")
+        return 10.0
+
+
+def write_jsonl(path, count):
+    with open(path, "w") as target:
+        for i in range(count):
+            target.write(json.dumps({"id": i, "scenario_category": "upselling", "response": f"answer {i}"}) + "\n")
+
+
+def read_results(path):
+    return [json.loads(line) for line in open(path)]
+
+
+class TestReaders:
+    """Test streaming input formats"""
+    
+    def test_jsonl_with_bad_line(self, tmp_path):
+        """Test a malformed line becomes an invalid record instead of stopping the read"""
+        path = tmp_path / "answers.jsonl"
+        path.write_text('{"scenario_category": "upselling", "response": "Dessert?"}\nnot json\n\n')
+        
+        records = list(read_responses(path))
+        assert records[0]["response"] == "Dessert?"
+        assert isinstance(records[1], InvalidRecord)
+        assert len(records) == 2
+    
+    def test_csv(self, tmp_path):
+        path = tmp_path / "answers.csv"
+        with open(path, "w", newline="") as target:
+            writer = csv.writer(target)
+            writer.writerow(["category", "response", "difficulty"])
+            writer.writerow(["order_taking", "Anything to drink?", "advanced"])
+        
+        assert list(read_responses(path)) == [
+            {"category": "order_taking", "response": "Anything to drink?", "difficulty": "advanced"}
+        ]
+    
+    def test_sqlite(self, tmp_path):
+        path = tmp_path / "archive.db"
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE answers (id INTEGER PRIMARY KEY, scenario_category TEXT, response TEXT)")
+        connection.execute("INSERT INTO answers (scenario_category, response) VALUES ('upselling', 'Wine?')")
+        connection.commit()
+        connection.close()
+        
+        assert list(read_responses(path, table="answers")) == [
+            {"id": 1, "scenario_category": "upselling", "response": "Wine?"}
+        ]
+        with pytest.raises(ValueError):
+            list(read_responses(path, table="answers; DROP TABLE answers"))
+
+
+class TestBatchGrader:
+    """Test the worker pool, ordering, retries and resume"""
+    
+    @pytest.mark.asyncio
+    async def test_results_in_input_order(self, tmp_path):
+        """Test concurrent grading still writes results in input order"""
+        write_jsonl(tmp_path / "in.jsonl", 25)
+        grader = BatchGrader(StubAgent(delay=0.01), workers=5)
+        
+        stats = await grader.run(read_responses(tmp_path / "in.jsonl"), tmp_path / "out.jsonl")
+        
+        results = read_results(tmp_path / "out.jsonl")
+        assert [result["id"] for result in results] == list(range(25))
+        assert results[3]["feedback"] == "Feedback on answer 3"
+        assert results[3]["score"] == 10.0
+        assert stats["graded"] == 25 and stats["failed"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_invalid_records_are_reported(self, tmp_path):
+        records = [{"scenario_category": "upselling"}, InvalidRecord("line 2: invalid JSON")]
+        stats = await BatchGrader(StubAgent()).run(records, tmp_path / "out.jsonl")
+        
+        results = read_results(tmp_path / "out.jsonl")
+        assert [result["status"] for result in results] == ["error", "error"]
+        assert stats["failed"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_unknown_category_and_scoring_errors_are_reported(self, tmp_path):
+        """Test records the agent cannot score fail on their own, without an LLM call or stalling the run"""
+        records = [{"id": i, "scenario_category": "upselling", "response": f"answer {i}"} for i in range(100)]
+        records[40] = {"id": 40, "scenario_category": "wine_service", "response": "A Rioja?"}
+        records[70] = {"id": 70, "scenario_category": "upselling", "response": "unscorable"}
+        agent = StubAgent()
+        
+        stats = await asyncio.wait_for(BatchGrader(agent, workers=4).run(records, tmp_path / "out.jsonl"), timeout=5)
+        
+        results = read_results(tmp_path / "out.jsonl")
+        assert [result["id"] for result in results] == list(range(100))
+        assert results[40]["status"] == "error" and "not found" in results[40]["error"]
+        assert results[70]["status"] == "error" and results[70]["error"] == "scorer crashed"
+        assert stats["graded"] == 98 and stats["failed"] == 2
+        assert agent.calls == 98
+    
+    @pytest.mark.asyncio
+    async def test_rate_limits_are_retried(self, tmp_path):
+        """Test a 429 pauses and retries instead of failing the record"""
+        write_jsonl(tmp_path / "in.jsonl", 3)
+        grader = BatchGrader(StubAgent(failures=2), workers=1, backoff=0.01)
+        
+        stats = await grader.run(read_responses(tmp_path / "in.jsonl"), tmp_path / "out.jsonl")
+        
+        assert stats["graded"] == 3
+        assert stats["rate_limited"] == 2
+        assert stats["retries"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_resume_from_checkpoint(self, tmp_path):
+        """Test an interrupted run resumes without losing or repeating results"""
+        write_jsonl(tmp_path / "in.jsonl", 20)
+        output, checkpoint = tmp_path / "out.jsonl", tmp_path / "out.checkpoint"
+        
+        stuck = BatchGrader(StubAgent(block_on="answer 12"), workers=3, checkpoint_every=1)
+        run = asyncio.create_task(stuck.run(read_responses(tmp_path / "in.jsonl"), output, checkpoint))
+        await asyncio.sleep(0.1)
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+        assert json.loads(checkpoint.read_text())["position"] == 12
+        
+        agent = StubAgent()
+        stats = await BatchGrader(agent, workers=3).run(read_responses(tmp_path / "in.jsonl"), output, checkpoint)
+        
+        assert stats["resumed_from"] == 12
+        assert agent.calls == 8
+        assert [result["id"] for result in read_results(output)] == list(range(20))
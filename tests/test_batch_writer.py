@@ -0,0 +1,54 @@
+"""
+Tests for the background batch writer
+"""
+
+import threading
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils.batch_writer import BatchWriter
+
+
+class TestBatchWriter:
+    """Test batching and surviving failed writes"""
+    
+    def test_items_are_written_in_batches(self):
+        """Test items queued together reach one write call, in order"""
+        batches = []
+        release = threading.Event()
+        
+        def write(batch):
+            release.wait()
+            batches.append(batch)
+        
+        writer = BatchWriter(write, "test-writer", batch_size=3, flush_interval=0.05)
+        for item in range(7):
+            writer.put(item)
+        release.set()
+        writer.close()
+        
+        assert [item for batch in batches for item in batch] == list(range(7))
+        assert all(len(batch) <= 3 for batch in batches)
+        assert len(batches) < 7
+    
+    def test_failed_batch_does_not_stop_the_writer(self):
+        """Test a write that raises is dropped and later items are still written"""
+        written = []
+        
+        def write(batch):
+            if "bad" in batch:
+                raise ValueError("cannot write")
+            written.extend(batch)
+        
+        writer = BatchWriter(write, "test-writer", flush_interval=0.01)
+        writer.put("bad")
+        writer.flush()
+        writer.put("good")
+        writer.flush()
+        
+        assert written == ["good"]
+        assert writer.pending == 0
+        writer.close()
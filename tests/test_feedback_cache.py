@@ -0,0 +1,89 @@
+"""
+Tests for the feedback cache
+"""
+
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.agent.feedback_cache import FeedbackCache, normalize_response
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_response():
+    """Test case, punctuation and whitespace are ignored"""
+    assert normalize_response("  Good evening,  WELCOME! Table for how many? ") == \
+        "good evening welcome table for how many"
+
+
+class TestFeedbackCache:
+    """Test the exact and similarity tiers"""
+    
+    def test_exact_hit_after_normalization(self):
+        """Test trivially different answers share feedback"""
+        cache = FeedbackCache()
+        cache.put("customer_greeting", "beginner", "Good evening, welcome!", "Lovely welcome.")
+        
+        assert cache.get("customer_greeting", "beginner", "good evening welcome") == "Lovely welcome."
+        assert cache.stats()["exact_hits"] == 1
+    
+    def test_scoped_by_category_difficulty_and_prompt(self):
+        """Test the same answer in another scenario, or for another prompt, is a miss"""
+        cache = FeedbackCache()
+        cache.put("customer_greeting", "beginner", "Welcome!", "Lovely welcome.", prompt="v1")
+        
+        assert cache.get("customer_greeting", "advanced", "Welcome!", prompt="v1") is None
+        assert cache.get("upselling", "beginner", "Welcome!", prompt="v1") is None
+        assert cache.get("customer_greeting", "beginner", "Welcome!", prompt="v2") is None
+        assert cache.get("customer_greeting", "beginner", "Welcome!", prompt="v1") == "Lovely welcome."
+        assert cache.stats()["misses"] == 3
+    
+    def test_entries_expire(self):
+        """Test entries are not served after the TTL"""
+        clock = FakeClock()
+        cache = FeedbackCache(ttl=60, clock=clock)
+        cache.put("upselling", "beginner", "Dessert?", "Suggest a specific dessert.")
+        
+        clock.now = 59
+        assert cache.get("upselling", "beginner", "Dessert?") is not None
+        clock.now = 61
+        assert cache.get("upselling", "beginner", "Dessert?") is None
+        assert len(cache) == 0
+    
+    def test_least_recently_used_evicted(self):
+        """Test the cache stays within max_entries"""
+        cache = FeedbackCache(max_entries=2)
+        cache.put("upselling", "beginner", "one", "1")
+        cache.put("upselling", "beginner", "two", "2")
+        cache.get("upselling", "beginner", "one")
+        cache.put("upselling", "beginner", "three", "3")
+        
+        assert cache.get("upselling", "beginner", "two") is None
+        assert cache.get("upselling", "beginner", "one") == "1"
+        assert cache.stats()["evictions"] == 1
+    
+    def test_similarity_tier(self):
+        """Test near-identical answers hit while different ones miss"""
+        cache = FeedbackCache(similarity=True, similarity_threshold=0.7)
+        cache.put("customer_greeting", "beginner",
+                  "Good evening and welcome to our restaurant, a table for how many tonight?",
+                  "Warm and efficient.")
+        
+        near = "Good evening and welcome to our restaurant, table for how many tonight?"
+        assert cache.get("customer_greeting", "beginner", near) == "Warm and efficient."
+        assert cache.get("customer_greeting", "beginner", "I would ignore them until they ask.") is None
+        
+        stats = cache.stats()
+        assert stats["similar_hits"] == 1
+        assert stats["hit_rate"] == 0.5
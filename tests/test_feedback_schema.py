@@ -0,0 +1,101 @@
+"""
+Tests for structured feedback parsing
+"""
+
+import json
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.agent.feedback_schema import (
+    FeedbackFormatError,
+    FeedbackParser,
+    StructuredFeedback,
+    feedback_max_tokens,
+    repair_json,
+)
+
+
+CRITERIA = ["Greeting", "Eye contact", "Reservation", "Seating"]
+
+FEEDBACK = {
+    "scores": [4, 3, 5, 2],
+    "strengths": ["Warm greeting"],
+    "improvements": ["Ask about a reservation", "Offer to seat them"],
+    "summary": "A friendly start."
+}
+
+
+class TestFeedbackParser:
+    """Test valid, repaired and prose completions"""
+    
+    def test_valid_json(self):
+        """Test a well-formed completion parses without repair"""
+        parser = FeedbackParser()
+        feedback = parser.parse(json.dumps(FEEDBACK), CRITERIA)
+        
+        assert feedback.scores == [4, 3, 5, 2]
+        assert feedback.to_rubric()["criteria"][2] == {"criterion": "Reservation", "score": 5}
+        assert feedback.to_text() == (
+            "A friendly start. Strengths: Warm greeting. To improve: Ask about a reservation; Offer to seat them."
+        )
+        assert parser.stats()["valid"] == 1
+    
+    @pytest.mark.parametrize("content", [
+        "```json\n" + json.dumps(FEEDBACK) + "\n```",
+        "Here is the feedback: " + json.dumps(FEEDBACK) + " Hope it helps!",
+        json.dumps(FEEDBACK).replace('"]', '",]'),
+    ])
+    def test_wrapped_or_sloppy_json_is_repaired(self, content):
+        """Test code fences, surrounding text and trailing commas are tolerated"""
+        parser = FeedbackParser()
+        assert parser.parse(content, CRITERIA).summary == "A friendly start."
+        assert parser.stats()["valid"] == 0
+    
+    def test_truncated_completion_is_repaired(self):
+        """Test output cut off at max_tokens keeps the fields that arrived"""
+        content = json.dumps(FEEDBACK)[:-30]
+        feedback = FeedbackParser().parse(content, CRITERIA)
+        
+        assert feedback.scores == [4, 3, 5, 2]
+        assert feedback.improvements[0] == "Ask about a reservation"
+    
+    def test_scores_are_clamped_and_trimmed(self):
+        """Test out-of-range scores are clamped and extra scores dropped"""
+        content = json.dumps({**FEEDBACK, "scores": [9, -1, "3", 2, 4]})
+        assert FeedbackParser().parse(content, CRITERIA).scores == [5, 0, 3, 2]
+    
+    def test_prose_is_kept_as_summary(self):
+        """Test a model that ignores the format still yields its text"""
+        parser = FeedbackParser()
+        feedback = parser.parse("Great greeting, now offer a menu.", CRITERIA)
+        
+        assert feedback.to_text() == "Great greeting, now offer a menu."
+        assert feedback.to_rubric()["criteria"] == []
+        assert parser.stats()["text_only"] == 1
+    
+    @pytest.mark.parametrize("content", ["", "   ", '{"scores": [1, 2'])
+    def test_unusable_completion_raises(self, content):
+        """Test empty output or broken JSON with no text is an error, not feedback"""
+        with pytest.raises(FeedbackFormatError):
+            FeedbackParser().parse(content, CRITERIA)
+
+
+def test_repair_json_rejects_non_objects():
+    """Test only JSON objects are recovered"""
+    assert repair_json("no json here") is None
+    assert repair_json('{"summary": "ok"}') == {"summary": "ok"}
+
+
+def test_round_trip_through_cache_json():
+    """Test feedback survives the JSON the cache stores"""
+    feedback = FeedbackParser().parse(json.dumps(FEEDBACK), CRITERIA)
+    assert StructuredFeedback.model_validate_json(feedback.model_dump_json()) == feedback
+
+
+def test_max_tokens_is_bounded_by_the_schema():
+    """Test the completion budget grows with the checklist and stays under free text"""
+    assert feedback_max_tokens(4) < feedback_max_tokens(6) < 200
@@ -0,0 +1,47 @@
+"""
+Tests for identifier generation
+"""
+
+import threading
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.utils.ids import ULIDGenerator, generate_session_id
+
+
+class TestULIDGenerator:
+    """Test the ULID generator"""
+    
+    def test_ids_are_url_safe_and_fixed_length(self):
+        """Test IDs use only Crockford base32 characters"""
+        ulid = ULIDGenerator().new()
+        assert len(ulid) == 26
+        assert set(ulid) <= set("0123456789ABCDEFGHJKMNPQRSTVWXYZ")
+    
+    def test_ids_sort_by_creation(self):
+        """Test IDs from one generator are strictly increasing"""
+        generator = ULIDGenerator()
+        ids = [generator.new() for _ in range(10000)]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+    
+    def test_no_collisions_across_threads(self):
+        """Test concurrent generation never repeats an ID"""
+        results = [[] for _ in range(8)]
+        
+        def generate(bucket):
+            for _ in range(10000):
+                bucket.append(generate_session_id())
+        
+        threads = [threading.Thread(target=generate, args=(bucket,)) for bucket in results]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        all_ids = [session_id for bucket in results for session_id in bucket]
+        assert len(set(all_ids)) == 80000
+        assert all(session_id.startswith("session_") for session_id in all_ids)
@@ -0,0 +1,85 @@
+"""
+Tests for the shared LLM client
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.agent.llm_client import LLMClient, LLMClientStats, RequestTiming
+from fake_llm_server import DEFAULT_FEEDBACK, FakeLLMServer
+
+
+class TestLLMClientStats:
+    """Test the rolling connection statistics"""
+    
+    def test_summary(self):
+        """Test percentiles are reported in milliseconds"""
+        stats = LLMClientStats()
+        stats.record(RequestTiming(pool_wait=0.001, connect=0.010, ttfb=0.200, new_connection=True))
+        stats.record(RequestTiming(pool_wait=0.003, connect=0.0, ttfb=0.100, new_connection=False))
+        
+        summary = stats.summary()
+        assert summary["requests"] == 2
+        assert summary["new_connections"] == 1
+        assert summary["ttfb_ms"]["max"] == 200.0
+        assert summary["connect_ms"]["p50"] in (0.0, 10.0)
+
+
+class TestLLMClient:
+    """Test the pooled client against the fake LLM server"""
+    
+    @pytest.mark.asyncio
+    async def test_connections_are_reused(self):
+        """Test sequential requests share one keep-alive connection"""
+        with FakeLLMServer(latency=0.01) as server:
+            llm = LLMClient({"openai_api_key": "test", "base_url": server.base_url})
+            try:
+                for _ in range(3):
+                    completion = await llm.chat("fake-model", [{"role": "user", "content": "Hi"}])
+                    assert completion.choices[0].message.content
+            finally:
+                await llm.aclose()
+        
+        summary = llm.stats.summary()
+        assert summary["requests"] == 3
+        assert summary["new_connections"] == 1
+        assert summary["ttfb_ms"]["p50"] >= 10.0
+    
+    @pytest.mark.asyncio
+    async def test_stream_chat(self):
+        """Test streamed tokens arrive in order and time to first token is recorded"""
+        with FakeLLMServer(latency=0.05, token_interval=0.01) as server:
+            llm = LLMClient({"openai_api_key": "test", "base_url": server.base_url})
+            try:
+                tokens = [token async for token in llm.stream_chat("fake-model", [{"role": "user", "content": "Hi"}])]
+            finally:
+                await llm.aclose()
+        
+        assert len(tokens) > 1
+        assert "".join(tokens) == DEFAULT_FEEDBACK
+        
+        summary = llm.stats.summary()
+        assert summary["streams"] == 1
+        assert summary["stream_ttft_ms"]["max"] >= 50.0
+        assert summary["stream_total_ms"]["max"] > summary["stream_ttft_ms"]["max"]
+    
+    @pytest.mark.asyncio
+    async def test_cached_prompt_tokens_are_recorded(self):
+        """Test prompt tokens the provider served from its prefix cache are counted"""
+        system = {"role": "system", "content": "You are an expert restaurant trainer. " * 20}
+        with FakeLLMServer(latency=0.0, prompt_cache=True, cache_min_tokens=0, cache_block_tokens=16) as server:
+            llm = LLMClient({"openai_api_key": "test", "base_url": server.base_url})
+            try:
+                for answer in ("Welcome!", "Good evening, table for two?"):
+                    await llm.chat("fake-model", [system, {"role": "user", "content": answer}])
+            finally:
+                await llm.aclose()
+        
+        usage = llm.stats.summary()["usage"]
+        assert usage["completions"] == 2
+        assert usage["cache_hit_rate"] == 0.5
+        assert 0 < usage["cached_tokens"] < usage["prompt_tokens"]
@@ -0,0 +1,119 @@
+"""
+Tests for the Prometheus metrics
+"""
+
+import asyncio
+import threading
+from datetime import datetime
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import httpx
+import openai
+
+from src.agent.metrics import AgentMetrics, MetricsRegistry
+from src.agent.session_store import InstrumentedSessionStore, MemorySessionStore
+from src.agent.training_session import TrainingSession
+
+
+def sample_lines(text):
+    return [line for line in text.splitlines() if line and not line.startswith("#")]
+
+
+class TestMetrics:
+    """Test counters, gauges and histograms and their exposition"""
+    
+    def test_counter_sums_across_threads(self):
+        """Test increments from several threads are all counted"""
+        registry = MetricsRegistry()
+        counter = registry.counter("test_events", "Events", ("kind",))
+        
+        def work():
+            for _ in range(1000):
+                counter.labels("a").inc()
+        
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert 'test_events_total{kind="a"} 4000' in registry.render()
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket counts include smaller buckets and count and sum match"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("test_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+        
+        assert sample_lines(registry.render()) == [
+            'test_seconds_bucket{le="0.1"} 2',
+            'test_seconds_bucket{le="1"} 3',
+            'test_seconds_bucket{le="+Inf"} 4',
+            "test_seconds_count 4",
+            "test_seconds_sum 3.65",
+        ]
+    
+    def test_gauge_and_label_escaping(self):
+        """Test gauges go up and down and label values are escaped"""
+        registry = MetricsRegistry()
+        gauge = registry.gauge("test_open", "Open things", ("name",))
+        gauge.labels('say "hi"\n').inc(3)
+        gauge.labels('say "hi"\n').dec()
+        
+        text = registry.render()
+        assert "# TYPE test_open gauge" in text
+        assert 'test_open{name="say \\"hi\\"\\n"} 2' in text
+    
+    def test_function_metrics_are_read_at_scrape_time(self):
+        """Test gauges and counters backed by functions report current values"""
+        registry = MetricsRegistry()
+        sessions = {"a": 1}
+        registry.gauge("test_sessions", "Sessions", function=lambda: len(sessions))
+        registry.counter("test_tokens", "Tokens", ("kind",), function=lambda: {("prompt",): 12})
+        sessions["b"] = 2
+        
+        text = registry.render()
+        assert "test_sessions 2" in text
+        assert 'test_tokens_total{kind="prompt"} 12' in text
+    
+    def test_llm_outcomes(self):
+        """Test timeouts and errors are labelled and errors counted by type"""
+        metrics = AgentMetrics()
+        metrics.record_llm_request("openai", 0.2)
+        metrics.record_llm_request("openai", 30.0, TimeoutError())
+        metrics.record_llm_request("openai", 30.0, asyncio.TimeoutError())
+        request = httpx.Request("POST", "http://llm/v1/chat/completions")
+        metrics.record_llm_request("openai", 30.0, openai.APITimeoutError(request=request))
+        metrics.record_llm_request("openai", 0.1, ValueError("bad"))
+        
+        text = metrics.render()
+        assert 'waiter_llm_request_duration_seconds_count{backend="openai",outcome="ok"} 1' in text
+        assert 'waiter_llm_request_duration_seconds_count{backend="openai",outcome="timeout"} 3' in text
+        assert 'waiter_llm_request_duration_seconds_count{backend="openai",outcome="error"} 1' in text
+        assert 'waiter_llm_errors_total{backend="openai",error="ValueError"} 1' in text
+
+
+class TestInstrumentedSessionStore:
+    """Test session store calls are timed and delegated"""
+    
+    def test_operations_are_timed(self):
+        """Test each call is observed under its operation and reaches the wrapped store"""
+        metrics = AgentMetrics()
+        store = InstrumentedSessionStore(MemorySessionStore(), "memory", metrics.store_operation_seconds)
+        session = TrainingSession(session_id="session_1", waiter_name="Ana", difficulty_level="beginner",
+                                  start_time=datetime.now(), scenarios_completed=[], score=0.0, feedback=[])
+        
+        store.create(session)
+        assert store.mutate("session_1", lambda s: s.add_feedback("Good")).feedback == ["Good"]
+        assert "session_1" in store
+        assert len(store) == 1
+        
+        text = metrics.render()
+        for operation, count in (("create", 1), ("mutate", 1), ("get", 1), ("count", 1)):
+            assert (f'waiter_session_store_operation_duration_seconds_count'
+                    f'{{store="memory",operation="{operation}"}} {count}') in text
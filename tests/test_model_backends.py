@@ -0,0 +1,168 @@
+"""
+Tests for the model backends
+"""
+
+import asyncio
+import json
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.agent import WaiterTrainingAgent
+from src.agent.model_backends import (
+    LocalModelBackend,
+    LocalRuntime,
+    OpenAIBackend,
+    create_model_backend,
+)
+
+
+class RecordingRuntime(LocalRuntime):
+    """Echoes the last message, recording loads, overlapping calls and threads"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False, reply: str = None, fail_load: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.reply = reply
+        self.fail_load = fail_load
+        self.loads = 0
+        self.running = 0
+        self.most_running = 0
+        self.threads = set()
+
+    def load(self):
+        self.loads += 1
+        if self.fail_load:
+            raise FileNotFoundError("models/test.gguf")
+
+    def generate(self, request):
+        self.threads.add(threading.get_ident())
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        try:
+            time.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("model crashed")
+            return self.reply or request.messages[-1]["content"].upper()
+        finally:
+            self.running -= 1
+
+
+def messages(text):
+    return [{"role": "user", "content": text}]
+
+
+class TestLocalModelBackend:
+    """Test the worker thread, warm loading and failures"""
+
+    @pytest.mark.asyncio
+    async def test_requests_run_one_at_a_time_on_one_thread(self):
+        """Test concurrent requests are generated in turn on the worker thread and get their own results"""
+        runtime = RecordingRuntime(delay=0.01)
+        backend = LocalModelBackend(runtime)
+
+        results = await asyncio.gather(*(backend.complete("local", messages(f"hi {i}")) for i in range(5)))
+
+        assert results == [f"HI {i}" for i in range(5)]
+        assert runtime.most_running == 1
+        assert len(runtime.threads) == 1
+        stats = backend.backend_stats()
+        assert stats["requests"] == 5 and stats["queued"] == 0
+        assert stats["queue_wait_ms"]["p95"] > 0
+        await backend.aclose()
+
+    @pytest.mark.asyncio
+    async def test_model_is_loaded_once(self):
+        """Test the model is loaded at start and kept warm between requests"""
+        runtime = RecordingRuntime()
+        backend = LocalModelBackend(runtime)
+        await backend.start()
+
+        for i in range(3):
+            await backend.complete("local", messages(f"hi {i}"))
+
+        assert runtime.loads == 1
+        await backend.aclose()
+
+    @pytest.mark.asyncio
+    async def test_failed_load_fails_fast(self):
+        """Test a model that failed to load is not loaded again on every request"""
+        runtime = RecordingRuntime(fail_load=True)
+        backend = LocalModelBackend(runtime)
+
+        for _ in range(3):
+            with pytest.raises(FileNotFoundError):
+                await backend.complete("local", messages("hi"))
+
+        assert runtime.loads == 1
+        assert backend.backend_stats()["load_error"] == "models/test.gguf"
+        await backend.aclose()
+
+    @pytest.mark.asyncio
+    async def test_slow_generation_times_out(self):
+        """Test a request past the timeout raises like a slow API call"""
+        backend = LocalModelBackend(RecordingRuntime(delay=0.3), request_timeout=0.05)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await backend.complete("local", messages("hi"))
+        await backend.aclose()
+
+    @pytest.mark.asyncio
+    async def test_runtime_error_reaches_the_caller(self):
+        """Test a failed generation fails its request only, and later ones still run"""
+        runtime = RecordingRuntime(fail=True)
+        backend = LocalModelBackend(runtime)
+
+        with pytest.raises(RuntimeError):
+            await backend.complete("local", messages("hi"))
+
+        runtime.fail = False
+        assert await backend.complete("local", messages("again")) == "AGAIN"
+        assert backend.backend_stats()["errors"] == 1
+        await backend.aclose()
+
+
+class TestCreateModelBackend:
+    """Test choosing a backend from the ai config section"""
+
+    def test_openai_is_the_default(self):
+        """Test configs without ai.backend keep using OpenAI"""
+        assert isinstance(create_model_backend({"openai_api_key": "test_key"}), OpenAIBackend)
+
+    def test_local_needs_a_model_path(self):
+        """Test the local backend refuses to start without a model file"""
+        with pytest.raises(ValueError):
+            create_model_backend({"backend": "local"})
+
+    def test_unknown_backend(self):
+        """Test an unknown backend name is rejected"""
+        with pytest.raises(ValueError):
+            create_model_backend({"backend": "tpu"})
+
+
+@pytest.mark.asyncio
+async def test_agent_feedback_from_local_backend():
+    """Test the agent grades with a local model when configured to"""
+    config = {
+        "training": {"scenario_categories": ["customer_greeting"]},
+        "ai": {"backend": "local", "local": {"model_path": "models/test.gguf"}},
+        "logging": {"level": "WARNING"}
+    }
+    reply = json.dumps({"scores": [5, 4, 4, 3], "strengths": ["Warm"], "improvements": [], "summary": "Good."})
+    with patch('src.agent.waiter_agent.load_config', return_value=config):
+        agent = WaiterTrainingAgent()
+    agent.llm.runtime = RecordingRuntime(reply=reply)
+    await agent.start()
+
+    feedback = await agent._generate_feedback("customer_greeting", "Welcome!", "beginner")
+
+    assert feedback.scores == [5, 4, 4, 3]
+    assert agent.get_llm_stats()["backend"] == "local"
+    assert agent.llm.runtime.loads == 1
+    await agent.aclose()
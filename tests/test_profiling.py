@@ -0,0 +1,135 @@
+"""
+Tests for the profiling hooks
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.agent.profiling import Profiler, ProfilerBusyError, collapsed, profiled, sample_stacks
+
+
+def spin(seconds):
+    deadline = time.thread_time() + seconds
+    while time.thread_time() < deadline:
+        pass
+
+
+class Worker:
+    def __init__(self, profiler):
+        self.profiler = profiler
+    
+    @profiled("busy")
+    async def busy(self):
+        spin(0.02)
+        await asyncio.sleep(0.05)
+    
+    @profiled("stream")
+    async def stream(self):
+        for _ in range(2):
+            spin(0.01)
+            yield 1
+    
+    @profiled("score")
+    def score(self):
+        spin(0.01)
+        return 3
+
+
+class TestCPUAttribution:
+    """Test CPU time is attributed to methods separately from wall time"""
+    
+    @pytest.mark.asyncio
+    async def test_coroutine_cpu_excludes_waiting(self):
+        """Test time spent suspended counts as wall time but not CPU time"""
+        profiler = Profiler(enabled=True)
+        await Worker(profiler).busy()
+        
+        stats = profiler.cpu_stats()["busy"]
+        assert stats["calls"] == 1
+        assert 15 <= stats["cpu_ms"] < 45
+        assert stats["mean_wall_ms"] >= 65
+        assert stats["cpu_share"] < 0.7
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_are_not_charged_for_each_other(self):
+        """Test a coroutine is not charged for CPU other tasks use while it waits"""
+        profiler = Profiler(enabled=True)
+        worker = Worker(profiler)
+        await asyncio.gather(*(worker.busy() for _ in range(5)))
+        
+        stats = profiler.cpu_stats()["busy"]
+        assert stats["calls"] == 5
+        assert stats["mean_cpu_ms"] < 45
+    
+    @pytest.mark.asyncio
+    async def test_generators_and_plain_methods(self):
+        """Test async generators and plain methods are attributed too, and tasks can be created from methods"""
+        profiler = Profiler(enabled=True)
+        worker = Worker(profiler)
+        assert [item async for item in worker.stream()] == [1, 1]
+        assert worker.score() == 3
+        await asyncio.create_task(worker.busy())
+        
+        stats = profiler.cpu_stats()
+        assert stats["stream"]["cpu_ms"] >= 15
+        assert stats["score"]["cpu_ms"] >= 8
+        assert stats["busy"]["calls"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_disabled_calls_straight_through(self):
+        """Test nothing is recorded without CPU attribution"""
+        profiler = Profiler(enabled=True, cpu_attribution=False)
+        worker = Worker(profiler)
+        await worker.busy()
+        assert worker.score() == 3
+        assert profiler.cpu_stats() == {}
+
+
+class TestStackSampling:
+    """Test the stack sampler and its collapsed output"""
+    
+    def test_samples_other_threads(self):
+        """Test a busy thread's function shows up in the collapsed stacks"""
+        stop = threading.Event()
+        
+        def hot_loop():
+            while not stop.is_set():
+                pass
+        
+        thread = threading.Thread(target=hot_loop, name="hot-thread")
+        thread.start()
+        try:
+            stacks = sample_stacks(0.1, interval=0.005)
+        finally:
+            stop.set()
+            thread.join()
+        
+        text = collapsed(stacks)
+        lines = [line for line in text.splitlines() if line.startswith("hot-thread;")]
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert "hot_loop (tests/test_profiling.py:" in stack
+        assert int(count) > 1
+    
+    def test_one_sample_at_a_time(self, tmp_path):
+        """Test a second profile is refused while one runs, and profiles are written to files"""
+        profiler = Profiler(enabled=True, output_dir=str(tmp_path))
+        results = []
+        thread = threading.Thread(target=lambda: results.append(profiler.sample(0.2)))
+        thread.start()
+        time.sleep(0.05)
+        with pytest.raises(ProfilerBusyError):
+            profiler.sample(0.1)
+        thread.join()
+        
+        path = profiler.write(results[0])
+        assert path.parent == tmp_path
+        assert path.suffix == ".folded"
+        assert "MainThread;" in path.read_text()
@@ -0,0 +1,105 @@
+"""
+Tests for prompt templates and token budgeting
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.agent.prompt_templates import (
+    FEEDBACK_PROMPT,
+    TRUNCATION_MARKER,
+    PromptRenderer,
+    PromptTemplate,
+    TokenCounter,
+    truncate_to_budget,
+)
+
+
+@pytest.fixture(scope="module")
+def counter():
+    return TokenCounter()
+
+
+class TestPromptTemplate:
+    """Test compiling and rendering templates"""
+
+    def test_source_whitespace_is_normalized(self):
+        """Test indentation, inner runs of spaces and repeated blank lines are removed"""
+        template = PromptTemplate("t", """
+            Category:   {category}
+
+
+            Response: {response}
+            """)
+        assert template.text == "Category: {category}\n\nResponse: {response}"
+        assert template.fields == ("category", "response")
+        assert template.render(category="upselling", response="Hi") == "Category: upselling\n\nResponse: Hi"
+
+    def test_version_follows_the_compiled_text(self):
+        """Test re-indenting a template keeps its version and rewording changes it"""
+        first = PromptTemplate("t", "  Say {response}")
+        assert PromptTemplate("t", "Say    {response}\n\n").version == first.version
+        assert PromptTemplate("t", "Repeat {response}").version != first.version
+
+    def test_compiled_prompt_uses_fewer_tokens(self, counter):
+        """Test the compiled feedback prompt is smaller than the indented source"""
+        values = {"category": "customer_greeting", "difficulty": "beginner", "response": "Welcome!"}
+        assert counter.count(FEEDBACK_PROMPT.render(**values)) < counter.count(FEEDBACK_PROMPT.render_source(**values))
+
+
+class TestTokenBudget:
+    """Test truncating long responses"""
+
+    def test_short_text_is_untouched(self, counter):
+        """Test text within the budget is returned as is"""
+        assert truncate_to_budget("Welcome to the restaurant.", 50, counter) == ("Welcome to the restaurant.", 0)
+
+    def test_long_text_keeps_start_and_end(self, counter):
+        """Test text over the budget keeps its opening and closing words"""
+        text = "First I greet them. " + "Then I wait a while. " * 100 + "Finally I seat them."
+        shortened, removed = truncate_to_budget(text, 40, counter)
+
+        assert counter.count(shortened) <= 40
+        assert removed > 0
+        assert shortened.startswith("First I greet them.")
+        assert shortened.endswith("seat them.")
+        assert TRUNCATION_MARKER.strip() in shortened
+
+
+class TestPromptRenderer:
+    """Test per-call budgeting and savings stats"""
+
+    def test_response_is_compacted_and_counted(self):
+        """Test whitespace in the response is collapsed and the savings recorded per template"""
+        renderer = PromptRenderer(response_token_budget=30)
+        messages = renderer.render_chat(FEEDBACK_PROMPT, "Hello   there,\n\n\n  welcome!",
+                                        category="customer_greeting", difficulty="beginner")
+        renderer.render_chat(FEEDBACK_PROMPT, "word " * 200, category="customer_greeting", difficulty="beginner")
+
+        assert messages[-1] == {"role": "user", "content": "Waiter's Response: Hello there, welcome!"}
+        stats = renderer.stats()["templates"]["feedback"]
+        assert stats["version"] == FEEDBACK_PROMPT.version
+        assert stats["calls"] == 2 and stats["truncated"] == 1
+        assert stats["mean_saved_tokens"] > 0
+
+    def test_chat_prefix_is_shared_per_scenario(self):
+        """Test trainees answering the same scenario get an identical system prefix, with the response last"""
+        renderer = PromptRenderer()
+        first = renderer.render_chat(FEEDBACK_PROMPT, "Welcome!", category="upselling", difficulty="beginner")
+        second = renderer.render_chat(FEEDBACK_PROMPT, "Hi there", category="upselling", difficulty="beginner")
+        other = renderer.render_chat(FEEDBACK_PROMPT, "Welcome!", category="upselling", difficulty="advanced")
+
+        assert first[0] == second[0] and first[0]["role"] == "system"
+        assert "Welcome!" not in first[0]["content"]
+        assert first[-1]["content"].endswith("Welcome!")
+        assert other[0]["content"].startswith(FEEDBACK_PROMPT.system.text.split("{")[0])
+        assert other[0] != first[0]
+
+    def test_zero_budget_disables_truncation(self):
+        """Test a budget of 0 never cuts a response"""
+        response = "word " * 1000
+        assert PromptRenderer(response_token_budget=0).prepare_response(response)[3] is False
@@ -0,0 +1,167 @@
+"""
+Tests for the LLM rate limiter and concurrency governor
+"""
+
+import asyncio
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import httpx
+import openai
+
+from src.agent.llm_client import LLMClient
+from src.agent.rate_limiter import LLMGovernor, LLMQueueTimeout, TokenBucket, retry_after_seconds
+from fake_llm_server import FakeLLMServer
+
+
+def rate_limit_error(retry_after_ms: int = 20) -> openai.RateLimitError:
+    request = httpx.Request("POST", "http://llm/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after-ms": str(retry_after_ms)}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    
+    def test_burst_then_rate(self):
+        """Test a full bucket allows a burst and then spaces calls at the rate"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, burst=2, clock=clock)
+        
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == pytest.approx(0.1)
+        clock.now += 0.1
+        assert bucket.reserve() == pytest.approx(0.1)
+
+
+class TestLLMGovernor:
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_is_capped(self):
+        """Test no more than the concurrency limit run at once"""
+        governor = LLMGovernor(initial_concurrency=3, max_concurrency=3)
+        running, peak = 0, 0
+        
+        async def completion():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return "ok"
+        
+        results = await asyncio.gather(*(governor.call(completion) for _ in range(12)))
+        assert results == ["ok"] * 12
+        assert peak == 3
+        assert governor.in_flight == 0
+    
+    @pytest.mark.asyncio
+    async def test_rate_limit_is_retried_and_backs_off(self):
+        """Test a 429 halves the limit, honours Retry-After and is retried"""
+        governor = LLMGovernor(initial_concurrency=8, backoff=0.001)
+        failures = [rate_limit_error(50)]
+        
+        async def completion():
+            if failures:
+                raise failures.pop()
+            return "ok"
+        
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        assert await governor.call(completion) == "ok"
+        
+        assert loop.time() - started >= 0.05
+        assert governor.limit == pytest.approx(4 + 1 / 4)
+        stats = governor.stats()
+        assert stats["throttled"] == 1
+        assert stats["retries"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        governor = LLMGovernor(max_retries=1, backoff=0.001)
+        
+        async def completion():
+            raise rate_limit_error(1)
+        
+        with pytest.raises(openai.RateLimitError):
+            await governor.call(completion)
+        assert governor.stats()["retries"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_queue_deadline(self):
+        """Test a call that cannot get a slot in time raises a timeout instead of waiting forever"""
+        governor = LLMGovernor(initial_concurrency=1, max_concurrency=1, queue_timeout=0.05)
+        blocker = asyncio.Event()
+        
+        holder = asyncio.create_task(governor.call(blocker.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(LLMQueueTimeout):
+            await governor.call(blocker.wait)
+        assert isinstance(LLMQueueTimeout(), asyncio.TimeoutError)
+        
+        blocker.set()
+        await holder
+        assert governor.stats()["queue_timeouts"] == 1
+        assert governor.in_flight == 0
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_while_rate_limited(self):
+        """Test a call cancelled while waiting for a token returns its slot and token"""
+        governor = LLMGovernor(rate=10, burst=1)
+        
+        async def completion():
+            return "ok"
+        
+        await governor.call(completion)
+        waiting = asyncio.create_task(governor.call(completion))
+        await asyncio.sleep(0.01)
+        assert governor.in_flight == 1
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        
+        assert governor.in_flight == 0
+        assert governor.bucket.reserve() < 0.1
+    
+    def test_retry_after_headers(self):
+        assert retry_after_seconds(rate_limit_error(250)) == 0.25
+        assert retry_after_seconds(ValueError()) is None
+
+
+class TestGovernedClient:
+    """Test the governed LLM client against a provider that rate limits"""
+    
+    @pytest.mark.asyncio
+    async def test_overloaded_provider(self):
+        """Test every call succeeds once the governor adapts to the provider's capacity"""
+        with FakeLLMServer(latency=0.02, capacity=3, retry_after=0.02) as server:
+            llm = LLMClient({
+                "openai_api_key": "test",
+                "base_url": server.base_url,
+                "rate_limit": {"initial_concurrency": 12, "max_retries": 6}
+            })
+            try:
+                completions = await asyncio.gather(*(
+                    llm.chat("fake-model", [{"role": "user", "content": f"Hi {i}"}]) for i in range(30)
+                ))
+            finally:
+                await llm.aclose()
+            rate_limited = server.app.state.rate_limited
+        
+        assert all(completion.choices[0].message.content for completion in completions)
+        assert rate_limited > 0
+        stats = llm.governor_stats()
+        assert stats["throttled"] == rate_limited
+        assert stats["concurrency_limit"] < 12
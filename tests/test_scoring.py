@@ -0,0 +1,156 @@
+"""
+Tests for rule-based response scoring
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.agent import WaiterTrainingAgent
+from src.agent.scoring import ResponseScorer
+from src.agent.training_scenarios import SCENARIO_CATALOG, SCENARIO_CHECKLISTS, TrainingScenario
+
+
+GOOD_GREETING = (
+    "I would walk over with a smile and make eye contact. I'd say: Good evening, welcome! "
+    "Do you have a reservation? I stay calm and polite even though it's busy. "
+    "Then I would show them to a table and bring menus."
+)
+
+GOOD_RECOVERY = (
+    "I'm so sorry about that. I'd take the plate back to the kitchen right away and have a fresh one made. "
+    "I would tell the kitchen so it does not happen again in the future, and check back to make sure "
+    "everything is fine."
+)
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return ResponseScorer()
+
+
+class TestChecklists:
+    """Test checklists parsed from the scenario templates"""
+
+    def test_every_scenario_has_a_checklist(self):
+        """Test each catalog prompt yields its bulleted points"""
+        assert set(SCENARIO_CHECKLISTS) == set(SCENARIO_CATALOG)
+        assert all(len(items) >= 4 for items in SCENARIO_CHECKLISTS.values())
+        assert SCENARIO_CHECKLISTS[("customer_greeting", "beginner")][0] == "How to approach the customer"
+
+    def test_scenario_checklist_falls_back_to_beginner(self):
+        """Test an unknown difficulty uses the beginner checklist, like the prompt"""
+        scenario = TrainingScenario(category="upselling", difficulty_levels=["beginner"])
+        assert scenario.get_checklist("expert") == SCENARIO_CHECKLISTS[("upselling", "beginner")]
+
+
+class TestResponseScorer:
+    """Test checklist coverage, required steps and length heuristics"""
+
+    def test_thorough_answer_scores_full_points(self, scorer):
+        """Test an answer covering every point and step gets the maximum"""
+        assessment = scorer.assess("customer_greeting", GOOD_GREETING, "beginner")
+        assert assessment.points == 10.0
+        assert assessment.missed == []
+        assert assessment.missing_steps == []
+
+    def test_terse_answer_scores_low_and_says_why(self, scorer):
+        """Test a one-word answer misses points and steps, and the summary lists them"""
+        assessment = scorer.assess("customer_greeting", "Welcome!", "beginner")
+        assert 0 < assessment.points < 5
+        assert "How to approach the customer" in assessment.missed
+        assert assessment.missing_steps == ["offer a next step such as seating"]
+        assert assessment.too_short
+        assert "how to approach the customer" in assessment.summary()
+
+    def test_missing_apology_is_a_missing_step(self, scorer):
+        """Test a problem resolution without an apology loses the required step"""
+        without_apology = GOOD_RECOVERY.replace("I'm so sorry about that. ", "")
+        full = scorer.assess("problem_resolution", GOOD_RECOVERY, "beginner")
+        partial = scorer.assess("problem_resolution", without_apology, "beginner")
+        assert "apologize" in partial.missing_steps
+        assert partial.points < full.points
+
+    def test_scoring_is_deterministic_and_case_insensitive(self, scorer):
+        """Test the same answer always scores the same, whatever its case"""
+        first = scorer.score("problem_resolution", GOOD_RECOVERY, "beginner")
+        assert scorer.score("problem_resolution", GOOD_RECOVERY.upper(), "beginner") == first
+        assert scorer.score("problem_resolution", GOOD_RECOVERY, "beginner") == first
+
+    def test_category_without_checklist_is_scored_on_form(self, scorer):
+        """Test a category outside the catalog is scored on length and structure, not given free points"""
+        assert scorer.assess("made_up_category", "", "beginner").points == 0.0
+
+        assessment = scorer.assess("made_up_category", GOOD_GREETING, "beginner")
+        assert assessment.points == 10.0
+        assert assessment.missed == [] and assessment.missing_steps == []
+        assert scorer.assess("made_up_category", "Welcome!", "beginner").too_short
+
+    def test_max_points_scales_scores(self):
+        """Test points are scaled to the configured maximum"""
+        assert ResponseScorer(max_points=20.0).score("customer_greeting", GOOD_GREETING, "beginner") == 20.0
+
+
+def build_agent(llm_feedback):
+    config = {
+        "training": {"scenario_categories": ["customer_greeting"]},
+        "ai": {"openai_api_key": "test_key"},
+        "scoring": {"llm_feedback": llm_feedback},
+        "logging": {"level": "WARNING"}
+    }
+    with patch('src.agent.waiter_agent.load_config', return_value=config):
+        return WaiterTrainingAgent()
+
+
+class TestFeedbackModes:
+    """Test LLM feedback requested before, after or never"""
+
+    @pytest.mark.asyncio
+    async def test_off_makes_no_llm_call(self):
+        """Test rule-based feedback is returned and recorded without the LLM"""
+        agent = build_agent("off")
+        agent._request_feedback = AsyncMock()
+        session_id = await agent.start_training_session("Ana")
+
+        result = await agent.process_waiter_response(session_id, "customer_greeting", GOOD_GREETING)
+
+        agent._request_feedback.assert_not_awaited()
+        assert result["points"] == result["score"] == 10.0
+        assert result["feedback"] == agent.scorer.assess("customer_greeting", GOOD_GREETING, "beginner").summary()
+        assert (await agent.get_session_status(session_id))["feedback_count"] == 1
+        await agent.aclose()
+
+    @pytest.mark.asyncio
+    async def test_async_pushes_llm_feedback_later(self):
+        """Test the score returns at once and LLM feedback follows as an event"""
+        agent = build_agent("async")
+        release = asyncio.Event()
+
+        async def request_feedback(category, response, difficulty):
+            await release.wait()
+            return "Lovely, warm greeting."
+
+        agent._request_feedback = request_feedback
+        session_id = await agent.start_training_session("Ana")
+
+        with agent.session_events.subscribe(session_id) as events:
+            result = await agent.process_waiter_response(session_id, "customer_greeting", "Welcome!")
+            assert result["feedback_pending"] is True
+            assert result["points"] > 0
+            assert (await asyncio.wait_for(events.get(), timeout=1))["type"] == "stats"
+            assert (await agent.get_session_status(session_id))["feedback_count"] == 0
+
+            release.set()
+            pushed = await asyncio.wait_for(events.get(), timeout=1)
+
+        assert pushed["type"] == "feedback"
+        assert pushed["scenario_category"] == "customer_greeting"
+        assert pushed["feedback"] == "Lovely, warm greeting."
+        assert pushed["rubric"]["summary"] == "Lovely, warm greeting."
+        assert (await agent.get_session_status(session_id))["feedback_count"] == 1
+        await agent.aclose()
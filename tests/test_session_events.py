@@ -0,0 +1,71 @@
+"""
+Tests for pushed session change events
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.agent import WaiterTrainingAgent
+from src.agent.feedback_schema import StructuredFeedback
+from src.agent.session_events import SessionEventBus
+
+
+class TestSessionEventBus:
+    """Test fan-out to subscriber queues"""
+    
+    @pytest.mark.asyncio
+    async def test_publish_reaches_each_subscriber(self):
+        """Test every subscriber of a session gets the event, and only that session's"""
+        bus = SessionEventBus()
+        with bus.subscribe("s1") as first, bus.subscribe("s1") as second, bus.subscribe("s2") as other:
+            bus.publish("s1", {"type": "stats"})
+            assert first.get_nowait() == {"type": "stats"}
+            assert second.get_nowait() == {"type": "stats"}
+            assert other.empty()
+            assert bus.subscriber_count() == 3
+        
+        assert bus.subscriber_count() == 0
+        bus.publish("s1", {"type": "stats"})
+    
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_keeps_latest(self):
+        """Test a full queue drops its oldest event rather than the newest"""
+        bus = SessionEventBus(max_queued=2)
+        with bus.subscribe("s1") as events:
+            for score in (10, 20, 30):
+                bus.publish("s1", {"type": "stats", "current_score": score})
+            assert [events.get_nowait()["current_score"] for _ in range(2)] == [20, 30]
+
+
+@pytest.mark.asyncio
+async def test_agent_publishes_session_changes():
+    """Test recording a response and ending a session push events to subscribers"""
+    config = {
+        "training": {"scenario_categories": ["customer_greeting", "menu_knowledge"]},
+        "ai": {"openai_api_key": "test_key"},
+        "logging": {"level": "WARNING"}
+    }
+    with patch('src.agent.waiter_agent.load_config', return_value=config):
+        agent = WaiterTrainingAgent()
+    agent._generate_feedback = AsyncMock(return_value=StructuredFeedback.from_text("Nice greeting."))
+    
+    session_id = await agent.start_training_session("Ana")
+    with agent.session_events.subscribe(session_id) as events:
+        result = await agent.process_waiter_response(session_id, "customer_greeting", "Welcome!")
+        stats = await asyncio.wait_for(events.get(), timeout=1)
+        assert stats["type"] == "stats"
+        assert stats["current_score"] == result["points"] > 0
+        assert stats["scenarios_completed"] == ["customer_greeting"]
+        
+        await agent.end_training_session(session_id)
+        ended = await asyncio.wait_for(events.get(), timeout=1)
+        assert ended["type"] == "ended"
+        assert ended["final_score"] == result["points"]
+    
+    await agent.aclose()
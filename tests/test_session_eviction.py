@@ -0,0 +1,178 @@
+"""
+Tests for session expiry and eviction
+"""
+
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.agent import WaiterTrainingAgent
+from src.agent.session_eviction import SessionEvictor, SharedSessionEvictor
+from src.agent.session_store import RedisSessionStore, SQLiteSessionStore
+from src.agent.training_session import TrainingSession
+from fake_redis import FakeAsyncRedis, FakeRedis
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestSessionEvictor:
+    """Test the timer wheel and LRU eviction"""
+    
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+    
+    def test_idle_sessions_expire(self, clock):
+        """Test a session expires once idle for the TTL"""
+        evictor = SessionEvictor(idle_ttl=10, max_sessions=100, clock=clock)
+        evictor.touch("s1", 100)
+        
+        clock.now += 9
+        assert evictor.collect() == []
+        clock.now += 1
+        assert evictor.collect() == [("s1", "expired")]
+        assert len(evictor) == 0
+        assert evictor.bytes_retained == 0
+    
+    def test_touch_postpones_expiry(self, clock):
+        """Test activity resets the idle timer"""
+        evictor = SessionEvictor(idle_ttl=10, max_sessions=100, clock=clock)
+        evictor.touch("s1")
+        clock.now += 8
+        evictor.touch("s1")
+        clock.now += 8
+        
+        assert evictor.collect() == []
+        clock.now += 2
+        assert evictor.collect() == [("s1", "expired")]
+    
+    def test_long_pause_keeps_recent_sessions(self, clock):
+        """Test a sweep after a long gap only expires sessions that were idle"""
+        evictor = SessionEvictor(idle_ttl=10, max_sessions=100, clock=clock)
+        evictor.touch("old")
+        clock.now += 100
+        evictor.touch("recent")
+        
+        assert evictor.collect() == [("old", "expired")]
+        assert len(evictor) == 1
+    
+    def test_capacity_evicts_least_recently_used(self, clock):
+        """Test the oldest sessions go first when over capacity"""
+        evictor = SessionEvictor(idle_ttl=60, max_sessions=2, clock=clock)
+        for session_id in ("s1", "s2", "s3"):
+            evictor.touch(session_id, 10)
+        evictor.touch("s1", 30)
+        
+        assert evictor.collect() == [("s2", "evicted")]
+        assert evictor.bytes_retained == 40
+        assert evictor.evicted_capacity == 1
+    
+    def test_forget(self, clock):
+        """Test ended sessions are no longer tracked"""
+        evictor = SessionEvictor(idle_ttl=10, clock=clock)
+        evictor.touch("s1", 50)
+        evictor.forget("s1")
+        clock.now += 20
+        
+        assert evictor.collect() == []
+        assert evictor.bytes_retained == 0
+
+
+class TestSharedSessionEvictor:
+    """Test eviction from the last-activity times in a shared store"""
+    
+    @pytest.fixture(params=["sqlite", "redis"])
+    def workers(self, request, tmp_path):
+        """Two store instances over the same backing data, as two workers would have"""
+        if request.param == "sqlite":
+            path = str(tmp_path / "shared.db")
+            stores = [SQLiteSessionStore(path, shared=True) for _ in range(2)]
+        else:
+            redis = FakeRedis()
+            stores = [RedisSessionStore(redis, async_client=FakeAsyncRedis(redis)) for _ in range(2)]
+        yield stores
+        for store in stores:
+            store.close()
+    
+    @staticmethod
+    async def start(store, session_id):
+        await store.acreate(TrainingSession(
+            session_id=session_id, waiter_name="Ann Lee", difficulty_level="beginner",
+            start_time=datetime.now(), scenarios_completed=[], score=0.0, feedback=[]
+        ))
+    
+    @pytest.mark.asyncio
+    async def test_activity_on_any_worker_keeps_a_session(self, workers):
+        """Test a session busy on one worker is not expired by another"""
+        first, second = workers
+        for session_id in ("s1", "s2", "s3"):
+            await self.start(first, session_id)
+        await asyncio.sleep(0.2)
+        
+        await second.amutate("s2", lambda session: session.add_feedback("Good."))
+        await second.atouch("s3")
+        evictor = SharedSessionEvictor(first, idle_ttl=0.1)
+        
+        assert await evictor.collect() == [("s1", "expired")]
+        assert evictor.evicted_idle == 1
+    
+    @pytest.mark.asyncio
+    async def test_capacity_counts_every_worker(self, workers):
+        """Test the session cap applies to the sessions of all workers together"""
+        first, second = workers
+        await self.start(first, "s1")
+        await self.start(second, "s2")
+        await self.start(second, "s3")
+        
+        evictor = SharedSessionEvictor(first, idle_ttl=60, max_sessions=2)
+        assert await evictor.collect() == [("s1", "evicted")]
+        assert evictor.evicted_capacity == 1
+    
+    @pytest.mark.asyncio
+    async def test_ended_sessions_are_not_tracked(self, workers):
+        """Test ending a session drops its activity from the store"""
+        first, second = workers
+        await self.start(first, "s1")
+        await second.aend("s1", {"session_id": "s1", "waiter_name": "Ann Lee"})
+        
+        assert await first.aleast_recently_active(10) == []
+
+
+@pytest.mark.asyncio
+async def test_evicted_sessions_are_archived():
+    """Test the agent ends evicted sessions and keeps their summaries"""
+    config = {
+        "training": {"difficulty_levels": ["beginner"], "scenario_categories": ["upselling"]},
+        "sessions": {"idle_ttl_seconds": 60, "max_sessions": 1},
+        "logging": {"level": "WARNING"}
+    }
+    with patch('src.agent.waiter_agent.load_config', return_value=config):
+        agent = WaiterTrainingAgent()
+    
+    first = await agent.start_training_session("Ann Lee")
+    second = await agent.start_training_session("Bob Ray")
+    await agent._evict_sessions(agent.evictor.collect())
+    
+    assert first not in agent.active_sessions
+    assert second in agent.active_sessions
+    history = await agent.get_session_history()
+    assert history[0]["session_id"] == first
+    assert history[0]["end_reason"] == "evicted"
+    
+    metrics = await agent.get_session_metrics()
+    assert metrics["live_sessions"] == 1
+    assert metrics["bytes_retained"] > 0
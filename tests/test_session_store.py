@@ -0,0 +1,304 @@
+"""
+Tests for the session stores
+"""
+
+import asyncio
+import pytest
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.agent.session_store import (
+    MemorySessionStore, RedisSessionStore, SQLiteSessionStore, create_session_store
+)
+from src.agent.training_session import TrainingSession
+from fake_redis import FakeAsyncRedis, FakeRedis
+
+
+def make_session(session_id: str, waiter_name: str = "Ann Lee") -> TrainingSession:
+    return TrainingSession(
+        session_id=session_id,
+        waiter_name=waiter_name,
+        difficulty_level="beginner",
+        start_time=datetime.now(),
+        scenarios_completed=[],
+        score=0.0,
+        feedback=[]
+    )
+
+
+class TestMemorySessionStore:
+    """Test the process-local session store"""
+    
+    def test_history_is_capped(self):
+        """Test only the newest max_history ended sessions are kept"""
+        store = MemorySessionStore(max_history=3)
+        for i in range(5):
+            store.create(make_session(f"s{i}"))
+            store.end(f"s{i}", {"session_id": f"s{i}", "waiter_name": "Ann Lee"})
+        
+        assert [s["session_id"] for s in store.history()] == ["s4", "s3", "s2"]
+
+
+class TestSQLiteSessionStore:
+    """Test the SQLite session store"""
+    
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        return str(tmp_path / "sessions.db")
+    
+    def test_round_trip_survives_restart(self, db_path):
+        """Test sessions written behind are readable after reopening the file"""
+        store = SQLiteSessionStore(db_path)
+        session = make_session("s1")
+        store.create(session)
+        session.complete_scenario("upselling")
+        session.add_feedback("Nice suggestion of dessert.")
+        session.score = 10.0
+        store.update(session)
+        store.close()
+        
+        reopened = SQLiteSessionStore(db_path)
+        loaded = reopened.get("s1")
+        assert loaded == session
+        assert "s1" in reopened
+        assert len(reopened) == 1
+        reopened.close()
+    
+    def test_end_keeps_history(self, db_path):
+        """Test ended sessions leave the live set but remain as history"""
+        store = SQLiteSessionStore(db_path)
+        store.create(make_session("s1", "Ann Lee"))
+        store.create(make_session("s2", "Bob Ray"))
+        store.end("s1", {"session_id": "s1", "waiter_name": "Ann Lee", "final_score": 20.0})
+        
+        assert store.get("s1") is None
+        assert len(store) == 1
+        assert [s["session_id"] for s in store.history("Ann Lee")] == ["s1"]
+        assert store.history("Bob Ray") == []
+        store.close()
+    
+    def test_bad_row_does_not_stop_the_writer(self, db_path):
+        """Test a write that violates a constraint is dropped alone and later writes still land"""
+        store = SQLiteSessionStore(db_path)
+        store.create(make_session("bad", waiter_name=None))
+        store.create(make_session("s1"))
+        store.flush()
+        store.create(make_session("s2"))
+        store.end("s1", {"session_id": "s1", "waiter_name": "Ann Lee"})
+        store.close()
+        
+        reopened = SQLiteSessionStore(db_path)
+        assert reopened.get("bad") is None
+        assert reopened.get("s2") is not None
+        assert len(reopened) == 1
+        assert [s["session_id"] for s in reopened.history()] == ["s1"]
+        reopened.close()
+    
+    def test_reads_do_not_wait_for_queued_writes(self, db_path):
+        """Test counts, lookups and history are answered while writes are still queued"""
+        store = SQLiteSessionStore(db_path, flush_interval=0.5)
+        store.create(make_session("s1"))
+        store.create(make_session("s2"))
+        store.end("s1", {"session_id": "s1", "waiter_name": "Ann Lee"})
+        
+        assert store._writer.pending > 0
+        assert len(store) == 1
+        assert store.get("s1") is None
+        assert [s["session_id"] for s in store.history()] == ["s1"]
+        store.close()
+    
+    def test_live_count_across_threads(self, db_path):
+        """Test sessions created and ended from several threads at once keep the live count exact"""
+        store = SQLiteSessionStore(db_path)
+        
+        def churn(worker):
+            for i in range(200):
+                store.create(make_session(f"w{worker}-{i}"))
+                store.end(f"w{worker}-{i}", {"session_id": f"w{worker}-{i}", "waiter_name": "Ann Lee"})
+            store.create(make_session(f"w{worker}-kept"))
+        
+        threads = [threading.Thread(target=churn, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(store) == 4
+        store.close()
+    
+    def test_wal_mode_and_indexes(self, db_path):
+        """Test the database uses WAL and indexes waiter_name and start_time"""
+        SQLiteSessionStore(db_path).close()
+        
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(sessions)")}
+        conn.close()
+        assert {"idx_sessions_waiter_name", "idx_sessions_start_time"} <= indexes
+    
+    def test_synchronous_writes(self, db_path):
+        """Test the store also works without the write-behind queue"""
+        store = SQLiteSessionStore(db_path, write_behind=False)
+        store.create(make_session("s1"))
+        
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 1
+        conn.close()
+        store.close()
+
+
+class TestSharedSessionStores:
+    """Test stores shared by several workers"""
+    
+    @pytest.fixture(params=["sqlite", "redis"])
+    def workers(self, request, tmp_path):
+        """Two store instances over the same backing data, as two workers would have"""
+        if request.param == "sqlite":
+            path = str(tmp_path / "shared.db")
+            stores = [SQLiteSessionStore(path, shared=True) for _ in range(2)]
+        else:
+            redis = FakeRedis()
+            stores = [RedisSessionStore(redis) for _ in range(2)]
+        yield stores
+        for store in stores:
+            store.close()
+    
+    def test_any_worker_serves_any_session(self, workers):
+        """Test a session started on one worker is visible and updatable on another"""
+        first, second = workers
+        first.create(make_session("s1"))
+        
+        second.mutate("s1", lambda session: session.add_feedback("Great smile."))
+        
+        assert first.get("s1").feedback == ["Great smile."]
+        assert first.get("s1").version == 1
+        assert len(second) == 1
+    
+    def test_stale_version_is_rejected(self, workers):
+        """Test compare-and-set refuses a write based on an old read"""
+        first, second = workers
+        first.create(make_session("s1"))
+        stale = second.get("s1")
+        
+        first.mutate("s1", lambda session: setattr(session, "score", 10.0))
+        stale.score = 99.0
+        stale.version += 1
+        
+        assert not second.replace(stale, expected_version=0)
+        assert first.get("s1").score == 10.0
+    
+    def test_concurrent_updates_are_not_lost(self, workers):
+        """Test optimistic concurrency keeps every increment under contention"""
+        workers[0].create(make_session("s1"))
+        
+        def add_points(store):
+            for _ in range(25):
+                store.mutate("s1", lambda session: setattr(session, "score", session.score + 1), retries=1000)
+        
+        threads = [threading.Thread(target=add_points, args=(workers[i % 2],)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert workers[0].get("s1").score == 100.0
+    
+    def test_end_is_shared(self, workers):
+        """Test ending a session on one worker removes it for all"""
+        first, second = workers
+        first.create(make_session("s1"))
+        second.end("s1", {"session_id": "s1", "waiter_name": "Ann Lee"})
+        
+        assert first.get("s1") is None
+        assert first.mutate("s1", lambda session: None) is None
+        assert [s["session_id"] for s in first.history()] == ["s1"]
+
+
+class TestAsyncSessionStores:
+    """Test the coroutine operations request handlers use"""
+    
+    @pytest.fixture(params=["memory", "sqlite", "sqlite-shared", "redis"])
+    def store(self, request, tmp_path):
+        if request.param == "memory":
+            store = MemorySessionStore()
+        elif request.param == "redis":
+            redis = FakeRedis()
+            store = RedisSessionStore(redis, async_client=FakeAsyncRedis(redis))
+        else:
+            store = SQLiteSessionStore(str(tmp_path / "sessions.db"), shared=request.param == "sqlite-shared")
+        yield store
+        store.close()
+    
+    @pytest.mark.asyncio
+    async def test_session_lifecycle(self, store):
+        """Test create, mutate, end and history through the async operations"""
+        await store.acreate(make_session("s1"))
+        await store.acreate(make_session("s2", "Bob Ray"))
+        
+        session = await store.amutate("s1", lambda session: session.add_feedback("Great smile."))
+        assert session.version == 1
+        assert (await store.aget("s1")).feedback == ["Great smile."]
+        
+        await store.aend("s1", {"session_id": "s1", "waiter_name": "Ann Lee"})
+        assert await store.aget("s1") is None
+        assert await store.amutate("s1", lambda session: None) is None
+        assert await store.acount() == 1
+        assert [s["session_id"] for s in await store.ahistory("Ann Lee")] == ["s1"]
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_mutations_are_not_lost(self, store):
+        """Test interleaved async updates all apply"""
+        await store.acreate(make_session("s1"))
+        
+        async def add_points():
+            for _ in range(10):
+                await store.amutate("s1", lambda session: setattr(session, "score", session.score + 1), retries=1000)
+        
+        await asyncio.gather(*(add_points() for _ in range(4)))
+        assert (await store.aget("s1")).score == 40.0
+    
+    @pytest.mark.asyncio
+    async def test_shared_sqlite_runs_off_the_event_loop(self, tmp_path):
+        """Test a shared SQLite store does its reads and writes on its I/O thread"""
+        store = SQLiteSessionStore(str(tmp_path / "shared.db"), shared=True)
+        threads = set()
+        replace = store.replace
+        
+        def recording_replace(session, expected_version):
+            threads.add(threading.current_thread().name)
+            return replace(session, expected_version)
+        
+        store.replace = recording_replace
+        await store.acreate(make_session("s1"))
+        await store.amutate("s1", lambda session: session.add_feedback("Good."))
+        await store.aclose()
+        
+        assert threads and all(name.startswith("session-store-io") for name in threads)
+    
+    @pytest.mark.asyncio
+    async def test_redis_uses_the_async_client(self):
+        """Test the async operations never call the blocking Redis client"""
+        redis = FakeRedis()
+        blocking = RedisSessionStore(redis)
+        store = RedisSessionStore(object(), async_client=FakeAsyncRedis(redis))
+        
+        await store.acreate(make_session("s1"))
+        await store.amutate("s1", lambda session: setattr(session, "score", 5.0))
+        assert blocking.get("s1").score == 5.0
+        assert await store.acount() == 1
+        
+        await store.aclose()
+        assert store.async_client.closed
+
+
+def test_create_session_store():
+    """Test the store type follows the database config"""
+    assert isinstance(create_session_store({}), MemorySessionStore)
+    with pytest.raises(ValueError):
+        create_session_store({"type": "postgres"})
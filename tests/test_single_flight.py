@@ -0,0 +1,153 @@
+"""
+Tests for coalescing identical in-flight feedback requests
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.agent import WaiterTrainingAgent
+from src.agent.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test sharing one call between concurrent callers"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_call(self):
+        """Test callers with the same key get one execution's result"""
+        flights = SingleFlight()
+        release = asyncio.Event()
+        executions = 0
+
+        async def fetch():
+            nonlocal executions
+            executions += 1
+            await release.wait()
+            return "shared"
+
+        callers = [asyncio.create_task(flights.do("key", fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*callers) == ["shared"] * 5
+        assert executions == 1
+        stats = flights.stats()
+        assert stats["calls"] == 5
+        assert stats["coalesced"] == 4
+        assert stats["max_waiters"] == 5
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_and_later_calls_run_separately(self):
+        """Test keys do not share calls, and a finished call is not reused"""
+        flights = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0)
+            return value
+
+        assert await asyncio.gather(flights.do("a", lambda: fetch(1)), flights.do("b", lambda: fetch(2))) == [1, 2]
+        assert await flights.do("a", lambda: fetch(3)) == 3
+        assert flights.executions == 3
+        assert flights.coalesced == 0
+
+    @pytest.mark.asyncio
+    async def test_error_reaches_every_caller(self):
+        """Test a failed call raises for all callers and is not remembered"""
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise RuntimeError("provider down")
+
+        results = await asyncio.gather(flights.do("key", fail), flights.do("key", fail), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert len(flights) == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """Test the shared call keeps running when the caller that started it goes away"""
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flights.do("key", fetch))
+        second = asyncio.create_task(flights.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+
+    @pytest.mark.asyncio
+    async def test_call_is_cancelled_when_every_caller_is(self):
+        """Test the shared call stops once no caller is waiting, and the key can be used again"""
+        flights = SingleFlight()
+        started = asyncio.Event()
+        cancelled = False
+
+        async def fetch():
+            nonlocal cancelled
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+
+        callers = [asyncio.create_task(flights.do("key", fetch)) for _ in range(2)]
+        await started.wait()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert cancelled
+        assert len(flights) == 0
+        assert await flights.do("key", lambda: asyncio.sleep(0, result="again")) == "again"
+
+
+@pytest.mark.asyncio
+async def test_agent_coalesces_duplicate_feedback_requests():
+    """Test a class submitting the same answer at once makes one LLM call"""
+    config = {
+        "training": {"scenario_categories": ["customer_greeting"]},
+        "ai": {"openai_api_key": "test_key", "model": "test-model"},
+        "logging": {"level": "WARNING"}
+    }
+    with patch('src.agent.waiter_agent.load_config', return_value=config):
+        agent = WaiterTrainingAgent()
+
+    requests = 0
+
+    async def request_feedback(category, response, difficulty):
+        nonlocal requests
+        requests += 1
+        await asyncio.sleep(0.01)
+        return "Warm and welcoming."
+
+    agent._request_feedback = request_feedback
+    sessions = [await agent.start_training_session(f"Trainee {i}") for i in range(6)]
+    answers = ["Welcome, table for two?", "welcome, table for two"]
+    results = await asyncio.gather(*(
+        agent.process_waiter_response(session_id, "customer_greeting", answers[i % 2])
+        for i, session_id in enumerate(sessions)
+    ))
+
+    assert requests == 1
+    assert all(result["feedback"] == "Warm and welcoming." for result in results)
+    assert agent.get_llm_stats()["coalescing"]["coalesced"] == 5
+
+    await agent.aclose()
@@ -0,0 +1,128 @@
+"""
+Tests for the precompressed static frontend
+"""
+
+import json
+import pytest
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.utils.static_assets import (
+    IMMUTABLE_CACHE, PrecompressedStaticFiles, build_assets, load_assets
+)
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    source = tmp_path / "frontend"
+    source.mkdir()
+    (source / "index.html").write_text(
+        '<html><head><link rel="stylesheet" href="/static/app.css"></head>'
+        '<body><script src="/static/app.js"></script></body></html>'
+    )
+    (source / "app.css").write_text("body { color: #333; }\n" * 50)
+    (source / "app.js").write_text("console.log('ready');\n" * 50)
+    return source
+
+
+class TestBuildAssets:
+    """Test the build step"""
+    
+    def test_hashed_names_and_variants(self, source_dir, tmp_path):
+        """Test assets get content-hashed names, rewritten references and compressed variants"""
+        output = tmp_path / "static"
+        manifest = build_assets(source_dir, output)
+        
+        css = manifest["files"]["app.css"]
+        assert css.startswith("app.") and css.endswith(".css") and css != "app.css"
+        assert (output / css).read_bytes() == (source_dir / "app.css").read_bytes()
+        assert (output / f"{css}.gz").exists()
+        
+        index = (output / "index.html").read_text()
+        assert f'"/static/{css}"' in index
+        assert f'"/static/{manifest["files"]["app.js"]}"' in index
+        assert json.loads((output / "manifest.json").read_text()) == manifest
+    
+    def test_rebuild_replaces_changed_sources(self, source_dir, tmp_path):
+        """Test a changed source gets a new name and the old build is removed"""
+        output = tmp_path / "static"
+        first = build_assets(source_dir, output)
+        
+        (source_dir / "app.js").write_text("console.log('changed');\n" * 50)
+        second = build_assets(source_dir, output)
+        assert second["files"]["app.js"] != first["files"]["app.js"]
+        assert not (output / first["files"]["app.js"]).exists()
+        assert (output / second["files"]["app.css"]).exists()
+
+
+class TestLoadAssets:
+    """Test choosing what to serve without building"""
+    
+    def test_serves_the_build(self, source_dir, tmp_path):
+        """Test an existing build is served with its manifest and left untouched"""
+        output = tmp_path / "static"
+        manifest = build_assets(source_dir, output)
+        (source_dir / "app.js").write_text("console.log('changed');\n" * 50)
+        
+        assert load_assets(source_dir, output) == (output, manifest)
+        assert (output / manifest["files"]["app.js"]).exists()
+    
+    def test_falls_back_to_sources(self, source_dir, tmp_path):
+        """Test the sources are served uncompressed when nothing has been built"""
+        output = tmp_path / "static"
+        
+        assert load_assets(source_dir, output) == (source_dir, {"files": {}})
+        assert not output.exists()
+
+
+class TestPrecompressedStaticFiles:
+    """Test content negotiation and caching headers"""
+    
+    @pytest.fixture
+    def built(self, source_dir, tmp_path):
+        output = tmp_path / "static"
+        manifest = build_assets(source_dir, output)
+        app = FastAPI()
+        app.mount("/static", PrecompressedStaticFiles(
+            directory=str(output), immutable=manifest["files"].values()
+        ))
+        return TestClient(app), manifest
+    
+    def test_serves_gzip_variant(self, built):
+        """Test a gzip-accepting client gets the precompressed file with the original type"""
+        client, manifest = built
+        response = client.get(f"/static/{manifest['files']['app.css']}", headers={"Accept-Encoding": "gzip"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/css")
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE
+        assert response.text.startswith("body { color: #333; }")
+    
+    def test_identity_and_refused_encodings(self, built):
+        """Test clients that refuse compression get the plain file"""
+        client, _ = built
+        response = client.get("/static/index.html", headers={"Accept-Encoding": "gzip;q=0, br;q=0"})
+        
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert response.headers["cache-control"] == "no-cache"
+    
+    def test_etag_revalidation(self, built):
+        """Test a matching If-None-Match gets a 304 without a body"""
+        client, _ = built
+        first = client.get("/static/index.html", headers={"Accept-Encoding": "gzip"})
+        second = client.get("/static/index.html", headers={
+            "Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]
+        })
+        
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == first.headers["etag"]
@@ -0,0 +1,161 @@
+"""
+Tests for request tracing
+"""
+
+import asyncio
+import json
+import pytest
+from pathlib import Path
+import sys
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from src.agent import WaiterTrainingAgent
+from src.agent.tracing import NOOP_SPAN, FileSpanExporter, InMemorySpanExporter, Tracer, current_span, traced
+from fake_llm_server import FakeLLMServer
+
+
+class Traced:
+    def __init__(self, tracer):
+        self.tracer = tracer
+    
+    @traced("outer")
+    async def outer(self):
+        await asyncio.gather(self.inner(), self.inner())
+        return current_span().name
+    
+    @traced("inner")
+    async def inner(self):
+        await asyncio.sleep(0)
+    
+    @traced("events")
+    async def events(self):
+        for i in range(3):
+            with self.tracer.span("step"):
+                yield i
+    
+    @traced("fails")
+    def fails(self):
+        raise ValueError("bad")
+
+
+def memory_tracer(sample_rate=1.0):
+    return Tracer(enabled=True, sample_rate=sample_rate, exporter=InMemorySpanExporter())
+
+
+class TestTracer:
+    """Test span nesting, sampling and export"""
+    
+    @pytest.mark.asyncio
+    async def test_spans_nest_across_tasks(self):
+        """Test spans started in gathered tasks are children of the span that created them"""
+        tracer = memory_tracer()
+        assert await Traced(tracer).outer() == "outer"
+        
+        spans = {span.name: span for span in tracer.exporter.spans}
+        inner = [span for span in tracer.exporter.spans if span.name == "inner"]
+        assert len(inner) == 2
+        assert all(span.parent_id == spans["outer"].span_id for span in inner)
+        assert {span.trace_id for span in tracer.exporter.spans} == {spans["outer"].trace_id}
+        assert spans["outer"].parent_id is None
+        assert current_span() is NOOP_SPAN
+    
+    @pytest.mark.asyncio
+    async def test_async_generator_span_is_not_active_between_items(self):
+        """Test a traced generator's span covers its steps without leaking into the caller"""
+        tracer = memory_tracer()
+        items = []
+        async for item in Traced(tracer).events():
+            assert current_span() is NOOP_SPAN
+            items.append(item)
+        
+        assert items == [0, 1, 2]
+        names = [span.name for span in tracer.exporter.spans]
+        assert names == ["step", "step", "step", "events"]
+        events = tracer.exporter.spans[-1]
+        assert all(span.parent_id == events.span_id for span in tracer.exporter.spans[:-1])
+    
+    def test_errors_are_recorded(self):
+        """Test an exception marks the span as failed and still propagates"""
+        tracer = memory_tracer()
+        with pytest.raises(ValueError):
+            Traced(tracer).fails()
+        
+        span = tracer.exporter.spans[0]
+        assert span.status == "error"
+        assert span.error == "ValueError: bad"
+    
+    @pytest.mark.asyncio
+    async def test_disabled_and_unsampled_traces_record_nothing(self):
+        """Test disabled tracers and unsampled traces export no spans at any depth"""
+        disabled = Tracer()
+        assert disabled.span("anything") is NOOP_SPAN
+        assert await Traced(disabled).outer() is None
+        
+        unsampled = memory_tracer(sample_rate=0.0)
+        await Traced(unsampled).outer()
+        assert [item async for item in Traced(unsampled).events()] == [0, 1, 2]
+        assert unsampled.exporter.spans == []
+    
+    def test_traceparent_continues_the_callers_trace(self):
+        """Test a W3C traceparent header sets the trace, parent and sampling decision"""
+        tracer = memory_tracer(sample_rate=0.0)
+        trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+        with tracer.start_span("GET /", traceparent=f"00-{trace_id}-{parent_id}-01"):
+            pass
+        with tracer.start_span("GET /", traceparent=f"00-{trace_id}-{parent_id}-00"):
+            pass
+        
+        assert len(tracer.exporter.spans) == 1
+        span = tracer.exporter.spans[0]
+        assert (span.trace_id, span.parent_id) == (trace_id, parent_id)
+    
+    def test_file_exporter_writes_json_lines(self, tmp_path):
+        """Test finished spans are written one JSON object per line"""
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer.from_config({"enabled": True, "path": str(path), "flush_interval": 0.01})
+        assert isinstance(tracer.exporter, FileSpanExporter)
+        with tracer.span("work", waiter="Ana") as span:
+            span.set_attribute("items", 2)
+        tracer.close()
+        
+        record = json.loads(path.read_text().strip())
+        assert record["name"] == "work"
+        assert record["attributes"] == {"waiter": "Ana", "items": 2}
+        assert record["service_name"] == "waiter-training-agent"
+        assert record["end_time_unix_nano"] >= record["start_time_unix_nano"]
+
+
+class TestAgentTracing:
+    """Test agent methods and model calls produce one connected trace"""
+    
+    @pytest.mark.asyncio
+    async def test_feedback_trace(self):
+        """Test scoring, feedback and the LLM call nest under the response span"""
+        with FakeLLMServer(latency=0.01) as server:
+            config = {
+                "training": {"difficulty_levels": ["beginner"], "scenario_categories": ["customer_greeting"]},
+                "ai": {"model": "fake-model", "openai_api_key": "test_key", "base_url": server.base_url},
+                "tracing": {"enabled": True, "exporter": "memory"},
+                "logging": {"level": "WARNING"}
+            }
+            with patch('src.agent.waiter_agent.load_config', return_value=config):
+                agent = WaiterTrainingAgent()
+            await agent.start()
+            try:
+                session_id = await agent.start_training_session("Ana")
+                await agent.process_waiter_response(session_id, "customer_greeting", "Welcome!")
+            finally:
+                await agent.aclose()
+        
+        spans = {span.name: span for span in agent.tracer.exporter.spans}
+        root = spans["agent.process_waiter_response"]
+        assert spans["agent.assess_response"].parent_id == root.span_id
+        assert spans["agent.fetch_feedback"].attributes["feedback.cache_hit"] is False
+        llm = spans["llm.complete"]
+        assert llm.trace_id == root.trace_id
+        assert llm.attributes["backend"] == "openai"
+        assert llm.attributes["prompt_tokens"] > 0
+        assert "ttfb_ms" in llm.attributes
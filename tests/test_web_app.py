@@ -0,0 +1,276 @@
+"""
+Tests for the web application
+"""
+
+import json
+import pytest
+import re
+from pathlib import Path
+import sys
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from fastapi.testclient import TestClient
+
+import web_app
+from src.agent import WaiterTrainingAgent
+from src.agent.profiling import Profiler
+from src.agent.tracing import InMemorySpanExporter, Tracer
+from fake_llm_server import DEFAULT_FEEDBACK, DEFAULT_STRUCTURED_FEEDBACK, FakeLLMServer
+
+
+@pytest.fixture
+def client():
+    with FakeLLMServer(latency=0.02, token_interval=0.005) as server:
+        config = {
+            "training": {
+                "difficulty_levels": ["beginner", "intermediate", "advanced"],
+                "scenario_categories": ["customer_greeting", "menu_knowledge"]
+            },
+            "ai": {"model": "fake-model", "openai_api_key": "test_key", "base_url": server.base_url},
+            "logging": {"level": "WARNING"}
+        }
+        with patch('src.agent.waiter_agent.load_config', return_value=config):
+            web_app.agent = WaiterTrainingAgent()
+        try:
+            yield TestClient(web_app.app)
+        finally:
+            web_app.agent = None
+
+
+class TestFeedbackWebSocket:
+    """Test streaming feedback over /ws/{session_id}"""
+    
+    def test_streams_tokens_then_score(self, client):
+        """Test tokens arrive before the score, next scenario and timing events"""
+        session_id = client.post("/api/start-session", json={"waiter_name": "Ana"}).json()["session_id"]
+        
+        with client.websocket_connect(f"/ws/{session_id}") as websocket:
+            websocket.send_json({"scenario_category": "customer_greeting", "response": "Welcome!"})
+            events = []
+            while not events or events[-1]["type"] != "done":
+                events.append(websocket.receive_json())
+        
+        types = [event["type"] for event in events]
+        assert types.count("token") > 1
+        assert types[-3:] == ["score", "next_scenario", "done"]
+        assert "".join(event["text"] for event in events if event["type"] == "token") == DEFAULT_FEEDBACK
+        
+        done = events[-1]
+        assert done["feedback"] == DEFAULT_FEEDBACK
+        assert 0 < done["ttft_ms"] < done["total_ms"]
+        assert events[-3]["score"] == events[-3]["points"] > 0
+        
+        status = client.get(f"/api/session-status/{session_id}").json()
+        assert status["feedback_count"] == 1
+    
+    def test_unknown_session(self, client):
+        """Test a response for a missing session is reported as an error event"""
+        with client.websocket_connect("/ws/session_missing") as websocket:
+            websocket.send_json({"scenario_category": "customer_greeting", "response": "Welcome!"})
+            event = websocket.receive_json()
+        
+        assert event["type"] == "error"
+        assert "not found" in event["message"]
+    
+    def test_cached_feedback_arrives_as_one_token(self, client):
+        """Test a repeated answer is streamed from the feedback cache in a single event"""
+        session_id = client.post("/api/start-session", json={"waiter_name": "Ana"}).json()["session_id"]
+        
+        with client.websocket_connect(f"/ws/{session_id}") as websocket:
+            for response in ("Welcome!", "welcome"):
+                websocket.send_json({"scenario_category": "customer_greeting", "response": response})
+                events = []
+                while not events or events[-1]["type"] != "done":
+                    events.append(websocket.receive_json())
+        
+        tokens = [event["text"] for event in events if event["type"] == "token"]
+        assert tokens == [DEFAULT_FEEDBACK]
+        assert web_app.agent.get_feedback_cache_stats()["exact_hits"] == 1
+    
+    def test_streamed_feedback_is_not_served_as_a_rubric(self, client):
+        """Test free-text streamed feedback is not reused for a structured submission"""
+        session_id = client.post("/api/start-session", json={"waiter_name": "Ana"}).json()["session_id"]
+        with client.websocket_connect(f"/ws/{session_id}") as websocket:
+            websocket.send_json({"scenario_category": "customer_greeting", "response": "Welcome!"})
+            while websocket.receive_json()["type"] != "done":
+                pass
+        
+        body = client.post("/api/submit-response", json={
+            "session_id": session_id, "scenario_category": "customer_greeting", "response": "Welcome!"
+        }).json()
+        expected = json.loads(DEFAULT_STRUCTURED_FEEDBACK)
+        assert [item["score"] for item in body["rubric"]["criteria"]] == expected["scores"]
+
+
+class TestSessionEventsEndpoint:
+    """Test /api/session-events/{session_id}"""
+    
+    def test_change_during_first_snapshot_is_not_lost(self, client):
+        """Test an event published while the first status is read still reaches the stream"""
+        session_id = client.post("/api/start-session", json={"waiter_name": "Ana"}).json()["session_id"]
+        get_session_status = web_app.agent.get_session_status
+        
+        async def status_then_end(session_id):
+            status = await get_session_status(session_id)
+            web_app.agent.session_events.publish(session_id, {"type": "ended", "session_id": session_id})
+            return status
+        
+        with patch.object(web_app.agent, "get_session_status", status_then_end):
+            with client.stream("GET", f"/api/session-events/{session_id}") as response:
+                body = "".join(response.iter_text())
+        
+        assert [line for line in body.splitlines() if line.startswith("event:")] == ["event: stats", "event: ended"]
+    
+    def test_unknown_session(self, client):
+        """Test a missing session is a 404 rather than an empty stream"""
+        assert client.get("/api/session-events/session_missing").status_code == 404
+
+
+class TestBatchEndpoint:
+    """Test /api/submit-responses"""
+    
+    def test_per_item_results(self, client):
+        """Test a batch returns results in order with partial failures counted"""
+        session_id = client.post("/api/start-session", json={"waiter_name": "Ana"}).json()["session_id"]
+        responses = [
+            {"session_id": session_id, "scenario_category": "customer_greeting", "response": "Welcome!"},
+            {"session_id": "session_missing", "scenario_category": "menu_knowledge", "response": "The fish."}
+        ]
+        
+        body = client.post("/api/submit-responses", json={"responses": responses}).json()
+        
+        assert body["succeeded"] == 1 and body["failed"] == 1
+        expected = json.loads(DEFAULT_STRUCTURED_FEEDBACK)
+        assert body["results"][0]["feedback"].startswith(expected["summary"])
+        assert [item["score"] for item in body["results"][0]["rubric"]["criteria"]] == expected["scores"]
+        assert body["results"][1]["status"] == "error"
+    
+    def test_oversized_batch_is_rejected(self, client):
+        """Test batches over the configured limit get a 413"""
+        web_app.agent.batch_max_items = 1
+        item = {"session_id": "session_x", "scenario_category": "customer_greeting", "response": "Hi"}
+        
+        response = client.post("/api/submit-responses", json={"responses": [item, item]})
+        assert response.status_code == 413
+
+
+class TestMetricsEndpoint:
+    """Test /metrics"""
+    
+    def test_exposes_route_llm_and_store_metrics(self, client):
+        """Test requests are recorded by route template alongside LLM and session store metrics"""
+        session_id = client.post("/api/start-session", json={"waiter_name": "Ana"}).json()["session_id"]
+        client.post("/api/submit-response", json={
+            "session_id": session_id, "scenario_category": "customer_greeting", "response": "Welcome!"
+        })
+        client.get(f"/api/session-status/{session_id}")
+        client.get("/no-such-page")
+        
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+        assert ('waiter_http_request_duration_seconds_count'
+                '{method="GET",route="/api/session-status/{session_id}",status="200"} 1') in text
+        assert 'route="unmatched",status="404"' in text
+        assert 'waiter_llm_request_duration_seconds_count{backend="openai",outcome="ok"} 1' in text
+        assert 'waiter_session_store_operation_duration_seconds_count{store="memory",operation="create"} 1' in text
+        assert "waiter_active_sessions 1" in text
+        assert 'waiter_llm_tokens_total{kind="prompt"}' in text
+    
+    def test_streamed_feedback_is_counted(self, client):
+        """Test streamed LLM calls are timed and their token usage counted"""
+        session_id = client.post("/api/start-session", json={"waiter_name": "Ana"}).json()["session_id"]
+        with client.websocket_connect(f"/ws/{session_id}") as websocket:
+            websocket.send_json({"scenario_category": "customer_greeting", "response": "Welcome!"})
+            while websocket.receive_json()["type"] != "done":
+                pass
+        
+        text = client.get("/metrics").text
+        assert 'waiter_llm_request_duration_seconds_count{backend="openai",outcome="ok"} 1' in text
+        tokens = dict(re.findall(r'waiter_llm_tokens_total\{kind="(\w+)"\} (\S+)', text))
+        assert float(tokens["prompt"]) > 0
+        assert float(tokens["completion"]) > 0
+    
+    def test_websocket_gauge(self, client):
+        """Test open WebSocket connections are counted"""
+        with client.websocket_connect("/ws/session_missing"):
+            assert "waiter_websocket_connections 1" in client.get("/metrics").text
+        assert "waiter_websocket_connections 0" in client.get("/metrics").text
+    
+    def test_websocket_handshake_is_recorded(self, client):
+        """Test WebSocket connections are timed by route template like HTTP requests"""
+        with client.websocket_connect("/ws/session_missing"):
+            pass
+        
+        assert ('waiter_http_request_duration_seconds_count'
+                '{method="WEBSOCKET",route="/ws/{session_id}",status="101"} 1') in client.get("/metrics").text
+
+
+class TestRequestTracing:
+    """Test HTTP requests open the root span of their trace"""
+    
+    def test_route_span_continues_traceparent(self, client):
+        """Test the request span is named by route template and parents the agent spans"""
+        web_app.agent.tracer = Tracer(enabled=True, exporter=InMemorySpanExporter())
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        response = client.post(
+            "/api/start-session", json={"waiter_name": "Ana"},
+            headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"}
+        )
+        assert response.status_code == 200
+        
+        spans = {span.name: span for span in web_app.agent.tracer.exporter.spans}
+        request_span = spans["POST /api/start-session"]
+        assert request_span.trace_id == trace_id
+        assert request_span.attributes["status_code"] == 200
+        assert spans["agent.start_training_session"].parent_id == request_span.span_id
+    
+    def test_websocket_span_parents_streamed_feedback(self, client):
+        """Test a WebSocket connection opens one span that the feedback it streams nests under"""
+        session_id = client.post("/api/start-session", json={"waiter_name": "Ana"}).json()["session_id"]
+        web_app.agent.tracer = Tracer(enabled=True, exporter=InMemorySpanExporter())
+        with client.websocket_connect(f"/ws/{session_id}") as websocket:
+            websocket.send_json({"scenario_category": "customer_greeting", "response": "Welcome!"})
+            while websocket.receive_json()["type"] != "done":
+                pass
+        
+        spans = web_app.agent.tracer.exporter.spans
+        connection_span = next(span for span in spans if span.name == "WEBSOCKET /ws/{session_id}")
+        assert connection_span.attributes["status_code"] == 101
+        assert any(span.parent_id == connection_span.span_id for span in spans)
+
+
+class TestProfilingEndpoints:
+    """Test the opt-in /admin profiling endpoints"""
+    
+    def test_hidden_unless_enabled(self, client):
+        """Test the admin endpoints do not exist while profiling is off"""
+        assert client.get("/admin/cpu-profile").status_code == 404
+        assert client.post("/admin/profile?seconds=0.1").status_code == 404
+    
+    def test_refused_without_a_configured_token(self, client, tmp_path):
+        """Test enabling profiling without an admin token does not open the endpoints"""
+        web_app.agent.profiler = Profiler(enabled=True, output_dir=str(tmp_path))
+        
+        assert client.get("/admin/cpu-profile").status_code == 403
+        assert client.get("/admin/cpu-profile", headers={"X-Admin-Token": ""}).status_code == 403
+    
+    def test_cpu_profile_and_stack_sample(self, client, tmp_path):
+        """Test CPU time is reported per route and agent method and stacks come back collapsed"""
+        web_app.agent.profiler = Profiler(enabled=True, output_dir=str(tmp_path))
+        web_app.agent.config["profiling"] = {"admin_token": "secret"}
+        client.post("/api/start-session", json={"waiter_name": "Ana"})
+        
+        assert client.get("/admin/cpu-profile").status_code == 403
+        timings = client.get("/admin/cpu-profile", headers={"X-Admin-Token": "secret"}).json()["timings"]
+        assert timings["POST /api/start-session"]["calls"] == 1
+        assert timings["agent.start_training_session"]["calls"] == 1
+        
+        response = client.post("/admin/profile?seconds=0.1&interval_ms=5", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        assert Path(response.headers["X-Profile-Path"]).read_text() == response.text
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
@@ -4,21 +4,35 @@ FastAPI web application for the Waiter Training Agent
 """
 
 import asyncio
+import hmac
+import json
+import signal
 import sys
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 
 from src.agent import WaiterTrainingAgent
-from src.utils.helpers import ensure_directories, validate_config
+from src.agent.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from src.agent.profiling import ProfilerBusyError, collapsed
+from src.utils.helpers import ensure_directories, load_config, validate_config
+from src.utils.static_assets import ENTRY_POINT, PrecompressedStaticFiles, load_assets
+
+
+# Frontend sources and their build output (python -m src.utils.static_assets)
+FRONTEND_DIR = Path(__file__).parent / "frontend"
+STATIC_DIR = Path(__file__).parent / "static"
+
+# Comment lines sent on idle event streams so proxies keep them open
+EVENT_KEEPALIVE_SECONDS = 15.0
 
 
 # Pydantic models for API
@@ -31,6 +45,17 @@ class WaiterResponse(BaseModel):
     session_id: str
     scenario_category: str
     response: str
+    bypass_cache: bool = False
+
+
+class WaiterResponseBatch(BaseModel):
+    responses: List[WaiterResponse]
+
+
+class StreamedResponse(BaseModel):
+    scenario_category: str
+    response: str
+    bypass_cache: bool = False
 
 
 class WebSocketManager:
@@ -50,20 +75,169 @@ class WebSocketManager:
             await self.active_connections[session_id].send_json(message)
 
 
+async def run_until_disconnect(http_request: Request, coro, poll_interval: float = 0.5):
+    """Await a coroutine, cancelling it if the HTTP client disconnects first"""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+# Scope types the request middlewares record; other scopes (lifespan) pass through
+REQUEST_SCOPES = ("http", "websocket")
+
+
+def request_method(scope) -> str:
+    """The request's HTTP method, or WEBSOCKET for a WebSocket connection"""
+    return scope.get("method", "WEBSOCKET")
+
+
+def response_status(message) -> Optional[int]:
+    """The status a response message starts with, or None for any other message"""
+    if message["type"] in ("http.response.start", "websocket.http.response.start"):
+        return message["status"]
+    if message["type"] == "websocket.accept":
+        return 101
+    if message["type"] == "websocket.close":
+        # Closing before accepting is refused by the server with a 403
+        return 403
+    return None
+
+
+class RequestMetricsMiddleware:
+    """
+    Records HTTP latency by route template in the agent's metrics
+
+    Latency is measured to the start of the response, so event streams
+    count their time to headers rather than how long they stay open, and
+    WebSocket connections their time to the handshake. Paths that match
+    no route share the ``unmatched`` label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in REQUEST_SCOPES or agent is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        recorded = False
+
+        def record(status: int) -> None:
+            nonlocal recorded
+            recorded = True
+            route = getattr(scope.get("route"), "path", "unmatched")
+            agent.metrics.http_request_seconds.labels(request_method(scope), route, status).observe(
+                time.perf_counter() - started
+            )
+
+        async def send_with_metrics(message):
+            if not recorded:
+                status = response_status(message)
+                if status is not None:
+                    record(status)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        except Exception:
+            if not recorded:
+                record(500)
+            raise
+
+
+class RequestTracingMiddleware:
+    """
+    Opens a root span for each HTTP request, named by its route template
+
+    A W3C ``traceparent`` header from the caller continues its trace and
+    sampling decision. Agent and LLM spans for the request nest under this
+    one. A WebSocket connection gets one span for as long as it is open,
+    covering every response streamed over it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in REQUEST_SCOPES or agent is None or not agent.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        method = request_method(scope)
+        traceparent = dict(scope["headers"]).get(b"traceparent", b"").decode("latin-1")
+        with agent.tracer.start_span(f"{method} {scope['path']}", traceparent=traceparent,
+                                     method=method, path=scope["path"]) as span:
+            started = False
+
+            async def send_with_status(message):
+                nonlocal started
+                status = response_status(message)
+                if status is not None and not started:
+                    started = True
+                    span.set_attribute("status_code", status)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None and span.recording:
+                    span.name = f"{method} {route}"
+                    span.set_attribute("route", route)
+
+
+class RequestProfilingMiddleware:
+    """Records the CPU time each HTTP request uses, by route template, when CPU attribution is on"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in REQUEST_SCOPES or agent is None or not agent.profiler.cpu_attribution:
+            await self.app(scope, receive, send)
+            return
+
+        def route() -> str:
+            return f"{request_method(scope)} {getattr(scope.get('route'), 'path', 'unmatched')}"
+
+        await agent.profiler.cpu_timed(route, self.app(scope, receive, send))
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Waiter Training Agent",
     description="AI-powered chatbot for training restaurant waiters",
     version="1.0.0"
 )
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(RequestTracingMiddleware)
+app.add_middleware(RequestProfilingMiddleware)
 
 # Initialize components
 manager = WebSocketManager()
 agent: Optional[WaiterTrainingAgent] = None
+# Profiles started by a signal, kept referenced until they finish
+profile_tasks = set()
 
 # Ensure directories exist
 ensure_directories({})
 
+# Serve the built frontend, or the sources as they are when it has not been built
+assets_dir, asset_manifest = load_assets(FRONTEND_DIR, STATIC_DIR)
+static_files = PrecompressedStaticFiles(directory=str(assets_dir), immutable=asset_manifest["files"].values())
+app.mount("/static", static_files, name="static")
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -71,484 +245,54 @@ async def startup_event():
     global agent
     try:
         agent = WaiterTrainingAgent()
+        await agent.start()
         if not validate_config(agent.config):
             print("Warning: Configuration validation failed")
+        if agent.config.get("web", {}).get("workers", 1) > 1 and not agent.active_sessions.shared:
+            print("Warning: multiple workers need a shared session store (database.type redis, or sqlite with shared: true)")
+        install_profile_signal(agent.config.get("profiling", {}))
         print("✅ Waiter Training Agent initialized successfully")
     except Exception as e:
         print(f"❌ Error initializing agent: {e}")
 
 
-@app.get("/", response_class=HTMLResponse)
-async def get_homepage():
+def install_profile_signal(profiling_config: Dict[str, Any]) -> None:
+    """Take a stack profile into profiling.output_dir whenever the configured signal arrives"""
+    signal_name = profiling_config.get("signal", "SIGUSR1")
+    if not agent.profiler.enabled or not signal_name or not hasattr(signal, signal_name):
+        return
+    seconds = profiling_config.get("signal_seconds", 10)
+    
+    async def profile_to_file():
+        try:
+            stacks = await asyncio.to_thread(agent.profiler.sample, seconds)
+        except ProfilerBusyError:
+            print(f"{signal_name} ignored: a profile is already being taken")
+            return
+        print(f"Profile written to {agent.profiler.write(stacks)}")
+    
+    def on_signal():
+        task = asyncio.create_task(profile_to_file())
+        profile_tasks.add(task)
+        task.add_done_callback(profile_tasks.discard)
+    
+    try:
+        asyncio.get_running_loop().add_signal_handler(getattr(signal, signal_name), on_signal)
+    except (NotImplementedError, RuntimeError, ValueError) as e:
+        print(f"Warning: cannot profile on {signal_name}: {e}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the agent's long-lived resources"""
+    if agent:
+        await agent.aclose()
+
+
+@app.get("/")
+async def get_homepage(request: Request):
     """Serve the main training interface"""
-    return """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Waiter Training Agent</title>
-        <style>
-            * {
-                margin: 0;
-                padding: 0;
-                box-sizing: border-box;
-            }
-            
-            body {
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-                color: #333;
-            }
-            
-            .container {
-                max-width: 1200px;
-                margin: 0 auto;
-                padding: 20px;
-            }
-            
-            .header {
-                text-align: center;
-                margin-bottom: 40px;
-                color: white;
-            }
-            
-            .header h1 {
-                font-size: 3rem;
-                margin-bottom: 10px;
-                text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-            }
-            
-            .header p {
-                font-size: 1.2rem;
-                opacity: 0.9;
-            }
-            
-            .training-interface {
-                background: white;
-                border-radius: 20px;
-                padding: 30px;
-                box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-                margin-bottom: 30px;
-            }
-            
-            .session-form {
-                display: grid;
-                grid-template-columns: 1fr 1fr auto;
-                gap: 20px;
-                align-items: end;
-                margin-bottom: 30px;
-            }
-            
-            .form-group {
-                display: flex;
-                flex-direction: column;
-            }
-            
-            .form-group label {
-                margin-bottom: 8px;
-                font-weight: 600;
-                color: #555;
-            }
-            
-            .form-group input, .form-group select {
-                padding: 12px;
-                border: 2px solid #e1e5e9;
-                border-radius: 10px;
-                font-size: 16px;
-                transition: border-color 0.3s;
-            }
-            
-            .form-group input:focus, .form-group select:focus {
-                outline: none;
-                border-color: #667eea;
-            }
-            
-            .btn {
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                border: none;
-                padding: 12px 30px;
-                border-radius: 10px;
-                font-size: 16px;
-                font-weight: 600;
-                cursor: pointer;
-                transition: transform 0.2s;
-            }
-            
-            .btn:hover {
-                transform: translateY(-2px);
-            }
-            
-            .btn:disabled {
-                opacity: 0.6;
-                cursor: not-allowed;
-                transform: none;
-            }
-            
-            .training-area {
-                display: none;
-                margin-top: 30px;
-            }
-            
-            .scenario-display {
-                background: #f8f9fa;
-                border-radius: 15px;
-                padding: 25px;
-                margin-bottom: 25px;
-                border-left: 5px solid #667eea;
-            }
-            
-            .scenario-category {
-                color: #667eea;
-                font-weight: 600;
-                margin-bottom: 10px;
-                text-transform: uppercase;
-                letter-spacing: 1px;
-            }
-            
-            .scenario-prompt {
-                font-size: 16px;
-                line-height: 1.6;
-                color: #333;
-            }
-            
-            .response-form {
-                display: grid;
-                gap: 20px;
-            }
-            
-            .response-textarea {
-                width: 100%;
-                min-height: 120px;
-                padding: 15px;
-                border: 2px solid #e1e5e9;
-                border-radius: 10px;
-                font-size: 16px;
-                font-family: inherit;
-                resize: vertical;
-            }
-            
-            .response-textarea:focus {
-                outline: none;
-                border-color: #667eea;
-            }
-            
-            .feedback-display {
-                background: #e8f5e8;
-                border-radius: 15px;
-                padding: 20px;
-                margin-top: 20px;
-                border-left: 5px solid #28a745;
-                display: none;
-            }
-            
-            .score-display {
-                background: #fff3cd;
-                border-radius: 15px;
-                padding: 20px;
-                margin-top: 20px;
-                border-left: 5px solid #ffc107;
-                text-align: center;
-            }
-            
-            .stats {
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                gap: 20px;
-                margin-top: 20px;
-            }
-            
-            .stat-card {
-                background: white;
-                padding: 20px;
-                border-radius: 15px;
-                text-align: center;
-                box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-            }
-            
-            .stat-value {
-                font-size: 2rem;
-                font-weight: bold;
-                color: #667eea;
-                margin-bottom: 5px;
-            }
-            
-            .stat-label {
-                color: #666;
-                font-size: 0.9rem;
-            }
-            
-            .hidden {
-                display: none;
-            }
-            
-            @media (max-width: 768px) {
-                .session-form {
-                    grid-template-columns: 1fr;
-                }
-                
-                .header h1 {
-                    font-size: 2rem;
-                }
-                
-                .container {
-                    padding: 10px;
-                }
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>🍽️ Waiter Training Agent</h1>
-                <p>AI-powered training for restaurant service excellence</p>
-            </div>
-            
-            <div class="training-interface">
-                <div class="session-form">
-                    <div class="form-group">
-                        <label for="waiterName">Waiter Name</label>
-                        <input type="text" id="waiterName" placeholder="Enter waiter name" required>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="difficultyLevel">Difficulty Level</label>
-                        <select id="difficultyLevel">
-                            <option value="beginner">Beginner</option>
-                            <option value="intermediate">Intermediate</option>
-                            <option value="advanced">Advanced</option>
-                        </select>
-                    </div>
-                    
-                    <button class="btn" onclick="startTraining()">Start Training</button>
-                </div>
-                
-                <div id="trainingArea" class="training-area">
-                    <div class="stats">
-                        <div class="stat-card">
-                            <div class="stat-value" id="currentScore">0</div>
-                            <div class="stat-label">Current Score</div>
-                        </div>
-                        <div class="stat-card">
-                            <div class="stat-value" id="scenariosCompleted">0</div>
-                            <div class="stat-label">Scenarios Completed</div>
-                        </div>
-                        <div class="stat-card">
-                            <div class="stat-value" id="sessionDuration">0</div>
-                            <div class="stat-label">Duration (min)</div>
-                        </div>
-                    </div>
-                    
-                    <div id="scenarioDisplay" class="scenario-display hidden">
-                        <div class="scenario-category" id="scenarioCategory"></div>
-                        <div class="scenario-prompt" id="scenarioPrompt"></div>
-                    </div>
-                    
-                    <div id="responseForm" class="response-form hidden">
-                        <label for="waiterResponse">Your Response:</label>
-                        <textarea 
-                            id="waiterResponse" 
-                            class="response-textarea" 
-                            placeholder="Describe how you would handle this situation..."
-                        ></textarea>
-                        <button class="btn" onclick="submitResponse()">Submit Response</button>
-                    </div>
-                    
-                    <div id="feedbackDisplay" class="feedback-display">
-                        <h4>Feedback:</h4>
-                        <div id="feedbackText"></div>
-                    </div>
-                    
-                    <div id="scoreDisplay" class="score-display hidden">
-                        <h4>Updated Score</h4>
-                        <div id="newScore"></div>
-                        <div id="nextScenario"></div>
-                    </div>
-                    
-                    <div style="text-align: center; margin-top: 30px;">
-                        <button class="btn" onclick="endSession()" style="background: #dc3545;">End Training Session</button>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <script>
-            let currentSessionId = null;
-            let sessionStartTime = null;
-            
-            async function startTraining() {
-                const waiterName = document.getElementById('waiterName').value.trim();
-                const difficultyLevel = document.getElementById('difficultyLevel').value;
-                
-                if (!waiterName) {
-                    alert('Please enter a waiter name');
-                    return;
-                }
-                
-                try {
-                    const response = await fetch('/api/start-session', {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json',
-                        },
-                        body: JSON.stringify({
-                            waiter_name: waiterName,
-                            difficulty_level: difficultyLevel
-                        })
-                    });
-                    
-                    if (response.ok) {
-                        const data = await response.json();
-                        currentSessionId = data.session_id;
-                        sessionStartTime = Date.now();
-                        
-                        document.getElementById('trainingArea').style.display = 'block';
-                        document.getElementById('sessionForm').style.display = 'none';
-                        
-                        // Get first scenario
-                        await getNextScenario();
-                        updateStats();
-                        
-                        // Start timer
-                        setInterval(updateStats, 30000); // Update every 30 seconds
-                    } else {
-                        alert('Failed to start training session');
-                    }
-                } catch (error) {
-                    console.error('Error:', error);
-                    alert('Error starting training session');
-                }
-            }
-            
-            async function getNextScenario() {
-                if (!currentSessionId) return;
-                
-                try {
-                    const response = await fetch(`/api/get-scenario/${currentSessionId}`);
-                    if (response.ok) {
-                        const data = await response.json();
-                        
-                        document.getElementById('scenarioCategory').textContent = 
-                            data.category.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
-                        document.getElementById('scenarioPrompt').textContent = data.prompt;
-                        document.getElementById('scenarioDisplay').classList.remove('hidden');
-                        document.getElementById('responseForm').classList.remove('hidden');
-                        document.getElementById('feedbackDisplay').style.display = 'none';
-                        document.getElementById('scoreDisplay').classList.add('hidden');
-                    }
-                } catch (error) {
-                    console.error('Error getting scenario:', error);
-                }
-            }
-            
-            async function submitResponse() {
-                if (!currentSessionId) return;
-                
-                const response = document.getElementById('waiterResponse').value.trim();
-                if (!response) {
-                    alert('Please enter a response');
-                    return;
-                }
-                
-                try {
-                    const apiResponse = await fetch('/api/submit-response', {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json',
-                        },
-                        body: JSON.stringify({
-                            session_id: currentSessionId,
-                            scenario_category: document.getElementById('scenarioCategory').textContent.toLowerCase().replace(/\s+/g, '_'),
-                            response: response
-                        })
-                    });
-                    
-                    if (apiResponse.ok) {
-                        const data = await apiResponse.json();
-                        
-                        // Show feedback
-                        document.getElementById('feedbackText').textContent = data.feedback;
-                        document.getElementById('feedbackDisplay').style.display = 'block';
-                        
-                        // Show score update
-                        document.getElementById('newScore').textContent = `Score: ${data.score}`;
-                        document.getElementById('nextScenario').textContent = `Next: ${data.next_scenario}`;
-                        document.getElementById('scoreDisplay').classList.remove('hidden');
-                        
-                        // Update stats
-                        updateStats();
-                        
-                        // Clear response
-                        document.getElementById('waiterResponse').value = '';
-                        
-                        // Hide response form temporarily
-                        document.getElementById('responseForm').classList.add('hidden');
-                        
-                        // Show next scenario after a delay
-                        setTimeout(() => {
-                            getNextScenario();
-                        }, 3000);
-                    }
-                } catch (error) {
-                    console.error('Error submitting response:', error);
-                    alert('Error submitting response');
-                }
-            }
-            
-            async function endSession() {
-                if (!currentSessionId) return;
-                
-                try {
-                    const response = await fetch(`/api/end-session/${currentSessionId}`);
-                    if (response.ok) {
-                        const data = await response.json();
-                        alert(`Training session ended!\\nFinal Score: ${data.final_score}\\nScenarios Completed: ${data.scenarios_completed.length}\\nDuration: ${data.duration_minutes} minutes`);
-                        
-                        // Reset interface
-                        resetInterface();
-                    }
-                } catch (error) {
-                    console.error('Error ending session:', error);
-                }
-            }
-            
-            function updateStats() {
-                if (!currentSessionId || !sessionStartTime) return;
-                
-                const duration = Math.round((Date.now() - sessionStartTime) / 60000);
-                document.getElementById('sessionDuration').textContent = duration;
-                
-                // Update other stats from session status
-                fetch(`/api/session-status/${currentSessionId}`)
-                    .then(response => response.json())
-                    .then(data => {
-                        document.getElementById('currentScore').textContent = Math.round(data.current_score);
-                        document.getElementById('scenariosCompleted').textContent = data.scenarios_completed.length;
-                    })
-                    .catch(error => console.error('Error updating stats:', error));
-            }
-            
-            function resetInterface() {
-                currentSessionId = null;
-                sessionStartTime = null;
-                
-                document.getElementById('trainingArea').style.display = 'none';
-                document.getElementById('sessionForm').style.display = 'grid';
-                document.getElementById('waiterName').value = '';
-                document.getElementById('difficultyLevel').value = 'beginner';
-                
-                // Hide all training elements
-                document.getElementById('scenarioDisplay').classList.add('hidden');
-                document.getElementById('responseForm').classList.add('hidden');
-                document.getElementById('feedbackDisplay').style.display = 'none';
-                document.getElementById('scoreDisplay').classList.add('hidden');
-            }
-        </script>
-    </body>
-    </html>
-    """
+    return await static_files.get_response(ENTRY_POINT, request.scope)
 
 
 # API endpoints
@@ -584,37 +328,142 @@ async def get_scenario(session_id: str, category: str = None):
 
 
 @app.post("/api/submit-response")
-async def submit_response(request: WaiterResponse):
+async def submit_response(request: WaiterResponse, http_request: Request):
     """Submit a waiter's response to a scenario"""
     if not agent:
         raise HTTPException(status_code=500, detail="Agent not initialized")
     
     try:
-        result = await agent.process_waiter_response(
-            request.session_id,
-            request.scenario_category,
-            request.response
+        result = await run_until_disconnect(
+            http_request,
+            agent.process_waiter_response(
+                request.session_id,
+                request.scenario_category,
+                request.response,
+                bypass_cache=request.bypass_cache
+            )
         )
         return result
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/submit-responses")
+async def submit_responses(request: WaiterResponseBatch, http_request: Request):
+    """Submit a batch of responses, e.g. a whole class, with per-item results"""
+    if not agent:
+        raise HTTPException(status_code=500, detail="Agent not initialized")
+    
+    if len(request.responses) > agent.batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(request.responses)} responses exceeds the limit of {agent.batch_max_items}"
+        )
+    
+    try:
+        results = await run_until_disconnect(
+            http_request,
+            agent.process_waiter_responses([item.model_dump() for item in request.responses])
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    failed = sum(result["status"] == "error" for result in results)
+    return {"results": results, "succeeded": len(results) - failed, "failed": failed}
+
+
+@app.websocket("/ws/{session_id}")
+async def feedback_stream(websocket: WebSocket, session_id: str):
+    """Stream feedback tokens, score and next scenario for each response sent on the socket"""
+    await manager.connect(websocket, session_id)
+    gauge = agent.metrics.websocket_connections if agent else None
+    if gauge is not None:
+        gauge.inc()
+    try:
+        if not agent:
+            await manager.send_message(session_id, {"type": "error", "message": "Agent not initialized"})
+            return
+        
+        while True:
+            try:
+                request = StreamedResponse(**await websocket.receive_json())
+            except ValueError as e:
+                await manager.send_message(session_id, {"type": "error", "message": str(e)})
+                continue
+            
+            events = agent.stream_waiter_response(
+                session_id,
+                request.scenario_category,
+                request.response,
+                bypass_cache=request.bypass_cache
+            )
+            try:
+                async for event in events:
+                    await manager.send_message(session_id, event)
+            except ValueError as e:
+                await manager.send_message(session_id, {"type": "error", "message": str(e)})
+            finally:
+                # Stops the LLM stream if the trainee disconnected mid-feedback
+                await events.aclose()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.disconnect(session_id)
+        if gauge is not None:
+            gauge.dec()
+
+
 @app.get("/api/session-status/{session_id}")
 async def get_session_status(session_id: str):
     """Get current status of a training session"""
     if not agent:
         raise HTTPException(status_code=500, detail="Agent not initialized")
     
-    status = agent.get_session_status(session_id)
+    status = await agent.get_session_status(session_id)
     if not status:
         raise HTTPException(status_code=404, detail="Session not found")
     
     return status
 
 
+@app.get("/api/session-events/{session_id}")
+async def session_events(session_id: str):
+    """Stream status changes for a session as Server-Sent Events"""
+    if not agent:
+        raise HTTPException(status_code=500, detail="Agent not initialized")
+    
+    if not await agent.get_session_status(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    async def event_stream():
+        with agent.session_events.subscribe(session_id) as events:
+            # Read the first snapshot only once subscribed, so no change falls in between
+            status = await agent.get_session_status(session_id)
+            event = {"type": "stats", **status} if status else {"type": "ended", "session_id": session_id}
+            while True:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                if event["type"] == "ended":
+                    return
+                event = None
+                while event is None:
+                    try:
+                        event = await asyncio.wait_for(events.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield ": keepalive\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/api/end-session/{session_id}")
 async def end_session(session_id: str):
     """End a training session"""
@@ -630,6 +479,15 @@ async def end_session(session_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/session-history")
+async def get_session_history(waiter_name: str = None, limit: int = 100):
+    """Get summaries of ended training sessions"""
+    if not agent:
+        raise HTTPException(status_code=500, detail="Agent not initialized")
+    
+    return {"sessions": await agent.get_session_history(waiter_name, limit)}
+
+
 @app.get("/api/categories")
 async def get_categories():
     """Get available training categories"""
@@ -648,10 +506,87 @@ async def get_difficulty_levels():
     return {"difficulty_levels": agent.get_difficulty_levels()}
 
 
+@app.get("/api/session-metrics")
+async def get_session_metrics():
+    """Get live session count, retained memory and eviction totals"""
+    if not agent:
+        raise HTTPException(status_code=500, detail="Agent not initialized")
+    
+    return await agent.get_session_metrics()
+
+
+@app.get("/api/feedback-cache-stats")
+async def get_feedback_cache_stats():
+    """Get feedback cache hit rates"""
+    if not agent:
+        raise HTTPException(status_code=500, detail="Agent not initialized")
+    
+    return agent.get_feedback_cache_stats()
+
+
+@app.get("/api/llm-stats")
+async def get_llm_stats():
+    """Get LLM connection pool statistics"""
+    if not agent:
+        raise HTTPException(status_code=500, detail="Agent not initialized")
+    
+    return agent.get_llm_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request, LLM and session store metrics in the Prometheus text format"""
+    if not agent:
+        raise HTTPException(status_code=500, detail="Agent not initialized")
+    
+    return PlainTextResponse(await agent.render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+def require_profiler(admin_token: Optional[str]) -> None:
+    """Hide the admin endpoints unless profiling is on, and require profiling.admin_token"""
+    if not agent or not agent.profiler.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    expected = agent.config.get("profiling", {}).get("admin_token")
+    if not expected:
+        # Never open to anyone who can reach the port
+        raise HTTPException(status_code=403, detail="Set profiling.admin_token to use the admin endpoints")
+    if not hmac.compare_digest(admin_token or "", expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/admin/profile", response_class=PlainTextResponse)
+async def take_profile(seconds: float = Query(10.0, gt=0, le=120), interval_ms: float = Query(None, gt=0),
+                       x_admin_token: Optional[str] = Header(None)):
+    """Sample every thread for ``seconds`` and return the collapsed stacks, for flamegraph tools"""
+    require_profiler(x_admin_token)
+    
+    interval = interval_ms / 1000 if interval_ms else None
+    try:
+        stacks = await asyncio.to_thread(agent.profiler.sample, seconds, interval)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    path = agent.profiler.write(stacks)
+    return PlainTextResponse(collapsed(stacks), headers={"X-Profile-Path": str(path)})
+
+
+@app.get("/admin/cpu-profile")
+async def get_cpu_profile(reset: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """Get CPU and wall time per agent method and route since the last reset"""
+    require_profiler(x_admin_token)
+    
+    stats = {"cpu_attribution": agent.profiler.cpu_attribution, "timings": agent.profiler.cpu_stats()}
+    if reset:
+        agent.profiler.reset_cpu_stats()
+    return stats
+
+
 if __name__ == "__main__":
+    web_config = load_config("config/config.yaml").get("web", {})
+    workers = web_config.get("workers", 1)
     uvicorn.run(
         "web_app:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
+        host=web_config.get("host", "0.0.0.0"),
+        port=web_config.get("port", 8000),
+        reload=workers == 1,
+        workers=workers
     ) 
\ No newline at end of file